@@ -0,0 +1,63 @@
+"""add key rotation job table
+
+Revision ID: a7c3e9d1f5b8
+Revises: e4b8a2f6c1d3
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a7c3e9d1f5b8"
+down_revision: str | Sequence[str] | None = "e4b8a2f6c1d3"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Create keyrotationjob table."""
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    tables = inspector.get_table_names()
+
+    if "keyrotationjob" not in tables:
+        op.create_table(
+            "keyrotationjob",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("old_key_id", sa.String(), nullable=False),
+            sa.Column("new_key_id", sa.String(), nullable=False),
+            sa.Column("status", sa.String(), nullable=False),
+            sa.Column("total_tokens", sa.Integer(), nullable=False),
+            sa.Column("re_encrypted_count", sa.Integer(), nullable=False),
+            sa.Column("skipped_count", sa.Integer(), nullable=False),
+            sa.Column("last_token_id", sa.Integer(), nullable=False),
+            sa.Column("error", sa.String(), nullable=True),
+            sa.Column("started_at", sa.DateTime(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+            sa.Column("completed_at", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index(
+            op.f("ix_keyrotationjob_new_key_id"),
+            "keyrotationjob",
+            ["new_key_id"],
+            unique=False,
+        )
+        op.create_index(
+            op.f("ix_keyrotationjob_status"),
+            "keyrotationjob",
+            ["status"],
+            unique=False,
+        )
+
+
+def downgrade() -> None:
+    """Drop keyrotationjob table."""
+    op.drop_index(op.f("ix_keyrotationjob_status"), table_name="keyrotationjob")
+    op.drop_index(op.f("ix_keyrotationjob_new_key_id"), table_name="keyrotationjob")
+    op.drop_table("keyrotationjob")
@@ -0,0 +1,32 @@
+"""add telemetry hedge
+
+Revision ID: a7d3e9b2c5f1
+Revises: f6a2c8e1d4b9
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a7d3e9b2c5f1"
+down_revision: str | Sequence[str] | None = "f6a2c8e1d4b9"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Mark the calls of hedged requests."""
+    op.add_column(
+        "telemetry",
+        sa.Column("hedge", sa.String(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Drop telemetry.hedge."""
+    op.drop_column("telemetry", "hedge")
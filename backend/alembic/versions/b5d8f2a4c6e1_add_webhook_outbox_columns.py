@@ -0,0 +1,60 @@
+"""add webhook outbox columns
+
+Revision ID: b5d8f2a4c6e1
+Revises: a7c3e9d1f5b8
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b5d8f2a4c6e1"
+down_revision: str | Sequence[str] | None = "a7c3e9d1f5b8"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Add retry/claim columns to webhookdelivery.
+
+    Existing rows keep next_attempt_at NULL, so deliveries that failed
+    before the outbox existed are not retried.
+    """
+    op.add_column(
+        "webhookdelivery",
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.add_column(
+        "webhookdelivery",
+        sa.Column("next_attempt_at", sa.DateTime(), nullable=True),
+    )
+    op.add_column(
+        "webhookdelivery",
+        sa.Column("claimed_until", sa.DateTime(), nullable=True),
+    )
+    op.add_column(
+        "webhookdelivery",
+        sa.Column("last_error", sa.String(), nullable=True),
+    )
+    op.create_index(
+        "ix_webhookdelivery_status_next_attempt_at",
+        "webhookdelivery",
+        ["status", "next_attempt_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Drop webhook outbox columns."""
+    op.drop_index(
+        "ix_webhookdelivery_status_next_attempt_at", table_name="webhookdelivery"
+    )
+    op.drop_column("webhookdelivery", "last_error")
+    op.drop_column("webhookdelivery", "claimed_until")
+    op.drop_column("webhookdelivery", "next_attempt_at")
+    op.drop_column("webhookdelivery", "attempts")
@@ -0,0 +1,75 @@
+"""add telemetry rollup tables
+
+Revision ID: b7d4e2a9c1f3
+Revises: 8d2f7c6a9b1e
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b7d4e2a9c1f3"
+down_revision: str | Sequence[str] | None = "8d2f7c6a9b1e"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+ROLLUP_TABLES = ("telemetryhourlyrollup", "telemetrydailyrollup")
+
+
+def upgrade() -> None:
+    """Create hourly/daily telemetry rollups and the rollup watermark."""
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    tables = set(inspector.get_table_names())
+
+    for table in ROLLUP_TABLES:
+        if table in tables:
+            continue
+        op.create_table(
+            table,
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("bucket_start", sa.DateTime(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("provider", sa.String(), nullable=False),
+            sa.Column("model", sa.String(), nullable=False),
+            sa.Column("request_count", sa.Integer(), nullable=False),
+            sa.Column("error_count", sa.Integer(), nullable=False),
+            sa.Column("input_tokens", sa.Integer(), nullable=False),
+            sa.Column("output_tokens", sa.Integer(), nullable=False),
+            sa.Column("cost", sa.Float(), nullable=False),
+            sa.Column("latency_ms_sum", sa.Float(), nullable=False),
+            sa.ForeignKeyConstraint(["user_id"], ["user.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint(
+                "user_id",
+                "bucket_start",
+                "provider",
+                "model",
+                name=f"uq_{table}_bucket",
+            ),
+        )
+        op.create_index(
+            op.f(f"ix_{table}_bucket_start"), table, ["bucket_start"], unique=False
+        )
+
+    if "telemetryrollupstate" not in tables:
+        op.create_table(
+            "telemetryrollupstate",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("rolled_until", sa.DateTime(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+        )
+
+
+def downgrade() -> None:
+    """Drop telemetry rollup tables."""
+    op.drop_table("telemetryrollupstate")
+    for table in ROLLUP_TABLES:
+        op.drop_index(op.f(f"ix_{table}_bucket_start"), table_name=table)
+        op.drop_table(table)
@@ -0,0 +1,56 @@
+"""add request queue table
+
+Revision ID: c8f3a6d2e4b7
+Revises: b5d8f2a4c6e1
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c8f3a6d2e4b7"
+down_revision: str | Sequence[str] | None = "b5d8f2a4c6e1"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Create requestqueue table (DatabaseQueueBackend, inference jobs)."""
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    tables = inspector.get_table_names()
+
+    if "requestqueue" not in tables:
+        op.create_table(
+            "requestqueue",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("queue", sa.String(), nullable=False),
+            sa.Column("request_data", sa.JSON(), nullable=True),
+            sa.Column("priority", sa.Integer(), nullable=False),
+            sa.Column("status", sa.String(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("started_at", sa.DateTime(), nullable=True),
+            sa.Column("processed_at", sa.DateTime(), nullable=True),
+            sa.Column("attempts", sa.Integer(), nullable=False),
+            sa.Column("claimed_until", sa.DateTime(), nullable=True),
+            sa.Column("result", sa.JSON(), nullable=True),
+            sa.Column("error", sa.String(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index(
+            "ix_requestqueue_queue_status_priority",
+            "requestqueue",
+            ["queue", "status", "priority"],
+            unique=False,
+        )
+
+
+def downgrade() -> None:
+    """Drop requestqueue table."""
+    op.drop_index("ix_requestqueue_queue_status_priority", table_name="requestqueue")
+    op.drop_table("requestqueue")
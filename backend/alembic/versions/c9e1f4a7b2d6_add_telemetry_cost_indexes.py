@@ -0,0 +1,58 @@
+"""add telemetry cost indexes
+
+Revision ID: c9e1f4a7b2d6
+Revises: b7d4e2a9c1f3
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c9e1f4a7b2d6"
+down_revision: str | Sequence[str] | None = "b7d4e2a9c1f3"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+COST_COLUMNS = [
+    "sdk",
+    "model",
+    "cost",
+    "input_tokens",
+    "output_tokens",
+    "execution_time_ms",
+]
+
+
+def upgrade() -> None:
+    """Add composite (user_id, timestamp) and covering timestamp indexes."""
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    indexes = {index["name"] for index in inspector.get_indexes("telemetry")}
+
+    if "ix_telemetry_user_id_timestamp" not in indexes:
+        op.create_index(
+            "ix_telemetry_user_id_timestamp",
+            "telemetry",
+            ["user_id", "timestamp"],
+            unique=False,
+            postgresql_include=COST_COLUMNS,
+        )
+    if "ix_telemetry_timestamp" not in indexes:
+        op.create_index(
+            "ix_telemetry_timestamp",
+            "telemetry",
+            ["timestamp"],
+            unique=False,
+            postgresql_include=["user_id", "status", *COST_COLUMNS],
+        )
+
+
+def downgrade() -> None:
+    """Drop telemetry cost indexes."""
+    op.drop_index("ix_telemetry_timestamp", table_name="telemetry")
+    op.drop_index("ix_telemetry_user_id_timestamp", table_name="telemetry")
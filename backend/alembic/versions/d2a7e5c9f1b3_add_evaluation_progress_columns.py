@@ -0,0 +1,59 @@
+"""add evaluation progress columns
+
+Revision ID: d2a7e5c9f1b3
+Revises: c8f3a6d2e4b7
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d2a7e5c9f1b3"
+down_revision: str | Sequence[str] | None = "c8f3a6d2e4b7"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Add run progress to evaluation and the dataset row to its results."""
+    op.add_column(
+        "evaluation",
+        sa.Column("total_items", sa.Integer(), nullable=True),
+    )
+    op.add_column(
+        "evaluation",
+        sa.Column(
+            "completed_items", sa.Integer(), nullable=False, server_default="0"
+        ),
+    )
+    op.add_column(
+        "evaluation",
+        sa.Column("error", sa.String(), nullable=True),
+    )
+    op.add_column(
+        "evaluationresult",
+        sa.Column("item_index", sa.Integer(), nullable=True),
+    )
+    op.create_index(
+        "ix_evaluationresult_evaluation_id_item_index",
+        "evaluationresult",
+        ["evaluation_id", "item_index"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Drop evaluation progress columns."""
+    op.drop_index(
+        "ix_evaluationresult_evaluation_id_item_index",
+        table_name="evaluationresult",
+    )
+    op.drop_column("evaluationresult", "item_index")
+    op.drop_column("evaluation", "error")
+    op.drop_column("evaluation", "completed_items")
+    op.drop_column("evaluation", "total_items")
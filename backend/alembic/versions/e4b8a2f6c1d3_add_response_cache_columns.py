@@ -0,0 +1,42 @@
+"""add response cache columns
+
+Revision ID: e4b8a2f6c1d3
+Revises: c9e1f4a7b2d6
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e4b8a2f6c1d3"
+down_revision: str | Sequence[str] | None = "c9e1f4a7b2d6"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Add telemetry.cache_hit and prompt.cache_ttl_seconds."""
+    op.add_column(
+        "telemetry",
+        sa.Column(
+            "cache_hit",
+            sa.Boolean(),
+            nullable=False,
+            server_default=sa.false(),
+        ),
+    )
+    op.add_column(
+        "prompt",
+        sa.Column("cache_ttl_seconds", sa.Integer(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Drop response cache columns."""
+    op.drop_column("prompt", "cache_ttl_seconds")
+    op.drop_column("telemetry", "cache_hit")
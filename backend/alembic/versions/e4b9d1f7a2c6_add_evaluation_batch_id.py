@@ -0,0 +1,32 @@
+"""add evaluation batch id
+
+Revision ID: e4b9d1f7a2c6
+Revises: d2a7e5c9f1b3
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e4b9d1f7a2c6"
+down_revision: str | Sequence[str] | None = "d2a7e5c9f1b3"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Add the provider batch job an evaluation run is waiting on."""
+    op.add_column(
+        "evaluation",
+        sa.Column("batch_id", sa.String(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Drop evaluation batch id."""
+    op.drop_column("evaluation", "batch_id")
@@ -0,0 +1,48 @@
+"""add ab test run columns
+
+Revision ID: f6a2c8e1d4b9
+Revises: e4b9d1f7a2c6
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f6a2c8e1d4b9"
+down_revision: str | Sequence[str] | None = "e4b9d1f7a2c6"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Add the owner and repetitions of A/B tests, and call errors."""
+    op.add_column(
+        "abtest",
+        sa.Column("user_id", sa.Integer(), nullable=True),
+    )
+    op.create_foreign_key(
+        "fk_abtest_user_id_user", "abtest", "user", ["user_id"], ["id"]
+    )
+    op.add_column(
+        "abtest",
+        sa.Column(
+            "repetitions", sa.Integer(), nullable=False, server_default="1"
+        ),
+    )
+    op.add_column(
+        "abtestresult",
+        sa.Column("error", sa.String(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Drop A/B test run columns."""
+    op.drop_column("abtestresult", "error")
+    op.drop_column("abtest", "repetitions")
+    op.drop_constraint("fk_abtest_user_id_user", "abtest", type_="foreignkey")
+    op.drop_column("abtest", "user_id")
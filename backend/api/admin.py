@@ -20,12 +20,15 @@ def rotate_encryption_key(
     Rotate encryption key and re-encrypt all tokens (admin only).
 
     This operation:
-    1. Generates a new encryption key
-    2. Re-encrypts all tokens with the new key
-    3. Deactivates the old key
+    1. Generates a new encryption key and deactivates the old key
+    2. Re-encrypts tokens with the new key in batches, committing a
+       checkpoint after each one
+    3. Resumes an interrupted rotation instead of starting a new one
+
+    Poll GET /rotate-encryption-key for progress while it runs.
 
     Returns:
-        Status and count of re-encrypted tokens
+        Status, count of re-encrypted tokens and rotation progress
     """
     rotation_service = KeyRotationService(session)
 
@@ -36,6 +39,7 @@ def rotate_encryption_key(
             "message": "Encryption key rotated successfully",
             "new_key_id": new_key_id,
             "re_encrypted_tokens": re_encrypted_count,
+            "progress": rotation_service.get_progress(),
         }
     except Exception as e:
         raise HTTPException(
@@ -44,6 +48,21 @@ def rotate_encryption_key(
         ) from e
 
 
+@router.get("/rotate-encryption-key")
+def get_key_rotation_progress(
+    session: Session = Depends(get_session),
+    user_id: int = Depends(require_admin),
+) -> dict:
+    """
+    Get progress of the most recent key rotation (admin only).
+
+    Returns:
+        Rotation progress, or {"status": "none"} if no rotation has run
+    """
+    progress = KeyRotationService(session).get_progress()
+    return progress or {"status": "none"}
+
+
 @router.get("/active-key")
 def get_active_key(
     session: Session = Depends(get_session),
@@ -6,21 +6,23 @@ from typing import Any
 import structlog
 from fastapi import APIRouter, Depends, Query, Request
 from pydantic import BaseModel, ConfigDict
-from sqlmodel import Session, and_, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from api.deps import get_current_user_id
-from core.database import get_session
+from core.database import get_async_session
 from models.cost_optimization import (
     Budget,
     OptimizationRecommendation,
 )
-from models.telemetry import Telemetry
 from services.cost_service import CostService
+from services.telemetry_rollup_service import aggregate_costs
 
 logger = structlog.get_logger()
 router = APIRouter()
 
 MIN_ANOMALY_HISTORY_DAYS = 10
+HISTORY_DAYS = 30
 
 
 class BudgetCreate(BaseModel):
@@ -49,21 +51,52 @@ class BudgetUpdate(BaseModel):
     alert_thresholds: dict[str, Any] | None = None
 
 
-def get_cost_service(session: Session = Depends(get_session)) -> CostService:
+def get_cost_service() -> CostService:
     """Dependency to get CostService instance."""
-    return CostService(session=session)
+    # Forecasting and anomaly detection are pure computations over the
+    # daily costs the endpoints load, so the service needs no session.
+    return CostService()
+
+
+async def _daily_costs(
+    session: AsyncSession, user_id: int, days: int = HISTORY_DAYS
+) -> tuple[datetime, list[float], dict[str, float]]:
+    """
+    Per-day and per-provider cost for the last ``days`` calendar days.
+
+    The database groups the rollups by day and provider; this only places
+    the (days x providers x models) rows into the daily series.
+
+    Returns:
+        Tuple of (first day, daily costs oldest first, cost by provider)
+    """
+    end_date = datetime.utcnow()
+    start_date = end_date.replace(
+        hour=0, minute=0, second=0, microsecond=0
+    ) - timedelta(days=days - 1)
+
+    daily_costs = [0.0] * days
+    by_provider: dict[str, float] = {}
+    for bucket in await aggregate_costs(session, user_id, start_date, end_date):
+        day = (bucket.bucket_start - start_date).days
+        if 0 <= day < days:
+            daily_costs[day] += bucket.cost
+        provider = bucket.provider or "unknown"
+        by_provider[provider] = by_provider.get(provider, 0.0) + bucket.cost
+
+    return start_date, daily_costs, by_provider
 
 
 @router.get("/budget", response_model=dict[str, Any])
-def get_budget(
+async def get_budget(
     request: Request,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     cost_service: CostService = Depends(get_cost_service),
     user_id: int = Depends(get_current_user_id),
 ) -> dict[str, Any]:
     """Get current budget status."""
     # Get user's budget (for now, get first budget)
-    budget = session.exec(select(Budget).limit(1)).first()
+    budget = (await session.exec(select(Budget).limit(1))).first()
     if not budget:
         return {
             "total_budget": 0,
@@ -73,39 +106,14 @@ def get_budget(
         }
 
     # Calculate current spend from telemetry
-    end_date = datetime.utcnow()
-    start_date = end_date - timedelta(days=30)
-    telemetry_query = select(Telemetry).where(
-        and_(
-            Telemetry.user_id == user_id,
-            Telemetry.timestamp >= start_date,
-            Telemetry.timestamp <= end_date,
-        )
-    )
-    telemetry_records = session.exec(telemetry_query).all()
-    current_spend = sum(record.cost or 0.0 for record in telemetry_records)
+    _, daily_costs, by_provider = await _daily_costs(session, user_id)
+    current_spend = sum(daily_costs)
 
     # Forecast costs
-    daily_costs = []
-    for i in range(30):
-        day_start = start_date + timedelta(days=i)
-        day_end = day_start + timedelta(days=1)
-        day_records = [
-            r for r in telemetry_records if day_start <= r.timestamp < day_end
-        ]
-        daily_costs.append(sum(r.cost or 0.0 for r in day_records))
-
     forecasts = cost_service.forecast_costs(daily_costs, days_ahead=30)
     total_forecast = (sum(f.predicted_cost for f in forecasts)
                       if forecasts else current_spend)
 
-    # Group by provider
-    by_provider: dict[str, float] = {}
-    for record in telemetry_records:
-        provider = record.sdk or "unknown"
-        by_provider[provider] = by_provider.get(
-            provider, 0.0) + (record.cost or 0.0)
-
     details = [
         {"category": provider, "allocated": 0, "spent": spent}
         for provider, spent in by_provider.items()
@@ -121,13 +129,13 @@ def get_budget(
 
 @router.get("/budgets/", response_model=list[BudgetRead])
 @router.get("/budgets", response_model=list[BudgetRead])
-def list_budgets(
+async def list_budgets(
     request: Request,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     user_id: int = Depends(get_current_user_id),
 ) -> list[BudgetRead]:
     """List all budgets."""
-    budgets = session.exec(select(Budget)).all()
+    budgets = (await session.exec(select(Budget))).all()
     return [
         BudgetRead(
             id=b.id,
@@ -144,10 +152,10 @@ def list_budgets(
 
 @router.post("/budgets/", response_model=BudgetRead, status_code=201)
 @router.post("/budgets", response_model=BudgetRead, status_code=201)
-def create_budget(
+async def create_budget(
     request: Request,
     budget_data: BudgetCreate,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     user_id: int = Depends(get_current_user_id),
 ) -> Budget:
     """Create a new budget."""
@@ -160,8 +168,8 @@ def create_budget(
         or {"warning": 80, "critical": 100},
     )
     session.add(budget)
-    session.commit()
-    session.refresh(budget)
+    await session.commit()
+    await session.refresh(budget)
 
     logger.info(
         "budget_created",
@@ -175,35 +183,16 @@ def create_budget(
 
 @router.get("/forecast/")
 @router.get("/forecast")
-def get_cost_forecast(
+async def get_cost_forecast(
     request: Request,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     cost_service: CostService = Depends(get_cost_service),
     user_id: int = Depends(get_current_user_id),
     days_ahead: int = Query(30, ge=1, le=90),
 ) -> dict[str, Any]:
     """Get cost forecast."""
-    # Get historical costs
-    end_date = datetime.utcnow()
-    start_date = end_date - timedelta(days=30)
-    telemetry_query = select(Telemetry).where(
-        and_(
-            Telemetry.user_id == user_id,
-            Telemetry.timestamp >= start_date,
-            Telemetry.timestamp <= end_date,
-        )
-    )
-    telemetry_records = session.exec(telemetry_query).all()
-
-    # Calculate daily costs
-    daily_costs = []
-    for i in range(30):
-        day_start = start_date + timedelta(days=i)
-        day_end = day_start + timedelta(days=1)
-        day_records = [
-            r for r in telemetry_records if day_start <= r.timestamp < day_end
-        ]
-        daily_costs.append(sum(r.cost or 0.0 for r in day_records))
+    # Get historical daily costs
+    _, daily_costs, _ = await _daily_costs(session, user_id)
 
     forecasts = cost_service.forecast_costs(daily_costs, days_ahead=days_ahead)
 
@@ -221,34 +210,15 @@ def get_cost_forecast(
 
 
 @router.get("/anomalies", response_model=list[dict[str, Any]])
-def get_cost_anomalies(
+async def get_cost_anomalies(
     request: Request,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     cost_service: CostService = Depends(get_cost_service),
     user_id: int = Depends(get_current_user_id),
 ) -> list[dict[str, Any]]:
     """Get detected cost anomalies."""
-    # Get recent costs
-    end_date = datetime.utcnow()
-    start_date = end_date - timedelta(days=30)
-    telemetry_query = select(Telemetry).where(
-        and_(
-            Telemetry.user_id == user_id,
-            Telemetry.timestamp >= start_date,
-            Telemetry.timestamp <= end_date,
-        )
-    )
-    telemetry_records = session.exec(telemetry_query).all()
-
-    # Calculate daily costs
-    daily_costs = []
-    for i in range(30):
-        day_start = start_date + timedelta(days=i)
-        day_end = day_start + timedelta(days=1)
-        day_records = [
-            r for r in telemetry_records if day_start <= r.timestamp < day_end
-        ]
-        daily_costs.append(sum(r.cost or 0.0 for r in day_records))
+    # Get recent daily costs
+    start_date, daily_costs, _ = await _daily_costs(session, user_id)
 
     # Detect anomalies
     anomalies = []
@@ -270,19 +240,21 @@ def get_cost_anomalies(
 
 
 @router.get("/recommendations", response_model=list[dict[str, Any]])
-def get_optimization_recommendations(
+async def get_optimization_recommendations(
     request: Request,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     user_id: int = Depends(get_current_user_id),
     limit: int = Query(5, ge=1, le=20),
 ) -> list[dict[str, Any]]:
     """Get optimization recommendations."""
-    recommendations = session.exec(
-        select(OptimizationRecommendation)
-        # For now, use workspace 1
-        .where(OptimizationRecommendation.workspace_id == 1)
-        .order_by(OptimizationRecommendation.potential_savings.desc())
-        .limit(limit)
+    recommendations = (
+        await session.exec(
+            select(OptimizationRecommendation)
+            # For now, use workspace 1
+            .where(OptimizationRecommendation.workspace_id == 1)
+            .order_by(OptimizationRecommendation.potential_savings.desc())
+            .limit(limit)
+        )
     ).all()
 
     return [
@@ -1,17 +1,24 @@
 """Data Loss Prevention API endpoints."""
 
+import codecs
+import json
 import re
+import tempfile
+from typing import Any
 
 import structlog
 from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, ConfigDict
 from sqlmodel import Session, select
 
 from api.deps import get_current_user_id, require_admin
 from core.database import get_session
 from models.dlp_rule import DLPAction, DLPRule
-from services.dlp_service import DLPService
-from services.pii_detection_service import PIIDetectionService
+from services.dlp_service import DLPService, invalidate_dlp_rules
+from services.pii_detection_service import get_pii_service
+from services.streaming_redactor import ContentBlockedError
 
 logger = structlog.get_logger()
 router = APIRouter()
@@ -62,8 +69,7 @@ class DLPViolationRead(BaseModel):
 
 def get_dlp_service(session: Session = Depends(get_session)) -> DLPService:
     """Dependency to get DLP service instance."""
-    pii_service = PIIDetectionService()
-    return DLPService(pii_service=pii_service, session=session)
+    return DLPService(pii_service=get_pii_service(), session=session)
 
 
 @router.post("/redact", response_model=RedactResponse)
@@ -90,6 +96,72 @@ def redact_pii(
     )
 
 
+_SPOOL_MAX_BYTES = 1024 * 1024
+_STREAM_CHUNK_BYTES = 64 * 1024
+
+
+def _sse(event: str, data: dict[str, Any]) -> str:
+    """Format a Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/redact/stream")
+async def redact_pii_stream(
+    request: Request,
+    dlp_service: DLPService = Depends(get_dlp_service),
+    user_id: int = Depends(get_current_user_id),
+):
+    """
+    Redact a plain-text request body of any size, streaming the result.
+
+    The body is spooled to a temporary file (in memory up to 1 MiB) and
+    redacted chunk by chunk with the same rules as /redact, so memory use
+    does not grow with its size. Events: ``chunk`` ({"text"}) as redacted
+    text becomes ready, then ``done`` ({"violations"}), or ``blocked``
+    ({"violations"}) if a BLOCK rule matched, which ends the output.
+    """
+    redactor = await run_in_threadpool(dlp_service.streaming_redactor)
+
+    # The body has to be read before the response starts: the HTTP
+    # middleware stops relaying request messages once it has a response.
+    body = tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX_BYTES)
+    async for data in request.stream():
+        body.write(data)
+    body.seek(0)
+
+    def body_text():
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        while data := body.read(_STREAM_CHUNK_BYTES):
+            yield decoder.decode(data)
+        yield decoder.decode(b"", final=True)
+
+    def event_stream():
+        # Sync generator: Starlette runs it in a worker thread
+        is_blocked = False
+        try:
+            for text in redactor.redact_iter(body_text()):
+                yield _sse("chunk", {"text": text})
+        except ContentBlockedError:
+            is_blocked = True
+        finally:
+            body.close()
+
+        logger.info(
+            "dlp_stream_completed",
+            is_blocked=is_blocked,
+            violation_count=len(redactor.violations),
+            user_id=user_id,
+        )
+        event = "blocked" if is_blocked else "done"
+        yield _sse(event, {"violations": redactor.violations})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/rules", response_model=list[DLPRuleRead])
 def list_dlp_rules(
     request: Request,
@@ -137,6 +209,7 @@ def create_dlp_rule(
     session.add(rule)
     session.commit()
     session.refresh(rule)
+    invalidate_dlp_rules()
 
     logger.info(
         "dlp_rule_created",
@@ -196,6 +269,7 @@ def update_dlp_rule(
     session.add(rule)
     session.commit()
     session.refresh(rule)
+    invalidate_dlp_rules()
 
     logger.info(
         "dlp_rule_updated",
@@ -220,6 +294,7 @@ def delete_dlp_rule(
 
     session.delete(rule)
     session.commit()
+    invalidate_dlp_rules()
 
     logger.info(
         "dlp_rule_deleted",
@@ -1,14 +1,19 @@
 """Evaluation API endpoints."""
 
+import logging
 from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request
 from pydantic import BaseModel, ConfigDict
+from sqlalchemy import case, func
 from sqlmodel import Session, select
 
 from api.deps import get_current_user_id
-from core.database import get_session
+from core.database import async_session_maker, get_session
 from models.evaluation import Evaluation, EvaluationResult
+from services.evaluation_service import EvaluationService
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -74,22 +79,46 @@ def create_evaluation(
 def get_evaluation_results(
     request: Request,
     evaluation_id: int,
+    *,
+    offset: int = 0,
+    limit: int | None = None,
     session: Session = Depends(get_session),
     user_id: int = Depends(get_current_user_id),
 ) -> dict[str, Any]:
-    """Get evaluation results."""
+    """
+    Get evaluation results (a page of them with offset/limit), the summary
+    over all of them, and the progress of the current or last run.
+    """
     evaluation = session.get(Evaluation, evaluation_id)
     if not evaluation or evaluation.user_id != user_id:
         raise HTTPException(status_code=404, detail="Evaluation not found")
 
-    results = session.exec(select(EvaluationResult).where(
-        EvaluationResult.evaluation_id == evaluation_id)).all()
-
-    total_tests = len(results)
-    passed = sum(1 for r in results if r.score >= PASS_SCORE_THRESHOLD)
+    query = (
+        select(EvaluationResult)
+        .where(EvaluationResult.evaluation_id == evaluation_id)
+        .order_by(EvaluationResult.id)
+        .offset(offset)
+    )
+    if limit is not None:
+        query = query.limit(limit)
+    results = session.exec(query).all()
+
+    total_tests, passed, avg_score = session.exec(
+        select(
+            func.count(EvaluationResult.id),
+            func.coalesce(
+                func.sum(
+                    case((EvaluationResult.score >= PASS_SCORE_THRESHOLD, 1),
+                         else_=0)
+                ),
+                0,
+            ),
+            func.coalesce(func.avg(EvaluationResult.score), 0.0),
+        ).where(EvaluationResult.evaluation_id == evaluation_id)
+    ).one()
     failed = total_tests - passed
-    avg_score = sum(r.score for r in results) / total_tests if total_tests > 0 else 0
 
+    total_items = evaluation.total_items
     return {
         "evaluation": evaluation,
         "results": results,
@@ -99,25 +128,66 @@ def get_evaluation_results(
             "failed": failed,
             "avg_score": avg_score,
         },
+        "progress": {
+            "status": evaluation.status,
+            "total_items": total_items,
+            "completed_items": evaluation.completed_items,
+            "percent_complete": (
+                round(evaluation.completed_items / total_items * 100, 1)
+                if total_items
+                else None
+            ),
+            "error": evaluation.error,
+        },
     }
 
 
+async def _run_evaluation_in_background(evaluation_id: int, batch: bool) -> None:
+    async with async_session_maker() as session:
+        try:
+            await EvaluationService(session).run_evaluation(
+                evaluation_id, batch=batch
+            )
+        except Exception as e:
+            # Recorded on the evaluation (status "failed", error)
+            logger.error(f"Evaluation {evaluation_id} failed: {e}")
+
+
 @router.post("/{evaluation_id}/run")
 def run_evaluation(
     request: Request,
     evaluation_id: int,
+    background_tasks: BackgroundTasks,
+    *,
+    force: bool = False,
+    batch: bool = False,
     session: Session = Depends(get_session),
     user_id: int = Depends(get_current_user_id),
 ) -> dict[str, Any]:
-    """Run an evaluation suite."""
+    """
+    Start an evaluation run in the background.
+
+    A run picks up where the last one stopped: rows that already have a
+    result are skipped. An evaluation that is already running is rejected
+    unless ``force`` is set (e.g. its run was lost in a restart).
+
+    With ``batch``, rows are sent as provider batch jobs (OpenAI and
+    Anthropic): half the price and outside the rate limits, but the run can
+    take up to a day. Progress is reported as each job's results are saved.
+    """
     evaluation = session.get(Evaluation, evaluation_id)
     if not evaluation or evaluation.user_id != user_id:
         raise HTTPException(status_code=404, detail="Evaluation not found")
+    if evaluation.status == "running" and not force:
+        raise HTTPException(status_code=409, detail="Evaluation is already running")
 
     evaluation.status = "running"
     session.add(evaluation)
     session.commit()
 
-    # In a real implementation, this would trigger async evaluation
-    # For now, return a placeholder
-    return {"status": "started", "evaluation_id": evaluation_id}
+    background_tasks.add_task(_run_evaluation_in_background, evaluation_id, batch)
+    return {
+        "status": "started",
+        "evaluation_id": evaluation_id,
+        "completed_items": evaluation.completed_items,
+    }
@@ -1,15 +1,33 @@
 
+import asyncio
+import json
+from typing import Any
+
 from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from sqlmodel import Session, desc, select
+from sqlmodel import desc, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from api.deps import get_current_user_id
-from core.database import get_session
+from core.config import get_settings
+from core.database import get_async_session
+from core.exceptions import InferenceError
 from core.limiter import limit
 from models.chat import ChatMessage
+from models.reliability import RequestQueue
 from models.token import Token
-from services.inference_service import run_inference
+from services.dlp_service import DLPService
+from services.hedging import HedgeTarget
+from services.inference_jobs import (
+    FINISHED_STATUSES,
+    InferenceJobWorker,
+    get_inference_job_worker,
+)
+from services.inference_service import run_inference, stream_inference
+from services.pii_detection_service import get_pii_service
 from services.security_audit_service import log_security_event
+from services.streaming_redactor import ContentBlockedError
 
 router = APIRouter()
 
@@ -23,19 +41,80 @@ class InferenceRequest(BaseModel):
     task: str | None = "auto"
     prompt_id: int | None = None
     prompt_variables: dict | None = None
+    use_cache: bool = False  # True may serve a cached answer to a repeat
+    redact_output: bool = False  # /stream: apply DLP rules to the output
+    # /run: duplicate a slow call to this token's provider and/or this model
+    hedge_token_id: int | None = None
+    hedge_model: str | None = None
+    # /run: move on to the failover providers if the provider fails
+    failover: bool = False
 
 
-@router.post("/run")
-@limit("10/minute")
-async def run_inference_endpoint(
+class InferenceJobRequest(BaseModel):
+    provider: str
+    model: str | None = None
+    input_text: str
+    token_id: int
+    hf_provider: str | None = "auto"
+    task: str | None = "auto"
+    prompt_id: int | None = None
+    prompt_variables: dict | None = None
+    use_cache: bool = False
+    priority: int = 1  # 0=High, 1=Normal, 2=Low
+
+
+def _job_view(job: RequestQueue) -> dict[str, Any]:
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "attempts": job.attempts,
+        "created_at": job.created_at.isoformat(),
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "processed_at": job.processed_at.isoformat() if job.processed_at else None,
+        "result": job.result["result"] if job.result else None,
+        "error": job.error,
+    }
+
+
+async def _log_token_access(
+    request: Request,
+    session: AsyncSession,
+    user_id: int,
+    token: Token,
+    model: str | None,
+) -> None:
+    ip_address = request.client.host if request.client else "unknown"
+    user_agent = request.headers.get("user-agent")
+    await session.run_sync(
+        lambda sync_session: log_security_event(
+            session=sync_session,
+            event_type="token_access",
+            ip_address=ip_address,
+            user_id=user_id,
+            user_agent=user_agent,
+            details={
+                "provider": token.provider,
+                "token_id": token.id,
+                "model": model,
+            },
+        )
+    )
+
+
+async def _prepare_inference(
     request: Request,
     inference_request: InferenceRequest,
-    session: Session = Depends(get_session),
-    user_id: int = Depends(get_current_user_id),
-):
+    session: AsyncSession,
+    user_id: int,
+) -> tuple[str, list[dict]]:
+    """
+    Validate the token, audit its use, load history and save the user message.
 
+    Returns:
+        Tuple of (decrypted token value, chat history)
+    """
     # Get the token
-    token = session.get(Token, inference_request.token_id)
+    token = await session.get(Token, inference_request.token_id)
     if not token or token.user_id != user_id:
         raise HTTPException(status_code=404, detail="Token not found")
 
@@ -44,28 +123,16 @@ async def run_inference_endpoint(
             status_code=400,
             detail="Token provider does not match request provider")
 
-    # Log token access
-    ip_address = request.client.host if request.client else "unknown"
-    user_agent = request.headers.get("user-agent")
-    log_security_event(
-        session=session,
-        event_type="token_access",
-        ip_address=ip_address,
-        user_id=user_id,
-        user_agent=user_agent,
-        details={
-            "provider": token.provider,
-            "token_id": token.id,
-            "model": inference_request.model,
-        },
-    )
+    await _log_token_access(request, session, user_id, token, inference_request.model)
 
     # Fetch chat history (last 20 messages)
-    history_objs = session.exec(
-        select(ChatMessage)
-        .where(ChatMessage.user_id == user_id)
-        .order_by(desc(ChatMessage.created_at))
-        .limit(20)
+    history_objs = (
+        await session.exec(
+            select(ChatMessage)
+            .where(ChatMessage.user_id == user_id)
+            .order_by(desc(ChatMessage.created_at))
+            .limit(20)
+        )
     ).all()
     # Reverse to chronological order
     history = [{"role": msg.role, "content": msg.content}
@@ -76,10 +143,64 @@ async def run_inference_endpoint(
         user_id=user_id, role="user", content=inference_request.input_text
     )
     session.add(user_msg)
-    session.commit()
+    await session.commit()
+
+    # Decrypt with the token's own key (cached after the first request)
+    token_value = await session.run_sync(token.get_token_value)
+    return token_value, history
+
+
+async def _hedge_target(
+    request: Request,
+    inference_request: InferenceRequest,
+    session: AsyncSession,
+    user_id: int,
+    token_value: str,
+) -> HedgeTarget | None:
+    """
+    Where a slow call is duplicated: the hedge token's provider (the
+    request's token if not given) with the hedge model (the request's
+    model if not given). None if the request doesn't hedge.
+    """
+    if inference_request.hedge_token_id is None and not inference_request.hedge_model:
+        return None
+
+    provider = inference_request.provider
+    model = inference_request.hedge_model or inference_request.model or "auto"
+    if inference_request.hedge_token_id is not None:
+        token = await session.get(Token, inference_request.hedge_token_id)
+        if not token or token.user_id != user_id:
+            raise HTTPException(status_code=404, detail="Hedge token not found")
+        await _log_token_access(request, session, user_id, token, model)
+        provider = token.provider
+        token_value = await session.run_sync(token.get_token_value)
+    return HedgeTarget(provider, model, token_value)
+
 
-    # Retrieve token value (encrypted, decrypted on access)
-    token_val = token.token_value
+def _sse(event: str, data: dict[str, Any]) -> str:
+    """Format a Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/run")
+@limit("10/minute")
+async def run_inference_endpoint(
+    request: Request,
+    inference_request: InferenceRequest,
+    session: AsyncSession = Depends(get_async_session),
+    user_id: int = Depends(get_current_user_id),
+):
+
+    token_val, history = await _prepare_inference(
+        request, inference_request, session, user_id
+    )
+    hedge = await _hedge_target(
+        request, inference_request, session, user_id, token_val
+    )
+    if hedge and inference_request.failover:
+        raise HTTPException(
+            status_code=400, detail="Hedging and failover can't be combined"
+        )
 
     result = await run_inference(
         session=session,
@@ -93,6 +214,9 @@ async def run_inference_endpoint(
         history=history,
         prompt_id=inference_request.prompt_id,
         prompt_variables=inference_request.prompt_variables,
+        use_cache=inference_request.use_cache,
+        hedge=hedge,
+        failover=inference_request.failover,
     )
 
     # Save assistant response (if text)
@@ -102,37 +226,232 @@ async def run_inference_endpoint(
             role="assistant",
             content=result)
         session.add(asst_msg)
-        session.commit()
+        await session.commit()
 
     return {"result": result}
 
 
+@router.post("/stream")
+@limit("10/minute")
+async def stream_inference_endpoint(
+    request: Request,
+    inference_request: InferenceRequest,
+    session: AsyncSession = Depends(get_async_session),
+    user_id: int = Depends(get_current_user_id),
+):
+    """
+    Run inference and stream the output as Server-Sent Events.
+
+    Events: ``token`` ({"delta"}) per text chunk, ``output`` ({"output"}) for
+    non-text results, then ``done`` with token usage, or ``error``.
+
+    With ``redact_output`` the text is passed through the DLP rules as it
+    streams; a few hundred characters are held back so matches split across
+    chunks are still caught, and a BLOCK match ends the stream with an
+    ``error`` (code DLP_BLOCKED).
+    """
+    token_val, history = await _prepare_inference(
+        request, inference_request, session, user_id
+    )
+    redactor = None
+    if inference_request.redact_output:
+        redactor = await session.run_sync(
+            lambda s: DLPService(get_pii_service(), s).streaming_redactor()
+        )
+
+    async def event_stream():
+        deltas: list[str] = []
+        output = None
+        usage: dict[str, int | None] = {
+            "input_tokens": None, "output_tokens": None}
+
+        try:
+            async for chunk in stream_inference(
+                session=session,
+                user_id=user_id,
+                provider=inference_request.provider,
+                model=inference_request.model,
+                input_text=inference_request.input_text,
+                token_value=token_val,
+                hf_provider=inference_request.hf_provider,
+                task=inference_request.task,
+                history=history,
+                prompt_id=inference_request.prompt_id,
+                prompt_variables=inference_request.prompt_variables,
+            ):
+                for key in usage:
+                    if chunk.get(key) is not None:
+                        usage[key] = chunk[key]
+                if "output" in chunk:
+                    output = chunk["output"]
+                    yield _sse("output", {"output": output})
+                elif chunk.get("delta"):
+                    delta = chunk["delta"]
+                    if redactor is not None:
+                        delta = redactor.feed(delta)
+                    if delta:
+                        deltas.append(delta)
+                        yield _sse("token", {"delta": delta})
+            if redactor is not None:
+                delta = redactor.flush()
+                if delta:
+                    deltas.append(delta)
+                    yield _sse("token", {"delta": delta})
+        except InferenceError as e:
+            yield _sse("error", {"code": e.error_code, "message": e.message})
+            return
+        except ContentBlockedError as e:
+            yield _sse("error", {"code": "DLP_BLOCKED", "message": str(e)})
+            return
+
+        # Save assistant response (if text) once the stream is complete
+        result = "".join(deltas) if output is None else output
+        if isinstance(result, str):
+            asst_msg = ChatMessage(
+                user_id=user_id,
+                role="assistant",
+                content=result)
+            session.add(asst_msg)
+            await session.commit()
+
+        yield _sse("done", usage)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/jobs", status_code=202)
+@limit("100/minute")
+async def submit_inference_job(
+    request: Request,
+    job_request: InferenceJobRequest,
+    session: AsyncSession = Depends(get_async_session),
+    user_id: int = Depends(get_current_user_id),
+    worker: InferenceJobWorker = Depends(get_inference_job_worker),
+):
+    """
+    Queue an inference and return immediately with its job id.
+
+    Jobs run on the backend's worker pool and do not touch chat history.
+    Poll ``GET /jobs/{job_id}`` or subscribe to ``GET /jobs/{job_id}/events``
+    for the result.
+    """
+    token = await session.get(Token, job_request.token_id)
+    if not token or token.user_id != user_id:
+        raise HTTPException(status_code=404, detail="Token not found")
+    if token.provider != job_request.provider:
+        raise HTTPException(
+            status_code=400,
+            detail="Token provider does not match request provider")
+
+    ip_address = request.client.host if request.client else "unknown"
+    user_agent = request.headers.get("user-agent")
+    await session.run_sync(
+        lambda sync_session: log_security_event(
+            session=sync_session,
+            event_type="token_access",
+            ip_address=ip_address,
+            user_id=user_id,
+            user_agent=user_agent,
+            details={
+                "provider": token.provider,
+                "token_id": token.id,
+                "model": job_request.model,
+                "queued": True,
+            },
+        )
+    )
+
+    job = await worker.submit(
+        user_id,
+        job_request.model_dump(exclude={"priority"}),
+        priority=job_request.priority,
+    )
+    return _job_view(job)
+
+
+@router.get("/jobs/{job_id}")
+async def get_inference_job(
+    job_id: int,
+    user_id: int = Depends(get_current_user_id),
+    worker: InferenceJobWorker = Depends(get_inference_job_worker),
+):
+    """Get a queued inference's status, and its result once finished."""
+    job = await worker.get_job(job_id, user_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_view(job)
+
+
+@router.get("/jobs/{job_id}/events")
+async def subscribe_inference_job(
+    job_id: int,
+    user_id: int = Depends(get_current_user_id),
+    worker: InferenceJobWorker = Depends(get_inference_job_worker),
+):
+    """
+    Stream a queued inference's progress as Server-Sent Events.
+
+    A ``status`` event (same body as ``GET /jobs/{job_id}``) is sent now and
+    whenever the status changes; the stream ends after the completed or
+    failed one.
+    """
+    job = await worker.get_job(job_id, user_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    poll_interval_s = get_settings().INFERENCE_JOB_SUBSCRIBE_POLL_S
+
+    async def event_stream():
+        current, last_status = job, None
+        while True:
+            if current.status != last_status:
+                last_status = current.status
+                yield _sse("status", _job_view(current))
+            if current.status in FINISHED_STATUSES:
+                return
+            await asyncio.sleep(poll_interval_s)
+            current = await worker.get_job(job_id, user_id) or current
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/history")
-def get_chat_history(
+async def get_chat_history(
     request: Request,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     user_id: int = Depends(get_current_user_id),
 ):
 
-    messages = session.exec(
-        select(ChatMessage)
-        .where(ChatMessage.user_id == user_id)
-        .order_by(ChatMessage.created_at)
+    messages = (
+        await session.exec(
+            select(ChatMessage)
+            .where(ChatMessage.user_id == user_id)
+            .order_by(ChatMessage.created_at)
+        )
     ).all()
     return messages
 
 
 @router.delete("/history")
-def clear_chat_history(
+async def clear_chat_history(
     request: Request,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     user_id: int = Depends(get_current_user_id),
 ):
 
-    messages = session.exec(
-        select(ChatMessage).where(ChatMessage.user_id == user_id)
+    messages = (
+        await session.exec(
+            select(ChatMessage).where(ChatMessage.user_id == user_id)
+        )
     ).all()
     for msg in messages:
-        session.delete(msg)
-    session.commit()
+        await session.delete(msg)
+    await session.commit()
     return {"ok": True}
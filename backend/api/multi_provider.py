@@ -1,16 +1,31 @@
+import logging
 from typing import Any
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from pydantic import BaseModel, Field
+from sqlmodel import Session
 
-from models.multi_provider import ProviderHealth
+from api.deps import get_current_user_id
+from core.database import engine, get_session
+from models.multi_provider import ABTest, ProviderHealth
 from services.ab_test_service import ABTestService
 from services.comparison_service import ComparisonService
 from services.health_service import HealthService
 from services.model_abstraction_service import ModelAbstractionService
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 
+class ABTestCreate(BaseModel):
+    name: str
+    prompt: str
+    # Provider names, optionally with a model ("openai:gpt-4o-mini")
+    providers: list[str] = Field(min_length=1)
+    repetitions: int | None = Field(default=None, ge=1, le=100)
+
+
 # Dependency Injection (Simple instantiation for demo)
 def get_health_service():
     return HealthService()
@@ -20,8 +35,8 @@ def get_comparison_service():
     return ComparisonService()
 
 
-def get_ab_test_service():
-    return ABTestService()
+def get_ab_test_service(session: Session = Depends(get_session)):
+    return ABTestService(session)
 
 
 def get_model_abstraction_service():
@@ -45,29 +60,58 @@ def compare_providers(
     return service.compare_providers(provider1, provider2, metric)
 
 
+async def _run_ab_test_in_background(test_id: int) -> None:
+    with Session(engine) as session:
+        try:
+            await ABTestService(session).run_test(test_id)
+        except Exception as e:
+            # Recorded on the test (status "failed")
+            logger.error(f"A/B test {test_id} failed: {e}")
+
+
 @router.post("/ab-test/start")
-async def start_ab_test(
-    name: str,
-    prompt: str,
-    providers: list[str],
+def start_ab_test(
+    body: ABTestCreate,
+    background_tasks: BackgroundTasks,
     service: ABTestService = Depends(get_ab_test_service),
-):
-    """Start an A/B test."""
-    return await service.start_test(name, prompt, providers)
+    user_id: int = Depends(get_current_user_id),
+) -> ABTest:
+    """
+    Start an A/B test in the background.
+
+    Each provider gets the prompt ``repetitions`` times, concurrently; the
+    test is "running" until every call has finished.
+    """
+    try:
+        test = service.create_test(
+            user_id, body.name, body.prompt, body.providers, body.repetitions
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    background_tasks.add_task(_run_ab_test_in_background, test.id)
+    return test
 
 
 @router.get("/ab-test")
-def list_ab_tests(service: ABTestService = Depends(get_ab_test_service)):
+def list_ab_tests(
+    service: ABTestService = Depends(get_ab_test_service),
+    user_id: int = Depends(get_current_user_id),
+):
     """List all A/B tests."""
-    return service.list_tests()
+    return service.list_tests(user_id)
 
 
 @router.get("/ab-test/{test_id}")
 def get_ab_test_results(
-    test_id: int, service: ABTestService = Depends(get_ab_test_service)
+    test_id: int,
+    service: ABTestService = Depends(get_ab_test_service),
+    user_id: int = Depends(get_current_user_id),
 ):
-    """Get results of an A/B test."""
-    return service.get_results(test_id)
+    """Get results of an A/B test, with per-provider statistics."""
+    results = service.get_results(test_id, user_id)
+    if results is None:
+        raise HTTPException(status_code=404, detail="A/B test not found")
+    return results
 
 
 @router.get("/routing")
@@ -7,6 +7,7 @@ from sqlmodel import Session, desc, select
 from api.deps import get_current_user_id, get_session_data
 from core.database import get_session
 from models.prompt import Prompt, PromptCreate, PromptRead, PromptUpdate
+from services.prompt_service import get_template_cache, validate_prompt_template
 
 router = APIRouter()
 
@@ -33,6 +34,11 @@ def create_prompt(
             ),
         )
 
+    try:
+        validate_prompt_template(prompt_data.template, prompt_data.input_variables)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
     prompt = Prompt.model_validate(prompt_data)
     prompt.user_id = user_id
     session.add(prompt)
@@ -83,6 +89,15 @@ def update_prompt(
         raise HTTPException(status_code=404, detail="Prompt not found")
 
     prompt_data = prompt_update.model_dump(exclude_unset=True)
+    if "template" in prompt_data or "input_variables" in prompt_data:
+        try:
+            validate_prompt_template(
+                prompt_data.get("template", db_prompt.template),
+                prompt_data.get("input_variables", db_prompt.input_variables),
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+
     for key, value in prompt_data.items():
         setattr(db_prompt, key, value)
 
@@ -93,6 +108,7 @@ def update_prompt(
     session.add(db_prompt)
     session.commit()
     session.refresh(db_prompt)
+    get_template_cache().invalidate(prompt_id)
     return db_prompt
 
 
@@ -114,4 +130,5 @@ def delete_prompt(
 
     session.delete(prompt)
     session.commit()
+    get_template_cache().invalidate(prompt_id)
     return {"ok": True}
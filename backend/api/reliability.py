@@ -1,25 +1,25 @@
 from typing import Any
 
-from fastapi import APIRouter, Depends
-
-from services.circuit_breaker_service import CircuitBreakerService
-from services.queue_service import QueueService
+from fastapi import APIRouter, Depends, HTTPException
+
+from api.deps import require_admin
+from services.circuit_breaker_service import (
+    CircuitBreakerService,
+    get_circuit_breaker,
+)
+from services.load_balancer_service import LoadBalancerService, get_load_balancer
+from services.queue_service import QueueService, get_queue_service
 from services.reliability_benchmark_service import ReliabilityBenchmarkService
 
 router = APIRouter()
 
 # Singletons (Simulated persistence)
-_queue_service = QueueService()
-_circuit_service = CircuitBreakerService()
 _benchmark_service = ReliabilityBenchmarkService()
 
 
-def get_queue_service():
-    return _queue_service
-
-
 def get_circuit_service():
-    return _circuit_service
+    # The breakers of the inference path
+    return get_circuit_breaker()
 
 
 def get_benchmark_service():
@@ -37,9 +37,12 @@ async def enqueue_request(
 
 
 @router.get("/queue/next")
-async def dequeue_request(service: QueueService = Depends(get_queue_service)):
-    """Dequeue next item."""
-    return await service.dequeue()
+async def dequeue_request(
+    visibility_timeout_s: float | None = None,
+    service: QueueService = Depends(get_queue_service),
+):
+    """Dequeue next item; it is redelivered if not completed in time."""
+    return await service.dequeue(visibility_timeout_s)
 
 
 @router.post("/queue/complete/{request_id}")
@@ -51,40 +54,56 @@ async def complete_request(
     return {"status": "ok"}
 
 
+@router.post("/queue/fail/{request_id}")
+async def fail_request(
+    request_id: int,
+    requeue: bool = False,
+    service: QueueService = Depends(get_queue_service),
+):
+    """Mark a dequeued request failed, or put it back in the queue."""
+    record = await service.fail(request_id, requeue)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Request not in flight")
+    return record
+
+
 @router.get("/circuit-breakers/{provider}")
-def get_circuit_status(
+async def get_circuit_status(
         provider: str,
         service: CircuitBreakerService = Depends(get_circuit_service)):
-    """Get circuit breaker status for a provider."""
-    breaker = service.get_breaker(provider)
-    is_open = service.is_open(provider)
+    """Get circuit breaker status for a provider (read-only)."""
+    breaker = await service.get_state(provider)
     return {
         "provider": provider,
         "state": breaker.state,
-        "is_blocking": is_open,
+        "is_blocking": service.is_blocking(breaker),
         "failures": breaker.failure_count,
     }
 
 
 @router.post("/circuit-breakers/{provider}/simulate-failure")
-def simulate_failure(
+async def simulate_failure(
         provider: str,
-        service: CircuitBreakerService = Depends(get_circuit_service)):
-    """Simulate a failure to trip the breaker."""
-    service.record_failure(provider)
+        service: CircuitBreakerService = Depends(get_circuit_service),
+        user_id: int = Depends(require_admin)):
+    """
+    Record a failure against the inference path's breaker (admin only):
+    enough of them open the provider's circuit for every user.
+    """
+    await service.on_failure(provider)
     return {"status": "recorded_failure"}
 
 
 @router.get("/queue")
-def list_queue_items(service: QueueService = Depends(get_queue_service)):
+async def list_queue_items(service: QueueService = Depends(get_queue_service)):
     """List all queue items."""
-    return service.list_items()
+    return await service.list_items()
 
 
 @router.get("/queue/metrics")
-def get_queue_metrics(service: QueueService = Depends(get_queue_service)):
+async def get_queue_metrics(service: QueueService = Depends(get_queue_service)):
     """Get queue metrics."""
-    return service.get_metrics()
+    return await service.get_metrics()
 
 
 @router.get("/load-balancers")
@@ -100,14 +119,10 @@ def create_load_balancer(balancer: dict[str, Any]):
 
 
 @router.get("/load-balancers/analytics")
-def get_load_balancer_analytics():
-    """Get load balancer analytics."""
-    return {
-        "total_requests": 0,
-        "avg_latency": 0,
-        "distribution": [],
-        "algorithm_performance": {},
-    }
+def get_load_balancer_analytics(
+        service: LoadBalancerService = Depends(get_load_balancer)):
+    """Get load balancer analytics (provider calls made by this process)."""
+    return service.analytics()
 
 
 @router.get("/benchmarks/{provider}")
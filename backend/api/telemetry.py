@@ -2,34 +2,38 @@ from datetime import datetime, timedelta
 from typing import Any
 
 from fastapi import APIRouter, Depends, Query, Request
-from sqlmodel import Session, and_, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from api.deps import get_current_user_id, get_session_data
-from core.database import get_session
+from core.database import get_async_session
 from models.telemetry import Telemetry
+from services.telemetry_rollup_service import aggregate_costs
 
 router = APIRouter()
 
 
 @router.get("/", response_model=list[Telemetry])
-def read_telemetry(
+async def read_telemetry(
     request: Request,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     user_id: int = Depends(get_current_user_id),
     session_data: dict[str, Any] = Depends(get_session_data),
 ) -> list[Telemetry]:
     if session_data.get("role") == "admin":
-        return session.exec(select(Telemetry)).all()
+        return (await session.exec(select(Telemetry))).all()
     else:
-        return session.exec(
-            select(Telemetry).where(
-                Telemetry.user_id == user_id)).all()
+        return (
+            await session.exec(
+                select(Telemetry).where(Telemetry.user_id == user_id)
+            )
+        ).all()
 
 
 @router.get("/cost-analytics")
-def get_cost_analytics(
+async def get_cost_analytics(
     request: Request,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     user_id: int = Depends(get_current_user_id),
     provider: str | None = Query(None),
     start_date: datetime | None = Query(None),
@@ -51,52 +55,31 @@ def get_cost_analytics(
     if not start_date:
         start_date = end_date - timedelta(days=30)
 
-    # Build query
-    query = select(Telemetry).where(
-        and_(
-            Telemetry.user_id == user_id,
-            Telemetry.timestamp >= start_date,
-            Telemetry.timestamp <= end_date,
-        )
+    # Aggregated in SQL over the rollups (raw telemetry for partial hours)
+    unit = group_by if group_by in ("week", "month") else "day"
+    buckets = await aggregate_costs(
+        session, user_id, start_date, end_date, unit=unit, provider=provider
     )
 
-    if provider:
-        query = query.where(Telemetry.sdk == provider)
-
-    telemetry_records = session.exec(query).all()
-
-    # Aggregate costs
-    total_cost = sum(record.cost or 0.0 for record in telemetry_records)
-
-    # Group by provider
+    total_cost = 0.0
+    record_count = 0
     by_provider: dict[str, float] = {}
-    for record in telemetry_records:
-        provider_name = record.sdk or "unknown"
-        by_provider[provider_name] = by_provider.get(provider_name, 0.0) + (
-            record.cost or 0.0
-        )
-
-    # Group by model
     by_model: dict[str, float] = {}
-    for record in telemetry_records:
-        model_name = record.model or "unknown"
-        by_model[model_name] = by_model.get(
-            model_name, 0.0) + (record.cost or 0.0)
-
-    # Group by time period
     by_time: dict[str, float] = {}
-    for record in telemetry_records:
-        if group_by == "day":
-            time_key = record.timestamp.strftime("%Y-%m-%d")
-        elif group_by == "week":
-            # Get week number
-            time_key = record.timestamp.strftime("%Y-W%W")
-        elif group_by == "month":
-            time_key = record.timestamp.strftime("%Y-%m")
-        else:
-            time_key = record.timestamp.strftime("%Y-%m-%d")
+    time_format = {"week": "%Y-W%W", "month": "%Y-%m"}.get(group_by, "%Y-%m-%d")
+    for bucket in buckets:
+        total_cost += bucket.cost
+        record_count += bucket.request_count
+
+        provider_name = bucket.provider or "unknown"
+        by_provider[provider_name] = by_provider.get(
+            provider_name, 0.0) + bucket.cost
+
+        model_name = bucket.model or "unknown"
+        by_model[model_name] = by_model.get(model_name, 0.0) + bucket.cost
 
-        by_time[time_key] = by_time.get(time_key, 0.0) + (record.cost or 0.0)
+        time_key = bucket.bucket_start.strftime(time_format)
+        by_time[time_key] = by_time.get(time_key, 0.0) + bucket.cost
 
     return {
         "total_cost": total_cost,
@@ -107,5 +90,5 @@ def get_cost_analytics(
         "by_provider": by_provider,
         "by_model": by_model,
         "by_time": by_time,
-        "record_count": len(telemetry_records),
+        "record_count": record_count,
     }
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from api.deps import get_current_user_id
-from core.database import get_session
+from core.database import get_async_session
 from core.limiter import limit
 from models.token import Token, TokenCreate, TokenRead
 from services.security_audit_service import log_security_event
@@ -12,10 +13,10 @@ router = APIRouter()
 
 @router.post("/", response_model=TokenRead)
 @limit("5/hour")
-def create_token(
+async def create_token(
     token_in: TokenCreate,
     request: Request,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     user_id: int = Depends(get_current_user_id),
 ) -> Token:
     token = Token(
@@ -25,101 +26,114 @@ def create_token(
         is_default=token_in.is_default,
         encrypted_token="",  # Initialize
     )
-    token.set_token(token_in.token_value, session)
+    # Looking up the active encryption key is sync model code
+    await session.run_sync(
+        lambda sync_session: token.set_token(token_in.token_value, sync_session)
+    )
 
     if token.is_default:
         # Unset other defaults for this user
-        existing_defaults = session.exec(
-            select(Token).where(
-                Token.user_id == user_id,
-                Token.is_default.is_(True))).all()
+        existing_defaults = (
+            await session.exec(
+                select(Token).where(
+                    Token.user_id == user_id, Token.is_default.is_(True)
+                )
+            )
+        ).all()
         for t in existing_defaults:
             t.is_default = False
             session.add(t)
 
     session.add(token)
-    session.commit()
-    session.refresh(token)
+    await session.commit()
+    await session.refresh(token)
     return token
 
 
 @router.get("/", response_model=list[TokenRead])
-def read_tokens(
+async def read_tokens(
     request: Request,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     user_id: int = Depends(get_current_user_id),
 ) -> list[Token]:
-    tokens = session.exec(select(Token).where(Token.user_id == user_id)).all()
+    tokens = (
+        await session.exec(select(Token).where(Token.user_id == user_id))
+    ).all()
     return tokens
 
 
 @router.delete("/{token_id}")
-def delete_token(
+async def delete_token(
     token_id: int,
     request: Request,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     user_id: int = Depends(get_current_user_id),
 ) -> dict:
-    token = session.get(Token, token_id)
+    token = await session.get(Token, token_id)
     if not token or token.user_id != user_id:
         raise HTTPException(status_code=404, detail="Token not found")
 
     # Log token deletion
     ip_address = request.client.host if request.client else "unknown"
     user_agent = request.headers.get("user-agent")
-    log_security_event(
-        session=session,
-        event_type="token_deleted",
-        ip_address=ip_address,
-        user_id=user_id,
-        user_agent=user_agent,
-        details={"provider": token.provider, "token_id": token_id},
+    await session.run_sync(
+        lambda sync_session: log_security_event(
+            session=sync_session,
+            event_type="token_deleted",
+            ip_address=ip_address,
+            user_id=user_id,
+            user_agent=user_agent,
+            details={"provider": token.provider, "token_id": token_id},
+        )
     )
 
-    session.delete(token)
-    session.commit()
+    await session.delete(token)
+    await session.commit()
     return {"ok": True}
 
 
 @router.put("/{token_id}/default", response_model=TokenRead)
-def set_default_token(
+async def set_default_token(
     token_id: int,
     request: Request,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     user_id: int = Depends(get_current_user_id),
 ) -> Token:
-    token = session.get(Token, token_id)
+    token = await session.get(Token, token_id)
     if not token or token.user_id != user_id:
         raise HTTPException(status_code=404, detail="Token not found")
 
     # Unset other defaults
-    existing_defaults = session.exec(
-        select(Token).where(
-            Token.user_id == user_id,
-            Token.is_default.is_(True))).all()
+    existing_defaults = (
+        await session.exec(
+            select(Token).where(
+                Token.user_id == user_id, Token.is_default.is_(True)
+            )
+        )
+    ).all()
     for t in existing_defaults:
         t.is_default = False
         session.add(t)
 
     token.is_default = True
     session.add(token)
-    session.commit()
-    session.refresh(token)
+    await session.commit()
+    await session.refresh(token)
     return token
 
 
 @router.put("/{token_id}", response_model=TokenRead)
-def update_token(
+async def update_token(
     token_id: int,
     # Using TokenCreate for update might be strict (requires token_value)
     token_update: TokenCreate,
     # But for now let's stick to it or create TokenUpdate.
     # Assuming update allows changing token value.
     request: Request,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     user_id: int = Depends(get_current_user_id),
 ) -> Token:
-    db_token = session.get(Token, token_id)
+    db_token = await session.get(Token, token_id)
     if not db_token or db_token.user_id != user_id:
         raise HTTPException(status_code=404, detail="Token not found")
 
@@ -129,15 +143,22 @@ def update_token(
 
     # Update token value if provided
     if token_update.token_value:
-        db_token.set_token(token_update.token_value, session)
+        await session.run_sync(
+            lambda sync_session: db_token.set_token(
+                token_update.token_value, sync_session
+            )
+        )
 
     # Handle is_default logic
     if token_update.is_default and not db_token.is_default:
         # Unset other defaults
-        existing_defaults = session.exec(
-            select(Token).where(
-                Token.user_id == user_id,
-                Token.is_default.is_(True))).all()
+        existing_defaults = (
+            await session.exec(
+                select(Token).where(
+                    Token.user_id == user_id, Token.is_default.is_(True)
+                )
+            )
+        ).all()
         for t in existing_defaults:
             t.is_default = False
             session.add(t)
@@ -145,6 +166,6 @@ def update_token(
     db_token.is_default = token_update.is_default
 
     session.add(db_token)
-    session.commit()
-    session.refresh(db_token)
+    await session.commit()
+    await session.refresh(db_token)
     return db_token
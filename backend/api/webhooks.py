@@ -2,16 +2,16 @@ from typing import Any
 
 from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request
 from pydantic import BaseModel
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from api.deps import get_current_user_id
-from core.database import engine, get_session
+from core.database import async_session_maker, get_async_session
 from services.webhook_service import WebhookService
 
 router = APIRouter()
 
 
-def get_webhook_service(session: Session = Depends(get_session)):
+def get_webhook_service(session: AsyncSession = Depends(get_async_session)):
     return WebhookService(session)
 
 
@@ -26,19 +26,19 @@ async def _dispatch_event_background(
     event_type: str,
     payload: dict[str, Any],
 ) -> None:
-    with Session(engine) as session:
+    async with async_session_maker() as session:
         await WebhookService(session).dispatch_event(workspace_id, event_type, payload)
 
 
 @router.get("/")
-def list_webhooks(
+async def list_webhooks(
     request: Request,
     user_id: int = Depends(get_current_user_id),
     service: WebhookService = Depends(get_webhook_service),
     workspace_id: int | None = None,
 ):
     """List all webhooks."""
-    return service.list_webhooks(workspace_id=workspace_id)
+    return await service.list_webhooks(workspace_id=workspace_id)
 
 
 @router.post("/")
@@ -59,7 +59,7 @@ async def create_webhook(
 
 
 @router.delete("/{webhook_id}", status_code=204)
-def delete_webhook(
+async def delete_webhook(
     request: Request,
     webhook_id: int,
     user_id: int = Depends(get_current_user_id),
@@ -67,31 +67,49 @@ def delete_webhook(
 ):
     """Delete a webhook."""
     try:
-        service.delete_webhook(webhook_id)
+        await service.delete_webhook(webhook_id)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e)) from e
 
 
 @router.get("/deliveries")
-def list_deliveries(
+async def list_deliveries(
     request: Request,
     user_id: int = Depends(get_current_user_id),
     service: WebhookService = Depends(get_webhook_service),
     workspace_id: int | None = None,
+    status: str | None = None,
 ):
-    """List webhook deliveries."""
-    return service.list_deliveries(workspace_id=workspace_id)
+    """List webhook deliveries (status=dead for the dead-letter queue)."""
+    return await service.list_deliveries(workspace_id=workspace_id, status=status)
+
+
+@router.post("/deliveries/{delivery_id}/retry")
+async def retry_delivery(
+    request: Request,
+    delivery_id: int,
+    user_id: int = Depends(get_current_user_id),
+    service: WebhookService = Depends(get_webhook_service),
+):
+    """Requeue a dead-lettered delivery."""
+    try:
+        return await service.retry_delivery(delivery_id)
+    except ValueError as e:
+        detail = str(e)
+        if "not found" in detail.lower():
+            raise HTTPException(status_code=404, detail=detail) from e
+        raise HTTPException(status_code=409, detail=detail) from e
 
 
 @router.get("/analytics")
-def get_webhook_analytics(
+async def get_webhook_analytics(
     request: Request,
     user_id: int = Depends(get_current_user_id),
     service: WebhookService = Depends(get_webhook_service),
     workspace_id: int | None = None,
 ):
     """Get webhook analytics."""
-    return service.get_analytics(workspace_id=workspace_id)
+    return await service.get_analytics(workspace_id=workspace_id)
 
 
 @router.post("/dispatch-test")
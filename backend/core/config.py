@@ -16,9 +16,128 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ENCRYPTION_KEY: str  # Required for token encryption
     ALGORITHM: str = "HS256"
+    # Key material cache (core/key_cache.py)
+    ENCRYPTION_KEY_CACHE_TTL_S: float = 300.0
+    DECRYPTED_TOKEN_CACHE_TTL_S: float = 60.0
+    # Batched key rotation (services/key_rotation_service.py)
+    KEY_ROTATION_BATCH_SIZE: int = 500
+    KEY_ROTATION_WORKERS: int = 4
     JAEGER_ENABLED: bool = True
     TESTING: bool = False
 
+    # Provider SDK client pool (services/llm_providers/client_pool.py)
+    LLM_CLIENT_POOL_SIZE: int = 64
+    LLM_CLIENT_IDLE_TIMEOUT_S: float = 300.0
+    LLM_CLIENT_SWEEP_INTERVAL_S: float = 60.0  # How often idle clients close
+
+    # Batched telemetry writer (services/telemetry_writer.py)
+    TELEMETRY_BATCH_SIZE: int = 100
+    TELEMETRY_FLUSH_INTERVAL_S: float = 1.0
+    TELEMETRY_BUFFER_MAX: int = 10000
+    TELEMETRY_ENQUEUE_TIMEOUT_S: float = 0.5
+
+    # Provider response cache (services/response_cache.py)
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_BACKEND: str = "memory"  # "memory" or "redis"
+    RESPONSE_CACHE_TTL_S: int = 3600
+    RESPONSE_CACHE_MAX_ENTRIES: int = 10000
+    RESPONSE_CACHE_MAX_ENTRY_BYTES: int = 262144
+
+    # Compiled DLP rules shared across requests (services/dlp_service.py)
+    DLP_RULES_CACHE_TTL_S: float = 60.0
+    # Longest match a streamed redaction is guaranteed to catch across chunks
+    DLP_STREAM_OVERLAP_CHARS: int = 256
+
+    # Shared PII analyzer (services/pii_detection_service.py)
+    PII_BATCH_SIZE: int = 64
+    PII_ANALYZE_PROCESSES: int = 1
+
+    # Webhook fan-out (services/webhook_dispatcher.py)
+    WEBHOOK_MAX_CONCURRENCY_PER_WORKSPACE: int = 20
+    WEBHOOK_MAX_CONNECTIONS_PER_HOST: int = 10
+    WEBHOOK_MAX_CONNECTIONS: int = 200
+
+    # Webhook retry outbox (services/webhook_outbox.py)
+    WEBHOOK_MAX_ATTEMPTS: int = 8
+    WEBHOOK_RETRY_BASE_DELAY_S: float = 5.0
+    WEBHOOK_RETRY_MAX_DELAY_S: float = 3600.0
+    WEBHOOK_OUTBOX_BATCH_SIZE: int = 100
+    WEBHOOK_OUTBOX_POLL_INTERVAL_S: float = 5.0
+    WEBHOOK_CLAIM_LEASE_S: float = 60.0
+    WEBHOOK_BREAKER_FAILURE_THRESHOLD: int = 5
+    WEBHOOK_BREAKER_RECOVERY_S: int = 60
+
+    # Request priority queue (services/queue_service.py)
+    QUEUE_BACKEND: str = "memory"  # "memory", "redis" or "database"
+    QUEUE_VISIBILITY_TIMEOUT_S: float = 300.0
+    QUEUE_MAX_FINISHED: int = 1000
+
+    # Queued inference jobs (services/inference_jobs.py)
+    INFERENCE_JOB_WORKERS: int = 4  # Per replica
+    INFERENCE_JOB_PROVIDER_CONCURRENCY: int = 4  # Per provider, per replica
+    INFERENCE_JOB_PROVIDER_LIMITS: dict[str, int] = {}  # e.g. {"openai": 8}
+    INFERENCE_JOB_VISIBILITY_TIMEOUT_S: float = 600.0
+    INFERENCE_JOB_MAX_ATTEMPTS: int = 3
+    INFERENCE_JOB_POLL_INTERVAL_S: float = 1.0
+    INFERENCE_JOB_SUBSCRIBE_POLL_S: float = 0.5
+
+    # Per-provider limits for bulk inference (services/provider_limiter.py)
+    PROVIDER_BULK_CONCURRENCY: int = 8
+    PROVIDER_BULK_LIMITS: dict[str, int] = {}  # e.g. {"openai": 16}
+    PROVIDER_BULK_RATES_PER_S: dict[str, float] = {}  # e.g. {"groq": 5.0}
+
+    # Evaluation runner (services/evaluation_service.py)
+    EVALUATION_CHECKPOINT_ROWS: int = 100
+    EVALUATION_MAX_RETRIES: int = 5  # On provider rate limiting
+    EVALUATION_RETRY_BASE_DELAY_S: float = 1.0
+
+    # Adaptive routing (services/routing_service.py)
+    ROUTING_WINDOW_S: float = 900.0  # Sliding window for error rate and cost
+    ROUTING_WINDOW_BUCKETS: int = 60
+    ROUTING_EWMA_ALPHA: float = 0.2  # Weight of the newest latency sample
+    ROUTING_MIN_SAMPLES: int = 5  # Before a route's error rate counts
+    ROUTING_MAX_ERROR_RATE: float = 0.5
+    ROUTING_REFRESH_INTERVAL_S: float = 10.0
+    ROUTING_REFRESH_LAG_S: float = 60.0  # Re-read for late-committed rows
+
+    # Load balancing (services/load_balancer_service.py)
+    LOAD_BALANCER_EWMA_DECAY_S: float = 10.0  # Peak-EWMA latency decay
+    LOAD_BALANCER_PROVIDER_CAPACITY: int = 64  # In-flight calls = 100% load
+    LOAD_BALANCER_PROVIDER_CAPACITIES: dict[str, int] = {}  # e.g. {"groq": 16}
+
+    # Provider call retries (services/retry_service.py)
+    RETRY_MAX_ATTEMPTS: int = 3
+    RETRY_INITIAL_DELAY_MS: int = 200
+    RETRY_MAX_DELAY_MS: int = 5000
+    RETRY_BACKOFF_MULTIPLIER: float = 2.0
+    RETRY_PROVIDER_CONFIGS: dict[str, dict] = {}  # e.g. {"groq": {"max_attempts": 5}}
+
+    # Provider circuit breakers (services/circuit_breaker_service.py)
+    CIRCUIT_BREAKER_BACKEND: str = "memory"  # "memory" or "redis" (all workers)
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_BREAKER_RECOVERY_TIMEOUT_S: int = 30
+
+    # Provider failover (services/failover_service.py)
+    FAILOVER_PROVIDERS: list[str] = ["openai", "anthropic", "groq"]  # In order
+
+    # Hedged requests (services/hedging.py)
+    HEDGE_LATENCY_PERCENTILE: float = 95.0  # Primary's head start
+    HEDGE_LATENCY_WINDOW: int = 200  # Recent latencies kept per provider/model
+    HEDGE_MIN_SAMPLES: int = 20  # Before the percentile is used
+    HEDGE_DEFAULT_DELAY_MS: float = 2000.0  # Head start until then
+    HEDGE_MIN_DELAY_MS: float = 50.0
+
+    # A/B tests (services/ab_test_service.py)
+    AB_TEST_REPETITIONS: int = 5  # Default calls per provider
+
+    # Provider batch jobs (services/batch_inference.py)
+    BATCH_POLL_INTERVAL_S: float = 30.0
+    BATCH_TIMEOUT_S: float = 26 * 3600.0  # Providers allow up to 24h
+    BATCH_MAX_REQUESTS: int = 10000  # Per batch job
+
+    # Compiled prompt templates (services/prompt_service.py)
+    PROMPT_TEMPLATE_CACHE_SIZE: int = 1024
+
     ADMIN_SEED_EMAIL: str | None = None
     ADMIN_SEED_PASSWORD: str | None = None
 
@@ -1,9 +1,22 @@
+from collections.abc import AsyncIterator
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from .config import get_settings
 
 settings = get_settings()
 
+# Async drivers for the sync URLs used by Alembic and the scheduler
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+# Sync engine: Alembic migrations, APScheduler jobs and routers not yet
+# migrated to AsyncSession
 engine = create_engine(
     settings.DATABASE_URL,
     echo=True,
@@ -14,10 +27,39 @@ engine = create_engine(
 )
 
 
+def get_async_database_url(database_url: str) -> str:
+    """Swap the sync driver in a database URL for its asyncio equivalent."""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend in ASYNC_DRIVERS:
+        url = url.set(drivername=ASYNC_DRIVERS[backend])
+    return url.render_as_string(hide_password=False)
+
+
+async_engine = create_async_engine(
+    get_async_database_url(settings.DATABASE_URL),
+    pool_size=10,
+    max_overflow=20,
+    pool_pre_ping=True,
+    pool_recycle=3600,
+)
+
+# expire_on_commit=False: attributes of committed objects stay loaded, since
+# lazy refreshes cannot run implicitly under asyncio
+async_session_maker = async_sessionmaker(
+    async_engine, class_=AsyncSession, expire_on_commit=False
+)
+
+
 def get_session():
     with Session(engine) as session:
         yield session
 
 
+async def get_async_session() -> AsyncIterator[AsyncSession]:
+    async with async_session_maker() as session:
+        yield session
+
+
 def init_db():
     SQLModel.metadata.create_all(engine)
@@ -0,0 +1,137 @@
+"""Process-wide cache of encryption key material and decrypted tokens."""
+
+import threading
+import time
+from collections import OrderedDict
+
+from cryptography.fernet import Fernet, MultiFernet
+
+from core.config import get_settings
+
+
+class KeyMaterialCache:
+    """
+    Ready-to-use ciphers for token encryption.
+
+    Holds the master Fernet, one Fernet per data key (by ``key_id``; a key's
+    material never changes, so these only go away on invalidate()), the
+    active key for ``active_ttl_s`` and decrypted provider tokens for
+    ``token_ttl_s``. Decrypted tokens are keyed by ciphertext, so a
+    re-encrypted token is never served from a stale entry.
+
+    KeyRotationService.rotate_key() calls invalidate(); the active-key TTL
+    bounds how long other processes keep encrypting with a rotated-out key.
+    """
+
+    def __init__(
+        self,
+        active_ttl_s: float = 300.0,
+        token_ttl_s: float = 60.0,
+        max_tokens: int = 1024,
+    ):
+        self.active_ttl_s = active_ttl_s
+        self.token_ttl_s = token_ttl_s
+        self.max_tokens = max_tokens
+        self._lock = threading.Lock()
+        self._master: Fernet | None = None
+        self._active: tuple[str, str, float] | None = None
+        self._ciphers: dict[str, Fernet] = {}
+        self._multi: tuple[Fernet, MultiFernet] | None = None
+        self._tokens: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self.token_hits = 0
+        self.token_misses = 0
+
+    def master_cipher(self) -> Fernet:
+        """Fernet for the master ENCRYPTION_KEY that wraps data keys."""
+        if self._master is None:
+            self._master = Fernet(get_settings().ENCRYPTION_KEY.encode())
+        return self._master
+
+    def get_active(self) -> tuple[str, str] | None:
+        """Cached (key_id, key_value) of the active data key, if fresh."""
+        active = self._active
+        if active is None or active[2] <= time.monotonic():
+            return None
+        return active[0], active[1]
+
+    def set_active(self, key_id: str, key_value: str) -> None:
+        self._active = (key_id, key_value, time.monotonic() + self.active_ttl_s)
+        self.cipher(key_id, key_value)
+
+    def cipher(self, key_id: str, key_value: str | None = None) -> Fernet | None:
+        """
+        Fernet for a data key, built once per key_id.
+
+        Returns:
+            The cached cipher, a new one if ``key_value`` is given, or None
+        """
+        cipher = self._ciphers.get(key_id)
+        if cipher is None and key_value is not None:
+            cipher = Fernet(key_value.encode())
+            with self._lock:
+                self._ciphers[key_id] = cipher
+                self._multi = None
+        return cipher
+
+    def multi_fernet(self, primary: Fernet) -> MultiFernet:
+        """MultiFernet that tries ``primary`` first, then every cached key."""
+        cached = self._multi
+        if cached is not None and cached[0] is primary:
+            return cached[1]
+        with self._lock:
+            others = [c for c in self._ciphers.values() if c is not primary]
+            multi = MultiFernet([primary, *others])
+            self._multi = (primary, multi)
+        return multi
+
+    def get_token(self, encrypted_token: str) -> str | None:
+        """Decrypted token for a ciphertext, if cached and not expired."""
+        with self._lock:
+            entry = self._tokens.get(encrypted_token)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._tokens[encrypted_token]
+                self.token_misses += 1
+                return None
+            self._tokens.move_to_end(encrypted_token)
+            self.token_hits += 1
+            return entry[1]
+
+    def put_token(self, encrypted_token: str, value: str) -> None:
+        with self._lock:
+            self._tokens[encrypted_token] = (
+                time.monotonic() + self.token_ttl_s,
+                value,
+            )
+            self._tokens.move_to_end(encrypted_token)
+            while len(self._tokens) > self.max_tokens:
+                self._tokens.popitem(last=False)
+
+    def invalidate(self) -> None:
+        """Forget all key material and decrypted tokens."""
+        with self._lock:
+            self._master = None
+            self._active = None
+            self._ciphers.clear()
+            self._multi = None
+            self._tokens.clear()
+
+    def stats(self) -> dict[str, int]:
+        """Cached key/token counts and decrypted-token hit/miss counters."""
+        return {
+            "ciphers": len(self._ciphers),
+            "tokens": len(self._tokens),
+            "token_hits": self.token_hits,
+            "token_misses": self.token_misses,
+        }
+
+
+_settings = get_settings()
+_key_cache = KeyMaterialCache(
+    active_ttl_s=_settings.ENCRYPTION_KEY_CACHE_TTL_S,
+    token_ttl_s=_settings.DECRYPTED_TOKEN_CACHE_TTL_S,
+)
+
+
+def get_key_cache() -> KeyMaterialCache:
+    return _key_cache
@@ -1,4 +1,4 @@
-from prometheus_client import Counter, Histogram
+from prometheus_client import Counter, Gauge, Histogram
 
 INFERENCE_COUNT = Counter(
     "llm_requests_total",
@@ -10,6 +10,12 @@ INFERENCE_DURATION = Histogram(
     "llm_latency_seconds", "LLM inference latency", ["provider", "model"]
 )
 
+INFERENCE_TTFT = Histogram(
+    "llm_time_to_first_token_seconds",
+    "Time from request start to the first streamed token",
+    ["provider", "model"],
+)
+
 INFERENCE_TOKENS = Histogram(
     "llm_tokens_total",
     "Total tokens used",
@@ -19,3 +25,53 @@ INFERENCE_TOKENS = Histogram(
 INFERENCE_COST = Histogram(
     "llm_cost_usd", "LLM cost in USD", [
         "provider", "model"])
+
+TELEMETRY_ROWS_BUFFERED = Counter(
+    "telemetry_rows_buffered_total", "Telemetry rows accepted into the write buffer"
+)
+
+TELEMETRY_ROWS_FLUSHED = Counter(
+    "telemetry_rows_flushed_total", "Telemetry rows bulk-inserted into the database"
+)
+
+TELEMETRY_ROWS_DROPPED = Counter(
+    "telemetry_rows_dropped_total",
+    "Telemetry rows dropped (buffer full or failed flush)",
+)
+
+TELEMETRY_BUFFER_SIZE = Gauge(
+    "telemetry_buffer_rows", "Telemetry rows waiting to be flushed"
+)
+
+RESPONSE_CACHE_LOOKUPS = Counter(
+    "llm_response_cache_lookups_total",
+    "Provider response cache lookups",
+    ["provider", "result"],  # result: hit, miss
+)
+
+RESPONSE_CACHE_HIT_RATIO = Gauge(
+    "llm_response_cache_hit_ratio", "Response cache hits / lookups in this process"
+)
+
+RESPONSE_CACHE_ENTRIES = Gauge(
+    "llm_response_cache_entries", "Responses held by the in-memory cache"
+)
+
+RESPONSE_CACHE_EVICTIONS = Counter(
+    "llm_response_cache_evictions_total",
+    "Responses evicted from the in-memory cache (LRU)",
+)
+
+WEBHOOK_DELIVERIES = Counter(
+    "webhook_deliveries_total",
+    "Webhook delivery attempts",
+    ["status"],  # status: success, failed
+)
+
+WEBHOOK_DELIVERY_DURATION = Histogram(
+    "webhook_delivery_seconds", "Time to POST a webhook and get a response"
+)
+
+WEBHOOK_DELIVERIES_IN_FLIGHT = Gauge(
+    "webhook_deliveries_in_flight", "Webhook requests currently being sent"
+)
@@ -3,10 +3,12 @@
 import structlog
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from sqlmodel import Session
 
 from core.database import engine
 from services.key_rotation_service import KeyRotationService
+from services.telemetry_rollup_service import TelemetryRollupService
 
 logger = structlog.get_logger()
 
@@ -24,7 +26,21 @@ def setup_scheduled_jobs():
         replace_existing=True,
     )
 
-    logger.info("scheduled_jobs_setup", jobs=["rotate_encryption_key"])
+    # Keep telemetry rollups current for cost analytics
+    scheduler.add_job(
+        refresh_telemetry_rollups_job,
+        trigger=IntervalTrigger(minutes=5),
+        id="refresh_telemetry_rollups",
+        name="Refresh hourly/daily telemetry rollups",
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True,
+    )
+
+    logger.info(
+        "scheduled_jobs_setup",
+        jobs=["rotate_encryption_key", "refresh_telemetry_rollups"],
+    )
 
 
 def rotate_encryption_key_job():
@@ -34,7 +50,16 @@ def rotate_encryption_key_job():
     try:
         with Session(engine) as session:
             rotation_service = KeyRotationService(session)
-            new_key_id, re_encrypted_count = rotation_service.rotate_key()
+            new_key_id, re_encrypted_count = rotation_service.rotate_key(
+                progress_callback=lambda progress: logger.info(
+                    "key_rotation_job_progress",
+                    job_id=progress["job_id"],
+                    status=progress["status"],
+                    processed_tokens=progress["processed_tokens"],
+                    total_tokens=progress["total_tokens"],
+                    percent_complete=progress["percent_complete"],
+                )
+            )
 
             logger.info(
                 "key_rotation_job_completed",
@@ -49,6 +74,19 @@ def rotate_encryption_key_job():
         )
 
 
+def refresh_telemetry_rollups_job():
+    """Scheduled job to roll up newly closed telemetry hours."""
+    try:
+        with Session(engine) as session:
+            TelemetryRollupService(session).refresh()
+    except Exception as e:
+        logger.error(
+            "telemetry_rollup_job_failed",
+            error=str(e),
+            exc_info=True,
+        )
+
+
 def start_scheduler():
     """Start the scheduler."""
     setup_scheduled_jobs()
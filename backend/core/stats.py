@@ -0,0 +1,14 @@
+"""Small statistics helpers shared by services."""
+
+import math
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Percentile by linear interpolation between the closest ranks."""
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * pct / 100
+    low = math.floor(rank)
+    high = math.ceil(rank)
+    return sorted_values[low] + (
+        sorted_values[high] - sorted_values[low]) * (rank - low)
@@ -1,3 +1,4 @@
+import asyncio
 import os
 import sys
 import traceback
@@ -58,6 +59,13 @@ from core.security import get_password_hash
 from core.security_headers import SecurityHeadersMiddleware
 from core.tracing import configure_tracing
 from models.user import User
+from services.inference_jobs import get_inference_job_worker
+from services.llm_providers.client_pool import get_client_pool
+from services.pii_detection_service import warm_up_pii_service
+from services.routing_service import get_routing_service
+from services.telemetry_writer import get_telemetry_writer
+from services.webhook_dispatcher import get_webhook_dispatcher
+from services.webhook_outbox import get_webhook_outbox
 
 settings = get_settings()
 
@@ -131,12 +139,51 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error("scheduler_start_failed", error=str(e))
 
+    get_telemetry_writer().start()
+    logger.info("telemetry_writer_started")
+
+    get_client_pool().start()
+    logger.info("provider_client_sweep_started")
+
+    get_webhook_outbox().start()
+    logger.info("webhook_outbox_started")
+
+    get_inference_job_worker().start()
+    logger.info("inference_job_workers_started")
+
+    # Load the PII analyzer (spaCy model) in the background; requests that
+    # arrive first wait for the same instance rather than building their own
+    async def warm_up_pii_analyzer():
+        try:
+            await asyncio.to_thread(warm_up_pii_service)
+            logger.info("pii_analyzer_warmed")
+        except Exception as e:
+            logger.error("pii_analyzer_warm_up_failed", error=str(e))
+
+    pii_warm_up = asyncio.create_task(warm_up_pii_analyzer())
+
     yield
 
     # Shutdown
     logger.info("application_shutting_down")
+    pii_warm_up.cancel()
     shutdown_scheduler()
     logger.info("scheduler_shutdown")
+    # Background work first: in-flight jobs still call providers and write
+    # telemetry, so the writer is flushed after them and the provider
+    # clients are closed last
+    await get_inference_job_worker().stop()
+    logger.info("inference_job_workers_stopped", **get_inference_job_worker().stats())
+    await get_webhook_outbox().stop()
+    logger.info("webhook_outbox_stopped", **get_webhook_outbox().stats())
+    await get_routing_service().stop()
+    logger.info("routing_refresh_stopped")
+    await get_webhook_dispatcher().aclose()
+    logger.info("webhook_client_closed")
+    await get_telemetry_writer().stop()
+    logger.info("telemetry_writer_flushed", **get_telemetry_writer().stats())
+    await get_client_pool().aclose()
+    logger.info("provider_clients_closed")
 
 
 app = FastAPI(title=get_full_product_name(), lifespan=lifespan)
@@ -9,7 +9,7 @@ from models.cost_optimization import (
     RoutingRule,
 )
 from models.dlp_rule import DLPAction, DLPRule
-from models.encryption_key import EncryptionKey
+from models.encryption_key import EncryptionKey, KeyRotationJob
 from models.evaluation import Evaluation, EvaluationResult
 from models.multi_provider import (
     ABTest,
@@ -33,6 +33,11 @@ from models.reliability import (
 )
 from models.security_audit import SecurityAudit
 from models.telemetry import Telemetry
+from models.telemetry_rollup import (
+    TelemetryDailyRollup,
+    TelemetryHourlyRollup,
+    TelemetryRollupState,
+)
 from models.token import Token
 from models.user import User
 from models.webhook import Webhook, WebhookDelivery
@@ -54,6 +59,7 @@ __all__ = [
     "Evaluation",
     "EvaluationResult",
     "FailoverConfig",
+    "KeyRotationJob",
     "LoadBalanceRule",
     "ModelMapping",
     "OptimizationRecommendation",
@@ -70,6 +76,9 @@ __all__ = [
     "RoutingRule",
     "SecurityAudit",
     "Telemetry",
+    "TelemetryDailyRollup",
+    "TelemetryHourlyRollup",
+    "TelemetryRollupState",
     "Token",
     "User",
     "Webhook",
@@ -14,3 +14,21 @@ class EncryptionKey(SQLModel, table=True):
     is_active: bool = Field(default=True, index=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     rotated_at: datetime | None = None
+
+
+class KeyRotationJob(SQLModel, table=True):
+    """Progress and resume checkpoint of a batched key rotation."""
+
+    id: int | None = Field(default=None, primary_key=True)
+    old_key_id: str
+    new_key_id: str = Field(index=True)
+    # "running", "failed" (resumable) or "completed"
+    status: str = Field(default="running", index=True)
+    total_tokens: int = Field(default=0)
+    re_encrypted_count: int = Field(default=0)
+    skipped_count: int = Field(default=0)
+    last_token_id: int = Field(default=0)  # Checkpoint: tokens <= id are done
+    error: str | None = None
+    started_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    completed_at: datetime | None = None
@@ -1,5 +1,6 @@
 from datetime import datetime
 
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship, SQLModel
 
 
@@ -17,6 +18,11 @@ class Evaluation(EvaluationBase, table=True):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     user_id: int | None = Field(default=None, foreign_key="user.id")
+    total_items: int | None = None  # Dataset rows, known once a run starts
+    completed_items: int = Field(default=0)  # Rows with a saved result
+    error: str | None = None  # Why the last run failed
+    # Provider batch job in flight; a rerun collects it instead of resubmitting
+    batch_id: str | None = None
 
     results: list["EvaluationResult"] = Relationship(
         back_populates="evaluation")
@@ -31,7 +37,14 @@ class EvaluationResultBase(SQLModel):
 
 
 class EvaluationResult(EvaluationResultBase, table=True):
+    __table_args__ = (
+        Index("ix_evaluationresult_evaluation_id_item_index",
+              "evaluation_id", "item_index"),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
+    # Dataset row this result is for; a resumed run skips rows that have one
+    item_index: int | None = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
     evaluation: Evaluation = Relationship(back_populates="results")
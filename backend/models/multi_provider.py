@@ -48,9 +48,12 @@ class ABTest(SQLModel, table=True):
     __table_args__ = {"extend_existing": True}
     name: str
     prompt: str
+    # Provider names, optionally with a model ("openai:gpt-4o-mini")
     providers: list[str] = Field(default=[], sa_column=Column(JSON))
-    status: str = Field(default="running")  # "running", "completed"
+    status: str = Field(default="running")  # "running", "completed", "failed"
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    user_id: int | None = Field(default=None, foreign_key="user.id")
+    repetitions: int = Field(default=1)  # Calls per provider
 
 
 class ABTestResult(SQLModel, table=True):
@@ -62,6 +65,7 @@ class ABTestResult(SQLModel, table=True):
     latency_ms: float
     cost: float
     quality_score: float = Field(default=0.0)
+    error: str | None = None  # Set if the call failed
 
 
 # Phase 5: Model Abstraction
@@ -11,6 +11,8 @@ class PromptBase(SQLModel):
     version: int = Field(default=1)
     description: str | None = None
     model: str | None = None  # Default model for this prompt
+    # Response cache TTL for this prompt (None: default TTL, 0: don't cache)
+    cache_ttl_seconds: int | None = Field(default=None, ge=0)
 
 
 class Prompt(PromptBase, table=True):
@@ -36,3 +38,4 @@ class PromptUpdate(SQLModel):
     input_variables: list[str] | None = None
     description: str | None = None
     model: str | None = None
+    cache_ttl_seconds: int | None = Field(default=None, ge=0)
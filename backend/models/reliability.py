@@ -1,19 +1,35 @@
 from datetime import datetime
 from typing import Any
 
-from sqlalchemy import JSON, Column
+from sqlalchemy import JSON, Column, Index
 from sqlmodel import Field, SQLModel
 
 
 class RequestQueue(SQLModel, table=True):
+    """
+    An item in a priority queue (services/queue_service.py).
+
+    Only DatabaseQueueBackend stores these rows; the memory and Redis
+    backends use the model as a plain record.
+    """
+
     id: int | None = Field(default=None, primary_key=True)
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        Index("ix_requestqueue_queue_status_priority", "queue", "status", "priority"),
+        {"extend_existing": True},
+    )
+    queue: str = Field(default="default")  # Name of the queue the item is in
     request_data: dict[str, Any] = Field(default={}, sa_column=Column(JSON))
     priority: int = Field(default=1)  # 0=High, 1=Normal, 2=Low
     # pending, processing, completed, failed
     status: str = Field(default="pending")
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    started_at: datetime | None = None  # Last dequeue
     processed_at: datetime | None = None
+    attempts: int = Field(default=0)  # Times dequeued
+    claimed_until: datetime | None = None  # Visibility timeout while processing
+    result: dict[str, Any] | None = Field(default=None, sa_column=Column(JSON))
+    error: str | None = None
 
 
 class CircuitBreaker(SQLModel, table=True):
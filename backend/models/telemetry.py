@@ -1,19 +1,43 @@
 from datetime import datetime
 
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 
+# Columns the cost queries read, carried in the indexes (Postgres INCLUDE)
+# so windowed aggregates are answered by index-only scans.
+COST_COLUMNS = ["sdk", "model", "cost", "input_tokens", "output_tokens",
+                "execution_time_ms"]
+
 
 class Telemetry(SQLModel, table=True):
     id: int | None = Field(default=None, primary_key=True)
+    __table_args__ = (
+        # Per-user windows: cost analytics, budget, forecast
+        Index(
+            "ix_telemetry_user_id_timestamp",
+            "user_id",
+            "timestamp",
+            postgresql_include=COST_COLUMNS,
+        ),
+        # Cross-user time ranges: the hourly rollup job
+        Index(
+            "ix_telemetry_timestamp",
+            "timestamp",
+            postgresql_include=["user_id", "status", *COST_COLUMNS],
+        ),
+    )
     user_id: int = Field(foreign_key="user.id")
     model: str
     sdk: str  # "huggingface" or "openai"
     input_summary: str
     execution_time_ms: float
-    status: str  # "success" or "error"
+    status: str  # "success", "error" or "cancelled" (abandoned stream)
     error_message: str | None = None
     timestamp: datetime = Field(default_factory=datetime.utcnow)
     input_tokens: int | None = Field(default=None)
     output_tokens: int | None = Field(default=None)
     cost: float | None = Field(default=None)
     prompt_id: int | None = Field(default=None, foreign_key="prompt.id")
+    cache_hit: bool = Field(default=False)  # Served from the response cache
+    # "primary" or "hedge" on both calls of a hedged request
+    hedge: str | None = Field(default=None)
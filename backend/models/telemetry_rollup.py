@@ -0,0 +1,49 @@
+from datetime import datetime
+
+from sqlalchemy import UniqueConstraint
+from sqlmodel import Field, SQLModel
+
+
+class TelemetryRollupBase(SQLModel):
+    # Start of the UTC hour/day the row aggregates (naive, like Telemetry)
+    bucket_start: datetime = Field(index=True)
+    user_id: int = Field(foreign_key="user.id")
+    provider: str  # Telemetry.sdk
+    model: str
+    request_count: int = Field(default=0)
+    error_count: int = Field(default=0)
+    input_tokens: int = Field(default=0)
+    output_tokens: int = Field(default=0)
+    cost: float = Field(default=0.0)
+    latency_ms_sum: float = Field(default=0.0)
+
+
+class TelemetryHourlyRollup(TelemetryRollupBase, table=True):
+    id: int | None = Field(default=None, primary_key=True)
+    __table_args__ = (
+        UniqueConstraint(
+            "user_id", "bucket_start", "provider", "model",
+            name="uq_telemetryhourlyrollup_bucket",
+        ),
+        {"extend_existing": True},
+    )
+
+
+class TelemetryDailyRollup(TelemetryRollupBase, table=True):
+    id: int | None = Field(default=None, primary_key=True)
+    __table_args__ = (
+        UniqueConstraint(
+            "user_id", "bucket_start", "provider", "model",
+            name="uq_telemetrydailyrollup_bucket",
+        ),
+        {"extend_existing": True},
+    )
+
+
+class TelemetryRollupState(SQLModel, table=True):
+    """Single-row watermark: raw telemetry before rolled_until is rolled up."""
+
+    id: int | None = Field(default=None, primary_key=True)
+    __table_args__ = {"extend_existing": True}
+    rolled_until: datetime  # Hour-aligned, exclusive
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -4,6 +4,7 @@ from cryptography.fernet import Fernet
 from sqlmodel import Field, SQLModel, select
 
 from core.config import get_settings
+from core.key_cache import get_key_cache
 from models.encryption_key import EncryptionKey
 
 settings = get_settings()
@@ -13,6 +14,9 @@ def get_active_encryption_key(session=None) -> tuple[str, str]:
     """
     Get the active encryption key.
 
+    The decrypted key is cached (see core/key_cache.py), so only the first
+    lookup per cache lifetime queries and decrypts it.
+
     Args:
         session: Optional database session
 
@@ -21,6 +25,10 @@ def get_active_encryption_key(session=None) -> tuple[str, str]:
     """
     # Try to get active key from database if session provided
     if session and hasattr(session, "exec"):
+        key_cache = get_key_cache()
+        cached = key_cache.get_active()
+        if cached:
+            return cached
         try:
             active_key = session.exec(
                 select(EncryptionKey).where(
@@ -30,11 +38,10 @@ def get_active_encryption_key(session=None) -> tuple[str, str]:
 
             if active_key:
                 # Decrypt the key using master key
-                master_key = settings.ENCRYPTION_KEY.encode()
-                master_cipher = Fernet(master_key)
-                decrypted_key = master_cipher.decrypt(
+                decrypted_key = key_cache.master_cipher().decrypt(
                     active_key.encrypted_key.encode()
                 ).decode()
+                key_cache.set_active(active_key.key_id, decrypted_key)
                 return (active_key.key_id, decrypted_key)
         except Exception:
             # If database lookup fails, fall back to environment variable
@@ -49,6 +56,22 @@ def get_active_encryption_key(session=None) -> tuple[str, str]:
     return ("legacy", key)
 
 
+def _key_cipher(session, key_id: str) -> Fernet | None:
+    """Cipher for a stored data key by key_id, loaded once per process."""
+    key_cache = get_key_cache()
+    cipher = key_cache.cipher(key_id)
+    if cipher is None:
+        key_record = session.exec(
+            select(EncryptionKey).where(EncryptionKey.key_id == key_id)
+        ).first()
+        if key_record:
+            key_value = key_cache.master_cipher().decrypt(
+                key_record.encrypted_key.encode()
+            ).decode()
+            cipher = key_cache.cipher(key_id, key_value)
+    return cipher
+
+
 class Token(SQLModel, table=True):
     id: int | None = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id")
@@ -62,38 +85,52 @@ class Token(SQLModel, table=True):
     def set_token(self, token: str, session=None):
         """Encrypt token using active key."""
         key_id, key_value = get_active_encryption_key(session)
-        cipher = Fernet(key_value.encode())
+        cipher = get_key_cache().cipher(key_id, key_value)
         self.encrypted_token = cipher.encrypt(token.encode()).decode()
         self.key_id = key_id
+        get_key_cache().put_token(self.encrypted_token, token)
 
     def get_token_value(self, session) -> str:
-        """Decrypt token using the key_id (requires session)."""
+        """
+        Decrypt token using the key_id (requires session).
+
+        Recently decrypted tokens are served from the key cache without a
+        query or decryption.
+        """
+        key_cache = get_key_cache()
+        cached = key_cache.get_token(self.encrypted_token)
+        if cached is not None:
+            return cached
+
         key_id, key_value = get_active_encryption_key(session)
 
         # If key_id doesn't match, try to find the correct key
+        cipher = None
         if self.key_id not in (key_id, "legacy"):
-            # Look up the key by key_id
-            key_record = session.exec(
-                select(EncryptionKey).where(
-                    EncryptionKey.key_id == self.key_id)).first()
-            if key_record:
-                master_key = settings.ENCRYPTION_KEY.encode()
-                master_cipher = Fernet(master_key)
-                key_value = master_cipher.decrypt(
-                    key_record.encrypted_key.encode()
-                ).decode()
+            cipher = _key_cipher(session, self.key_id)
+        if cipher is None:
+            cipher = key_cache.cipher(key_id, key_value)
 
-        cipher = Fernet(key_value.encode())
-        return cipher.decrypt(self.encrypted_token.encode()).decode()
+        value = cipher.decrypt(self.encrypted_token.encode()).decode()
+        key_cache.put_token(self.encrypted_token, value)
+        return value
 
     @property
     def token_value(self) -> str:
         """Decrypt token (backward compatibility - uses active key)."""
         # For backward compatibility, use active key from environment
         # This will be replaced by get_token_value() in key rotation service
-        _, key_value = get_active_encryption_key()
-        cipher = Fernet(key_value.encode())
-        return cipher.decrypt(self.encrypted_token.encode()).decode()
+        key_cache = get_key_cache()
+        cached = key_cache.get_token(self.encrypted_token)
+        if cached is not None:
+            return cached
+
+        key_id, key_value = get_active_encryption_key()
+        # Falls back to any data key this process has already loaded
+        cipher = key_cache.multi_fernet(key_cache.cipher(key_id, key_value))
+        value = cipher.decrypt(self.encrypted_token.encode()).decode()
+        key_cache.put_token(self.encrypted_token, value)
+        return value
 
 
 class TokenCreate(SQLModel):
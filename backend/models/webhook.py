@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Any
 
-from sqlalchemy import JSON, Column
+from sqlalchemy import JSON, Column, Index
 from sqlmodel import Field, SQLModel
 
 
@@ -19,12 +19,31 @@ class Webhook(SQLModel, table=True):
 
 
 class WebhookDelivery(SQLModel, table=True):
+    """
+    One event for one webhook; the rows double as the retry outbox.
+
+    Status: "pending" (due at next_attempt_at), "sending" (claimed by a
+    worker until claimed_until), "success", "failed" (last attempt failed,
+    retried at next_attempt_at) or "dead" (gave up, see last_error).
+    """
+
     id: int | None = Field(default=None, primary_key=True)
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        Index(
+            "ix_webhookdelivery_status_next_attempt_at",
+            "status",
+            "next_attempt_at",
+        ),
+        {"extend_existing": True},
+    )
     webhook_id: int = Field(foreign_key="webhook.id")
     event_type: str
     payload: dict[str, Any] = Field(default={}, sa_column=Column(JSON))
-    status: str = Field(index=True)  # "pending", "success", "failed"
+    status: str = Field(index=True)
     response_code: int | None = None
+    attempts: int = Field(default=0)
+    next_attempt_at: datetime | None = None
+    claimed_until: datetime | None = None
+    last_error: str | None = None
     delivered_at: datetime | None = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -0,0 +1,156 @@
+"""
+Benchmark 30-day cost aggregation over a seeded telemetry table.
+
+Compares the old budget path (load every Telemetry row in the window, then
+bucket per day with a nested Python loop) with aggregate_costs(), which
+groups by date_trunc('day'), provider and model in the database.
+
+Rows are seeded into a fresh database; point --database-url at a scratch
+Postgres to measure the covering indexes at production scale.
+
+Usage:
+    python scripts/bench_cost_aggregation.py [--rows 5000000]
+        [--database-url sqlite:///bench_costs.db]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.database import get_async_database_url
+from models.telemetry import Telemetry
+from models.user import User
+from services.telemetry_rollup_service import (
+    aggregate_costs,
+    floor_day,
+)
+
+SEED_BATCH = 10000
+USERS = 10
+PROVIDERS = {
+    "openai": ["gpt-4", "gpt-3.5-turbo"],
+    "anthropic": ["claude-3-opus", "claude-3-haiku"],
+    "huggingface": ["meta-llama/Llama-2-7b"],
+}
+
+
+def _seed(engine, rows: int, now: datetime) -> None:
+    SQLModel.metadata.create_all(engine)
+    rng = random.Random(42)
+    pairs = [(p, m) for p, models in PROVIDERS.items() for m in models]
+    with Session(engine) as session:
+        session.execute(
+            insert(User),
+            [
+                {"email": f"bench{i}@example.com", "password_hash": "x"}
+                for i in range(1, USERS + 1)
+            ],
+        )
+        for offset in range(0, rows, SEED_BATCH):
+            batch = []
+            for _ in range(min(SEED_BATCH, rows - offset)):
+                sdk, model = rng.choice(pairs)
+                batch.append(
+                    {
+                        "user_id": rng.randint(1, USERS),
+                        "sdk": sdk,
+                        "model": model,
+                        "input_summary": "bench",
+                        "timestamp": now
+                        - timedelta(seconds=rng.randint(0, 45 * 86400)),
+                        "execution_time_ms": rng.uniform(50, 2000),
+                        "status": "success",
+                        "input_tokens": rng.randint(10, 2000),
+                        "output_tokens": rng.randint(10, 1000),
+                        "cost": rng.uniform(0.0001, 0.05),
+                    }
+                )
+            session.execute(insert(Telemetry), batch)
+            session.commit()
+
+
+def _legacy_daily_costs(engine, user_id: int, now: datetime) -> list[float]:
+    start_date = now - timedelta(days=30)
+    with Session(engine) as session:
+        records = session.exec(
+            select(Telemetry).where(
+                Telemetry.user_id == user_id,
+                Telemetry.timestamp >= start_date,
+                Telemetry.timestamp <= now,
+            )
+        ).all()
+    daily_costs = []
+    for i in range(30):
+        day_start = start_date + timedelta(days=i)
+        day_end = day_start + timedelta(days=1)
+        day_records = [r for r in records if day_start <= r.timestamp < day_end]
+        daily_costs.append(sum(r.cost or 0.0 for r in day_records))
+    return daily_costs
+
+
+async def _sql_daily_costs(session, user_id: int, now: datetime) -> list[float]:
+    start_date = floor_day(now) - timedelta(days=29)
+    buckets = await aggregate_costs(session, user_id, start_date, now)
+    by_day = {}
+    for bucket in buckets:
+        by_day[bucket.bucket_start] = by_day.get(bucket.bucket_start, 0.0) + bucket.cost
+    return [by_day.get(start_date + timedelta(days=i), 0.0) for i in range(30)]
+
+
+def _report(label: str, timings: list[float]) -> None:
+    print(
+        f"{label:<26} median={statistics.median(timings):9.1f}ms "
+        f"min={min(timings):9.1f}ms max={max(timings):9.1f}ms"
+    )
+
+
+async def main(rows: int, database_url: str, repeats: int):
+    now = datetime.utcnow()
+    engine = create_engine(database_url)
+    print(f"Seeding {rows} telemetry rows into {engine.url.render_as_string()}")
+    start = time.perf_counter()
+    _seed(engine, rows, now)
+    print(f"seeded in {time.perf_counter() - start:.1f}s")
+
+    legacy, grouped = [], []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        _legacy_daily_costs(engine, 1, now)
+        legacy.append((time.perf_counter() - start) * 1000)
+
+    async_engine = create_async_engine(get_async_database_url(database_url))
+    async with AsyncSession(async_engine) as session:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            await _sql_daily_costs(session, 1, now)
+            grouped.append((time.perf_counter() - start) * 1000)
+    await async_engine.dispose()
+    engine.dispose()
+
+    print(f"30-day daily costs for one of {USERS} users, {repeats} runs")
+    _report("rows + python loop", legacy)
+    _report("SQL GROUP BY date_trunc", grouped)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument(
+        "--database-url",
+        default=os.getenv("DATABASE_URL", "sqlite:///bench_costs.db"),
+    )
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.database_url, args.repeats))
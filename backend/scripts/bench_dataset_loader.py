@@ -0,0 +1,98 @@
+"""
+Benchmark evaluation dataset loading: peak memory and rows per second.
+
+Writes --rows rows as JSON, JSONL and CSV into a temporary directory, then
+reads each one with the old approach (load the whole file into a list and
+validate it afterwards) and with the streaming iter_dataset(), tracking the
+peak Python heap with tracemalloc.
+
+Usage:
+    python scripts/bench_dataset_loader.py [--rows 200000]
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from services.dataset_loader import iter_dataset
+
+
+def _rows(count: int):
+    for i in range(count):
+        yield {
+            "input": f"Translate sentence number {i} to French",
+            "expected": f"Phrase {i}",
+        }
+
+
+def _write(tmp: str, rows: int) -> dict[str, str]:
+    paths = {
+        ext: os.path.join(tmp, f"data.{ext}") for ext in ("json", "jsonl", "csv")
+    }
+    with open(paths["json"], "w") as f:
+        json.dump(list(_rows(rows)), f)
+    with open(paths["jsonl"], "w") as f:
+        for row in _rows(rows):
+            f.write(json.dumps(row) + "\n")
+    with open(paths["csv"], "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["input", "expected"])
+        writer.writeheader()
+        writer.writerows(_rows(rows))
+    return paths
+
+
+def _load_list(path: str) -> int:
+    """The pre-streaming loader: whole file into a list, then validate."""
+    with open(path) as f:
+        if path.endswith(".csv"):
+            dataset = list(csv.DictReader(f))
+        elif path.endswith(".jsonl"):
+            dataset = [json.loads(line) for line in f if line.strip()]
+        else:
+            dataset = json.load(f)
+    for item in dataset:
+        if "input" not in item or "expected" not in item:
+            raise ValueError("invalid row")
+    return len(dataset)
+
+
+def _stream(path: str) -> int:
+    return sum(1 for _ in iter_dataset(path))
+
+
+def _measure(fn, path: str) -> tuple[int, float, float]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    rows = fn(path)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return rows, elapsed, peak / 1024 / 1024
+
+
+def main(rows: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = _write(tmp, rows)
+        print(f"{rows} rows")
+        for ext, path in paths.items():
+            size_mb = os.path.getsize(path) / 1024 / 1024
+            for name, fn in (("list", _load_list), ("streaming", _stream)):
+                count, elapsed, peak_mb = _measure(fn, path)
+                print(
+                    f"{ext:<6} {size_mb:6.1f}MB {name:<10} "
+                    f"peak {peak_mb:8.1f}MB  {count / elapsed:10.0f} rows/s"
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+    main(args.rows)
@@ -0,0 +1,113 @@
+"""
+Benchmark PII analysis throughput for the regex fallback and Presidio.
+
+For each available path, compares analyzing texts one at a time with
+analyze_many() (spaCy nlp.pipe batches for Presidio, a process pool for the
+regex fallback when --processes > 1). The Presidio path is skipped if
+presidio-analyzer or its spaCy model is not installed.
+
+Usage:
+    python scripts/bench_pii_analysis.py [--texts 2000] [--processes 4]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from services.pii_detection_service import PIIDetectionService
+
+FRAGMENTS = [
+    "Please summarise the attached quarterly report for the board.",
+    "Contact {name} at {name}@example.com or 555-{n:03d}-{m:04d}.",
+    "The customer's SSN is {n:03d}-{k:02d}-{m:04d}; verify before refunding.",
+    "Translate the following paragraph into French and keep the tone formal.",
+    "{name} from Berlin asked about invoice #{m} dated last Tuesday.",
+]
+NAMES = ["alice", "bob", "carol", "dave", "erin", "frank"]
+
+
+def _make_texts(count: int) -> list[str]:
+    rng = random.Random(7)
+    texts = []
+    for _ in range(count):
+        parts = [
+            rng.choice(FRAGMENTS).format(
+                name=rng.choice(NAMES),
+                n=rng.randint(100, 999),
+                k=rng.randint(10, 99),
+                m=rng.randint(1000, 9999),
+            )
+            for _ in range(rng.randint(2, 6))
+        ]
+        texts.append(" ".join(parts))
+    return texts
+
+
+def _measure(label: str, fn, texts: list[str]) -> None:
+    start = time.perf_counter()
+    results = fn(texts)
+    elapsed = time.perf_counter() - start
+    found = sum(len(r) for r in results)
+    print(
+        f"{label:<34} {len(texts) / elapsed:10.0f} texts/s "
+        f"({elapsed:6.2f}s, {found} entities)"
+    )
+
+
+def main(count: int, processes: int, batch_size: int):
+    texts = _make_texts(count)
+    print(f"{count} texts, batch size {batch_size}, {os.cpu_count()} CPUs")
+
+    service = PIIDetectionService()
+    presidio = service.analyzer
+    service.analyzer = None  # force the regex fallback first
+
+    _measure("regex: one at a time", lambda t: [service.analyze(x) for x in t], texts)
+    _measure(
+        "regex: analyze_many",
+        lambda t: service.analyze_many(t, batch_size=batch_size, n_process=1),
+        texts,
+    )
+    if processes > 1:
+        _measure(
+            f"regex: analyze_many x{processes} procs",
+            lambda t: service.analyze_many(
+                t, batch_size=batch_size, n_process=processes
+            ),
+            texts,
+        )
+
+    if presidio is None:
+        print("presidio: not available, skipping")
+        return
+
+    service.analyzer = presidio
+    _measure(
+        "presidio: one at a time", lambda t: [service.analyze(x) for x in t], texts
+    )
+    _measure(
+        "presidio: analyze_many (nlp.pipe)",
+        lambda t: service.analyze_many(t, batch_size=batch_size, n_process=1),
+        texts,
+    )
+    if processes > 1:
+        _measure(
+            f"presidio: analyze_many x{processes} procs",
+            lambda t: service.analyze_many(
+                t, batch_size=batch_size, n_process=processes
+            ),
+            texts,
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+    main(args.texts, args.processes, args.batch_size)
@@ -0,0 +1,75 @@
+"""
+Microbenchmark prompt rendering with and without the compiled-template cache.
+
+"cache off" compiles the template on every render (the old render_prompt
+behaviour); "cache on" goes through render_prompt and the TemplateCache.
+
+Usage:
+    python scripts/bench_prompt_render.py [--renders 20000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from models.prompt import Prompt
+from services.prompt_service import (
+    _environment,
+    get_template_cache,
+    render_prompt,
+)
+
+TEMPLATE = """You are a support assistant for {{ product }}.
+{% if tier == "enterprise" %}Prioritise SLA commitments.{% endif %}
+Customer: {{ customer }}
+Recent tickets:
+{% for ticket in tickets %}- #{{ ticket.id }} {{ ticket.title | title }}
+{% endfor %}
+Question: {{ question }}"""
+
+VARIABLES = {
+    "product": "Aistrale",
+    "tier": "enterprise",
+    "customer": "Acme",
+    "tickets": [{"id": i, "title": f"ticket number {i}"} for i in range(5)],
+    "question": "Why did my latency spike?",
+}
+
+
+def _render_uncached(prompt: Prompt, variables: dict) -> str:
+    return _environment.from_string(prompt.template).render(**variables)
+
+
+def _measure(label: str, render, prompt: Prompt, renders: int) -> None:
+    start = time.perf_counter()
+    for _ in range(renders):
+        render(prompt, VARIABLES)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:<10} {renders / elapsed:10.0f} renders/s "
+        f"({elapsed / renders * 1e6:7.1f}us/render)"
+    )
+
+
+def main(renders: int):
+    prompt = Prompt(
+        id=1,
+        name="support",
+        template=TEMPLATE,
+        input_variables=list(VARIABLES),
+        version=1,
+    )
+    print(f"{renders} renders of a {len(TEMPLATE)}-char template")
+    _measure("cache off", _render_uncached, prompt, renders)
+    _measure("cache on", render_prompt, prompt, renders)
+    print(f"cache stats: {get_template_cache().stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--renders", type=int, default=20000)
+    args = parser.parse_args()
+    main(args.renders)
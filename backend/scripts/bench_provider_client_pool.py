@@ -0,0 +1,118 @@
+"""
+Benchmark provider client reuse against a local OpenAI-compatible stub.
+
+Compares building a fresh OpenAIProvider per request (the old factory
+behaviour) with get_provider(), which reuses pooled SDK clients.
+
+Usage:
+    python scripts/bench_provider_client_pool.py [--requests 500]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from services.llm_providers.client_pool import get_client_pool
+from services.llm_providers.factory import get_provider
+from services.llm_providers.openai import OpenAIProvider
+
+STUB_RESPONSE = json.dumps(
+    {
+        "id": "chatcmpl-bench",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "gpt-3.5-turbo",
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": "ok"},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {"prompt_tokens": 5, "completion_tokens": 1, "total_tokens": 6},
+    }
+).encode()
+
+
+async def _handle_connection(reader, writer):
+    """Minimal HTTP/1.1 keep-alive handler returning a chat completion."""
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            if length:
+                await reader.readexactly(length)
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: application/json\r\n"
+                b"Content-Length: " + str(len(STUB_RESPONSE)).encode() + b"\r\n"
+                b"Connection: keep-alive\r\n\r\n" + STUB_RESPONSE
+            )
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionResetError):
+        pass
+    finally:
+        writer.close()
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+async def _measure(label: str, make_provider, requests: int, close_each: bool):
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        provider = make_provider()
+        await provider.run_inference(model="gpt-3.5-turbo", input_text="ping")
+        latencies.append((time.perf_counter() - start) * 1000)
+        if close_each:
+            await provider.client.close()
+
+    print(
+        f"{label:<22} p50={statistics.median(latencies):7.2f}ms "
+        f"p99={_percentile(latencies, 99):7.2f}ms "
+        f"mean={statistics.fmean(latencies):7.2f}ms"
+    )
+
+
+async def main(requests: int):
+    server = await asyncio.start_server(_handle_connection, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    # Read by the SDK when each client is built
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{port}/v1"
+
+    async with server:
+        print(f"{requests} sequential requests against stub on port {port}")
+        await _measure(
+            "fresh client/request",
+            lambda: OpenAIProvider(token="sk-bench"),
+            requests,
+            close_each=True,
+        )
+        await _measure(
+            "pooled client",
+            lambda: get_provider("openai", token="sk-bench"),
+            requests,
+            close_each=False,
+        )
+        print(f"pool stats: {get_client_pool().stats()}")
+        await get_client_pool().aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
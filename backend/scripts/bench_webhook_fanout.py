@@ -0,0 +1,166 @@
+"""
+Load test webhook fan-out against local stub receivers.
+
+Registers --webhooks endpoints spread over --hosts stub receivers (each on
+its own port, answering after --delay-ms) in a temporary SQLite database,
+then dispatches --events events. Compares the old behaviour (one send at a
+time, a new httpx client and two commits per delivery) with
+WebhookService.dispatch_event on the shared WebhookDispatcher, and reports
+deliveries per second.
+
+Usage:
+    python scripts/bench_webhook_fanout.py [--webhooks 50] [--events 20]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import UTC, datetime
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+import httpx
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models.webhook import Webhook, WebhookDelivery
+from models.workspace import Workspace
+from services.webhook_dispatcher import (
+    HTTP_SUCCESS_MAX_EXCLUSIVE,
+    WebhookDispatcher,
+)
+from services.webhook_outbox import WebhookOutbox
+from services.webhook_service import WebhookService
+
+
+def _make_handler(delay_s: float):
+    async def handle(reader, writer):
+        """Minimal HTTP/1.1 keep-alive handler answering 204 after a delay."""
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":", 1)[1])
+                if length:
+                    await reader.readexactly(length)
+                await asyncio.sleep(delay_s)
+                writer.write(
+                    b"HTTP/1.1 204 No Content\r\n"
+                    b"Connection: keep-alive\r\n\r\n"
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    return handle
+
+
+async def _serial_dispatch(session: AsyncSession, service, event: dict) -> None:
+    """The pre-dispatcher loop: one send, one client and two commits at a time."""
+    webhooks = (await session.exec(select(Webhook))).all()
+    for webhook in webhooks:
+        delivery = WebhookDelivery(
+            webhook_id=webhook.id,
+            event_type="bench.event",
+            payload=event,
+            status="pending",
+        )
+        session.add(delivery)
+        await session.commit()
+        headers = {
+            "Content-Type": "application/json",
+            "X-Aistrale-Signature": service._generate_signature(
+                webhook.secret, event
+            ),
+        }
+        try:
+            async with httpx.AsyncClient() as client:
+                response = await client.post(webhook.url, json=event, headers=headers)
+            delivery.status = (
+                "success"
+                if response.status_code < HTTP_SUCCESS_MAX_EXCLUSIVE
+                else "failed"
+            )
+            delivery.response_code = response.status_code
+        except Exception:
+            delivery.status = "failed"
+        delivery.delivered_at = datetime.now(UTC)
+        session.add(delivery)
+        await session.commit()
+
+
+async def main(webhooks: int, events: int, hosts: int, delay_ms: float):
+    servers = [
+        await asyncio.start_server(_make_handler(delay_ms / 1000), "127.0.0.1", 0)
+        for _ in range(hosts)
+    ]
+    ports = [server.sockets[0].getsockname()[1] for server in servers]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp}/bench.db")
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            session.add(Workspace(id=1, name="bench"))
+            for i in range(webhooks):
+                session.add(
+                    Webhook(
+                        workspace_id=1,
+                        url=f"http://127.0.0.1:{ports[i % hosts]}/hook/{i}",
+                        events=["*"],
+                        secret="secret",
+                    )
+                )
+            await session.commit()
+
+            print(
+                f"{webhooks} webhooks on {hosts} hosts, {events} events, "
+                f"receiver delay {delay_ms:.0f}ms"
+            )
+            dispatcher = WebhookDispatcher()
+            service = WebhookService(
+                session, outbox=WebhookOutbox(dispatcher=dispatcher)
+            )
+
+            start = time.perf_counter()
+            for n in range(events):
+                await _serial_dispatch(session, service, {"n": n})
+            elapsed = time.perf_counter() - start
+            print(
+                f"{'serial, client per send':<26} "
+                f"{webhooks * events / elapsed:8.0f} deliveries/s ({elapsed:.2f}s)"
+            )
+
+            start = time.perf_counter()
+            for n in range(events):
+                await service.dispatch_event(1, "bench.event", {"n": n})
+            elapsed = time.perf_counter() - start
+            print(
+                f"{'dispatcher fan-out':<26} "
+                f"{webhooks * events / elapsed:8.0f} deliveries/s ({elapsed:.2f}s)"
+            )
+            print(f"dispatcher stats: {dispatcher.stats()}")
+            await dispatcher.aclose()
+        await engine.dispose()
+
+    for server in servers:
+        server.close()
+        await server.wait_closed()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--webhooks", type=int, default=50)
+    parser.add_argument("--events", type=int, default=20)
+    parser.add_argument("--hosts", type=int, default=5)
+    parser.add_argument("--delay-ms", type=float, default=20.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.webhooks, args.events, args.hosts, args.delay_ms))
@@ -1,121 +1,292 @@
+import asyncio
 import logging
-import random
-from datetime import datetime
+import math
+import time
 from typing import Any
 
+from sqlmodel import Session, select
+
+from core.config import get_settings
+from core.stats import percentile
 from models.multi_provider import ABTest, ABTestResult
+from models.token import Token
+from services.llm_providers.base import LLMProvider
+from services.llm_providers.factory import get_provider
+from services.pricing_service import PricingService
+from services.provider_limiter import ProviderLimiters, get_provider_limiters
+from services.quality_service import QualityScoringService
 
 logger = logging.getLogger(__name__)
 
+LATENCY_PERCENTILES = (50, 90, 95, 99)
+
+# A sample variance needs at least two values
+MIN_SAMPLES_FOR_CI = 2
+
+# Two-sided 95% critical values of Student's t by degrees of freedom; the
+# normal 1.96 is used beyond the table
+_T95 = {
+    1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365,
+    8: 2.306, 9: 2.262, 10: 2.228, 11: 2.201, 12: 2.179, 13: 2.160,
+    14: 2.145, 15: 2.131, 16: 2.120, 17: 2.110, 18: 2.101, 19: 2.093,
+    20: 2.086, 21: 2.080, 22: 2.074, 23: 2.069, 24: 2.064, 25: 2.060,
+    26: 2.056, 27: 2.052, 28: 2.048, 29: 2.045, 30: 2.042,
+}
+
+
+def parse_variant(variant: str) -> tuple[str, str]:
+    """Split a variant ("openai" or "openai:gpt-4o-mini") into provider, model."""
+    provider, _, model = variant.partition(":")
+    return provider.strip().lower(), model.strip() or "auto"
+
+
+def mean_confidence_interval(values: list[float]) -> dict[str, float]:
+    """Mean with a 95% Student's t confidence interval (zero width if n < 2)."""
+    n = len(values)
+    mean = sum(values) / n if n else 0.0
+    if n < MIN_SAMPLES_FOR_CI:
+        return {"mean": mean, "ci_low": mean, "ci_high": mean}
+    variance = sum((v - mean) ** 2 for v in values) / (n - 1)
+    margin = _T95.get(n - 1, 1.96) * math.sqrt(variance / n)
+    return {"mean": mean, "ci_low": mean - margin, "ci_high": mean + margin}
+
 
 class ABTestService:
     """
     Service to execute and analyze A/B tests across multiple providers.
+
+    A test sends its prompt ``repetitions`` times to each variant, a
+    provider optionally pinned to a model ("anthropic:claude-3-haiku-20240307").
+    All calls run concurrently within the per-provider limits shared with
+    other bulk work (services/provider_limiter.py), using the user's token
+    for each provider. Every call is saved as an ABTestResult; failed calls
+    are saved with their error and left out of the latency, cost and
+    quality statistics.
     """
 
-    async def start_test(
-            self,
-            name: str,
-            prompt: str,
-            providers: list[str]) -> ABTest:
+    def __init__(
+        self,
+        session: Session,
+        limiters: ProviderLimiters | None = None,
+        repetitions: int | None = None,
+        quality_service: QualityScoringService | None = None,
+    ):
+        self.session = session
+        self.limiters = limiters or get_provider_limiters()
+        self.repetitions = repetitions or get_settings().AB_TEST_REPETITIONS
+        self.quality_service = quality_service or QualityScoringService()
+
+    def create_test(
+        self,
+        user_id: int,
+        name: str,
+        prompt: str,
+        providers: list[str],
+        repetitions: int | None = None,
+    ) -> ABTest:
         """
-        Create and start a new A/B test.
-        In reality, this would likely queue a background job.
-        For simulation, we'll execute immediately.
+        Save a new A/B test, to be executed by run_test.
+
+        Raises:
+            ValueError: If the user has no token for one of the providers
         """
+        for variant in providers:
+            self._get_token(user_id, parse_variant(variant)[0])
         test = ABTest(
             name=name,
             prompt=prompt,
             providers=providers,
-            status="running")
-        # Save to DB (mock)
-        test.id = random.randint(1, 1000)
-
-        await self._run_test_execution(test)
-        test.status = "completed"
+            status="running",
+            user_id=user_id,
+            repetitions=repetitions or self.repetitions,
+        )
+        self.session.add(test)
+        self.session.commit()
+        self.session.refresh(test)
+        return test
 
+    async def start_test(
+            self,
+            user_id: int,
+            name: str,
+            prompt: str,
+            providers: list[str],
+            repetitions: int | None = None) -> ABTest:
+        """Create an A/B test and execute it."""
+        test = self.create_test(user_id, name, prompt, providers, repetitions)
+        await self.run_test(test.id)
         return test
 
+    async def run_test(self, test_id: int) -> list[ABTestResult]:
+        """
+        Execute a saved test and store its results.
+
+        The test ends "completed" if any call succeeded, "failed" otherwise.
+        """
+        test = self.session.get(ABTest, test_id)
+        if not test:
+            raise ValueError("A/B test not found")
+        try:
+            results = await self._run_test_execution(test)
+        except Exception:
+            test.status = "failed"
+            self.session.add(test)
+            self.session.commit()
+            raise
+
+        self.session.add_all(results)
+        test.status = (
+            "completed" if any(r.error is None for r in results) else "failed"
+        )
+        self.session.add(test)
+        self.session.commit()
+        return results
+
+    def _get_token(self, user_id: int, provider: str) -> Token:
+        tokens = select(Token).where(
+            Token.user_id == user_id, Token.provider == provider
+        )
+        token = (
+            self.session.exec(tokens.where(Token.is_default)).first()
+            or self.session.exec(tokens).first()
+        )
+        if not token:
+            raise ValueError(f"No API token found for provider {provider}")
+        return token
+
     async def _run_test_execution(self, test: ABTest) -> list[ABTestResult]:
         """
         Execute the prompt against all configured providers.
         """
-        results = []
-        for provider in test.providers:
-            # Simulate execution
-            latency = random.uniform(200, 1500)
-            result = ABTestResult(
-                ab_test_id=test.id,
-                provider=provider,
-                response=f"Response from {provider} for '{test.prompt}'",
-                latency_ms=latency,
-                cost=0.01 * (latency / 1000),  # Dummy cost logic
-                quality_score=random.uniform(0.7, 1.0),
+        llms: dict[str, LLMProvider] = {}
+        for variant in dict.fromkeys(test.providers):
+            provider = parse_variant(variant)[0]
+            token = self._get_token(test.user_id, provider)
+            llms[variant] = get_provider(
+                provider, token=token.get_token_value(self.session)
             )
-            results.append(result)
-        return results
 
-    def list_tests(self) -> list[ABTest]:
+        return list(await asyncio.gather(*(
+            self._run_once(test, variant, llm)
+            for variant, llm in llms.items()
+            for _ in range(test.repetitions)
+        )))
+
+    async def _run_once(
+        self, test: ABTest, variant: str, llm: LLMProvider
+    ) -> ABTestResult:
+        """One call, timed from when the provider's limiter lets it start."""
+        provider, model = parse_variant(variant)
+        async with self.limiters.get(provider):
+            start = time.perf_counter()
+            try:
+                inference = await llm.run_inference(
+                    model=model, input_text=test.prompt
+                )
+            except Exception as e:
+                logger.warning(f"A/B test {test.id}: {variant} failed: {e}")
+                return ABTestResult(
+                    ab_test_id=test.id,
+                    provider=variant,
+                    response="",
+                    latency_ms=(time.perf_counter() - start) * 1000,
+                    cost=0.0,
+                    error=str(e),
+                )
+            latency_ms = (time.perf_counter() - start) * 1000
+
+        response = str(inference["output"])
+        return ABTestResult(
+            ab_test_id=test.id,
+            provider=variant,
+            response=response,
+            latency_ms=latency_ms,
+            cost=PricingService.calculate_cost(
+                provider=provider,
+                model=model,
+                input_tokens=inference.get("input_tokens"),
+                output_tokens=inference.get("output_tokens"),
+            ),
+            quality_score=self.quality_service.calculate_quality_score(response),
+        )
+
+    def list_tests(self, user_id: int) -> list[ABTest]:
         """
         List all A/B tests.
         """
-        # Mock: Return empty list or sample tests
-        return []
+        return self.session.exec(
+            select(ABTest)
+            .where(ABTest.user_id == user_id)
+            .order_by(ABTest.created_at.desc())
+        ).all()
 
-    def get_results(self, test_id: int) -> dict[str, Any]:
+    def get_results(self, test_id: int, user_id: int) -> dict[str, Any] | None:
         """
-        Analyze results of a completed test.
+        Analyze results of a test: per-variant latency percentiles, and
+        cost and quality means with 95% confidence intervals.
+
+        Returns:
+            The analysis, or None if the test doesn't exist or belongs to
+            another user
         """
-        # Mock retrieval of results
-        # In reality, fetch ABTestResult where ab_test_id=test_id
-
-        # Simulating data for test_id 1
-        results = [
-            ABTestResult(
-                ab_test_id=test_id,
-                provider="openai",
-                response="A",
-                latency_ms=500,
-                cost=0.02,
-                quality_score=0.9,
-            ),
-            ABTestResult(
-                ab_test_id=test_id,
-                provider="anthropic",
-                response="B",
-                latency_ms=1000,
-                cost=0.01,
-                quality_score=0.95,
-            ),
-        ]
+        test = self.session.get(ABTest, test_id)
+        if not test or test.user_id != user_id:
+            return None
+        results = self.session.exec(
+            select(ABTestResult)
+            .where(ABTestResult.ab_test_id == test_id)
+            .order_by(ABTestResult.id)
+        ).all()
 
-        best_quality = max(results, key=lambda r: r.quality_score)
-        fastest = min(results, key=lambda r: r.latency_ms)
+        statistics = {
+            variant: self._variant_statistics(
+                [r for r in results if r.provider == variant]
+            )
+            for variant in dict.fromkeys(test.providers)
+        }
+        answered = {v: s for v, s in statistics.items() if s["total_responses"]}
 
         return {
             "test": {
-                "id": test_id,
-                "name": "Sample Test",
-                "prompt": "Test prompt",
-                "providers": ["openai", "anthropic"],
-                "status": "completed",
-                "created_at": datetime.utcnow().isoformat(),
+                "id": test.id,
+                "name": test.name,
+                "prompt": test.prompt,
+                "providers": test.providers,
+                "repetitions": test.repetitions,
+                "status": test.status,
+                "created_at": test.created_at.isoformat(),
             },
             "results": results,
-            "fastest_provider": fastest.provider,
-            "best_quality_provider": best_quality.provider,
-            "statistics": {
-                "openai": {
-                    "avg_latency": 500,
-                    "avg_cost": 0.02,
-                    "avg_quality": 0.9,
-                    "total_responses": 1,
-                },
-                "anthropic": {
-                    "avg_latency": 1000,
-                    "avg_cost": 0.01,
-                    "avg_quality": 0.95,
-                    "total_responses": 1,
-                },
+            "fastest_provider": min(
+                answered, key=lambda v: answered[v]["latency_ms"]["p50"],
+                default=None,
+            ),
+            "best_quality_provider": max(
+                answered, key=lambda v: answered[v]["avg_quality"], default=None
+            ),
+            "statistics": statistics,
+        }
+
+    @staticmethod
+    def _variant_statistics(results: list[ABTestResult]) -> dict[str, Any]:
+        succeeded = [r for r in results if r.error is None]
+        latencies = sorted(r.latency_ms for r in succeeded)
+        cost = mean_confidence_interval([r.cost for r in succeeded])
+        quality = mean_confidence_interval([r.quality_score for r in succeeded])
+        latency = mean_confidence_interval(latencies)
+        return {
+            "avg_latency": latency["mean"],
+            "avg_cost": cost["mean"],
+            "avg_quality": quality["mean"],
+            "total_responses": len(succeeded),
+            "errors": len(results) - len(succeeded),
+            "error_rate": (
+                (len(results) - len(succeeded)) / len(results) if results else 0.0
+            ),
+            "latency_ms": {
+                **{f"p{p}": percentile(latencies, p) for p in LATENCY_PERCENTILES},
+                "ci95": [latency["ci_low"], latency["ci_high"]],
             },
+            "cost_ci95": [cost["ci_low"], cost["ci_high"]],
+            "quality_ci95": [quality["ci_low"], quality["ci_high"]],
         }
@@ -0,0 +1,168 @@
+"""Provider batch jobs: submit, wait for the provider, collect the results."""
+
+import asyncio
+import time
+
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.config import get_settings
+from core.exceptions import InferenceError
+from core.metrics import INFERENCE_COST, INFERENCE_COUNT
+from models.telemetry import Telemetry
+from services.llm_providers.base import (
+    BATCH_ENDED,
+    BATCH_FAILED,
+    BatchItemResult,
+    BatchRequest,
+    LLMProvider,
+)
+from services.pricing_service import PricingService
+from services.telemetry_writer import get_telemetry_writer
+
+
+class BatchRunner:
+    """
+    Runs requests as provider batch jobs, for workloads that can wait
+    (evaluations, A/B tests). Batch jobs are billed at a discount and don't
+    count against the interactive rate limits, but can take up to a day.
+
+    Waiting is done by polling every ``poll_interval_s``; a batch that
+    hasn't ended after ``timeout_s`` raises but keeps running at the
+    provider, and can be collected later by its ID.
+    """
+
+    def __init__(
+        self,
+        poll_interval_s: float = 30.0,
+        timeout_s: float = 26 * 3600.0,
+        max_requests: int = 10000,
+    ):
+        self.poll_interval_s = poll_interval_s
+        self.timeout_s = timeout_s
+        self.max_requests = max_requests
+
+    async def submit(self, provider: LLMProvider, requests: list[BatchRequest]) -> str:
+        """
+        Start a batch job.
+
+        Raises:
+            ValueError: If the provider has no batch API, or there are more
+                than ``max_requests`` requests
+        """
+        if not provider.supports_batch:
+            raise ValueError(
+                f"Provider {provider.get_provider_name()} does not support "
+                f"batch jobs"
+            )
+        if len(requests) > self.max_requests:
+            raise ValueError(
+                f"A batch holds at most {self.max_requests} requests, "
+                f"got {len(requests)}"
+            )
+        return await provider.submit_batch(requests)
+
+    async def wait(self, provider: LLMProvider, batch_id: str) -> None:
+        """
+        Poll until the batch has ended.
+
+        Raises:
+            InferenceError: If the provider rejected the batch, or it didn't
+                end within ``timeout_s``
+        """
+        deadline = time.monotonic() + self.timeout_s
+        while True:
+            status = await provider.get_batch_status(batch_id)
+            if status["status"] == BATCH_ENDED:
+                return
+            if status["status"] == BATCH_FAILED:
+                raise InferenceError(
+                    f"Batch {batch_id} failed: {status.get('error')}"
+                )
+            if time.monotonic() >= deadline:
+                raise InferenceError(
+                    f"Batch {batch_id} did not finish within {self.timeout_s:.0f}s"
+                )
+            await asyncio.sleep(self.poll_interval_s)
+
+    async def collect(
+        self, provider: LLMProvider, batch_id: str
+    ) -> dict[str, BatchItemResult]:
+        """Wait for a batch to end and return its results by custom_id."""
+        await self.wait(provider, batch_id)
+        return {
+            result["custom_id"]: result
+            async for result in provider.get_batch_results(batch_id)
+        }
+
+    async def run(
+        self, provider: LLMProvider, requests: list[BatchRequest]
+    ) -> dict[str, BatchItemResult]:
+        """Submit requests as one batch and return its results by custom_id."""
+        batch_id = await self.submit(provider, requests)
+        return await self.collect(provider, batch_id)
+
+
+async def record_batch_telemetry(
+    session: Session | AsyncSession,
+    provider: LLMProvider,
+    *,
+    user_id: int,
+    model: str,
+    input_text: str,
+    result: BatchItemResult,
+    prompt_id: int | None,
+    execution_time_ms: float,
+) -> None:
+    """
+    Record telemetry for one request of a batch, priced at the provider's
+    batch discount. ``execution_time_ms`` is the batch's turnaround.
+
+    The row goes to the batched telemetry writer when it is running, and is
+    added to the caller's session otherwise (to be committed by the caller,
+    e.g. with the results it belongs to).
+    """
+    provider_name = provider.get_provider_name()
+    status = "error" if result.get("error") else "success"
+    cost = PricingService.calculate_cost(
+        provider=provider_name,
+        model=model or "auto",
+        input_tokens=result.get("input_tokens"),
+        output_tokens=result.get("output_tokens"),
+    ) * provider.batch_discount
+
+    telemetry = Telemetry(
+        user_id=user_id,
+        model=model or "auto",
+        sdk=provider_name,
+        input_summary=input_text[:50],  # Truncate for summary
+        execution_time_ms=execution_time_ms,
+        status=status,
+        error_message=result.get("error"),
+        input_tokens=result.get("input_tokens"),
+        output_tokens=result.get("output_tokens"),
+        cost=cost,
+        prompt_id=prompt_id,
+    )
+    if not await get_telemetry_writer().write(telemetry):
+        session.add(telemetry)
+
+    INFERENCE_COUNT.labels(
+        provider=provider_name, model=model or "auto", status=status
+    ).inc()
+    if cost > 0:
+        INFERENCE_COST.labels(
+            provider=provider_name, model=model or "auto"
+        ).observe(cost)
+
+
+_settings = get_settings()
+_batch_runner = BatchRunner(
+    poll_interval_s=_settings.BATCH_POLL_INTERVAL_S,
+    timeout_s=_settings.BATCH_TIMEOUT_S,
+    max_requests=_settings.BATCH_MAX_REQUESTS,
+)
+
+
+def get_batch_runner() -> BatchRunner:
+    return _batch_runner
@@ -1,14 +1,47 @@
 import logging
+import time
+from collections.abc import Awaitable, Callable
 from datetime import datetime
+from typing import Any, TypeVar
 
+import redis.asyncio as redis
+
+from core.config import get_settings
 from models.reliability import CircuitBreaker
+from services.provider_limiter import is_rate_limited
+from services.retry_service import is_retryable
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+REDIS_KEY_PREFIX = "aistrale:breaker:"
+
+
+class CircuitOpenError(Exception):
+    """A call was not made because the provider's circuit is open."""
+
+    def __init__(self, provider: str):
+        super().__init__(f"Circuit for {provider} is open")
+        self.provider = provider
+
+
+def is_provider_failure(error: Exception) -> bool:
+    """
+    Whether an error counts against the provider's circuit: a transient
+    failure (see is_retryable) other than throttling, which is usually
+    one key's quota rather than the provider being down.
+    """
+    return is_retryable(error) and not is_rate_limited(error)
+
 
 class CircuitBreakerService:
     """
     Manages circuit breakers for providers.
+
+    The synchronous methods keep breakers in this process. The inference
+    path uses the async ones (call() and the methods it is built on), which
+    RedisCircuitBreakerService overrides to share breakers between workers.
     """
 
     def __init__(self, failure_threshold: int = 5,
@@ -83,3 +116,188 @@ class CircuitBreakerService:
             breaker.state = "open"
             breaker.opened_at = datetime.utcnow()
             logger.warning(f"Circuit for {provider} failed probe, re-OPENED")
+
+    async def allow_request(self, provider: str) -> bool:
+        """Whether a call may go ahead (the async is_open, negated)."""
+        return not self.is_open(provider)
+
+    async def on_success(self, provider: str) -> None:
+        self.record_success(provider)
+
+    async def on_failure(self, provider: str) -> None:
+        self.record_failure(provider)
+
+    async def get_state(self, provider: str) -> CircuitBreaker:
+        return self.get_breaker(provider)
+
+    def is_blocking(self, breaker: CircuitBreaker) -> bool:
+        """
+        Whether a breaker, as returned by get_state(), blocks calls now.
+        Unlike allow_request(), this never changes the breaker's state.
+        """
+        if breaker.state != "open":
+            return False
+        if breaker.opened_at is None:
+            return True
+        elapsed = (self._utcnow() - breaker.opened_at).total_seconds()
+        return elapsed <= self.recovery_timeout_sec
+
+    def _utcnow(self) -> datetime:
+        return datetime.utcnow()
+
+    async def call(self, provider: str, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Call ``func`` behind the provider's circuit.
+
+        Raises:
+            CircuitOpenError: Without calling ``func``, if the circuit is open
+        """
+        if not await self.allow_request(provider):
+            raise CircuitOpenError(provider)
+        try:
+            result = await func()
+        except Exception as e:
+            if is_provider_failure(e):
+                await self.on_failure(provider)
+            raise
+        await self.on_success(provider)
+        return result
+
+
+# Each breaker is a hash: state, failures, opened_at and last_failure (epoch
+# seconds). The scripts apply the same transitions as the in-process
+# methods, atomically across workers.
+_ALLOW_SCRIPT = """
+if redis.call('HGET', KEYS[1], 'state') ~= 'open' then return 1 end
+local opened_at = tonumber(redis.call('HGET', KEYS[1], 'opened_at') or '0')
+if tonumber(ARGV[1]) - opened_at > tonumber(ARGV[2]) then
+  redis.call('HSET', KEYS[1], 'state', 'half-open')
+  return 1
+end
+return 0
+"""
+
+_SUCCESS_SCRIPT = """
+local state = redis.call('HGET', KEYS[1], 'state')
+if state == 'half-open'
+    or (state == 'closed' and redis.call('HGET', KEYS[1], 'failures') ~= '0') then
+  redis.call('HSET', KEYS[1], 'state', 'closed', 'failures', 0)
+  redis.call('HDEL', KEYS[1], 'opened_at')
+end
+return 0
+"""
+
+_FAILURE_SCRIPT = """
+local state = redis.call('HGET', KEYS[1], 'state') or 'closed'
+local failures = redis.call('HINCRBY', KEYS[1], 'failures', 1)
+redis.call('HSET', KEYS[1], 'state', state, 'last_failure', ARGV[1])
+if state == 'half-open'
+    or (state == 'closed' and failures >= tonumber(ARGV[2])) then
+  redis.call('HSET', KEYS[1], 'state', 'open', 'opened_at', ARGV[1])
+  return 1
+end
+return 0
+"""
+
+
+class RedisCircuitBreakerService(CircuitBreakerService):
+    """
+    Circuit breakers shared by every worker through Redis, so a provider
+    that is failing is cut off everywhere after ``failure_threshold``
+    failures in total.
+
+    If Redis can't be reached, calls are let through and go unrecorded:
+    the breaker never blocks traffic on its own failure.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_timeout_sec: int = 30,
+        *,
+        client: Any = None,
+        url: str | None = None,
+        prefix: str = REDIS_KEY_PREFIX,
+        clock: Callable[[], float] = time.time,
+    ):
+        super().__init__(failure_threshold, recovery_timeout_sec)
+        if client is None:
+            client = redis.Redis.from_url(url or get_settings().REDIS_URL)
+        self.client = client
+        self.prefix = prefix
+        self._clock = clock
+        self._allow = client.register_script(_ALLOW_SCRIPT)
+        self._success = client.register_script(_SUCCESS_SCRIPT)
+        self._failure = client.register_script(_FAILURE_SCRIPT)
+
+    async def allow_request(self, provider: str) -> bool:
+        try:
+            allowed = await self._allow(
+                keys=[self.prefix + provider],
+                args=[self._clock(), self.recovery_timeout_sec],
+            )
+        except Exception as e:
+            logger.warning(f"Circuit breaker check for {provider} failed: {e}")
+            return True
+        return bool(allowed)
+
+    async def on_success(self, provider: str) -> None:
+        try:
+            await self._success(keys=[self.prefix + provider], args=[])
+        except Exception as e:
+            logger.warning(f"Circuit breaker update for {provider} failed: {e}")
+
+    async def on_failure(self, provider: str) -> None:
+        try:
+            tripped = await self._failure(
+                keys=[self.prefix + provider],
+                args=[self._clock(), self.failure_threshold],
+            )
+        except Exception as e:
+            logger.warning(f"Circuit breaker update for {provider} failed: {e}")
+            return
+        if tripped:
+            logger.warning(f"Circuit for {provider} OPEN")
+
+    def _utcnow(self) -> datetime:
+        return datetime.utcfromtimestamp(self._clock())
+
+    async def get_state(self, provider: str) -> CircuitBreaker:
+        fields = {
+            (k.decode() if isinstance(k, bytes) else k):
+                (v.decode() if isinstance(v, bytes) else v)
+            for k, v in (await self.client.hgetall(self.prefix + provider)).items()
+        }
+
+        def timestamp(name: str) -> datetime | None:
+            value = fields.get(name)
+            return datetime.utcfromtimestamp(float(value)) if value else None
+
+        return CircuitBreaker(
+            provider=provider,
+            state=fields.get("state", "closed"),
+            failure_count=int(fields.get("failures", 0)),
+            last_failure=timestamp("last_failure"),
+            opened_at=timestamp("opened_at"),
+        )
+
+
+def _build_breaker(settings) -> CircuitBreakerService:
+    if settings.CIRCUIT_BREAKER_BACKEND == "redis":
+        return RedisCircuitBreakerService(
+            failure_threshold=settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+            recovery_timeout_sec=settings.CIRCUIT_BREAKER_RECOVERY_TIMEOUT_S,
+            url=settings.REDIS_URL,
+        )
+    return CircuitBreakerService(
+        failure_threshold=settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+        recovery_timeout_sec=settings.CIRCUIT_BREAKER_RECOVERY_TIMEOUT_S,
+    )
+
+
+_settings = get_settings()
+_circuit_breaker = _build_breaker(_settings)
+
+
+def get_circuit_breaker() -> CircuitBreakerService:
+    return _circuit_breaker
@@ -0,0 +1,197 @@
+"""Streaming readers for evaluation datasets (JSON, JSONL, CSV, Parquet)."""
+
+import codecs
+import csv
+import io
+import json
+import mmap
+import os
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+try:
+    import pyarrow.parquet as pq
+
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+    pq = None
+
+REQUIRED_KEYS = ("input", "expected")
+READ_CHUNK_BYTES = 1024 * 1024
+PARQUET_BATCH_ROWS = 1024
+
+_JSON_WHITESPACE = " \t\n\r"
+
+
+class DatasetError(ValueError):
+    """A dataset file can't be read, or one of its rows is invalid."""
+
+
+@contextmanager
+def _mapped(file_path: str):
+    """The file memory-mapped read-only (mmap can't map empty files)."""
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield io.BytesIO(b"")
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+
+def _validate(row: Any, number: int) -> dict[str, Any]:
+    if not isinstance(row, dict):
+        raise DatasetError(f"Row {number}: dataset rows must be objects")
+    for key in REQUIRED_KEYS:
+        if row.get(key) is None:
+            raise DatasetError(
+                f"Row {number}: dataset items must contain 'input' and "
+                f"'expected' keys"
+            )
+        if not isinstance(row[key], str):
+            row[key] = str(row[key])
+    return row
+
+
+def _iter_jsonl(file_path: str) -> Iterator[Any]:
+    with _mapped(file_path) as mapped:
+        for number, line in enumerate(iter(mapped.readline, b""), start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise DatasetError(f"Line {number}: invalid JSON ({e.msg})") from e
+
+
+def _iter_json_array(file_path: str) -> Iterator[Any]:
+    """
+    Items of a top-level JSON array, decoded one at a time from a sliding
+    buffer instead of parsing the whole document.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    with _mapped(file_path) as mapped:
+        buffer = ""
+        pos = 0
+        eof = False
+
+        def fill() -> bool:
+            nonlocal buffer, pos, eof
+            if eof:
+                return False
+            chunk = mapped.read(READ_CHUNK_BYTES)
+            eof = not chunk
+            buffer = buffer[pos:] + text_decoder.decode(chunk, final=eof)
+            pos = 0
+            return True
+
+        def next_token() -> str:
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos] in _JSON_WHITESPACE:
+                    pos += 1
+                if pos < len(buffer):
+                    return buffer[pos]
+                if not fill():
+                    return ""
+
+        if next_token() != "[":
+            raise DatasetError("JSON dataset must be a list of objects")
+        pos += 1
+        if next_token() == "]":
+            return
+        while True:
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as e:
+                # The item may just be cut off by the end of the buffer
+                if fill():
+                    continue
+                raise DatasetError(f"Invalid JSON dataset ({e.msg})") from e
+            if end == len(buffer) and not eof:
+                # A number or literal might continue in the next chunk
+                fill()
+                continue
+            pos = end
+            yield item
+            token = next_token()
+            if token == "]":
+                return
+            if token != ",":
+                raise DatasetError("Invalid JSON dataset (expected ',' or ']')")
+            pos += 1
+            next_token()
+
+
+def _iter_csv(file_path: str) -> Iterator[Any]:
+    with _mapped(file_path) as mapped:
+        lines = (
+            line.decode("utf-8-sig" if number == 0 else "utf-8")
+            for number, line in enumerate(iter(mapped.readline, b""))
+        )
+        yield from csv.DictReader(lines)
+
+
+def _iter_parquet(file_path: str) -> Iterator[Any]:
+    if not PYARROW_AVAILABLE:
+        raise DatasetError("Parquet datasets need pyarrow (pip install pyarrow)")
+    parquet_file = pq.ParquetFile(file_path, memory_map=True)
+    missing = set(REQUIRED_KEYS) - set(parquet_file.schema_arrow.names)
+    if missing:
+        raise DatasetError(
+            "Dataset items must contain 'input' and 'expected' keys"
+        )
+    for batch in parquet_file.iter_batches(batch_size=PARQUET_BATCH_ROWS):
+        yield from batch.to_pylist()
+
+
+_READERS = {
+    ".json": _iter_json_array,
+    ".jsonl": _iter_jsonl,
+    ".ndjson": _iter_jsonl,
+    ".csv": _iter_csv,
+    ".parquet": _iter_parquet,
+}
+
+
+def iter_dataset(file_path: str) -> Iterator[dict[str, Any]]:
+    """
+    Yield dataset rows one at a time, validating each as it is read.
+
+    Memory use doesn't depend on the size of the file: JSONL, CSV and JSON
+    files are memory-mapped and parsed a row at a time, and Parquet files
+    are read in record batches. ``input`` and ``expected`` are required and
+    converted to strings.
+
+    Raises:
+        DatasetError: For an unsupported format, unreadable file or invalid
+            row (raised when that row is reached)
+    """
+    reader = _READERS.get(os.path.splitext(file_path)[1].lower())
+    if reader is None:
+        raise DatasetError(
+            "Unsupported file format. Use .json, .jsonl, .csv or .parquet"
+        )
+    for number, row in enumerate(reader(file_path), start=1):
+        yield _validate(row, number)
+
+
+def count_rows(file_path: str) -> int | None:
+    """
+    Number of rows, if it can be known without parsing the file: from the
+    Parquet footer, or by counting lines of a JSONL file. None otherwise.
+    """
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext == ".parquet" and PYARROW_AVAILABLE:
+        return pq.ParquetFile(file_path).metadata.num_rows
+    if ext in (".jsonl", ".ndjson"):
+        rows = 0
+        last = b"\n"
+        with open(file_path, "rb") as f:
+            while chunk := f.read(READ_CHUNK_BYTES):
+                rows += chunk.count(b"\n")
+                last = chunk[-1:]
+        return rows + (last != b"\n")
+    return None
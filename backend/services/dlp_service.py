@@ -2,14 +2,192 @@
 
 import logging
 import re
+import threading
+import time
 
 from sqlmodel import Session, select
 
+from core.config import get_settings
 from models.dlp_rule import DLPAction, DLPRule
 from services.pii_detection_service import PIIDetectionService
+from services.streaming_redactor import RedactionRule, StreamingRedactor
 
 logger = logging.getLogger(__name__)
 
+# Patterns that can't be embedded in the combined alternation: numbered or
+# named backreferences would point at another rule's groups.
+_BACKREFERENCE = re.compile(r"\\[1-9]|\(\?P=")
+# Stands in for a BLOCK rule whose pattern doesn't compile, so the rule
+# blocks all content instead of silently letting everything through
+_MATCH_ANY = re.compile(r"[\s\S]")
+
+
+def _default_rules() -> list[DLPRule]:
+    """Rules used when none are configured in the database."""
+    return [
+        DLPRule(
+            name="Block Auth Tokens",
+            pattern=r"(sk-[a-zA-Z0-9]{20,})",
+            action=DLPAction.BLOCK,
+            priority=100,
+        ),
+        DLPRule(
+            name="Redact Internal IPs",
+            pattern=r"(10\.\d{1,3}\.\d{1,3}\.\d{1,3})",
+            action=DLPAction.REDACT,
+            priority=50,
+        ),
+    ]
+
+
+class CompiledRuleSet:
+    """
+    Active DLP rules, sorted and compiled once.
+
+    All patterns are also joined into one alternation that is searched
+    first: text no rule matches (the common case) is cleared in a single
+    pass. Text with a hit is then evaluated rule by rule in priority order
+    with the precompiled patterns, because a leftmost match in the
+    alternation can hide an overlapping match of another rule (e.g. a WARN
+    swallowing a token a BLOCK rule should catch).
+
+    A rule whose pattern doesn't compile is skipped, except a BLOCK rule,
+    which then blocks any non-empty text: DLP fails closed.
+    """
+
+    def __init__(self, rules: list[DLPRule]):
+        self.rules = sorted(
+            (rule for rule in rules if rule.is_active),
+            key=lambda r: r.priority,
+            reverse=True,
+        )
+        self._patterns: list[tuple[DLPRule, re.Pattern]] = []
+        for rule in self.rules:
+            try:
+                self._patterns.append((rule, re.compile(rule.pattern)))
+            except re.error as e:
+                if rule.action == DLPAction.BLOCK:
+                    logger.error(
+                        f"DLP rule {rule.name!r} has an invalid pattern and "
+                        f"blocks all content until it is fixed: {e}"
+                    )
+                    self._patterns.append((rule, _MATCH_ANY))
+                else:
+                    logger.warning(f"Skipping DLP rule {rule.name!r}: {e}")
+
+        combinable = []
+        self._standalone: list[re.Pattern] = []
+        for _, pattern in self._patterns:
+            if _BACKREFERENCE.search(pattern.pattern) or not self._embeddable(
+                pattern.pattern
+            ):
+                self._standalone.append(pattern)
+            else:
+                combinable.append(f"(?:{pattern.pattern})")
+        self._combined = None
+        if combinable:
+            try:
+                self._combined = re.compile("|".join(combinable))
+            except re.error:
+                # e.g. two rules defining the same named group
+                self._standalone = [pattern for _, pattern in self._patterns]
+
+    @staticmethod
+    def _embeddable(pattern: str) -> bool:
+        # e.g. global inline flags such as (?i) are only valid at the start
+        try:
+            re.compile(f"x|(?:{pattern})")
+        except re.error:
+            return False
+        return True
+
+    def may_match(self, text: str) -> bool:
+        """True if any rule matches somewhere in ``text``."""
+        if self._combined is not None and self._combined.search(text):
+            return True
+        return any(pattern.search(text) for pattern in self._standalone)
+
+    def scan(self, text: str) -> tuple[bool, str, list[str]]:
+        """
+        Apply the rules to ``text``.
+
+        Returns: (is_blocked, processed_text, violation_messages)
+        """
+        violations: list[str] = []
+        if not self.may_match(text):
+            return False, text, violations
+
+        processed_text = text
+        for rule, pattern in self._patterns:
+            if rule.action == DLPAction.BLOCK:
+                if pattern.search(processed_text):
+                    violations.append(f"Blocked by rule: {rule.name}")
+                    return True, text, violations  # Immediate block
+
+            elif rule.action == DLPAction.REDACT:
+                # Replace with <REDACTED:RuleName>
+                replacement = f"<REDACTED:{rule.name}>"
+                processed_text, count = pattern.subn(
+                    lambda _, text=replacement: text, processed_text
+                )
+                if count:
+                    violations.append(f"Redacted by rule: {rule.name}")
+
+            elif rule.action == DLPAction.WARN:
+                if pattern.search(processed_text):
+                    violations.append(f"Warning by rule: {rule.name}")
+
+        return False, processed_text, violations
+
+
+_default_rule_set = CompiledRuleSet(_default_rules())
+
+
+class _SharedRuleSet:
+    """
+    Compiled rules from the database, shared by all requests.
+
+    The rule set is rebuilt after invalidate() or, as a backstop for
+    changes made by other processes, once it is DLP_RULES_CACHE_TTL_S old.
+    """
+
+    def __init__(self):
+        self._entry: tuple[CompiledRuleSet, float] | None = None
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entry = None
+
+    def get(self, session: Session) -> CompiledRuleSet:
+        cached = self._entry
+        if cached is not None and cached[1] > time.monotonic():
+            return cached[0]
+
+        try:
+            rules = session.exec(
+                select(DLPRule).where(DLPRule.is_active == True)  # noqa: E712
+            ).all()
+        except Exception as e:
+            logger.warning(f"Failed to load DLP rules from DB: {e}")
+            return _default_rule_set
+
+        rule_set = CompiledRuleSet(list(rules)) if rules else _default_rule_set
+        with self._lock:
+            self._entry = (
+                rule_set,
+                time.monotonic() + get_settings().DLP_RULES_CACHE_TTL_S,
+            )
+        return rule_set
+
+
+_shared_rule_set = _SharedRuleSet()
+
+
+def invalidate_dlp_rules() -> None:
+    """Drop the shared compiled rule set (call after changing DLP rules)."""
+    _shared_rule_set.invalidate()
+
 
 class DLPService:
     """
@@ -21,45 +199,20 @@ class DLPService:
                  session: Session | None = None):
         self.pii_service = pii_service
         self.session = session
-        self._rules_cache: list[DLPRule] | None = None
+
+    def _rule_set(self) -> CompiledRuleSet:
+        """Shared compiled rules from the database, or the defaults."""
+        if self.session:
+            return _shared_rule_set.get(self.session)
+        return _default_rule_set
 
     def _load_rules(self) -> list[DLPRule]:
         """Load DLP rules from database or use defaults."""
-        if self._rules_cache is not None:
-            return self._rules_cache
-
-        if self.session:
-            try:
-                rules = self.session.exec(
-                    select(DLPRule).where(DLPRule.is_active == True)  # noqa: E712
-                ).all()
-                if rules:
-                    self._rules_cache = list(rules)
-                    return self._rules_cache
-            except Exception as e:
-                logger.warning(f"Failed to load DLP rules from DB: {e}")
-
-        # Default rules if DB not available
-        default_rules = [
-            DLPRule(
-                name="Block Auth Tokens",
-                pattern=r"(sk-[a-zA-Z0-9]{20,})",
-                action=DLPAction.BLOCK,
-                priority=100,
-            ),
-            DLPRule(
-                name="Redact Internal IPs",
-                pattern=r"(10\.\d{1,3}\.\d{1,3}\.\d{1,3})",
-                action=DLPAction.REDACT,
-                priority=50,
-            ),
-        ]
-        self._rules_cache = default_rules
-        return default_rules
+        return self._rule_set().rules
 
     def invalidate_cache(self):
         """Invalidate the rules cache."""
-        self._rules_cache = None
+        invalidate_dlp_rules()
 
     def scan_content(self, text: str) -> tuple[bool, str, list[str]]:
         """
@@ -69,37 +222,10 @@ class DLPService:
         if not text:
             return False, text, []
 
-        violations = []
-        is_blocked = False
-        processed_text = text
-
         # 1. Check custom rules
-        rules = self._load_rules()
-        sorted_rules = sorted(rules, key=lambda r: r.priority, reverse=True)
-
-        for rule in sorted_rules:
-            if not rule.is_active:
-                continue
-
-            # Simple check if any match exists to flag action
-            # For redaction, we need to substitute.
-            if rule.action == DLPAction.BLOCK:
-                if re.search(rule.pattern, processed_text):
-                    is_blocked = True
-                    violations.append(f"Blocked by rule: {rule.name}")
-                    return True, text, violations  # Immediate block
-
-            elif rule.action == DLPAction.REDACT:
-                if re.search(rule.pattern, processed_text):
-                    # Replace with <REDACTED: RuleName>
-                    processed_text = re.sub(
-                        rule.pattern, f"<REDACTED:{rule.name}>", processed_text
-                    )
-                    violations.append(f"Redacted by rule: {rule.name}")
-
-            elif rule.action == DLPAction.WARN:
-                if re.search(rule.pattern, processed_text):
-                    violations.append(f"Warning by rule: {rule.name}")
+        is_blocked, processed_text, violations = self._rule_set().scan(text)
+        if is_blocked:
+            return True, text, violations
 
         # 2. Check PII (using existing service)
         # PII usually means redact or warn, rarely block entire request unless
@@ -108,3 +234,19 @@ class DLPService:
         processed_text = self.pii_service.redact(processed_text)
 
         return is_blocked, processed_text, violations
+
+    def streaming_redactor(self, overlap: int | None = None) -> StreamingRedactor:
+        """
+        Redactor applying the same rules as scan_content() to a stream.
+
+        A BLOCK match raises ContentBlockedError once it is reached, after any
+        text before it has been emitted.
+        """
+        rules = [
+            RedactionRule(name=rule.name, pattern=pattern, action=rule.action)
+            for rule, pattern in self._rule_set()._patterns
+        ]
+        rules.extend(self.pii_service.redaction_rules())
+        if overlap is None:
+            overlap = get_settings().DLP_STREAM_OVERLAP_CHARS
+        return StreamingRedactor(rules, overlap=overlap)
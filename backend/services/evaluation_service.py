@@ -1,141 +1,484 @@
-import csv
-import json
+import asyncio
+import time
+from collections.abc import AsyncIterator, Callable, Iterable, Iterator
+from datetime import datetime
 
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from core.config import get_settings
+from core.database import async_session_maker
+from core.exceptions import InferenceError
 from models.evaluation import Evaluation, EvaluationResult
 from models.prompt import Prompt
 from models.token import Token
 from services import inference_service
+from services.batch_inference import (
+    BatchRunner,
+    get_batch_runner,
+    record_batch_telemetry,
+)
+from services.dataset_loader import count_rows, iter_dataset
+from services.llm_providers.base import BatchItemResult, BatchRequest, LLMProvider
+from services.llm_providers.factory import get_provider
+from services.prompt_service import render_prompt
+from services.provider_limiter import (
+    ProviderLimiter,
+    ProviderLimiters,
+    get_provider_limiters,
+    is_rate_limited,
+)
+
+FINISHED_PAGE_ROWS = 10000
+
+
+def _custom_id(index: int) -> str:
+    """Batch request ID of a dataset row."""
+    return f"row-{index}"
+
+
+def _row_index(custom_id: str) -> int:
+    return int(custom_id.removeprefix("row-"))
+
+
+async def _take(rows: AsyncIterator, n: int) -> list:
+    """Up to ``n`` items from ``rows``."""
+    taken = []
+    while len(taken) < n and (row := await anext(rows, None)) is not None:
+        taken.append(row)
+    return taken
+
+
+async def _chain(first: Iterable, rest: AsyncIterator) -> AsyncIterator:
+    for row in first:
+        yield row
+    async for row in rest:
+        yield row
 
 
 class EvaluationService:
-    def __init__(self, session: Session):
+    def __init__(
+        self,
+        session: AsyncSession,
+        *,
+        session_factory: Callable[[], AsyncSession] | None = None,
+        limiters: ProviderLimiters | None = None,
+        checkpoint_rows: int | None = None,
+        max_retries: int | None = None,
+        retry_base_delay_s: float | None = None,
+        batch_runner: BatchRunner | None = None,
+    ):
+        settings = get_settings()
         self.session = session
+        # Workers run their inferences on sessions of their own
+        self._session_factory = session_factory or async_session_maker
+        self.limiters = limiters or get_provider_limiters()
+        self.batch_runner = batch_runner or get_batch_runner()
+        self.checkpoint_rows = checkpoint_rows or settings.EVALUATION_CHECKPOINT_ROWS
+        self.max_retries = (
+            settings.EVALUATION_MAX_RETRIES if max_retries is None else max_retries
+        )
+        self.retry_base_delay_s = (
+            settings.EVALUATION_RETRY_BASE_DELAY_S
+            if retry_base_delay_s is None
+            else retry_base_delay_s
+        )
 
     def load_dataset(self, file_path: str) -> list[dict[str, str]]:
         """
-        Load dataset from a JSON or CSV file.
-        Expected format: List of dicts with 'input' and 'expected' keys.
+        Load a whole dataset (JSON, JSONL, CSV or Parquet) into a list.
+        Expected format: rows with 'input' and 'expected' keys.
+
+        Runs stream the file with iter_dataset instead.
         """
-        dataset = []
         try:
-            if file_path.endswith(".json"):
-                with open(file_path) as f:
-                    data = json.load(f)
-                    if isinstance(data, list):
-                        dataset = data
-                    else:
-                        raise ValueError(
-                            "JSON dataset must be a list of objects")
-            elif file_path.endswith(".csv"):
-                with open(file_path) as f:
-                    reader = csv.DictReader(f)
-                    dataset = list(reader)
-            else:
-                raise ValueError("Unsupported file format. Use .json or .csv")
-
-            # Validate dataset
-            for item in dataset:
-                if "input" not in item or "expected" not in item:
-                    raise ValueError(
-                        "Dataset items must contain 'input' and 'expected' keys"
-                    )
-
-            return dataset
+            return list(iter_dataset(file_path))
         except Exception as e:
             raise ValueError(f"Failed to load dataset: {e!s}") from e
 
-    async def run_evaluation(self, evaluation_id: int):
-        evaluation = self.session.get(Evaluation, evaluation_id)
+    def iter_dataset(self, file_path: str) -> Iterator[dict[str, str]]:
+        """Dataset rows one at a time (see services/dataset_loader.py)."""
+        return iter_dataset(file_path)
+
+    async def _get_token(self, user_id: int) -> Token:
+        # Try to find default token first
+        token = (await self.session.exec(
+            select(Token).where(Token.user_id == user_id, Token.is_default)
+        )).first()
+        if not token:
+            # Fallback to any token
+            token = (await self.session.exec(
+                select(Token).where(Token.user_id == user_id)
+            )).first()
+        if not token:
+            raise ValueError("No API token found for user")
+        return token
+
+    async def _finished_indices(self, evaluation_id: int) -> AsyncIterator[int]:
+        """
+        Dataset rows that already have a result, in order, fetched a page at
+        a time so resuming a large run doesn't load them all.
+        """
+        last = -1
+        while True:
+            page = (await self.session.exec(
+                select(EvaluationResult.item_index)
+                .where(
+                    EvaluationResult.evaluation_id == evaluation_id,
+                    EvaluationResult.item_index > last,
+                )
+                .order_by(EvaluationResult.item_index)
+                .limit(FINISHED_PAGE_ROWS)
+            )).all()
+            for index in page:
+                yield index
+            if len(page) < FINISHED_PAGE_ROWS:
+                return
+            last = page[-1]
+
+    async def _pending_rows(
+        self, evaluation: Evaluation, rows: Iterator[dict[str, str]]
+    ) -> AsyncIterator[tuple[int, dict[str, str]]]:
+        """
+        (index, row) for rows without a result; finished rows are skipped
+        and counted in completed_items.
+        """
+        finished = self._finished_indices(evaluation.id)
+        next_finished = await anext(finished, None)
+        for index, row in enumerate(rows):
+            while next_finished is not None and next_finished < index:
+                next_finished = await anext(finished, None)
+            if next_finished == index:
+                evaluation.completed_items += 1
+                continue
+            yield index, row
+
+    async def _checkpoint(
+        self, evaluation: Evaluation, results: list[EvaluationResult]
+    ) -> None:
+        """Insert buffered results and the progress counter in one commit."""
+        if not results:
+            return
+        # Take the buffer before committing; workers keep adding to it
+        saved = results[:]
+        results.clear()
+        self.session.add_all(saved)
+        evaluation.completed_items += len(saved)
+        evaluation.updated_at = datetime.utcnow()
+        self.session.add(evaluation)
+        await self.session.commit()
+
+    async def run_evaluation(self, evaluation_id: int, batch: bool = False):
+        """
+        Run every dataset row through the prompt and score the outputs.
+
+        The dataset is streamed, so memory use doesn't grow with its size.
+        Rows run concurrently, within the provider's limits from
+        services/provider_limiter.py. Results are inserted in batches of
+        ``checkpoint_rows`` along with ``completed_items``, so a run that
+        fails (or is interrupted) keeps what it finished, and running the
+        evaluation again only runs the rows without a result.
+
+        With ``batch``, rows are sent as provider batch jobs instead (see
+        _run_batches): cheaper and not rate limited, but slower to finish.
+        A run always collects a batch job left by an interrupted run first.
+
+        Raises:
+            ValueError: If the evaluation, prompt or a token is missing, or
+                a dataset row is invalid (rows before it are still run)
+        """
+        evaluation = await self.session.get(Evaluation, evaluation_id)
         if not evaluation:
             raise ValueError("Evaluation not found")
 
         evaluation.status = "running"
+        evaluation.error = None
         self.session.add(evaluation)
-        self.session.commit()
+        await self.session.commit()
 
         try:
-            # Load dataset
+            # Stream the dataset
             if not evaluation.dataset_path:
                 # Fallback to mock for backward compatibility or testing if
                 # path is missing
-                dataset = [
+                rows = iter([
                     {"input": "Hello", "expected": "Hi there"},
                     {"input": "Bye", "expected": "Goodbye"},
-                ]
+                ])
+                evaluation.total_items = 2
             else:
-                dataset = self.load_dataset(evaluation.dataset_path)
+                rows = self.iter_dataset(evaluation.dataset_path)
+                evaluation.total_items = await asyncio.to_thread(
+                    count_rows, evaluation.dataset_path
+                )
 
-            prompt = self.session.get(Prompt, evaluation.prompt_id)
+            prompt = await self.session.get(Prompt, evaluation.prompt_id)
             if not prompt:
                 raise ValueError("Prompt not found")
 
-            # Get user token
-            # Try to find default token first
-            token = self.session.exec(
-                select(Token).where(
-                    Token.user_id == evaluation.user_id, Token.is_default
-                )
-            ).first()
-
-            if not token:
-                # Fallback to any token
-                token = self.session.exec(
-                    select(Token).where(Token.user_id == evaluation.user_id)
-                ).first()
+            token = await self._get_token(evaluation.user_id)
+            # Decrypt once for the whole run
+            token_value = await self.session.run_sync(token.get_token_value)
 
-            if not token:
-                raise ValueError("No API token found for user")
-
-            results = []
-            for item in dataset:
-                # Run inference
-                # We need to determine provider from token or prompt?
-                # Token has provider.
-
-                # Use token.token_value (which decrypts it)
-                token_val = token.token_value
-
-                output = await inference_service.run_inference(
-                    session=self.session,
-                    user_id=evaluation.user_id,
+            evaluation.completed_items = 0
+            pending = self._pending_rows(evaluation, rows)
+            model = prompt.model or "gpt-3.5-turbo"  # Fallback model
+            if batch or evaluation.batch_id:
+                await self._run_batches(
+                    evaluation,
+                    pending,
+                    get_provider(token.provider, token=token_value),
+                    prompt=prompt,
+                    model=model,
+                )
+            else:
+                await self._run_items(
+                    evaluation,
+                    pending,
                     provider=token.provider,
-                    model=prompt.model or "gpt-3.5-turbo",  # Fallback model
-                    input_text=item["input"],
-                    token_value=token_val,
+                    model=model,
                     prompt_id=prompt.id,
-                    # Prompt variables support can be added when prompts require more
-                    # than just 'input'.
-                    # For now assuming 'input' maps to the main input
-                )
-
-                # If output is a dict (e.g. image), we need to handle it.
-                # Evaluation usually expects text.
-                if isinstance(output, dict):
-                    output_text = str(output)
-                else:
-                    output_text = str(output)
-
-                # Calculate score (exact match for now)
-                score = 1.0 if output_text.strip(
-                ) == item["expected"].strip() else 0.0
-
-                result = EvaluationResult(
-                    evaluation_id=evaluation.id,
-                    input=item["input"],
-                    output=output_text,
-                    score=score,
+                    token_value=token_value,
                 )
-                self.session.add(result)
-                results.append(result)
 
             evaluation.status = "completed"
+            evaluation.total_items = evaluation.completed_items
+            evaluation.updated_at = datetime.utcnow()
             self.session.add(evaluation)
-            self.session.commit()
+            await self.session.commit()
 
-        except Exception:
+        except Exception as e:
             evaluation.status = "failed"
+            evaluation.error = str(e)
+            evaluation.updated_at = datetime.utcnow()
             self.session.add(evaluation)
-            self.session.commit()
+            await self.session.commit()
+            raise
+
+    async def _run_items(
+        self,
+        evaluation: Evaluation,
+        pending: AsyncIterator[tuple[int, dict[str, str]]],
+        **inference_args,
+    ) -> None:
+        """
+        Run pending rows on a pool of workers, one per provider slot.
+
+        Each worker records its inferences on a session of its own; reading
+        rows and checkpoints share the run's session, one at a time.
+        The first error stops the other workers; results finished so far
+        are still saved.
+        """
+        limiter = self.limiters.get(inference_args["provider"])
+        results: list[EvaluationResult] = []
+        run_session = asyncio.Lock()
+
+        async def worker():
+            async with self._session_factory() as session:
+                while True:
+                    async with run_session:
+                        row = await anext(pending, None)
+                    if row is None:
+                        return
+                    index, item = row
+                    output_text = await self._infer(
+                        session, limiter, item, evaluation.user_id,
+                        **inference_args,
+                    )
+                    results.append(
+                        self._result(evaluation, index, item, output_text)
+                    )
+                    if len(results) >= self.checkpoint_rows:
+                        async with run_session:
+                            await self._checkpoint(evaluation, results)
+
+        workers = [
+            asyncio.create_task(worker())
+            for _ in range(limiter.concurrency)
+        ]
+        try:
+            await asyncio.gather(*workers)
+        except BaseException:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
             raise
+        finally:
+            await self._checkpoint(evaluation, results)
+
+    @staticmethod
+    def _result(
+        evaluation: Evaluation, index: int, item: dict[str, str], output_text: str
+    ) -> EvaluationResult:
+        # Calculate score (exact match for now)
+        score = 1.0 if output_text.strip() == item["expected"].strip() else 0.0
+        return EvaluationResult(
+            evaluation_id=evaluation.id,
+            item_index=index,
+            input=item["input"],
+            output=output_text,
+            score=score,
+        )
+
+    async def _infer(
+        self,
+        session: AsyncSession,
+        limiter: ProviderLimiter,
+        item: dict[str, str],
+        user_id: int,
+        *,
+        provider: str,
+        model: str,
+        prompt_id: int,
+        token_value: str,
+    ) -> str:
+        """
+        One inference, retried with exponential backoff while the provider
+        is rate limiting. A 429 holds back every call to the provider, not
+        just this one.
+        """
+        for attempt in range(self.max_retries + 1):
+            async with limiter:
+                try:
+                    output = await inference_service.run_inference(
+                        session=session,
+                        user_id=user_id,
+                        provider=provider,
+                        model=model,
+                        input_text=item["input"],
+                        token_value=token_value,
+                        prompt_id=prompt_id,
+                        # The row's columns are the prompt's variables
+                        prompt_variables=item,
+                    )
+                except Exception as e:
+                    if not is_rate_limited(e) or attempt == self.max_retries:
+                        raise
+                    limiter.throttle(self.retry_base_delay_s * 2**attempt)
+                    continue
+            # Evaluation expects text; non-text outputs (e.g. images) are
+            # compared as their string form
+            return str(output)
+
+    async def _run_batches(
+        self,
+        evaluation: Evaluation,
+        pending: AsyncIterator[tuple[int, dict[str, str]]],
+        llm: LLMProvider,
+        *,
+        prompt: Prompt,
+        model: str,
+    ) -> None:
+        """
+        Run pending rows as provider batch jobs of up to the runner's
+        ``max_requests`` rows, one job at a time.
+
+        The job's ID is saved on the evaluation until its results are, so a
+        run that is interrupted while waiting collects that job when the
+        evaluation runs again instead of paying for the rows twice. Rows
+        whose request failed get no result (the next run retries them), and
+        fail the run once every job has been collected.
+        """
+        failed = 0
+        first_error = None
+
+        if evaluation.batch_id:
+            started = time.monotonic()
+            results = await self.batch_runner.collect(llm, evaluation.batch_id)
+            # The job's rows were the first pending ones when it was
+            # submitted; rows after them go to the next job
+            last_index = max(map(_row_index, results), default=-1)
+            rows, later = [], []
+            async for index, item in pending:
+                (rows if _custom_id(index) in results else later).append(
+                    (index, item)
+                )
+                if index >= last_index:
+                    break
+            pending = _chain(later, pending)
+            errors = await self._save_batch(
+                evaluation, llm, rows, results,
+                model=model, prompt_id=prompt.id, started=started,
+            )
+            failed += len(errors)
+            first_error = first_error or next(iter(errors), None)
+
+        while rows := await _take(pending, self.batch_runner.max_requests):
+            requests = [
+                BatchRequest(
+                    custom_id=_custom_id(index),
+                    model=model,
+                    input_text=render_prompt(prompt, item),
+                )
+                for index, item in rows
+            ]
+            started = time.monotonic()
+            evaluation.batch_id = await self.batch_runner.submit(llm, requests)
+            evaluation.updated_at = datetime.utcnow()
+            self.session.add(evaluation)
+            await self.session.commit()
+
+            results = await self.batch_runner.collect(llm, evaluation.batch_id)
+            errors = await self._save_batch(
+                evaluation, llm, rows, results,
+                model=model, prompt_id=prompt.id, started=started,
+            )
+            failed += len(errors)
+            first_error = first_error or next(iter(errors), None)
+
+        if failed:
+            raise InferenceError(
+                f"{failed} rows failed in batch jobs (first: {first_error})"
+            )
+
+    async def _save_batch(
+        self,
+        evaluation: Evaluation,
+        llm: LLMProvider,
+        rows: list[tuple[int, dict[str, str]]],
+        results: dict[str, BatchItemResult],
+        *,
+        model: str,
+        prompt_id: int,
+        started: float,
+    ) -> list[str]:
+        """
+        Save the results and telemetry of an ended batch job's rows, then
+        clear the job from the evaluation.
+
+        Returns:
+            Errors of the rows without a result
+        """
+        execution_time_ms = (time.monotonic() - started) * 1000
+        saved: list[EvaluationResult] = []
+        errors = []
+        for index, item in rows:
+            result = results.get(_custom_id(index))
+            if result is None:
+                errors.append(f"Row {index}: missing from batch results")
+                continue
+            await record_batch_telemetry(
+                self.session,
+                llm,
+                user_id=evaluation.user_id,
+                model=model,
+                input_text=item["input"],
+                result=result,
+                prompt_id=prompt_id,
+                execution_time_ms=execution_time_ms,
+            )
+            if result.get("error"):
+                errors.append(f"Row {index}: {result['error']}")
+                continue
+            saved.append(
+                self._result(evaluation, index, item, str(result["output"]))
+            )
+            if len(saved) >= self.checkpoint_rows:
+                await self._checkpoint(evaluation, saved)
+        await self._checkpoint(evaluation, saved)
+
+        evaluation.batch_id = None
+        evaluation.updated_at = datetime.utcnow()
+        self.session.add(evaluation)
+        await self.session.commit()
+        return errors
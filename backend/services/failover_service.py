@@ -1,77 +1,150 @@
 import logging
-import random
-from typing import Any
+import time
+from collections.abc import AsyncIterable, Awaitable, Callable
+from dataclasses import dataclass
 
+from core.config import get_settings
 from models.multi_provider import FailoverConfig
+from services.circuit_breaker_service import (
+    CircuitBreakerService,
+    CircuitOpenError,
+    get_circuit_breaker,
+)
 from services.health_service import HealthService
+from services.hedging import HedgeTarget
+from services.llm_providers.base import InferenceResult
+from services.retry_service import RetryService, get_retry_service
 
 logger = logging.getLogger(__name__)
 
-SIMULATED_FAILURE_PROBABILITY = 0.5
+
+class AllProvidersFailedError(Exception):
+    """Every provider of a failover chain failed or was skipped."""
+
+    def __init__(self, errors: list[str]):
+        super().__init__("All providers failed: " + "; ".join(errors))
+        self.errors = errors
+
+
+@dataclass
+class FailedCall:
+    """A provider call that failed, after its retries."""
+
+    target: HedgeTarget
+    elapsed_ms: float
+    error: Exception
+
+    # Recorded like a losing HedgeAttempt, without the hedge marker
+    status = "error"
+    result = None
+    role = None
 
 
 class FailoverService:
     """
-    Service to handle automatic provider failover during inference.
+    Resilience pipeline for provider calls: failover across providers, then
+    retries within a provider, then the provider's circuit breaker.
+
+    call() makes one provider call with the provider's retry policy, each
+    attempt going through its circuit breaker, so the retries stop as soon
+    as the circuit opens. execute() moves down a chain of providers until
+    one answers, skipping without a call those whose circuit is open or
+    whose latest health check (when a health service is given) is "down".
     """
 
-    def __init__(self, health_service: HealthService):
+    def __init__(
+        self,
+        health_service: HealthService | None = None,
+        breaker: CircuitBreakerService | None = None,
+        retry: RetryService | None = None,
+        config: FailoverConfig | None = None,
+    ):
         self.health_service = health_service
-        # Simulation: In-memory config
-        self.config = FailoverConfig(
-            workspace_id=1,
-            primary_provider="openai",
-            fallback_providers=["anthropic", "together"],
-            failover_conditions={"latency_ms": 2000, "retry_count": 2},
-            enabled=True,
+        self.breaker = breaker or get_circuit_breaker()
+        self.retry = retry or get_retry_service()
+        if config is None:
+            primary, *fallbacks = get_settings().FAILOVER_PROVIDERS
+            config = FailoverConfig(
+                workspace_id=0,
+                primary_provider=primary,
+                fallback_providers=fallbacks,
+                enabled=True,
+            )
+        self.config = config
+
+    def fallback_providers(self, provider: str) -> list[str]:
+        """Providers to fail over to from ``provider``, in order."""
+        if not self.config.enabled:
+            return []
+        chain = [self.config.primary_provider, *self.config.fallback_providers]
+        return [p for p in chain if p != provider]
+
+    async def call(
+        self,
+        target: HedgeTarget,
+        call: Callable[[HedgeTarget], Awaitable[InferenceResult]],
+    ) -> InferenceResult:
+        """``call(target)``, retried and behind the provider's circuit."""
+        return await self.retry.run(
+            target.provider,
+            lambda: self.breaker.call(target.provider, lambda: call(target)),
         )
 
-    async def execute_with_failover(
-            self, task: str, prompt: str) -> dict[str, Any]:
+    async def execute(
+        self,
+        targets: AsyncIterable[HedgeTarget],
+        call: Callable[[HedgeTarget], Awaitable[InferenceResult]],
+        failed: list[FailedCall] | None = None,
+    ) -> tuple[HedgeTarget, InferenceResult]:
         """
-        Execute an inference task with automatic failover logic.
+        Try each target in turn, through call(), until one answers.
+
+        Targets are only taken from ``targets`` as they are needed. Calls
+        that failed are appended to ``failed``.
+
+        Returns:
+            Tuple of (the target that answered, its result)
+
+        Raises:
+            The error of the only target tried, or AllProvidersFailedError
         """
-        providers = [
-            self.config.primary_provider,
-            *self.config.fallback_providers,
-        ]
-        errors = []
-
-        for provider in providers:
-            # Check health first
-            health = self.health_service.get_latest_health(provider)
+        errors: list[Exception] = []
+        messages = []
+        async for target in targets:
+            health = (
+                self.health_service.get_latest_health(target.provider)
+                if self.health_service else None
+            )
             if health and health.status == "down":
                 logger.warning(
-                    f"Skipping {provider} because it is marked DOWN.")
+                    f"Skipping {target.provider} because it is marked DOWN.")
+                messages.append(f"{target.provider}: marked down")
                 continue
 
+            start = time.perf_counter()
             try:
-                # Simulation: Call provider
-                response = await self._simulate_inference(provider)
-                return {
-                    "provider": provider,
-                    "response": response,
-                    "status": "success",
-                    "attempts": len(errors) + 1,
-                }
+                return target, await self.call(target, call)
+            except CircuitOpenError as e:
+                logger.warning(f"Skipping {target.provider}: {e}")
+                error = e
             except Exception as e:
-                logger.error(f"Provider {provider} failed: {e}")
-                errors.append({"provider": provider, "error": str(e)})
+                logger.error(f"Provider {target.provider} failed: {e}")
+                error = e
+                if failed is not None:
+                    failed.append(FailedCall(
+                        target, (time.perf_counter() - start) * 1000, e
+                    ))
+            errors.append(error)
+            messages.append(f"{target.provider}: {error}")
 
-        # If we get here, all failed
+        if len(messages) == 1 and errors:
+            raise errors[0]
         logger.critical("All providers failed.")
-        return {"status": "failed", "errors": errors}
+        raise AllProvidersFailedError(messages)
 
-    async def _simulate_inference(self, provider: str) -> str:
-        """
-        Simulate an inference call.
-        """
-        # Force fail random providers for testing logic
-        # For unit testing stability, we might need to mock this method
-        # interaction instead
-        if provider == "openai":
-            # Simulate generic failure
-            if random.random() > SIMULATED_FAILURE_PROBABILITY:
-                raise Exception("Connection timeout")
-
-        return f"Response from {provider}"
+
+_failover_service = FailoverService()
+
+
+def get_failover_service() -> FailoverService:
+    return _failover_service
@@ -0,0 +1,183 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+from core.config import get_settings
+from core.stats import percentile
+from services.llm_providers.base import InferenceResult
+
+logger = logging.getLogger(__name__)
+
+# Telemetry.hedge values
+PRIMARY = "primary"
+HEDGE = "hedge"
+
+
+@dataclass(frozen=True)
+class HedgeTarget:
+    """Where a call goes: a provider, a model and the token to use."""
+
+    provider: str
+    model: str
+    token_value: str
+
+
+@dataclass
+class HedgeAttempt:
+    """One call of a hedged request, filled in as it finishes."""
+
+    role: str  # PRIMARY or HEDGE
+    target: HedgeTarget
+    started_at: float = field(default=0.0, repr=False)
+    elapsed_ms: float = 0.0
+    result: InferenceResult | None = None
+    error: Exception | None = None
+
+    @property
+    def status(self) -> str:
+        """Telemetry status: "success", "error" or "cancelled" (it lost)."""
+        if self.result is not None:
+            return "success"
+        return "error" if self.error is not None else "cancelled"
+
+
+@dataclass
+class HedgeOutcome:
+    attempts: list[HedgeAttempt]  # The primary first
+    winner: HedgeAttempt | None  # None if every attempt failed
+
+    @property
+    def hedged(self) -> bool:
+        """Whether the duplicate was sent."""
+        return len(self.attempts) > 1
+
+
+class HedgingService:
+    """
+    Hedged requests against provider tail latency.
+
+    The primary call gets a head start of the ``percentile``-th percentile
+    of the last ``window`` latencies seen for its provider and model. If it
+    hasn't answered by then, the same request goes to the secondary target,
+    and the first successful response wins; the other call is cancelled.
+    A primary that fails before the delay is not hedged (that's failover).
+
+    Latencies are fed by observe(), which the inference path calls after
+    every successful provider call, hedged or not. Until ``min_samples``
+    latencies are known the delay is ``default_delay_ms``. A primary
+    cancelled after losing is recorded here with the time it had run, a
+    lower bound on its latency, so that hedging doesn't cut the slow tail
+    out of the percentile it is based on.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        window: int = 200,
+        min_samples: int = 20,
+        default_delay_ms: float = 2000.0,
+        min_delay_ms: float = 50.0,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.percentile = percentile
+        self.window = window
+        self.min_samples = min_samples
+        self.default_delay_ms = default_delay_ms
+        self.min_delay_ms = min_delay_ms
+        self._clock = clock
+        self._latencies: dict[tuple[str, str], deque[float]] = {}
+
+    def observe(self, provider: str, model: str, latency_ms: float) -> None:
+        """Record the latency of a successful call."""
+        samples = self._latencies.get((provider, model))
+        if samples is None:
+            samples = self._latencies[(provider, model)] = deque(
+                maxlen=self.window
+            )
+        samples.append(latency_ms)
+
+    def delay_s(self, provider: str, model: str) -> float:
+        """How long the primary call runs alone before it is hedged."""
+        samples = self._latencies.get((provider, model), ())
+        if len(samples) < self.min_samples:
+            delay_ms = self.default_delay_ms
+        else:
+            delay_ms = percentile(sorted(samples), self.percentile)
+        return max(delay_ms, self.min_delay_ms) / 1000
+
+    async def run(
+        self,
+        primary: HedgeTarget,
+        secondary: HedgeTarget,
+        call: Callable[[HedgeTarget], Awaitable[InferenceResult]],
+    ) -> HedgeOutcome:
+        """
+        Make ``call(primary)``, hedged with ``call(secondary)``.
+
+        Errors are not raised but kept on the attempts, so the caller can
+        record every call that was made.
+        """
+        attempts: dict[asyncio.Future, HedgeAttempt] = {}
+
+        def launch(role: str, target: HedgeTarget) -> None:
+            attempt = HedgeAttempt(role, target, started_at=self._clock())
+            attempts[asyncio.ensure_future(call(target))] = attempt
+
+        launch(PRIMARY, primary)
+        pending = set(attempts)
+        winner = None
+        try:
+            done, _ = await asyncio.wait(
+                pending, timeout=self.delay_s(primary.provider, primary.model)
+            )
+            if not done:
+                logger.info(
+                    f"Hedging {primary.provider}:{primary.model} with "
+                    f"{secondary.provider}:{secondary.model}"
+                )
+                launch(HEDGE, secondary)
+                pending = set(attempts)
+            while pending and winner is None:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    attempt = attempts[task]
+                    attempt.elapsed_ms = (self._clock() - attempt.started_at) * 1000
+                    if task.exception() is not None:
+                        attempt.error = task.exception()
+                        continue
+                    attempt.result = task.result()
+                    winner = winner or attempt
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.wait(pending)
+            for task in pending:
+                attempt = attempts[task]
+                attempt.elapsed_ms = (self._clock() - attempt.started_at) * 1000
+                if attempt.role == PRIMARY:
+                    self.observe(
+                        primary.provider, primary.model, attempt.elapsed_ms
+                    )
+
+        return HedgeOutcome(list(attempts.values()), winner)
+
+
+_settings = get_settings()
+_hedging_service = HedgingService(
+    percentile=_settings.HEDGE_LATENCY_PERCENTILE,
+    window=_settings.HEDGE_LATENCY_WINDOW,
+    min_samples=_settings.HEDGE_MIN_SAMPLES,
+    default_delay_ms=_settings.HEDGE_DEFAULT_DELAY_MS,
+    min_delay_ms=_settings.HEDGE_MIN_DELAY_MS,
+)
+
+
+def get_hedging_service() -> HedgingService:
+    return _hedging_service
@@ -0,0 +1,220 @@
+"""Worker pool for queued inference jobs (POST /api/inference/jobs)."""
+
+import asyncio
+import logging
+from collections.abc import Callable
+from typing import Any
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.config import get_settings
+from core.database import async_session_maker
+from core.exceptions import InferenceError
+from models.reliability import RequestQueue
+from models.token import Token
+from services.inference_service import run_inference
+from services.queue_service import DatabaseQueueBackend, QueueService
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUE = "inference"
+FINISHED_STATUSES = ("completed", "failed")
+
+
+class InferenceJobWorker:
+    """
+    Runs queued inference jobs.
+
+    Jobs are RequestQueue rows in the "inference" queue, so the workers of
+    every replica pull from the same queue and a job outlives the replica
+    that accepted it. Each replica runs ``workers`` asyncio tasks, with at
+    most ``provider_concurrency`` of them (or the provider's entry in
+    ``provider_limits``) calling one provider at a time. A job whose worker
+    died is handed out again after the queue's visibility timeout, up to
+    ``max_attempts`` times.
+    """
+
+    def __init__(
+        self,
+        queue: QueueService | None = None,
+        *,
+        workers: int = 4,
+        provider_concurrency: int = 4,
+        provider_limits: dict[str, int] | None = None,
+        max_attempts: int = 3,
+        poll_interval_s: float = 1.0,
+        session_factory: Callable[[], AsyncSession] | None = None,
+    ):
+        self._session_factory = session_factory or async_session_maker
+        self.queue = queue or QueueService(
+            DatabaseQueueBackend(JOB_QUEUE, session_factory=self._session_factory)
+        )
+        self.workers = workers
+        self.provider_concurrency = provider_concurrency
+        self.provider_limits = provider_limits or {}
+        self.max_attempts = max_attempts
+        self.poll_interval_s = poll_interval_s
+        self._provider_slots: dict[str, asyncio.Semaphore] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wake: asyncio.Event | None = None
+        self._stopping: asyncio.Event | None = None
+        self._tasks: list[asyncio.Task] = []
+        self.completed = 0
+        self.failed = 0
+        self.in_flight = 0
+
+    def _provider_slot(self, provider: str) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._provider_slots.clear()
+            self._loop = loop
+        slot = self._provider_slots.get(provider)
+        if slot is None:
+            limit = self.provider_limits.get(provider, self.provider_concurrency)
+            slot = self._provider_slots[provider] = asyncio.Semaphore(limit)
+        return slot
+
+    async def submit(
+        self, user_id: int, request: dict[str, Any], priority: int = 1
+    ) -> RequestQueue:
+        """
+        Queue an inference. ``request`` holds run_inference's arguments, with
+        token_id in place of the token value.
+        """
+        job = await self.queue.enqueue({**request, "user_id": user_id}, priority)
+        if self._wake is not None:
+            self._wake.set()
+        return job
+
+    async def get_job(self, job_id: int, user_id: int) -> RequestQueue | None:
+        """The job, or None if it doesn't exist or belongs to another user."""
+        job = await self.queue.get(job_id)
+        if job is None or job.request_data.get("user_id") != user_id:
+            return None
+        return job
+
+    async def process_one(self) -> bool:
+        """
+        Run the next job, if any.
+
+        Returns:
+            False if the queue was empty
+        """
+        job = await self.queue.dequeue()
+        if job is None:
+            return False
+        if job.attempts > self.max_attempts:
+            await self._fail(job, f"Gave up after {self.max_attempts} attempts")
+            return True
+
+        async with self._provider_slot(job.request_data["provider"]):
+            self.in_flight += 1
+            try:
+                result = await self._infer(job.request_data)
+            except InferenceError as e:
+                await self._fail(job, e.message)
+                return True
+            except Exception as e:
+                logger.error(f"Inference job {job.id} failed: {e}")
+                await self._fail(job, str(e))
+                return True
+            finally:
+                self.in_flight -= 1
+
+        await self.queue.complete(job.id, {"result": result})
+        self.completed += 1
+        return True
+
+    async def _fail(self, job: RequestQueue, error: str) -> None:
+        await self.queue.fail(job.id, error=error)
+        self.failed += 1
+
+    async def _infer(self, data: dict[str, Any]) -> Any:
+        async with self._session_factory() as session:
+            token = await session.get(Token, data["token_id"])
+            if (
+                not token
+                or token.user_id != data["user_id"]
+                or token.provider != data["provider"]
+            ):
+                raise InferenceError("Token not found")
+            token_value = await session.run_sync(token.get_token_value)
+            return await run_inference(
+                session=session,
+                user_id=data["user_id"],
+                provider=data["provider"],
+                model=data.get("model"),
+                input_text=data["input_text"],
+                token_value=token_value,
+                hf_provider=data.get("hf_provider") or "auto",
+                task=data.get("task") or "auto",
+                prompt_id=data.get("prompt_id"),
+                prompt_variables=data.get("prompt_variables"),
+                use_cache=data.get("use_cache", False),
+            )
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    def start(self) -> None:
+        """Start the workers on the running event loop."""
+        if self.running:
+            return
+        self._wake = asyncio.Event()
+        self._stopping = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._work()) for _ in range(self.workers)
+        ]
+        logger.info(f"Started {self.workers} inference job workers")
+
+    async def stop(self) -> None:
+        """Stop the workers once their current jobs finish."""
+        if not self._tasks:
+            return
+        self._stopping.set()
+        self._wake.set()
+        await asyncio.gather(*self._tasks)
+        self._tasks = []
+        self._wake = None
+        logger.info("Inference job workers stopped")
+
+    async def _work(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                if await self.process_one():
+                    continue
+            except Exception as e:
+                logger.error(f"Inference job worker error: {e}")
+            # Idle: wait for a job submitted here, or poll for other replicas'
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_interval_s)
+            except TimeoutError:
+                pass
+            self._wake.clear()
+
+    def stats(self) -> dict[str, int]:
+        """Completed/failed/in-flight counters."""
+        return {
+            "completed": self.completed,
+            "failed": self.failed,
+            "in_flight": self.in_flight,
+        }
+
+
+_settings = get_settings()
+_inference_job_worker = InferenceJobWorker(
+    queue=QueueService(
+        DatabaseQueueBackend(JOB_QUEUE),
+        visibility_timeout_s=_settings.INFERENCE_JOB_VISIBILITY_TIMEOUT_S,
+    ),
+    workers=_settings.INFERENCE_JOB_WORKERS,
+    provider_concurrency=_settings.INFERENCE_JOB_PROVIDER_CONCURRENCY,
+    provider_limits=_settings.INFERENCE_JOB_PROVIDER_LIMITS,
+    max_attempts=_settings.INFERENCE_JOB_MAX_ATTEMPTS,
+    poll_interval_s=_settings.INFERENCE_JOB_POLL_INTERVAL_S,
+)
+
+
+def get_inference_job_worker() -> InferenceJobWorker:
+    return _inference_job_worker
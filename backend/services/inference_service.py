@@ -1,8 +1,11 @@
+import asyncio
 import time
+from collections.abc import AsyncIterator
 
 import sentry_sdk
 from opentelemetry import trace
-from sqlmodel import Session
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from core.exceptions import InferenceError
 from core.metrics import (
@@ -10,18 +13,241 @@ from core.metrics import (
     INFERENCE_COUNT,
     INFERENCE_DURATION,
     INFERENCE_TOKENS,
+    INFERENCE_TTFT,
 )
 from models.prompt import Prompt
 from models.telemetry import Telemetry
+from models.token import Token
+from services.failover_service import FailedCall, get_failover_service
+from services.hedging import HedgeAttempt, HedgeTarget, get_hedging_service
+from services.llm_providers.base import InferenceChunk, InferenceResult, LLMProvider
 from services.llm_providers.factory import get_provider
+from services.load_balancer_service import get_load_balancer
 from services.pricing_service import PricingService
 from services.prompt_service import render_prompt
+from services.response_cache import get_response_cache, make_cache_key
+from services.telemetry_writer import get_telemetry_writer
 
 tracer = trace.get_tracer(__name__)
 
 
+async def _apply_prompt(
+    session: Session | AsyncSession,
+    prompt_id: int,
+    prompt_variables: dict | None,
+    model: str,
+) -> tuple[str, str, int | None]:
+    """
+    Render a stored prompt template.
+
+    Returns:
+        Tuple of (input_text, model, response cache TTL for the prompt)
+    """
+    if isinstance(session, AsyncSession):
+        prompt = await session.get(Prompt, prompt_id)
+    else:
+        prompt = session.get(Prompt, prompt_id)
+    if not prompt:
+        raise ValueError(f"Prompt with ID {prompt_id} not found")
+
+    # Render prompt
+    input_text = render_prompt(prompt, prompt_variables or {})
+
+    # Also update model if prompt has a default model and none provided
+    if not model or model == "auto":
+        if prompt.model:
+            model = prompt.model
+
+    return input_text, model, prompt.cache_ttl_seconds
+
+
+def _build_provider(
+    provider: str, token_value: str, hf_provider: str, task: str
+) -> LLMProvider:
+    """Get provider instance using factory."""
+    provider_kwargs = {}
+    if provider == "huggingface":
+        provider_kwargs["hf_provider"] = hf_provider
+        provider_kwargs["task"] = task
+
+    return get_provider(provider, token=token_value, **provider_kwargs)
+
+
+async def _call_provider(
+    target: HedgeTarget,
+    input_text: str,
+    history: list,
+    hf_provider: str,
+    task: str,
+) -> InferenceResult:
+    """One provider call; the load balancer counts it in flight and records
+    its latency, and the hedging service records the latency if it answers."""
+    provider_instance = _build_provider(
+        target.provider, target.token_value, hf_provider, task
+    )
+    start = time.perf_counter()
+    with get_load_balancer().track(target.provider):
+        result = await provider_instance.run_inference(
+            model=target.model,
+            input_text=input_text,
+            history=history,
+            task=task if target.provider == "huggingface" else None,
+        )
+    get_hedging_service().observe(
+        target.provider, target.model, (time.perf_counter() - start) * 1000
+    )
+    return result
+
+
+async def _user_token_value(
+    session: Session | AsyncSession, user_id: int, provider: str
+) -> str | None:
+    """The user's token for a provider, the default one first."""
+    query = (
+        select(Token)
+        .where(Token.user_id == user_id, Token.provider == provider)
+        .order_by(Token.is_default.desc())
+    )
+    if isinstance(session, AsyncSession):
+        token = (await session.exec(query)).first()
+        return await session.run_sync(token.get_token_value) if token else None
+    token = session.exec(query).first()
+    return token.get_token_value(session) if token else None
+
+
+async def _failover_targets(
+    session: Session | AsyncSession, user_id: int, target: HedgeTarget
+) -> AsyncIterator[HedgeTarget]:
+    """
+    The request's target, then each failover provider the user has a token
+    for, with its default model.
+    """
+    yield target
+    for provider in get_failover_service().fallback_providers(target.provider):
+        token_value = await _user_token_value(session, user_id, provider)
+        if token_value:
+            yield HedgeTarget(provider, "auto", token_value)
+
+
+async def _record_inference(
+    session: Session | AsyncSession,
+    span,
+    *,
+    user_id: int,
+    provider: str,
+    model: str,
+    input_text: str,
+    token_value: str,
+    hf_provider: str,
+    task: str,
+    prompt_id: int | None,
+    execution_time_ms: float,
+    status: str,
+    error_message: str | None,
+    input_tokens: int | None,
+    output_tokens: int | None,
+    cache_hit: bool = False,
+    hedge: str | None = None,
+    raise_on_error: bool = True,
+) -> None:
+    """
+    Persist telemetry and emit metrics for a finished inference.
+
+    The row goes to the batched telemetry writer when it is running, and is
+    committed on the caller's session otherwise. Responses served from the
+    response cache are recorded with zero cost.
+
+    Raises:
+        InferenceError: If the inference failed (after telemetry is saved)
+            and ``raise_on_error`` is set
+    """
+    # Calculate cost using pricing service
+    cost = 0.0 if cache_hit else PricingService.calculate_cost(
+        provider=provider,
+        model=model or "auto",
+        input_tokens=input_tokens,
+        output_tokens=output_tokens,
+    )
+    span.set_attribute("llm.cache_hit", cache_hit)
+
+    # Log telemetry
+    telemetry = Telemetry(
+        user_id=user_id,
+        model=model or "auto",
+        sdk=provider,
+        input_summary=input_text[:50],  # Truncate for summary
+        execution_time_ms=execution_time_ms,
+        status=status,
+        error_message=error_message,
+        input_tokens=input_tokens,
+        output_tokens=output_tokens,
+        cost=cost,
+        prompt_id=prompt_id,
+        cache_hit=cache_hit,
+        hedge=hedge,
+    )
+    if not await get_telemetry_writer().write(telemetry):
+        session.add(telemetry)
+        if isinstance(session, AsyncSession):
+            await session.commit()
+        else:
+            session.commit()
+
+    # Record metrics
+    INFERENCE_COUNT.labels(
+        provider=provider, model=model or "auto", status=status
+    ).inc()
+    INFERENCE_DURATION.labels(
+        provider=provider,
+        model=model or "auto").observe(
+        execution_time_ms / 1000.0)
+    if input_tokens is not None:
+        INFERENCE_TOKENS.labels(
+            provider=provider, model=model or "auto", type="input"
+        ).observe(input_tokens)
+        span.set_attribute("llm.usage.input_tokens", input_tokens)
+    if output_tokens is not None:
+        INFERENCE_TOKENS.labels(
+            provider=provider, model=model or "auto", type="output"
+        ).observe(output_tokens)
+        span.set_attribute("llm.usage.output_tokens", output_tokens)
+
+    if cost > 0:
+        INFERENCE_COST.labels(
+            provider=provider,
+            model=model or "auto").observe(cost)
+        span.set_attribute("llm.cost", cost)
+
+    if status == "error":
+        span.set_status(trace.Status(trace.StatusCode.ERROR))
+        span.record_exception(Exception(error_message))
+
+        # Capture exception with context in Sentry
+        with sentry_sdk.new_scope() as scope:
+            scope.set_tag("provider", provider)
+            scope.set_tag("model", model or "auto")
+            scope.set_user({"id": user_id})
+            scope.set_context(
+                "inference",
+                {
+                    "input_text_length": len(input_text) if input_text else 0,
+                    "token_value_masked": (
+                        token_value[:4] + "***" if token_value else None
+                    ),
+                    "hf_provider": hf_provider,
+                    "task": task,
+                },
+            )
+            sentry_sdk.capture_exception(Exception(error_message))
+
+        if raise_on_error:
+            raise InferenceError(error_message)
+    else:
+        span.set_status(trace.Status(trace.StatusCode.OK))
+
+
 async def run_inference(
-    session: Session,
+    session: Session | AsyncSession,
     user_id: int,
     provider: str,
     model: str,
@@ -32,7 +258,38 @@ async def run_inference(
     history: list | None = None,
     prompt_id: int | None = None,
     prompt_variables: dict | None = None,
+    *,
+    use_cache: bool = False,
+    hedge: HedgeTarget | None = None,
+    failover: bool = False,
 ):
+    """
+    Run an inference and record its telemetry.
+
+    With ``use_cache``, successful responses are cached by user, token,
+    provider, model, rendered prompt and history (see
+    services/response_cache.py). A cache hit skips the provider call and is
+    recorded with zero cost and ``cache_hit`` set. Caching is opt-in, so a
+    retried or regenerated chat turn gets a fresh answer by default.
+
+    With ``hedge``, a provider call that is slow for its provider and model
+    is duplicated to the hedge target and the first response is returned
+    (see services/hedging.py). When the duplicate is sent, both calls are
+    recorded, with ``Telemetry.hedge`` set to "primary" or "hedge" and the
+    losing call as "cancelled". Only the primary's responses are cached.
+
+    Provider calls are retried on transient errors and go through the
+    provider's circuit breaker, which fails them at once while the provider
+    keeps failing (see services/failover_service.py). With ``failover``, a
+    call that still fails moves on to the failover providers the user has
+    tokens for; each failed call is recorded as an error.
+
+    Raises:
+        InferenceError: If the provider fails (after telemetry is saved)
+        ValueError: If both ``hedge`` and ``failover`` are given
+    """
+    if hedge is not None and failover:
+        raise ValueError("Hedging and failover can't be combined")
     history = history or []
     start_time = time.time()
     status = "success"
@@ -40,6 +297,11 @@ async def run_inference(
     input_tokens = None
     output_tokens = None
     result = None
+    cache = get_response_cache()
+    cache_ttl_s = None
+    cache_hit = False
+    hedge_role = None
+    other_calls: list[HedgeAttempt | FailedCall] = []
 
     with tracer.start_as_current_span("llm_inference") as span:
         span.set_attribute("llm.provider", provider)
@@ -49,128 +311,240 @@ async def run_inference(
         try:
             # Handle Prompt Template
             if prompt_id:
-                prompt = session.get(Prompt, prompt_id)
-                if not prompt:
-                    raise ValueError(f"Prompt with ID {prompt_id} not found")
-
-                if not prompt_variables:
-                    prompt_variables = {}
-
-                # Render prompt
-                input_text = render_prompt(prompt, prompt_variables)
-
-                # Also update model if prompt has a default model and none
-                # provided
-                if not model or model == "auto":
-                    if prompt.model:
-                        model = prompt.model
-
-            # Get provider instance using factory
-            provider_kwargs = {}
-            if provider == "huggingface":
-                provider_kwargs["hf_provider"] = hf_provider
-                provider_kwargs["task"] = task
-
-            provider_instance = get_provider(
-                provider, token=token_value, **provider_kwargs
-            )
+                input_text, model, cache_ttl_s = await _apply_prompt(
+                    session, prompt_id, prompt_variables, model
+                )
 
-            # Run inference using provider abstraction
-            inference_result = await provider_instance.run_inference(
-                model=model,
-                input_text=input_text,
-                history=history,
-                task=task if provider == "huggingface" else None,
-            )
+            cache_key = None
+            if use_cache and cache.enabled:
+                cache_key = make_cache_key(
+                    provider,
+                    model,
+                    input_text,
+                    history,
+                    user_id=user_id,
+                    token_value=token_value,
+                    hf_provider=hf_provider,
+                    task=task,
+                )
+                cached = await cache.get(cache_key, provider)
+                cache_hit = cached is not None
 
-            result = inference_result["output"]
-            input_tokens = inference_result.get("input_tokens")
-            output_tokens = inference_result.get("output_tokens")
+            if cache_hit:
+                result = cached["output"]
+            else:
+                target = HedgeTarget(provider, model, token_value)
+                resilience = get_failover_service()
+
+                async def provider_call(target: HedgeTarget) -> InferenceResult:
+                    return await _call_provider(
+                        target, input_text, history, hf_provider, task
+                    )
+
+                async def call(target: HedgeTarget) -> InferenceResult:
+                    # Retried, and behind the provider's circuit breaker
+                    return await resilience.call(target, provider_call)
+
+                if failover:
+                    answered = target
+                    try:
+                        answered, inference_result = await resilience.execute(
+                            _failover_targets(session, user_id, target),
+                            provider_call,
+                            other_calls,
+                        )
+                    except Exception:
+                        # The last failed call is the row for the request
+                        if other_calls:
+                            answered = other_calls.pop().target
+                        raise
+                    finally:
+                        provider, model, token_value = (
+                            answered.provider, answered.model,
+                            answered.token_value,
+                        )
+                    if answered != target:
+                        cache_key = None
+                elif hedge is None:
+                    inference_result = await call(target)
+                else:
+                    outcome = await get_hedging_service().run(
+                        target, hedge, call
+                    )
+                    span.set_attribute("llm.hedged", outcome.hedged)
+                    main = outcome.winner or outcome.attempts[0]
+                    if outcome.hedged:
+                        hedge_role = main.role
+                        other_calls = [
+                            a for a in outcome.attempts if a is not main
+                        ]
+                    # The row for the answer is the answering call's
+                    provider, model, token_value = (
+                        main.target.provider, main.target.model,
+                        main.target.token_value,
+                    )
+                    if main.error is not None:
+                        raise main.error
+                    inference_result = main.result
+                    if main.target != target:
+                        cache_key = None
+
+                result = inference_result["output"]
+                input_tokens = inference_result.get("input_tokens")
+                output_tokens = inference_result.get("output_tokens")
+                if cache_key is not None:
+                    await cache.set(cache_key, inference_result, cache_ttl_s)
 
         except Exception as e:
             status = "error"
             error_message = str(e)
-            # Log the error but also raise a structured exception for the API
-            # We need to ensure telemetry is still saved before raising
-            # So we'll save telemetry in a finally block or before raising
+            # Telemetry is saved by _record_inference before it raises
+            # a structured InferenceError for the API
 
         end_time = time.time()
         execution_time_ms = (end_time - start_time) * 1000
 
-        # Calculate cost using pricing service
-        cost = PricingService.calculate_cost(
-            provider=provider,
-            model=model or "auto",
-            input_tokens=input_tokens,
-            output_tokens=output_tokens,
-        )
+        # The other call of a hedged request, or the calls that failed over,
+        # first so that the span ends with the answer's status
+        for attempt in other_calls:
+            await _record_inference(
+                session,
+                span,
+                user_id=user_id,
+                provider=attempt.target.provider,
+                model=attempt.target.model,
+                input_text=input_text,
+                token_value=attempt.target.token_value,
+                hf_provider=hf_provider,
+                task=task,
+                prompt_id=prompt_id,
+                execution_time_ms=attempt.elapsed_ms,
+                status=attempt.status,
+                error_message=str(attempt.error) if attempt.error else None,
+                input_tokens=(attempt.result or {}).get("input_tokens"),
+                output_tokens=(attempt.result or {}).get("output_tokens"),
+                hedge=attempt.role,
+                raise_on_error=False,
+            )
 
-        # Log telemetry
-        telemetry = Telemetry(
+        await _record_inference(
+            session,
+            span,
             user_id=user_id,
-            model=model or "auto",
-            sdk=provider,
-            input_summary=input_text[:50],  # Truncate for summary
+            provider=provider,
+            model=model,
+            input_text=input_text,
+            token_value=token_value,
+            hf_provider=hf_provider,
+            task=task,
+            prompt_id=prompt_id,
             execution_time_ms=execution_time_ms,
             status=status,
             error_message=error_message,
             input_tokens=input_tokens,
             output_tokens=output_tokens,
-            cost=cost,
-            prompt_id=prompt_id,
+            cache_hit=cache_hit,
+            hedge=hedge_role,
         )
-        session.add(telemetry)
-        session.commit()
 
-        # Record metrics
-        INFERENCE_COUNT.labels(
-            provider=provider, model=model or "auto", status=status
-        ).inc()
-        INFERENCE_DURATION.labels(
-            provider=provider,
-            model=model or "auto").observe(
-            execution_time_ms / 1000.0)
-        if input_tokens is not None:
-            INFERENCE_TOKENS.labels(
-                provider=provider, model=model or "auto", type="input"
-            ).observe(input_tokens)
-            span.set_attribute("llm.usage.input_tokens", input_tokens)
-        if output_tokens is not None:
-            INFERENCE_TOKENS.labels(
-                provider=provider, model=model or "auto", type="output"
-            ).observe(output_tokens)
-            span.set_attribute("llm.usage.output_tokens", output_tokens)
-
-        if cost > 0:
-            INFERENCE_COST.labels(
-                provider=provider,
-                model=model or "auto").observe(cost)
-            span.set_attribute("llm.cost", cost)
-
-        if status == "error":
-            span.set_status(trace.Status(trace.StatusCode.ERROR))
-            span.record_exception(Exception(error_message))
-
-            # Capture exception with context in Sentry
-            with sentry_sdk.new_scope() as scope:
-                scope.set_tag("provider", provider)
-                scope.set_tag("model", model or "auto")
-                scope.set_user({"id": user_id})
-                scope.set_context(
-                    "inference",
-                    {
-                        "input_text_length": len(input_text) if input_text else 0,
-                        "token_value_masked": (
-                            token_value[:4] + "***" if token_value else None
-                        ),
-                        "hf_provider": hf_provider,
-                        "task": task,
-                    },
+        return result
+
+
+async def stream_inference(
+    session: Session | AsyncSession,
+    *,
+    user_id: int,
+    provider: str,
+    model: str,
+    input_text: str,
+    token_value: str,
+    hf_provider: str = "auto",
+    task: str = "auto",
+    history: list | None = None,
+    prompt_id: int | None = None,
+    prompt_variables: dict | None = None,
+) -> AsyncIterator[InferenceChunk]:
+    """
+    Stream an inference, yielding provider chunks as they arrive.
+
+    Telemetry, cost and metrics are recorded once the stream completes, the
+    same way as run_inference (status "cancelled" if the consumer stops
+    early). Time-to-first-token is observed separately.
+
+    Raises:
+        InferenceError: If the provider fails (after telemetry is saved)
+    """
+    history = history or []
+    start_time = time.time()
+    status = "success"
+    error_message = None
+    input_tokens = None
+    output_tokens = None
+    first_token_seen = False
+
+    with tracer.start_as_current_span("llm_inference_stream") as span:
+        span.set_attribute("llm.provider", provider)
+        span.set_attribute("llm.model", model or "auto")
+        span.set_attribute("user.id", user_id)
+
+        try:
+            if prompt_id:
+                input_text, model, _ = await _apply_prompt(
+                    session, prompt_id, prompt_variables, model
                 )
-                sentry_sdk.capture_exception(Exception(error_message))
 
-            raise InferenceError(error_message)
-        else:
-            span.set_status(trace.Status(trace.StatusCode.OK))
+            provider_instance = _build_provider(
+                provider, token_value, hf_provider, task
+            )
 
-        return result
+            async for chunk in provider_instance.stream_inference(
+                model=model,
+                input_text=input_text,
+                history=history,
+                task=task if provider == "huggingface" else None,
+            ):
+                if not first_token_seen and (
+                    chunk.get("delta") or "output" in chunk
+                ):
+                    first_token_seen = True
+                    ttft_s = time.time() - start_time
+                    INFERENCE_TTFT.labels(
+                        provider=provider, model=model or "auto"
+                    ).observe(ttft_s)
+                    span.set_attribute("llm.time_to_first_token_ms", ttft_s * 1000)
+
+                if chunk.get("input_tokens") is not None:
+                    input_tokens = chunk["input_tokens"]
+                if chunk.get("output_tokens") is not None:
+                    output_tokens = chunk["output_tokens"]
+
+                yield chunk
+
+        except (GeneratorExit, asyncio.CancelledError):
+            # Consumer went away mid-stream; record what was generated.
+            status = "cancelled"
+            error_message = "Stream closed before completion"
+            raise
+        except Exception as e:
+            status = "error"
+            error_message = str(e)
+        finally:
+            execution_time_ms = (time.time() - start_time) * 1000
+
+            await _record_inference(
+                session,
+                span,
+                user_id=user_id,
+                provider=provider,
+                model=model,
+                input_text=input_text,
+                token_value=token_value,
+                hf_provider=hf_provider,
+                task=task,
+                prompt_id=prompt_id,
+                execution_time_ms=execution_time_ms,
+                status=status,
+                error_message=error_message,
+                input_tokens=input_tokens,
+                output_tokens=output_tokens,
+            )
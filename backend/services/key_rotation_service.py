@@ -1,13 +1,17 @@
 """Encryption key rotation service."""
 
 import uuid
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from typing import Any
 
-from cryptography.fernet import Fernet
-from sqlmodel import Session, select
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
+from sqlmodel import Session, func, select
 
 from core.config import get_settings
-from models.encryption_key import EncryptionKey
+from core.key_cache import get_key_cache
+from models.encryption_key import EncryptionKey, KeyRotationJob
 from models.token import Token
 
 settings = get_settings()
@@ -16,8 +20,15 @@ settings = get_settings()
 class KeyRotationService:
     """Service for managing encryption key rotation."""
 
-    def __init__(self, session: Session):
+    def __init__(
+        self,
+        session: Session,
+        batch_size: int | None = None,
+        max_workers: int | None = None,
+    ):
         self.session = session
+        self.batch_size = batch_size or settings.KEY_ROTATION_BATCH_SIZE
+        self.max_workers = max_workers or settings.KEY_ROTATION_WORKERS
 
     def get_active_key(self) -> EncryptionKey:
         """Get the currently active encryption key."""
@@ -50,29 +61,85 @@ class KeyRotationService:
         self.session.commit()
         return key_record
 
-    def rotate_key(self) -> tuple[str, int]:
+    def rotate_key(
+        self,
+        progress_callback: Callable[[dict[str, Any]], None] | None = None,
+    ) -> tuple[str, int]:
         """
         Rotate encryption key and re-encrypt all tokens.
 
+        Tokens are paged by id and re-encrypted ``batch_size`` at a time on a
+        thread pool; each batch commits together with the job checkpoint, so
+        locks are short-lived and an interrupted rotation resumes where it
+        stopped on the next call instead of generating another key.
+
+        Args:
+            progress_callback: Called with get_progress() after every batch
+
         Returns:
             Tuple of (new_key_id, re_encrypted_count)
         """
+        job = self._resumable_job() or self._start_job()
+        try:
+            self._run(job, progress_callback)
+        except Exception as e:
+            self.session.rollback()
+            job.status = "failed"
+            job.error = str(e)
+            job.updated_at = datetime.utcnow()
+            self.session.add(job)
+            self.session.commit()
+            raise
+
+        return (job.new_key_id, job.re_encrypted_count)
+
+    def get_progress(self, job: KeyRotationJob | None = None) -> dict[str, Any] | None:
+        """Progress of the given (default: most recent) rotation job."""
+        if job is None:
+            job = self.session.exec(
+                select(KeyRotationJob).order_by(KeyRotationJob.id.desc())
+            ).first()
+        if job is None:
+            return None
+
+        processed = job.re_encrypted_count + job.skipped_count
+        return {
+            "job_id": job.id,
+            "status": job.status,
+            "old_key_id": job.old_key_id,
+            "new_key_id": job.new_key_id,
+            "total_tokens": job.total_tokens,
+            "processed_tokens": processed,
+            "re_encrypted_tokens": job.re_encrypted_count,
+            "skipped_tokens": job.skipped_count,
+            "percent_complete": (
+                round(min(processed / job.total_tokens, 1.0) * 100, 1)
+                if job.total_tokens
+                else 100.0
+            ),
+            "last_token_id": job.last_token_id,
+            "error": job.error,
+            "started_at": job.started_at,
+            "updated_at": job.updated_at,
+            "completed_at": job.completed_at,
+        }
+
+    def _resumable_job(self) -> KeyRotationJob | None:
+        return self.session.exec(
+            select(KeyRotationJob)
+            .where(KeyRotationJob.status.in_(("running", "failed")))
+            .order_by(KeyRotationJob.id.desc())
+        ).first()
+
+    def _start_job(self) -> KeyRotationJob:
+        """Create and activate a new key and record a rotation job for it."""
         # Get current active key
         old_key = self.get_active_key()
+        master_cipher = get_key_cache().master_cipher()
 
-        # Decrypt old key
-        master_key = settings.ENCRYPTION_KEY.encode()
-        master_cipher = Fernet(master_key)
-        old_key_value = master_cipher.decrypt(
-            old_key.encrypted_key.encode()).decode()
-        old_cipher = Fernet(old_key_value.encode())
-
-        # Generate new key
+        # Generate new key, encrypted with master key for storage
         new_key_id = str(uuid.uuid4())
         new_key_value = Fernet.generate_key().decode()
-        new_cipher = Fernet(new_key_value.encode())
-
-        # Encrypt new key with master key
         encrypted_new_key = master_cipher.encrypt(
             new_key_value.encode()).decode()
 
@@ -84,35 +151,116 @@ class KeyRotationService:
         )
         self.session.add(new_key_record)
 
-        # Deactivate old key
+        # Deactivate old key; tokens keep decrypting with it via their key_id
+        # until their batch is re-encrypted
         old_key.is_active = False
         old_key.rotated_at = datetime.utcnow()
         self.session.add(old_key)
 
-        # Re-encrypt all tokens
-        tokens = self.session.exec(select(Token)).all()
-        re_encrypted_count = 0
+        total_tokens = self.session.exec(
+            select(func.count()).select_from(Token)
+        ).one()
+        job = KeyRotationJob(
+            old_key_id=old_key.key_id,
+            new_key_id=new_key_id,
+            total_tokens=total_tokens,
+        )
+        self.session.add(job)
+        self.session.commit()
+        self.session.refresh(job)
+
+        # New tokens must be encrypted with the new key from now on
+        get_key_cache().invalidate()
+        return job
+
+    def _load_ciphers(self) -> dict[str, Fernet]:
+        """Fernet for every stored data key, plus the legacy env key."""
+        master_cipher = get_key_cache().master_cipher()
+        ciphers = {"legacy": Fernet(settings.ENCRYPTION_KEY.encode())}
+        for key in self.session.exec(select(EncryptionKey)).all():
+            ciphers[key.key_id] = Fernet(
+                master_cipher.decrypt(key.encrypted_key.encode())
+            )
+        return ciphers
+
+    def _run(
+        self,
+        job: KeyRotationJob,
+        progress_callback: Callable[[dict[str, Any]], None] | None,
+    ) -> None:
+        ciphers = self._load_ciphers()
+        new_cipher = ciphers[job.new_key_id]
+        decryptors: dict[str, MultiFernet] = {}
 
-        for token in tokens:
+        def decryptor(key_id: str) -> MultiFernet:
+            # The token's own key first, then the rotated-out key (tokens
+            # from before key_id tracking) and finally the legacy env key.
+            if key_id not in decryptors:
+                candidates = [
+                    ciphers.get(key_id),
+                    ciphers.get(job.old_key_id),
+                    ciphers["legacy"],
+                ]
+                decryptors[key_id] = MultiFernet(
+                    [c for i, c in enumerate(candidates)
+                     if c is not None and c not in candidates[:i]]
+                )
+            return decryptors[key_id]
+
+        def re_encrypt(item: tuple[str, str]) -> str | None:
+            key_id, encrypted_token = item
             try:
-                # Decrypt with old key
-                decrypted_token = old_cipher.decrypt(
-                    token.encrypted_token.encode()
-                ).decode()
-
-                # Encrypt with new key
-                token.encrypted_token = new_cipher.encrypt(
-                    decrypted_token.encode()
-                ).decode()
-                token.key_id = new_key_id
-
-                self.session.add(token)
-                re_encrypted_count += 1
-            except Exception:
-                # If decryption fails, token might be using a different key
-                # Skip it for now (could be from a previous rotation)
-                continue
+                decrypted_token = decryptor(key_id).decrypt(encrypted_token.encode())
+            except InvalidToken:
+                # Encrypted with a key we no longer have; leave it as is
+                return None
+            return new_cipher.encrypt(decrypted_token).decode()
 
-        self.session.commit()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while True:
+                # Tokens created during the rotation already use the new key
+                tokens = self.session.exec(
+                    select(Token)
+                    .where(
+                        Token.id > job.last_token_id,
+                        Token.key_id != job.new_key_id,
+                    )
+                    .order_by(Token.id)
+                    .limit(self.batch_size)
+                ).all()
+                if not tokens:
+                    break
+
+                # Resolve decryptors before fanning out to the pool
+                for token in tokens:
+                    decryptor(token.key_id)
+                encrypted = pool.map(
+                    re_encrypt,
+                    [(token.key_id, token.encrypted_token) for token in tokens],
+                )
+                for token, encrypted_token in zip(tokens, encrypted, strict=True):
+                    if encrypted_token is None:
+                        job.skipped_count += 1
+                        continue
+                    token.encrypted_token = encrypted_token
+                    token.key_id = job.new_key_id
+                    self.session.add(token)
+                    job.re_encrypted_count += 1
 
-        return (new_key_id, re_encrypted_count)
+                job.last_token_id = tokens[-1].id
+                job.updated_at = datetime.utcnow()
+                self.session.add(job)
+                self.session.commit()
+                if progress_callback:
+                    progress_callback(self.get_progress(job))
+
+        job.status = "completed"
+        job.error = None
+        job.completed_at = datetime.utcnow()
+        job.updated_at = job.completed_at
+        self.session.add(job)
+        self.session.commit()
+        # Cached key material and decrypted tokens refer to the old key
+        get_key_cache().invalidate()
+        if progress_callback:
+            progress_callback(self.get_progress(job))
@@ -1,6 +1,24 @@
 """LLM Provider abstraction layer."""
 
-from services.llm_providers.base import InferenceResult, LLMProvider
+from services.llm_providers.base import (
+    BatchItemResult,
+    BatchRequest,
+    BatchStatus,
+    InferenceChunk,
+    InferenceResult,
+    LLMProvider,
+)
+from services.llm_providers.client_pool import ProviderClientPool, get_client_pool
 from services.llm_providers.factory import get_provider
 
-__all__ = ["InferenceResult", "LLMProvider", "get_provider"]
+__all__ = [
+    "BatchItemResult",
+    "BatchRequest",
+    "BatchStatus",
+    "InferenceChunk",
+    "InferenceResult",
+    "LLMProvider",
+    "ProviderClientPool",
+    "get_client_pool",
+    "get_provider",
+]
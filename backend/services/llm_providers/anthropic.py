@@ -1,24 +1,65 @@
 """Anthropic provider implementation."""
 
+from collections.abc import AsyncIterator
 
-from anthropic import AsyncAnthropic
+from anthropic import AsyncAnthropic, DefaultAsyncHttpxClient
 
-from services.llm_providers.base import InferenceResult, LLMProvider
+from services.llm_providers.base import (
+    BATCH_ENDED,
+    BATCH_IN_PROGRESS,
+    BatchItemResult,
+    BatchRequest,
+    BatchStatus,
+    InferenceChunk,
+    InferenceResult,
+    LLMProvider,
+)
 
 
 class AnthropicProvider(LLMProvider):
     """Anthropic Claude provider."""
 
-    def __init__(self, token: str, **kwargs):
+    supports_batch = True
+    batch_discount = 0.5
+
+    def __init__(self, token: str, client: AsyncAnthropic | None = None, **kwargs):
         """
         Initialize Anthropic provider.
 
         Args:
             token: Anthropic API key
+            client: Pooled SDK client to reuse (see client_pool)
             **kwargs: Additional parameters
         """
         self.token = token
-        self.client = AsyncAnthropic(api_key=token)
+        self.client = client or AsyncAnthropic(api_key=token)
+
+    @classmethod
+    def create_client(
+            cls,
+            token: str,
+            http_client: DefaultAsyncHttpxClient | None = None,
+            **kwargs) -> AsyncAnthropic:
+        """Build a pooled client on the shared keep-alive transport."""
+        return AsyncAnthropic(api_key=token, http_client=http_client)
+
+    @classmethod
+    def create_http_client(cls, **kwargs) -> DefaultAsyncHttpxClient:
+        """Build the keep-alive transport shared by all tokens."""
+        return DefaultAsyncHttpxClient(**kwargs)
+
+    def _build_messages(self, input_text: str, history: list) -> list[dict]:
+        # Convert history to Anthropic message format
+        messages = []
+        for msg in history:
+            # Anthropic uses "user" and "assistant" roles
+            role = msg["role"] if msg["role"] in [
+                "user", "assistant"] else "user"
+            messages.append({"role": role, "content": msg["content"]})
+
+        # Add current user message
+        messages.append({"role": "user", "content": input_text})
+        return messages
 
     async def run_inference(
             self,
@@ -31,20 +72,9 @@ class AnthropicProvider(LLMProvider):
         target_model = (model if model and model !=
                         "auto" else "claude-3-5-sonnet-20241022")
 
-        # Convert history to Anthropic message format
-        messages = []
-        for msg in history:
-            # Anthropic uses "user" and "assistant" roles
-            role = msg["role"] if msg["role"] in [
-                "user", "assistant"] else "user"
-            messages.append({"role": role, "content": msg["content"]})
-
-        # Add current user message
-        messages.append({"role": "user", "content": input_text})
-
         response = await self.client.messages.create(
             model=target_model,
-            messages=messages,
+            messages=self._build_messages(input_text, history),
             max_tokens=4096,
         )
 
@@ -58,6 +88,91 @@ class AnthropicProvider(LLMProvider):
             output_tokens=output_tokens,
         )
 
+    async def stream_inference(
+            self,
+            model: str,
+            input_text: str,
+            history: list | None = None,
+            **kwargs) -> AsyncIterator[InferenceChunk]:
+        """Stream Anthropic inference."""
+        history = history or []
+        target_model = (model if model and model !=
+                        "auto" else "claude-3-5-sonnet-20241022")
+
+        stream = await self.client.messages.create(
+            model=target_model,
+            messages=self._build_messages(input_text, history),
+            max_tokens=4096,
+            stream=True,
+        )
+
+        input_tokens = None
+        async for event in stream:
+            if event.type == "message_start":
+                input_tokens = event.message.usage.input_tokens
+            elif (
+                event.type == "content_block_delta"
+                and event.delta.type == "text_delta"
+            ):
+                yield InferenceChunk(delta=event.delta.text)
+            elif event.type == "message_delta" and event.usage:
+                # Output usage is cumulative and final on message_delta
+                yield InferenceChunk(
+                    delta="",
+                    input_tokens=input_tokens,
+                    output_tokens=event.usage.output_tokens,
+                )
+
+    async def submit_batch(self, requests: list[BatchRequest]) -> str:
+        """Create a Message Batch."""
+        batch = await self.client.messages.batches.create(requests=[
+            {
+                "custom_id": request["custom_id"],
+                "params": {
+                    "model": (request.get("model")
+                              if request.get("model") not in (None, "", "auto")
+                              else "claude-3-5-sonnet-20241022"),
+                    "messages": self._build_messages(
+                        request["input_text"], request.get("history") or []
+                    ),
+                    "max_tokens": 4096,
+                },
+            }
+            for request in requests
+        ])
+        return batch.id
+
+    async def get_batch_status(self, batch_id: str) -> BatchStatus:
+        """Get Anthropic batch status."""
+        batch = await self.client.messages.batches.retrieve(batch_id)
+        # Message Batches are never rejected as a whole once created
+        status = (BATCH_ENDED if batch.processing_status == "ended"
+                  else BATCH_IN_PROGRESS)
+        return BatchStatus(status=status, error=None)
+
+    async def get_batch_results(
+            self, batch_id: str) -> AsyncIterator[BatchItemResult]:
+        """Stream the results of an ended Message Batch."""
+        results = await self.client.messages.batches.results(batch_id)
+        async for entry in results:
+            result = entry.result
+            if result.type != "succeeded":
+                error = (result.error.error.message if result.type == "errored"
+                         else f"Request {result.type}")
+                yield BatchItemResult(
+                    custom_id=entry.custom_id, output=None, error=error
+                )
+                continue
+            message = result.message
+            yield BatchItemResult(
+                custom_id=entry.custom_id,
+                output=message.content[0].text if message.content else "",
+                input_tokens=message.usage.input_tokens if message.usage else None,
+                output_tokens=(message.usage.output_tokens
+                               if message.usage else None),
+                error=None,
+            )
+
     def get_pricing(self, model: str) -> dict[str, float]:
         """Get Anthropic pricing per 1M tokens."""
         # Pricing per 1M tokens
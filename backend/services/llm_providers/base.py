@@ -1,6 +1,7 @@
 """Base provider interface for LLM providers."""
 
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
 from typing import Any, TypedDict
 
 
@@ -12,8 +13,58 @@ class InferenceResult(TypedDict, total=False):
     output_tokens: int | None
 
 
+class InferenceChunk(TypedDict, total=False):
+    """Incremental piece of a streamed LLM inference."""
+
+    delta: str  # Text generated since the previous chunk
+    output: Any  # Complete non-text output (e.g. images), sent as one chunk
+    input_tokens: int | None
+    output_tokens: int | None
+
+
+BATCH_IN_PROGRESS = "in_progress"
+BATCH_ENDED = "ended"  # Results can be fetched (some items may have failed)
+BATCH_FAILED = "failed"  # Rejected as a whole; there are no results
+
+
+class BatchRequest(TypedDict, total=False):
+    """One request in a provider batch job."""
+
+    custom_id: str  # Caller's key for matching the result; [A-Za-z0-9_-]{1,64}
+    model: str
+    input_text: str
+    history: list | None
+
+
+class BatchItemResult(TypedDict, total=False):
+    """Outcome of one request of a finished batch job."""
+
+    custom_id: str
+    output: Any  # None if the request failed
+    input_tokens: int | None
+    output_tokens: int | None
+    error: str | None
+
+
+class BatchStatus(TypedDict, total=False):
+    """Progress of a batch job, in provider-neutral terms."""
+
+    status: str  # BATCH_IN_PROGRESS, BATCH_ENDED or BATCH_FAILED
+    error: str | None  # Why the batch failed
+
+
 class LLMProvider(ABC):
-    """Base class for LLM providers."""
+    """
+    Base class for LLM providers.
+
+    Providers with an asynchronous batch API (cheaper, and outside the
+    interactive rate limits) set ``supports_batch`` and implement
+    submit_batch, get_batch_status and get_batch_results; see
+    services/batch_inference.py for the runner.
+    """
+
+    supports_batch: bool = False
+    batch_discount: float = 1.0  # Batch price as a fraction of the list price
 
     @abstractmethod
     async def run_inference(
@@ -35,6 +86,30 @@ class LLMProvider(ABC):
             InferenceResult with output and token counts
         """
 
+    @abstractmethod
+    def stream_inference(
+            self,
+            model: str,
+            input_text: str,
+            history: list | None = None,
+            **kwargs) -> AsyncIterator[InferenceChunk]:
+        """
+        Stream inference output as it is generated.
+
+        Implementations are async generators yielding text deltas as they
+        arrive. Token usage, when the provider reports it, is attached to the
+        chunk it arrives on (usually the last one).
+
+        Args:
+            model: Model identifier
+            input_text: Input text for inference
+            history: Optional conversation history
+            **kwargs: Additional provider-specific parameters
+
+        Yields:
+            InferenceChunk with a text delta and/or token counts
+        """
+
     @abstractmethod
     def get_pricing(self, model: str) -> dict[str, float]:
         """
@@ -50,3 +125,60 @@ class LLMProvider(ABC):
     @abstractmethod
     def get_provider_name(self) -> str:
         """Get the provider name (e.g., 'openai', 'anthropic')."""
+
+    @classmethod
+    def create_client(cls, token: str, http_client: Any = None, **kwargs) -> Any:
+        """
+        Build a long-lived SDK client for the provider client pool.
+
+        Args:
+            token: API token/key for the provider
+            http_client: Shared transport from create_http_client, if any
+            **kwargs: Additional provider-specific parameters
+
+        Returns:
+            SDK client, or None if the provider has no reusable client
+        """
+        return None
+
+    @classmethod
+    def create_http_client(cls, **kwargs) -> Any:
+        """
+        Build a keep-alive HTTP transport shared by all clients of the provider.
+
+        Args:
+            **kwargs: httpx client options (http2, limits)
+
+        Returns:
+            HTTP client, or None if the SDK manages its own transport
+        """
+        return None
+
+    async def submit_batch(self, requests: list[BatchRequest]) -> str:
+        """
+        Submit requests as one batch job.
+
+        Args:
+            requests: Requests with unique custom_ids
+
+        Returns:
+            Provider's batch ID
+        """
+        raise NotImplementedError(
+            f"{self.get_provider_name()} does not support batch jobs"
+        )
+
+    async def get_batch_status(self, batch_id: str) -> BatchStatus:
+        """Get the status of a batch job."""
+        raise NotImplementedError(
+            f"{self.get_provider_name()} does not support batch jobs"
+        )
+
+    def get_batch_results(self, batch_id: str) -> AsyncIterator[BatchItemResult]:
+        """
+        Results of an ended batch job, one per request, in no particular
+        order. Requests that failed, expired or were cancelled have an error.
+        """
+        raise NotImplementedError(
+            f"{self.get_provider_name()} does not support batch jobs"
+        )
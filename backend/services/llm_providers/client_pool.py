@@ -0,0 +1,251 @@
+"""Long-lived registry of provider SDK clients."""
+
+import asyncio
+import hashlib
+import importlib.util
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+import httpx
+
+from core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 needs the optional ``h2`` package (``httpx[http2]``).
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+MAX_CONNECTIONS_PER_PROVIDER = 100
+MAX_KEEPALIVE_CONNECTIONS_PER_PROVIDER = 20
+KEEPALIVE_EXPIRY_S = 30.0
+
+# (provider, token fingerprint, hf_provider)
+ClientKey = tuple[str, str, str]
+
+
+def token_fingerprint(token: str) -> str:
+    """Stable, non-reversible identifier for an API token."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass
+class _PooledClient:
+    client: Any
+    owns_transport: bool
+    last_used: float
+
+
+class ProviderClientPool:
+    """
+    Bounded LRU registry of provider SDK clients.
+
+    Clients are keyed by (provider, token fingerprint, hf_provider) so repeated
+    inferences with the same credentials reuse one client instead of paying for
+    a new TLS handshake and connection pool on every request. Providers that
+    support it share a single keep-alive HTTP transport per provider, so
+    clients for different tokens still reuse the same connections.
+
+    Clients that own their transport are closed by close_idle() once they
+    are evicted or idle; start() runs it every ``sweep_interval_s``.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 64,
+        idle_timeout_s: float = 300.0,
+        sweep_interval_s: float = 60.0,
+    ):
+        self.max_size = max_size
+        self.idle_timeout_s = idle_timeout_s
+        self.sweep_interval_s = sweep_interval_s
+        self._clients: OrderedDict[ClientKey, _PooledClient] = OrderedDict()
+        self._http_clients: dict[str, Any] = {}
+        self._retired: list[Any] = []
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._task: asyncio.Task | None = None
+        self._stopping: asyncio.Event | None = None
+
+    def acquire(
+        self,
+        provider_class: type,
+        provider_name: str,
+        token: str,
+        hf_provider: str = "auto",
+    ) -> Any:
+        """
+        Return a pooled SDK client, creating it on first use.
+
+        Args:
+            provider_class: LLMProvider subclass that knows how to build the client
+            provider_name: Provider name used in the pool key
+            token: API token/key for the provider
+            hf_provider: HuggingFace sub-provider (part of the key)
+
+        Returns:
+            SDK client, or None if the provider has no reusable client
+        """
+        key = (provider_name, token_fingerprint(token), hf_provider or "auto")
+        now = time.monotonic()
+
+        with self._lock:
+            self._prune_idle(now)
+
+            entry = self._clients.get(key)
+            if entry is not None:
+                self._clients.move_to_end(key)
+                entry.last_used = now
+                self.hits += 1
+                return entry.client
+
+            http_client = self._get_http_client(provider_name, provider_class)
+            client = provider_class.create_client(
+                token=token, http_client=http_client, hf_provider=hf_provider
+            )
+            if client is None:
+                return None
+
+            self.misses += 1
+            self._clients[key] = _PooledClient(
+                client=client,
+                owns_transport=http_client is None,
+                last_used=now,
+            )
+            while len(self._clients) > self.max_size:
+                _, evicted = self._clients.popitem(last=False)
+                self.evictions += 1
+                self._retire(evicted)
+
+            return client
+
+    def _get_http_client(self, provider_name: str, provider_class: type) -> Any:
+        if provider_name not in self._http_clients:
+            self._http_clients[provider_name] = provider_class.create_http_client(
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_connections=MAX_CONNECTIONS_PER_PROVIDER,
+                    max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS_PER_PROVIDER,
+                    keepalive_expiry=KEEPALIVE_EXPIRY_S,
+                ),
+            )
+        return self._http_clients[provider_name]
+
+    def _prune_idle(self, now: float) -> None:
+        # The OrderedDict is in last-used order, so stale entries sit at the head.
+        while self._clients:
+            key, entry = next(iter(self._clients.items()))
+            if now - entry.last_used <= self.idle_timeout_s:
+                break
+            del self._clients[key]
+            self._retire(entry)
+
+    def _retire(self, entry: _PooledClient) -> None:
+        # Clients on a shared transport hold no sockets of their own; closing
+        # them would close the transport for every other token.
+        if entry.owns_transport:
+            self._retired.append(entry.client)
+
+    async def close_idle(self) -> int:
+        """
+        Close clients that were evicted or have been idle past the timeout.
+
+        Returns:
+            Number of clients closed
+        """
+        with self._lock:
+            self._prune_idle(time.monotonic())
+            retired, self._retired = self._retired, []
+
+        for client in retired:
+            await _close_client(client)
+        return len(retired)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Run close_idle() periodically on the running event loop."""
+        if self.running:
+            return
+        self._stopping = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the periodic close_idle()."""
+        if self._task is None:
+            return
+        self._stopping.set()
+        await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(
+                    self._stopping.wait(), self.sweep_interval_s
+                )
+            except TimeoutError:
+                pass
+            try:
+                closed = await self.close_idle()
+            except Exception as e:
+                logger.error(f"Closing idle provider clients failed: {e}")
+            else:
+                if closed:
+                    logger.info(f"Closed {closed} idle provider clients")
+
+    async def aclose(self) -> None:
+        """Close every pooled client and shared transport (app shutdown)."""
+        await self.stop()
+        with self._lock:
+            owned = [e.client for e in self._clients.values() if e.owns_transport]
+            transports = list(self._http_clients.values())
+            retired = self._retired
+            self._clients.clear()
+            self._http_clients.clear()
+            self._retired = []
+
+        for client in [*retired, *owned, *transports]:
+            await _close_client(client)
+        logger.info("Provider client pool closed")
+
+    def stats(self) -> dict[str, int]:
+        """Pool size and hit/miss/eviction counters."""
+        return {
+            "size": len(self._clients),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+async def _close_client(client: Any) -> None:
+    close = getattr(client, "aclose", None) or getattr(client, "close", None)
+    if close is None:
+        return
+    try:
+        result = close()
+        if asyncio.iscoroutine(result):
+            await result
+    except Exception as e:
+        logger.warning(f"Failed to close provider client: {e}")
+
+
+_settings = get_settings()
+_client_pool = ProviderClientPool(
+    max_size=_settings.LLM_CLIENT_POOL_SIZE,
+    idle_timeout_s=_settings.LLM_CLIENT_IDLE_TIMEOUT_S,
+    sweep_interval_s=_settings.LLM_CLIENT_SWEEP_INTERVAL_S,
+)
+
+
+def get_client_pool() -> ProviderClientPool:
+    return _client_pool
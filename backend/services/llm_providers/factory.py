@@ -1,19 +1,26 @@
 """Factory for creating LLM provider instances."""
 
+from core.config import get_settings
 from services.llm_providers.anthropic import AnthropicProvider
 from services.llm_providers.base import LLMProvider
+from services.llm_providers.client_pool import get_client_pool
 from services.llm_providers.gemini import GeminiProvider
 from services.llm_providers.groq import GroqProvider
 from services.llm_providers.huggingface import HuggingFaceProvider
 from services.llm_providers.openai import OpenAIProvider
+from services.llm_providers.stub import StubProvider
 
 
 def get_provider(provider_name: str, token: str, **kwargs) -> LLMProvider:
     """
     Create a provider instance.
 
+    The underlying SDK client is taken from the shared client pool, so
+    providers built for the same credentials reuse connections.
+
     Args:
-        provider_name: Provider name (huggingface, openai, groq, anthropic, gemini)
+        provider_name: Provider name (huggingface, openai, groq, anthropic,
+            gemini; stub is only available when TESTING is set)
         token: API token/key for the provider
         **kwargs: Additional provider-specific parameters
 
@@ -30,6 +37,9 @@ def get_provider(provider_name: str, token: str, **kwargs) -> LLMProvider:
         "anthropic": AnthropicProvider,
         "gemini": GeminiProvider,
     }
+    if get_settings().TESTING:
+        # Free echo provider; never exposed to real tokens
+        provider_map["stub"] = StubProvider
 
     provider_class = provider_map.get(provider_name.lower())
     if not provider_class:
@@ -38,4 +48,10 @@ def get_provider(provider_name: str, token: str, **kwargs) -> LLMProvider:
             f"Supported providers: {', '.join(provider_map.keys())}"
         )
 
-    return provider_class(token=token, **kwargs)
+    client = get_client_pool().acquire(
+        provider_class,
+        provider_name.lower(),
+        token,
+        hf_provider=kwargs.get("hf_provider", "auto"),
+    )
+    return provider_class(token=token, client=client, **kwargs)
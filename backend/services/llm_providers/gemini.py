@@ -1,9 +1,11 @@
 """Google Gemini provider implementation."""
 
 import asyncio
+import functools
 import importlib
+from collections.abc import AsyncIterator
 
-from services.llm_providers.base import InferenceResult, LLMProvider
+from services.llm_providers.base import InferenceChunk, InferenceResult, LLMProvider
 
 genai = None
 
@@ -28,14 +30,7 @@ class GeminiProvider(LLMProvider):
             globals()["genai"] = genai_module
         return globals()["genai"]
 
-    async def run_inference(
-            self,
-            model: str,
-            input_text: str,
-            history: list | None = None,
-            **kwargs) -> InferenceResult:
-        """Run Gemini inference."""
-        history = history or []
+    def _start_chat(self, model: str, history: list):
         target_model = model if model and model != "auto" else "gemini-pro"
 
         genai = self._get_genai()
@@ -54,7 +49,16 @@ class GeminiProvider(LLMProvider):
                     {"role": "model", "parts": [msg["content"]]})
 
         # Start chat with history
-        chat = genai_model.start_chat(history=chat_history)
+        return genai_model.start_chat(history=chat_history)
+
+    async def run_inference(
+            self,
+            model: str,
+            input_text: str,
+            history: list | None = None,
+            **kwargs) -> InferenceResult:
+        """Run Gemini inference."""
+        chat = self._start_chat(model, history or [])
 
         # Send current message (run in thread pool since Gemini SDK is sync)
         loop = asyncio.get_event_loop()
@@ -72,6 +76,29 @@ class GeminiProvider(LLMProvider):
             output_tokens=output_tokens,
         )
 
+    async def stream_inference(
+            self,
+            model: str,
+            input_text: str,
+            history: list | None = None,
+            **kwargs) -> AsyncIterator[InferenceChunk]:
+        """Stream Gemini inference."""
+        chat = self._start_chat(model, history or [])
+
+        # The SDK is sync: both the request and each chunk read block, so
+        # pull chunks one at a time from the thread pool.
+        loop = asyncio.get_event_loop()
+        response = await loop.run_in_executor(
+            None, functools.partial(chat.send_message, input_text, stream=True)
+        )
+        chunks = iter(response)
+        while True:
+            chunk = await loop.run_in_executor(None, next, chunks, None)
+            if chunk is None:
+                break
+            if chunk.text:
+                yield InferenceChunk(delta=chunk.text)
+
     def get_pricing(self, model: str) -> dict[str, float]:
         """Get Gemini pricing per 1M tokens."""
         # Pricing per 1M tokens
@@ -1,24 +1,40 @@
 """Groq provider implementation."""
 
+from collections.abc import AsyncIterator
 
-from groq import AsyncGroq
+from groq import AsyncGroq, DefaultAsyncHttpxClient
 
-from services.llm_providers.base import InferenceResult, LLMProvider
+from services.llm_providers.base import InferenceChunk, InferenceResult, LLMProvider
 
 
 class GroqProvider(LLMProvider):
     """Groq provider."""
 
-    def __init__(self, token: str, **kwargs):
+    def __init__(self, token: str, client: AsyncGroq | None = None, **kwargs):
         """
         Initialize Groq provider.
 
         Args:
             token: Groq API key
+            client: Pooled SDK client to reuse (see client_pool)
             **kwargs: Additional parameters
         """
         self.token = token
-        self.client = AsyncGroq(api_key=token)
+        self.client = client or AsyncGroq(api_key=token)
+
+    @classmethod
+    def create_client(
+            cls,
+            token: str,
+            http_client: DefaultAsyncHttpxClient | None = None,
+            **kwargs) -> AsyncGroq:
+        """Build a pooled client on the shared keep-alive transport."""
+        return AsyncGroq(api_key=token, http_client=http_client)
+
+    @classmethod
+    def create_http_client(cls, **kwargs) -> DefaultAsyncHttpxClient:
+        """Build the keep-alive transport shared by all tokens."""
+        return DefaultAsyncHttpxClient(**kwargs)
 
     async def run_inference(
             self,
@@ -27,6 +43,31 @@ class GroqProvider(LLMProvider):
             history: list | None = None,
             **kwargs) -> InferenceResult:
         """Run Groq inference."""
+        full_content = []
+        input_tokens = None
+        output_tokens = None
+
+        async for chunk in self.stream_inference(model, input_text, history):
+            full_content.append(chunk.get("delta", ""))
+            if chunk.get("input_tokens") is not None:
+                input_tokens = chunk["input_tokens"]
+                output_tokens = chunk["output_tokens"]
+
+        result = "".join(full_content)
+
+        return InferenceResult(
+            output=result,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+        )
+
+    async def stream_inference(
+            self,
+            model: str,
+            input_text: str,
+            history: list | None = None,
+            **kwargs) -> AsyncIterator[InferenceChunk]:
+        """Stream Groq inference."""
         history = history or []
         target_model = model if model and model != "auto" else "llama-3.3-70b-versatile"
 
@@ -42,19 +83,18 @@ class GroqProvider(LLMProvider):
             stream=True,
         )
 
-        full_content = []
-        input_tokens = None
-        output_tokens = None
-
         async for chunk in stream:
             content = chunk.choices[0].delta.content
             if content:
-                full_content.append(content)
+                yield InferenceChunk(delta=content)
 
             # Attempt to capture usage from the chunk if available
             if hasattr(chunk, "usage") and chunk.usage:
-                input_tokens = chunk.usage.prompt_tokens
-                output_tokens = chunk.usage.completion_tokens
+                yield InferenceChunk(
+                    delta="",
+                    input_tokens=chunk.usage.prompt_tokens,
+                    output_tokens=chunk.usage.completion_tokens,
+                )
             elif (
                 hasattr(chunk, "x_groq")
                 and chunk.x_groq
@@ -62,16 +102,11 @@ class GroqProvider(LLMProvider):
                 and "usage" in chunk.x_groq
             ):
                 usage_data = chunk.x_groq["usage"]
-                input_tokens = usage_data.get("prompt_tokens")
-                output_tokens = usage_data.get("completion_tokens")
-
-        result = "".join(full_content)
-
-        return InferenceResult(
-            output=result,
-            input_tokens=input_tokens,
-            output_tokens=output_tokens,
-        )
+                yield InferenceChunk(
+                    delta="",
+                    input_tokens=usage_data.get("prompt_tokens"),
+                    output_tokens=usage_data.get("completion_tokens"),
+                )
 
     def get_pricing(self, model: str) -> dict[str, float]:
         """Get Groq pricing per 1M tokens."""
@@ -2,54 +2,83 @@
 
 import base64
 import io
+from collections.abc import AsyncIterator
 from typing import Any
 
 import httpx
 from huggingface_hub import AsyncInferenceClient
 
-from services.llm_providers.base import InferenceResult, LLMProvider
+from services.llm_providers.base import InferenceChunk, InferenceResult, LLMProvider
 
 
 class HuggingFaceProvider(LLMProvider):
     """HuggingFace Hub provider."""
 
-    def __init__(self, token: str, hf_provider: str = "auto", **kwargs):
+    def __init__(
+        self,
+        token: str,
+        hf_provider: str = "auto",
+        client: AsyncInferenceClient | None = None,
+        **kwargs,
+    ):
         """
         Initialize HuggingFace provider.
 
         Args:
             token: HuggingFace API token
             hf_provider: HuggingFace provider (auto, fal-ai, replicate, etc.)
+            client: Pooled SDK client to reuse (see client_pool)
             **kwargs: Additional parameters
         """
         self.token = token
         self.hf_provider = hf_provider
-        self.client = AsyncInferenceClient(token=token, provider=hf_provider)
-
-    async def run_inference(
-        self,
-        model: str,
-        input_text: str,
-        history: list | None = None,
-        task: str = "auto",
+        self.client = client or AsyncInferenceClient(
+            token=token, provider=hf_provider)
+
+    @classmethod
+    def create_client(
+        cls,
+        token: str,
+        http_client: None = None,
+        hf_provider: str = "auto",
         **kwargs,
-    ) -> InferenceResult:
-        """Run HuggingFace inference."""
-        history = history or []
-        target_model = model if model and model != "auto" else None
+    ) -> AsyncInferenceClient:
+        """Build a pooled client (the HF SDK owns its own HTTP session)."""
+        return AsyncInferenceClient(token=token, provider=hf_provider)
 
+    def _build_prompt(self, input_text: str, history: list) -> str:
         # Construct prompt with history for text generation/chat
         prompt_history = ""
         for msg in history:
             role = "User" if msg["role"] == "user" else "Assistant"
             prompt_history += f"{role}: {msg['content']}\n"
 
-        full_input = (
+        return (
             prompt_history + f"User: {input_text}\nAssistant:"
             if history
             else input_text
         )
 
+    def _build_messages(self, input_text: str, history: list) -> list[dict]:
+        messages = []
+        for msg in history:
+            messages.append({"role": msg["role"], "content": msg["content"]})
+        messages.append({"role": "user", "content": input_text})
+        return messages
+
+    async def run_inference(
+        self,
+        model: str,
+        input_text: str,
+        history: list | None = None,
+        task: str = "auto",
+        **kwargs,
+    ) -> InferenceResult:
+        """Run HuggingFace inference."""
+        history = history or []
+        target_model = model if model and model != "auto" else None
+        full_input = self._build_prompt(input_text, history)
+
         result: Any = None
         input_tokens = None
         output_tokens = None
@@ -77,11 +106,7 @@ class HuggingFaceProvider(LLMProvider):
                 "Image-to-video requires image input support")
 
         elif task == "chat-completion":
-            messages = []
-            for msg in history:
-                messages.append(
-                    {"role": msg["role"], "content": msg["content"]})
-            messages.append({"role": "user", "content": input_text})
+            messages = self._build_messages(input_text, history)
 
             response = await self.client.chat_completion(messages, model=target_model)
             result = response.choices[0].message.content
@@ -111,12 +136,7 @@ class HuggingFaceProvider(LLMProvider):
                 elif "conversational" in error_str and (
                     "supported task" in error_str or "available tasks" in error_str
                 ):
-                    messages = []
-                    for msg in history:
-                        messages.append(
-                            {"role": msg["role"], "content": msg["content"]}
-                        )
-                    messages.append({"role": "user", "content": input_text})
+                    messages = self._build_messages(input_text, history)
 
                     response = await self.client.chat_completion(
                         messages, model=target_model
@@ -154,6 +174,62 @@ class HuggingFaceProvider(LLMProvider):
             output_tokens=output_tokens,
         )
 
+    async def stream_inference(
+        self,
+        model: str,
+        input_text: str,
+        history: list | None = None,
+        task: str = "auto",
+        **kwargs,
+    ) -> AsyncIterator[InferenceChunk]:
+        """
+        Stream HuggingFace inference.
+
+        Text generation and chat completion stream token by token. Other tasks
+        (images, video) and auto-detected fallbacks produce their complete
+        output as a single chunk.
+        """
+        history = history or []
+        target_model = model if model and model != "auto" else None
+
+        if task == "chat-completion":
+            stream = await self.client.chat_completion(
+                self._build_messages(input_text, history),
+                model=target_model,
+                stream=True,
+            )
+            async for chunk in stream:
+                content = chunk.choices[0].delta.content
+                if content:
+                    yield InferenceChunk(delta=content)
+            return
+
+        if task in ("text-generation", "auto"):
+            try:
+                stream = await self.client.text_generation(
+                    self._build_prompt(input_text, history),
+                    model=target_model,
+                    stream=True,
+                )
+            except Exception:
+                # Auto mode may need a different task; the fallback chain in
+                # run_inference works that out.
+                if task != "auto":
+                    raise
+            else:
+                async for token in stream:
+                    if token:
+                        yield InferenceChunk(delta=token)
+                return
+
+        result = await self.run_inference(
+            model=model, input_text=input_text, history=history, task=task
+        )
+        if isinstance(result["output"], str):
+            yield InferenceChunk(delta=result["output"])
+        else:
+            yield InferenceChunk(output=result["output"])
+
     def get_pricing(self, model: str) -> dict[str, float]:
         """Get HuggingFace pricing (typically free for inference endpoints)."""
         # HuggingFace inference endpoints are typically free
@@ -1,24 +1,72 @@
 """OpenAI provider implementation."""
 
+import json
+from collections.abc import AsyncIterator
 
-from openai import AsyncOpenAI
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
 
-from services.llm_providers.base import InferenceResult, LLMProvider
+from services.llm_providers.base import (
+    BATCH_ENDED,
+    BATCH_FAILED,
+    BATCH_IN_PROGRESS,
+    BatchItemResult,
+    BatchRequest,
+    BatchStatus,
+    InferenceChunk,
+    InferenceResult,
+    LLMProvider,
+)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+HTTP_OK = 200
+_BATCH_STATUSES = {
+    "completed": BATCH_ENDED,
+    # Expired and cancelled batches still have the requests that finished
+    "expired": BATCH_ENDED,
+    "cancelled": BATCH_ENDED,
+    "failed": BATCH_FAILED,
+}
 
 
 class OpenAIProvider(LLMProvider):
     """OpenAI provider."""
 
-    def __init__(self, token: str, **kwargs):
+    supports_batch = True
+    batch_discount = 0.5
+
+    def __init__(self, token: str, client: AsyncOpenAI | None = None, **kwargs):
         """
         Initialize OpenAI provider.
 
         Args:
             token: OpenAI API key
+            client: Pooled SDK client to reuse (see client_pool)
             **kwargs: Additional parameters
         """
         self.token = token
-        self.client = AsyncOpenAI(api_key=token)
+        self.client = client or AsyncOpenAI(api_key=token)
+
+    @classmethod
+    def create_client(
+            cls,
+            token: str,
+            http_client: DefaultAsyncHttpxClient | None = None,
+            **kwargs) -> AsyncOpenAI:
+        """Build a pooled client on the shared keep-alive transport."""
+        return AsyncOpenAI(api_key=token, http_client=http_client)
+
+    @classmethod
+    def create_http_client(cls, **kwargs) -> DefaultAsyncHttpxClient:
+        """Build the keep-alive transport shared by all tokens."""
+        return DefaultAsyncHttpxClient(**kwargs)
+
+    def _build_messages(self, input_text: str, history: list) -> list[dict]:
+        messages = [{"role": "system",
+                     "content": "You are a helpful assistant."}]
+        for msg in history:
+            messages.append({"role": msg["role"], "content": msg["content"]})
+        messages.append({"role": "user", "content": input_text})
+        return messages
 
     async def run_inference(
             self,
@@ -30,14 +78,8 @@ class OpenAIProvider(LLMProvider):
         history = history or []
         target_model = model if model and model != "auto" else "gpt-3.5-turbo"
 
-        messages = [{"role": "system",
-                     "content": "You are a helpful assistant."}]
-        for msg in history:
-            messages.append({"role": msg["role"], "content": msg["content"]})
-        messages.append({"role": "user", "content": input_text})
-
         response = await self.client.chat.completions.create(
-            model=target_model, messages=messages
+            model=target_model, messages=self._build_messages(input_text, history)
         )
 
         result = response.choices[0].message.content
@@ -50,6 +92,102 @@ class OpenAIProvider(LLMProvider):
             output_tokens=output_tokens,
         )
 
+    async def stream_inference(
+            self,
+            model: str,
+            input_text: str,
+            history: list | None = None,
+            **kwargs) -> AsyncIterator[InferenceChunk]:
+        """Stream OpenAI inference."""
+        history = history or []
+        target_model = model if model and model != "auto" else "gpt-3.5-turbo"
+
+        stream = await self.client.chat.completions.create(
+            model=target_model,
+            messages=self._build_messages(input_text, history),
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield InferenceChunk(delta=chunk.choices[0].delta.content)
+            # With include_usage, the final chunk has no choices, only usage
+            if chunk.usage:
+                yield InferenceChunk(
+                    delta="",
+                    input_tokens=chunk.usage.prompt_tokens,
+                    output_tokens=chunk.usage.completion_tokens,
+                )
+
+    async def submit_batch(self, requests: list[BatchRequest]) -> str:
+        """Upload requests as a JSONL file and start a 24h batch on it."""
+        lines = []
+        for request in requests:
+            model = request.get("model")
+            lines.append(json.dumps({
+                "custom_id": request["custom_id"],
+                "method": "POST",
+                "url": BATCH_ENDPOINT,
+                "body": {
+                    "model": model if model and model != "auto" else "gpt-3.5-turbo",
+                    "messages": self._build_messages(
+                        request["input_text"], request.get("history") or []
+                    ),
+                },
+            }))
+        batch_file = await self.client.files.create(
+            file=("batch.jsonl", "\n".join(lines).encode()), purpose="batch"
+        )
+        batch = await self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window="24h",
+        )
+        return batch.id
+
+    async def get_batch_status(self, batch_id: str) -> BatchStatus:
+        """Get OpenAI batch status."""
+        batch = await self.client.batches.retrieve(batch_id)
+        status = _BATCH_STATUSES.get(batch.status, BATCH_IN_PROGRESS)
+        error = None
+        if status == BATCH_FAILED:
+            errors = batch.errors.data if batch.errors and batch.errors.data else []
+            error = errors[0].message if errors else "Batch failed"
+        return BatchStatus(status=status, error=error)
+
+    async def get_batch_results(
+            self, batch_id: str) -> AsyncIterator[BatchItemResult]:
+        """Read the output file, then the error file, of an ended batch."""
+        batch = await self.client.batches.retrieve(batch_id)
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            content = await self.client.files.content(file_id)
+            for line in content.text.splitlines():
+                if line.strip():
+                    yield self._parse_batch_line(json.loads(line))
+
+    @staticmethod
+    def _parse_batch_line(line: dict) -> BatchItemResult:
+        response = line.get("response") or {}
+        body = response.get("body") or {}
+        if line.get("error") or response.get("status_code") != HTTP_OK:
+            error = line.get("error") or body.get("error") or {}
+            return BatchItemResult(
+                custom_id=line["custom_id"],
+                output=None,
+                error=error.get("message") or "Request failed",
+            )
+        usage = body.get("usage") or {}
+        return BatchItemResult(
+            custom_id=line["custom_id"],
+            output=body["choices"][0]["message"]["content"],
+            input_tokens=usage.get("prompt_tokens"),
+            output_tokens=usage.get("completion_tokens"),
+            error=None,
+        )
+
     def get_pricing(self, model: str) -> dict[str, float]:
         """Get OpenAI pricing per 1M tokens."""
         # Pricing per 1M tokens
@@ -0,0 +1,121 @@
+"""Offline stub provider for tests and local development."""
+
+import itertools
+from collections.abc import AsyncIterator
+from typing import ClassVar
+
+from services.llm_providers.base import (
+    BATCH_ENDED,
+    BATCH_IN_PROGRESS,
+    BatchItemResult,
+    BatchRequest,
+    BatchStatus,
+    InferenceChunk,
+    InferenceResult,
+    LLMProvider,
+)
+
+
+class StubProvider(LLMProvider):
+    """
+    Provider that never leaves the process: it echoes the input (or returns
+    ``reply``) and counts whitespace-separated words as tokens.
+
+    Batch jobs are kept in memory, shared by every instance, and end after
+    ``pending_polls`` status checks, so batch runs can be exercised without
+    a provider account.
+    """
+
+    supports_batch = True
+    batch_discount = 0.5
+    pending_polls = 0
+
+    _batches: ClassVar[dict[str, dict]] = {}
+    _batch_ids = itertools.count(1)
+
+    def __init__(self, token: str, client=None, reply: str | None = None,
+                 **kwargs):
+        """
+        Initialize stub provider.
+
+        Args:
+            token: Ignored
+            client: Ignored
+            reply: Fixed output; the input is echoed if None
+            **kwargs: Additional parameters
+        """
+        self.token = token
+        self.reply = reply
+
+    def _result(self, input_text: str) -> InferenceResult:
+        output = input_text if self.reply is None else self.reply
+        return InferenceResult(
+            output=output,
+            input_tokens=len(input_text.split()),
+            output_tokens=len(output.split()),
+        )
+
+    async def run_inference(
+            self,
+            model: str,
+            input_text: str,
+            history: list | None = None,
+            **kwargs) -> InferenceResult:
+        """Return the stub output."""
+        return self._result(input_text)
+
+    async def stream_inference(
+            self,
+            model: str,
+            input_text: str,
+            history: list | None = None,
+            **kwargs) -> AsyncIterator[InferenceChunk]:
+        """Stream the stub output as a single chunk."""
+        result = self._result(input_text)
+        yield InferenceChunk(
+            delta=result["output"],
+            input_tokens=result["input_tokens"],
+            output_tokens=result["output_tokens"],
+        )
+
+    async def submit_batch(self, requests: list[BatchRequest]) -> str:
+        """Queue the requests in memory."""
+        batch_id = f"stub-batch-{next(self._batch_ids)}"
+        self._batches[batch_id] = {
+            "requests": list(requests),
+            "polls": 0,
+            "reply": self.reply,
+        }
+        return batch_id
+
+    async def get_batch_status(self, batch_id: str) -> BatchStatus:
+        """In progress for the first ``pending_polls`` checks, then ended."""
+        batch = self._batches.get(batch_id)
+        if batch is None:
+            raise ValueError(f"Unknown batch: {batch_id}")
+        batch["polls"] += 1
+        if batch["polls"] <= self.pending_polls:
+            return BatchStatus(status=BATCH_IN_PROGRESS, error=None)
+        return BatchStatus(status=BATCH_ENDED, error=None)
+
+    async def get_batch_results(
+            self, batch_id: str) -> AsyncIterator[BatchItemResult]:
+        """Results of every queued request; the batch is then forgotten."""
+        batch = self._batches.get(batch_id)
+        if batch is None:
+            raise ValueError(f"Unknown batch: {batch_id}")
+        stub = StubProvider(self.token, reply=batch["reply"])
+        for request in batch["requests"]:
+            result = stub._result(request["input_text"])
+            yield BatchItemResult(
+                custom_id=request["custom_id"], error=None, **result
+            )
+        self._batches.pop(batch_id, None)
+
+    def get_pricing(self, model: str) -> dict[str, float]:
+        """The stub is free."""
+        return {"input": 0.0, "output": 0.0}
+
+    def get_provider_name(self) -> str:
+        """Get provider name."""
+        return "stub"
@@ -1,22 +1,120 @@
+import asyncio
 import logging
+import math
 import random
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any
 
+from core.config import get_settings
 from models.reliability import LoadBalanceRule
 
 logger = logging.getLogger(__name__)
 
+# p2c-peak-ewma compares two random providers
+_P2C_CHOICES = 2
+
+# Names the frontend uses for the same algorithms
+ALGORITHM_ALIASES = {
+    "least-connections": "least-outstanding",
+    "latency-based": "p2c-peak-ewma",
+}
+
+
+class AliasTable:
+    """
+    Walker/Vose alias table: a weighted random choice in O(1) per draw,
+    after O(n) setup.
+    """
+
+    def __init__(self, items: list[str], weights: list[float]):
+        if not items or sum(weights) <= 0:
+            raise ValueError("Weighted selection needs a positive total weight")
+        n = len(items)
+        total = sum(weights)
+        scaled = [w * n / total for w in weights]
+        self.items = items
+        self.prob = [1.0] * n
+        self.alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s = small.pop()
+            g = large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = g
+            scaled[g] += scaled[s] - 1.0
+            (small if scaled[g] < 1.0 else large).append(g)
+        # Leftovers are 1 up to rounding error
+
+    def sample(self, rng: random.Random) -> str:
+        i = rng.randrange(len(self.items))
+        return self.items[i if rng.random() < self.prob[i] else self.alias[i]]
+
+
+@dataclass
+class ProviderLoad:
+    """Live counters for one provider, fed by LoadBalancerService.track."""
+
+    in_flight: int = 0
+    requests: int = 0
+    errors: int = 0
+    latency_total_ms: float = 0.0
+    peak_ewma_ms: float = 0.0
+    updated_at: float = 0.0
+
+    def observe(self, latency_ms: float, now: float, decay_s: float) -> None:
+        """
+        Peak-EWMA: a slower call takes over at once, faster calls pull the
+        average down with a weight that grows with the time since the last
+        sample.
+        """
+        if latency_ms > self.peak_ewma_ms:
+            self.peak_ewma_ms = latency_ms
+        else:
+            w = math.exp(-max(now - self.updated_at, 0.0) / decay_s)
+            self.peak_ewma_ms = self.peak_ewma_ms * w + latency_ms * (1 - w)
+        self.updated_at = now
+
 
 class LoadBalancerService:
     """
     Distributes requests across providers.
+
+    Algorithms:
+        round-robin: providers in turn
+        weighted: random, proportional to the rule's weights (alias method)
+        least-outstanding: fewest requests in flight, ties broken at random
+        p2c-peak-ewma: the cheaper of two random providers, where cost is
+            peak-EWMA latency times (in-flight requests + 1)
+
+    In-flight and latency counters come from track(), which the inference
+    path wraps around every provider call. They are per process.
     """
 
-    def __init__(self):
-        # Simulation: In-memory counters for round-robin
+    def __init__(
+        self,
+        rules: dict[str, LoadBalanceRule] | None = None,
+        decay_s: float = 10.0,
+        capacity: int = 64,
+        *,
+        capacities: dict[str, int] | None = None,
+        rng: random.Random | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.decay_s = decay_s
+        self.capacity = capacity
+        self.capacities = capacities or {}
+        self._rng = rng or random.Random()
+        self._clock = clock
         self._counters: dict[str, int] = {}
+        self._alias_tables: dict[str, AliasTable] = {}
+        self.loads: dict[str, ProviderLoad] = {}
 
-        # Mock Rule
-        self.rules = {
+        self.rules = {}
+        for rule in (rules or {
             "default": LoadBalanceRule(
                 name="default",
                 algorithm="weighted",
@@ -30,7 +128,13 @@ class LoadBalancerService:
                 providers=["anthropic", "together"],
                 enabled=True,
             ),
-        }
+        }).values():
+            self.add_rule(rule)
+
+    def add_rule(self, rule: LoadBalanceRule) -> None:
+        """Add or replace a rule (rules must not be changed in place)."""
+        self.rules[rule.name] = rule
+        self._alias_tables.pop(rule.name, None)
 
     def select_provider(self, rule_name: str = "default") -> str:
         """
@@ -41,10 +145,15 @@ class LoadBalancerService:
             # Fallback default logic if no rule
             return "openai"
 
-        if rule.algorithm == "round-robin":
+        algorithm = ALGORITHM_ALIASES.get(rule.algorithm, rule.algorithm)
+        if algorithm == "round-robin":
             return self._round_robin(rule.name, rule.providers)
-        elif rule.algorithm == "weighted":
-            return self._weighted(rule.providers, rule.weights)
+        elif algorithm == "weighted":
+            return self._weighted(rule)
+        elif algorithm == "least-outstanding":
+            return self._least_outstanding(rule.providers)
+        elif algorithm == "p2c-peak-ewma":
+            return self._power_of_two(rule.providers)
 
         return rule.providers[0]
 
@@ -54,12 +163,110 @@ class LoadBalancerService:
         self._counters[key] = idx + 1
         return provider
 
-    def _weighted(self, providers: list[str], weights: dict[str, int]) -> str:
-        # Create weighted pool (simple list expansion)
-        # Optimziation: Use cumulative weights for binary search if pool is
-        # huge
-        pool = []
-        for p in providers:
-            w = weights.get(p, 1)
-            pool.extend([p] * w)
-        return random.choice(pool)
+    def _weighted(self, rule: LoadBalanceRule) -> str:
+        table = self._alias_tables.get(rule.name)
+        if table is None:
+            table = self._alias_tables[rule.name] = AliasTable(
+                rule.providers, [rule.weights.get(p, 1) for p in rule.providers]
+            )
+        return table.sample(self._rng)
+
+    def _load(self, provider: str) -> ProviderLoad:
+        load = self.loads.get(provider)
+        if load is None:
+            load = self.loads[provider] = ProviderLoad()
+        return load
+
+    def _least_outstanding(self, providers: list[str]) -> str:
+        fewest = min(self._load(p).in_flight for p in providers)
+        return self._rng.choice(
+            [p for p in providers if self._load(p).in_flight == fewest]
+        )
+
+    def _cost(self, provider: str) -> float:
+        load = self._load(provider)
+        # Providers without a sample yet cost nothing, so they get tried
+        return load.peak_ewma_ms * (load.in_flight + 1)
+
+    def _power_of_two(self, providers: list[str]) -> str:
+        if len(providers) < _P2C_CHOICES:
+            return providers[0]
+        a, b = self._rng.sample(providers, _P2C_CHOICES)
+        return a if self._cost(a) <= self._cost(b) else b
+
+    @contextmanager
+    def track(self, provider: str) -> Iterator[None]:
+        """
+        Count a provider call as in flight for the duration of the block,
+        then record its latency, or an error if the block raised.
+        Cancelled calls (e.g. a hedge that lost) are not recorded.
+        """
+        load = self._load(provider)
+        load.in_flight += 1
+        start = self._clock()
+        failed = False
+        try:
+            yield
+        except asyncio.CancelledError:
+            start = None
+            raise
+        except Exception:
+            failed = True
+            raise
+        finally:
+            load.in_flight -= 1
+            if start is not None:
+                self.observe(provider, (self._clock() - start) * 1000, failed)
+
+    def observe(
+        self, provider: str, latency_ms: float, failed: bool = False
+    ) -> None:
+        """Record a finished call."""
+        load = self._load(provider)
+        load.requests += 1
+        if failed:
+            load.errors += 1
+            return
+        load.latency_total_ms += latency_ms
+        load.observe(latency_ms, self._clock(), self.decay_s)
+
+    def analytics(self) -> dict[str, Any]:
+        """
+        Requests, share, latency and current load per provider.
+        ``current_load`` is in-flight requests as a percentage of the
+        provider's capacity, and ``capacity`` is the percentage left.
+        """
+        total = sum(load.requests for load in self.loads.values())
+        succeeded = sum(load.requests - load.errors for load in self.loads.values())
+        latency_total = sum(load.latency_total_ms for load in self.loads.values())
+        distribution = []
+        for provider, load in sorted(self.loads.items()):
+            capacity = self.capacities.get(provider, self.capacity)
+            current_load = min(100.0, load.in_flight / capacity * 100)
+            distribution.append({
+                "provider": provider,
+                "requests": load.requests,
+                "percentage": load.requests / total * 100 if total else 0.0,
+                "capacity": round(100.0 - current_load, 1),
+                "current_load": round(current_load, 1),
+                "in_flight": load.in_flight,
+                "errors": load.errors,
+                "latency_ewma_ms": load.peak_ewma_ms,
+            })
+        return {
+            "total_requests": total,
+            "avg_latency": latency_total / succeeded if succeeded else 0.0,
+            "distribution": distribution,
+        }
+
+
+_settings = get_settings()
+_load_balancer = LoadBalancerService(
+    decay_s=_settings.LOAD_BALANCER_EWMA_DECAY_S,
+    capacity=_settings.LOAD_BALANCER_PROVIDER_CAPACITY,
+    capacities=_settings.LOAD_BALANCER_PROVIDER_CAPACITIES,
+)
+
+
+def get_load_balancer() -> LoadBalancerService:
+    return _load_balancer
@@ -1,9 +1,20 @@
 import logging
 import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
 from typing import Any
 
+from core.config import get_settings
+from services.streaming_redactor import RedactionRule
+
 try:
-    from presidio_analyzer import AnalyzerEngine, RecognizerResult
+    from presidio_analyzer import (
+        AnalyzerEngine,
+        BatchAnalyzerEngine,
+        RecognizerResult,
+    )
     from presidio_anonymizer import AnonymizerEngine
     from presidio_anonymizer.entities import OperatorConfig
 
@@ -11,12 +22,38 @@ try:
 except ImportError:
     PRESIDIO_AVAILABLE = False
     AnalyzerEngine = None
+    BatchAnalyzerEngine = None
     AnonymizerEngine = None
     RecognizerResult = None
     OperatorConfig = None
 
 logger = logging.getLogger(__name__)
 
+BASIC_PII_PATTERNS = {
+    "EMAIL": re.compile(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b"),
+    "PHONE": re.compile(r"\b\d{3}[-.]?\d{3}[-.]?\d{4}\b"),
+    "SSN": re.compile(r"\b\d{3}-\d{2}-\d{4}\b"),
+}
+
+
+@dataclass(frozen=True)
+class BasicPIIResult:
+    """PII match from the regex fallback (same fields as RecognizerResult)."""
+
+    entity_type: str
+    start: int
+    end: int
+    score: float = 0.8
+
+
+def _basic_pii_detection(text: str) -> list[BasicPIIResult]:
+    """Basic PII detection using regex patterns."""
+    return [
+        BasicPIIResult(entity_type, match.start(), match.end())
+        for entity_type, pattern in BASIC_PII_PATTERNS.items()
+        for match in pattern.finditer(text)
+    ]
+
 
 class PIIDetectionService:
     """
@@ -78,29 +115,57 @@ class PIIDetectionService:
             logger.error(f"Error analyzing text for PII: {e}")
             return self._basic_pii_detection(text)
 
+    def analyze_many(
+        self,
+        texts: list[str],
+        batch_size: int | None = None,
+        n_process: int | None = None,
+    ) -> list[list]:
+        """
+        Analyze many texts at once.
+
+        With Presidio, texts go through spaCy's ``nlp.pipe`` in batches (via
+        BatchAnalyzerEngine), using ``n_process`` worker processes. The regex
+        fallback fans large inputs out to a process pool of the same size.
+
+        Args:
+            texts: Texts to analyze
+            batch_size: Texts per spaCy batch (default PII_BATCH_SIZE)
+            n_process: Worker processes (default PII_ANALYZE_PROCESSES)
+
+        Returns:
+            One list of PII results per input text, in order
+        """
+        settings = get_settings()
+        batch_size = batch_size or settings.PII_BATCH_SIZE
+        n_process = n_process or settings.PII_ANALYZE_PROCESSES
+
+        if self.analyzer:
+            try:
+                batch_analyzer = BatchAnalyzerEngine(analyzer_engine=self.analyzer)
+                return [
+                    list(results)
+                    for results in batch_analyzer.analyze_iterator(
+                        texts,
+                        language="en",
+                        batch_size=batch_size,
+                        n_process=n_process,
+                    )
+                ]
+            except Exception as e:
+                logger.error(f"Batch PII analysis failed: {e}, analyzing one by one")
+                return [self.analyze(text) for text in texts]
+
+        if n_process > 1 and len(texts) > batch_size:
+            with ProcessPoolExecutor(max_workers=n_process) as pool:
+                return list(
+                    pool.map(_basic_pii_detection, texts, chunksize=batch_size)
+                )
+        return [_basic_pii_detection(text) for text in texts]
+
     def _basic_pii_detection(self, text: str) -> list:
         """Basic PII detection using regex patterns."""
-        patterns = {
-            "EMAIL": r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b",
-            "PHONE": r"\b\d{3}[-.]?\d{3}[-.]?\d{4}\b",
-            "SSN": r"\b\d{3}-\d{2}-\d{4}\b",
-        }
-        results = []
-        for entity_type, pattern in patterns.items():
-            for match in re.finditer(pattern, text):
-                # Create a simple result object
-                result = type(
-                    "Result",
-                    (),
-                    {
-                        "entity_type": entity_type,
-                        "start": match.start(),
-                        "end": match.end(),
-                        "score": 0.8,
-                    },
-                )()
-                results.append(result)
-        return results
+        return _basic_pii_detection(text)
 
     def anonymize(self, text: str,
                   operators: dict[str, Any] | None = None) -> str:
@@ -130,14 +195,9 @@ class PIIDetectionService:
 
     def _basic_redaction(self, text: str) -> str:
         """Basic PII redaction using regex patterns."""
-        patterns = {
-            "EMAIL": r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b",
-            "PHONE": r"\b\d{3}[-.]?\d{3}[-.]?\d{4}\b",
-            "SSN": r"\b\d{3}-\d{2}-\d{4}\b",
-        }
         redacted = text
-        for entity_type, pattern in patterns.items():
-            redacted = re.sub(pattern, f"<REDACTED:{entity_type}>", redacted)
+        for entity_type, pattern in BASIC_PII_PATTERNS.items():
+            redacted = pattern.sub(f"<REDACTED:{entity_type}>", redacted)
         return redacted
 
     def redact(self, text: str) -> str:
@@ -145,3 +205,42 @@ class PIIDetectionService:
         Helper to simple redaction.
         """
         return self.anonymize(text)
+
+    def redaction_rules(self) -> list[RedactionRule]:
+        """
+        Rules for redacting PII with a StreamingRedactor.
+
+        Presidio needs the whole text to find entities, so streams always use
+        the regex patterns, with the same <REDACTED:ENTITY> replacements as
+        the basic redaction.
+        """
+        return [
+            RedactionRule(name=entity_type, pattern=pattern, report_violation=False)
+            for entity_type, pattern in BASIC_PII_PATTERNS.items()
+        ]
+
+
+_pii_service_lock = threading.Lock()
+
+
+@lru_cache
+def _shared_pii_service() -> PIIDetectionService:
+    return PIIDetectionService()
+
+
+def get_pii_service() -> PIIDetectionService:
+    """
+    Process-wide PIIDetectionService.
+
+    Building one loads the spaCy model behind Presidio's AnalyzerEngine,
+    which takes seconds, so it is built once (normally by warm_up_pii_service
+    at startup) and shared by every request. The lock keeps requests racing
+    the warm-up from building a second one.
+    """
+    with _pii_service_lock:
+        return _shared_pii_service()
+
+
+def warm_up_pii_service() -> None:
+    """Build the shared analyzer and run it once so the first request is fast."""
+    get_pii_service().analyze("Warm-up: contact jane@example.com")
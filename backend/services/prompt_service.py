@@ -1,7 +1,115 @@
-from jinja2 import Template
+import hashlib
+import threading
+from collections import OrderedDict
 
+from jinja2 import Template, TemplateSyntaxError, meta
+from jinja2.sandbox import SandboxedEnvironment
+
+from core.config import get_settings
 from models.prompt import Prompt
 
+# Prompt templates are user-authored, so they are compiled in a sandbox that
+# blocks access to unsafe attributes and callables.
+_environment = SandboxedEnvironment()
+
+# (prompt id, version, template content hash)
+TemplateKey = tuple[int | None, int, str]
+
+
+def _content_hash(template: str) -> str:
+    return hashlib.sha256(template.encode("utf-8")).hexdigest()[:16]
+
+
+class TemplateCache:
+    """
+    Process-wide LRU of compiled prompt templates.
+
+    Entries are keyed by prompt id, version and a hash of the template text,
+    so an edited template is never served stale even in a worker that missed
+    the invalidation; invalidate() just frees the old entries early.
+    """
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._templates: OrderedDict[TemplateKey, Template] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, prompt: Prompt) -> Template:
+        """Return the compiled template for a prompt, compiling on first use."""
+        key = (prompt.id, prompt.version, _content_hash(prompt.template))
+        with self._lock:
+            template = self._templates.get(key)
+            if template is not None:
+                self._templates.move_to_end(key)
+                self.hits += 1
+                return template
+            self.misses += 1
+
+        template = _environment.from_string(prompt.template)
+        with self._lock:
+            self._templates[key] = template
+            while len(self._templates) > self.max_size:
+                self._templates.popitem(last=False)
+        return template
+
+    def invalidate(self, prompt_id: int) -> int:
+        """
+        Drop every compiled version of a prompt.
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            stale = [key for key in self._templates if key[0] == prompt_id]
+            for key in stale:
+                del self._templates[key]
+        return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._templates.clear()
+
+    def stats(self) -> dict[str, int]:
+        """Cache size and hit/miss counters."""
+        return {
+            "size": len(self._templates),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+_template_cache = TemplateCache(max_size=get_settings().PROMPT_TEMPLATE_CACHE_SIZE)
+
+
+def get_template_cache() -> TemplateCache:
+    return _template_cache
+
+
+def validate_prompt_template(template: str, input_variables: list[str]) -> None:
+    """
+    Check a template when it is saved.
+
+    Parses the template in the sandboxed environment and verifies that every
+    variable it references is declared in ``input_variables``, so renders
+    only need to check that the declared variables were supplied.
+
+    Raises:
+        ValueError: If the template is invalid or uses undeclared variables.
+    """
+    try:
+        ast = _environment.parse(template)
+    except TemplateSyntaxError as e:
+        raise ValueError(f"Invalid prompt template: {e!s}") from e
+
+    undeclared = meta.find_undeclared_variables(ast) - set(input_variables or [])
+    if undeclared:
+        raise ValueError(
+            "Template uses variables not listed in input_variables: "
+            f"{', '.join(sorted(undeclared))}"
+        )
+
 
 def render_prompt(prompt: Prompt, variables: dict) -> str:
     """
@@ -18,11 +126,10 @@ def render_prompt(prompt: Prompt, variables: dict) -> str:
         ValueError: If variables are missing or template is invalid.
     """
     try:
-        template = Template(prompt.template)
-        # Jinja2 defaults to empty strings for missing vars; validate via inputs.
-        # We might want strict validation based on prompt.input_variables.
+        template = _template_cache.get(prompt)
 
-        # Simple validation
+        # Jinja2 defaults to empty strings for missing vars; the template's
+        # variables were checked against input_variables when it was saved.
         if prompt.input_variables:
             missing_vars = [
                 var for var in prompt.input_variables if var not in variables
@@ -0,0 +1,107 @@
+"""Per-provider concurrency caps and request pacing for bulk workloads."""
+
+import asyncio
+import time
+
+from core.config import get_settings
+
+
+def is_rate_limited(error: Exception | str) -> bool:
+    """Whether a provider error is a throttling response (HTTP 429)."""
+    message = str(error).lower()
+    return "429" in message or "rate limit" in message or "rate_limit" in message
+
+
+class ProviderLimiter:
+    """
+    Admission control for calls to one provider.
+
+    ``async with limiter:`` waits for one of ``concurrency`` slots, then for
+    the pacer: calls start at most ``rate_per_s`` per second (unlimited if
+    None), and not before a backoff set by throttle() has passed. Waiting
+    for the slot first keeps the number of callers queued on the pacer
+    bounded.
+    """
+
+    def __init__(self, concurrency: int, rate_per_s: float | None = None):
+        self.concurrency = concurrency
+        self.rate_per_s = rate_per_s
+        self._slots = asyncio.Semaphore(concurrency)
+        self._pace_lock = asyncio.Lock()
+        self._next_start = 0.0
+        self._paused_until = 0.0
+        self.throttled = 0
+
+    async def __aenter__(self) -> "ProviderLimiter":
+        await self._slots.acquire()
+        try:
+            await self._pace()
+        except BaseException:
+            self._slots.release()
+            raise
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self._slots.release()
+
+    async def _pace(self) -> None:
+        async with self._pace_lock:
+            now = time.monotonic()
+            start = max(now, self._next_start, self._paused_until)
+            if self.rate_per_s:
+                self._next_start = start + 1.0 / self.rate_per_s
+            if start > now:
+                await asyncio.sleep(start - now)
+
+    def throttle(self, delay_s: float) -> None:
+        """Hold back every new call for ``delay_s`` (after a 429)."""
+        self._paused_until = max(self._paused_until, time.monotonic() + delay_s)
+        self.throttled += 1
+
+
+class ProviderLimiters:
+    """
+    One ProviderLimiter per provider, shared by everything in the process
+    that runs bulk inference, so two evaluations against the same provider
+    share its limits.
+
+    Limiters belong to the event loop that created them and are rebuilt if
+    used from another loop.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 8,
+        limits: dict[str, int] | None = None,
+        rates: dict[str, float] | None = None,
+    ):
+        self.concurrency = concurrency
+        self.limits = limits or {}
+        self.rates = rates or {}
+        self._limiters: dict[str, ProviderLimiter] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def get(self, provider: str) -> ProviderLimiter:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._limiters.clear()
+            self._loop = loop
+        limiter = self._limiters.get(provider)
+        if limiter is None:
+            limiter = self._limiters[provider] = ProviderLimiter(
+                self.limits.get(provider, self.concurrency),
+                self.rates.get(provider),
+            )
+        return limiter
+
+
+_settings = get_settings()
+_provider_limiters = ProviderLimiters(
+    concurrency=_settings.PROVIDER_BULK_CONCURRENCY,
+    limits=_settings.PROVIDER_BULK_LIMITS,
+    rates=_settings.PROVIDER_BULK_RATES_PER_S,
+)
+
+
+def get_provider_limiters() -> ProviderLimiters:
+    return _provider_limiters
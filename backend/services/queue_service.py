@@ -1,95 +1,812 @@
+"""Priority request queue with pluggable in-process and Redis backends."""
+
+import heapq
+import json
 import logging
-from datetime import datetime
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from itertools import count
 from typing import Any
 
+import redis.asyncio as redis
+from sqlalchemy import and_, func, or_, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.config import get_settings
+from core.database import async_session_maker
 from models.reliability import RequestQueue
 
 logger = logging.getLogger(__name__)
 
+REDIS_KEY_PREFIX = "request-queue:"
+# Redis scores are doubles: priority in the high bits, enqueue order below
+PRIORITY_SCALE = 2**40
 
-class QueueService:
+
+def _utcnow() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def _from_timestamp(ts: float | None) -> datetime | None:
+    # RequestQueue timestamps are naive UTC, like its created_at default
+    if ts is None:
+        return None
+    return datetime.fromtimestamp(ts, UTC).replace(tzinfo=None)
+
+
+@dataclass
+class QueueStats:
+    """Counters behind QueueService.get_metrics()."""
+
+    pending: int = 0
+    processing: int = 0
+    completed: int = 0
+    failed: int = 0
+    redelivered: int = 0
+    wait_total_s: float = 0.0
+    wait_count: int = 0
+    processing_total_s: float = 0.0
+    processing_count: int = 0
+
+
+class QueueBackend(ABC):
+    """
+    Storage and ordering for queued requests.
+
+    Items come out lowest ``priority`` first, FIFO within a priority. A
+    dequeued item is invisible to other consumers until it is acked (or
+    nacked) or until its visibility timeout passes, after which it is
+    handed out again.
+    """
+
+    @abstractmethod
+    async def enqueue(
+        self, request_data: dict[str, Any], priority: int
+    ) -> RequestQueue:
+        ...
+
+    @abstractmethod
+    async def dequeue(self, visibility_timeout_s: float) -> RequestQueue | None:
+        ...
+
+    @abstractmethod
+    async def ack(
+        self, request_id: int, result: dict[str, Any] | None = None
+    ) -> RequestQueue | None:
+        """Mark an item completed; None if it is unknown or already finished."""
+
+    @abstractmethod
+    async def nack(
+        self, request_id: int, requeue: bool, error: str | None = None
+    ) -> RequestQueue | None:
+        """Put an in-flight item back in the queue, or mark it failed."""
+
+    @abstractmethod
+    async def get(self, request_id: int) -> RequestQueue | None:
+        ...
+
+    @abstractmethod
+    async def list_items(self) -> list[RequestQueue]:
+        """Queued, in-flight and recently finished items, by id."""
+
+    @abstractmethod
+    async def depth(self) -> int:
+        """Number of items waiting to be dequeued."""
+
+    @abstractmethod
+    async def stats(self) -> QueueStats:
+        ...
+
+
+class MemoryQueueBackend(QueueBackend):
     """
-    Simulation of a Redis-backed request queue using in-memory list.
+    Binary heap in this process.
+
+    Enqueue and dequeue are O(log n). Acked/nacked items leave the heap
+    lazily: entries whose item is no longer pending are skipped when they
+    reach the top. In-flight deadlines are kept in a second heap, so expired
+    items are found without scanning. The last ``max_finished`` completed or
+    failed items are kept for list_items().
     """
 
-    def __init__(self):
-        # Simulated persistence
-        self._queue = []
-        self._db_mirror = {}  # Dictionary simulation of DB for ID lookup
+    def __init__(self, max_finished: int = 1000):
+        self.max_finished = max_finished
+        self._ids = count(1)
+        self._seq = count()
+        self._heap: list[tuple[int, int, int]] = []  # (priority, seq, id)
+        self._deadlines: list[tuple[float, int]] = []  # (deadline, id)
+        self._records: dict[int, RequestQueue] = {}
+        self._order: dict[int, tuple[int, int]] = {}  # id -> (priority, seq)
+        self._in_flight: dict[int, float] = {}  # id -> deadline
+        self._finished: deque[int] = deque()
+        self._stats = QueueStats()
 
     async def enqueue(
-        self, request_data: dict[str, Any], priority: int = 1
+        self, request_data: dict[str, Any], priority: int
     ) -> RequestQueue:
-        """
-        Add a request to the queue.
-        """
-        # Create record
         record = RequestQueue(
-            id=len(self._db_mirror) + 1,
+            id=next(self._ids),
             request_data=request_data,
             priority=priority,
             status="pending",
         )
-        self._db_mirror[record.id] = record
+        self._records[record.id] = record
+        self._order[record.id] = (priority, next(self._seq))
+        heapq.heappush(self._heap, (*self._order[record.id], record.id))
+        return record
 
-        # Add to in-memory queue (simple list for demo)
-        # In reality, this would be `redis.lpush`
-        self._queue.append(record)
+    def _requeue_expired(self, now: float) -> None:
+        while self._deadlines and self._deadlines[0][0] <= now:
+            deadline, request_id = heapq.heappop(self._deadlines)
+            if self._in_flight.get(request_id) != deadline:
+                continue  # Acked, nacked or dequeued again since
+            del self._in_flight[request_id]
+            self._records[request_id].status = "pending"
+            heapq.heappush(self._heap, (*self._order[request_id], request_id))
+            self._stats.redelivered += 1
 
-        # Sort by priority (0 is highest)
-        self._queue.sort(key=lambda x: x.priority)
+    async def dequeue(self, visibility_timeout_s: float) -> RequestQueue | None:
+        now = time.time()
+        self._requeue_expired(now)
+        while self._heap:
+            _, _, request_id = heapq.heappop(self._heap)
+            record = self._records.get(request_id)
+            if record is None or record.status != "pending":
+                continue
+            deadline = now + visibility_timeout_s
+            self._in_flight[request_id] = deadline
+            heapq.heappush(self._deadlines, (deadline, request_id))
+            record.status = "processing"
+            record.started_at = _from_timestamp(now)
+            record.attempts += 1
+            if record.attempts == 1:
+                self._stats.wait_total_s += (
+                    record.started_at - record.created_at
+                ).total_seconds()
+                self._stats.wait_count += 1
+            return record
+        return None
 
-        logger.info(f"Enqueued request {record.id} with priority {priority}")
+    def _finish(
+        self,
+        request_id: int,
+        status: str,
+        result: dict[str, Any] | None = None,
+        error: str | None = None,
+    ) -> RequestQueue | None:
+        record = self._records.get(request_id)
+        if record is None or record.status not in ("pending", "processing"):
+            return None
+        self._in_flight.pop(request_id, None)
+        record.status = status
+        record.result = result
+        record.error = error
+        record.processed_at = _from_timestamp(time.time())
+        if status == "completed":
+            self._stats.completed += 1
+            if record.started_at is not None:
+                self._stats.processing_total_s += (
+                    record.processed_at - record.started_at
+                ).total_seconds()
+                self._stats.processing_count += 1
+        else:
+            self._stats.failed += 1
+
+        self._finished.append(request_id)
+        while len(self._finished) > self.max_finished:
+            old_id = self._finished.popleft()
+            self._records.pop(old_id, None)
+            self._order.pop(old_id, None)
+        return record
+
+    async def ack(
+        self, request_id: int, result: dict[str, Any] | None = None
+    ) -> RequestQueue | None:
+        return self._finish(request_id, "completed", result=result)
+
+    async def nack(
+        self, request_id: int, requeue: bool, error: str | None = None
+    ) -> RequestQueue | None:
+        if not requeue:
+            return self._finish(request_id, "failed", error=error)
+        if self._in_flight.pop(request_id, None) is None:
+            return None
+        record = self._records[request_id]
+        record.status = "pending"
+        record.error = error
+        heapq.heappush(self._heap, (*self._order[request_id], request_id))
+        return record
+
+    async def get(self, request_id: int) -> RequestQueue | None:
+        return self._records.get(request_id)
+
+    async def list_items(self) -> list[RequestQueue]:
+        return [self._records[request_id] for request_id in sorted(self._records)]
+
+    async def depth(self) -> int:
+        return sum(1 for r in self._records.values() if r.status == "pending")
+
+    async def stats(self) -> QueueStats:
+        pending = sum(1 for r in self._records.values() if r.status == "pending")
+        return QueueStats(
+            **{
+                **self._stats.__dict__,
+                "pending": pending,
+                "processing": len(self._in_flight),
+            }
+        )
+
+
+# KEYS: pending, inflight, stats. ARGV: now, deadline, item key prefix.
+_DEQUEUE_SCRIPT = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])
+for _, id in ipairs(expired) do
+  local item = ARGV[3] .. id
+  redis.call('ZREM', KEYS[2], id)
+  redis.call('ZADD', KEYS[1], redis.call('HGET', item, 'score'), id)
+  redis.call('HSET', item, 'status', 'pending')
+  redis.call('HINCRBY', KEYS[3], 'redelivered', 1)
+end
+local popped = redis.call('ZPOPMIN', KEYS[1])
+if #popped == 0 then return false end
+local id = popped[1]
+local item = ARGV[3] .. id
+redis.call('ZADD', KEYS[2], ARGV[2], id)
+redis.call('HSET', item, 'status', 'processing', 'started_at', ARGV[1])
+redis.call('HINCRBY', item, 'attempts', 1)
+return id
+"""
+
+# KEYS: inflight, pending, finished, stats.
+# ARGV: id, now, final status, max finished, item key prefix, result JSON
+# (or ""), error (or "").
+_FINISH_SCRIPT = """
+local removed = redis.call('ZREM', KEYS[1], ARGV[1])
+  + redis.call('ZREM', KEYS[2], ARGV[1])
+if removed == 0 then return false end
+local item = ARGV[5] .. ARGV[1]
+redis.call('HSET', item, 'status', ARGV[3], 'processed_at', ARGV[2])
+if ARGV[6] ~= '' then redis.call('HSET', item, 'result', ARGV[6]) end
+if ARGV[7] ~= '' then redis.call('HSET', item, 'error', ARGV[7]) end
+redis.call('HINCRBY', KEYS[4], ARGV[3], 1)
+redis.call('LPUSH', KEYS[3], ARGV[1])
+while redis.call('LLEN', KEYS[3]) > tonumber(ARGV[4]) do
+  redis.call('DEL', ARGV[5] .. redis.call('RPOP', KEYS[3]))
+end
+return 1
+"""
+
+# KEYS: inflight, pending. ARGV: id, item key prefix.
+_REQUEUE_SCRIPT = """
+if redis.call('ZREM', KEYS[1], ARGV[1]) == 0 then return false end
+local item = ARGV[2] .. ARGV[1]
+redis.call('ZADD', KEYS[2], redis.call('HGET', item, 'score'), ARGV[1])
+redis.call('HSET', item, 'status', 'pending')
+return 1
+"""
+
+
+class RedisQueueBackend(QueueBackend):
+    """
+    Queue shared by every process through Redis.
+
+    Waiting ids sit in a sorted set scored by priority then enqueue order,
+    in-flight ids in a second sorted set scored by their visibility
+    deadline, and each item in its own hash. Lua scripts move ids between
+    the sets atomically, so an item is never lost or handed to two
+    consumers, and requeue expired items as part of every dequeue.
+    """
+
+    def __init__(
+        self,
+        client: Any = None,
+        url: str | None = None,
+        max_finished: int = 1000,
+        prefix: str = REDIS_KEY_PREFIX,
+    ):
+        if client is None:
+            client = redis.Redis.from_url(url or get_settings().REDIS_URL)
+        self.client = client
+        self.max_finished = max_finished
+        self._seq_key = prefix + "seq"
+        self._pending_key = prefix + "pending"
+        self._inflight_key = prefix + "inflight"
+        self._finished_key = prefix + "finished"
+        self._stats_key = prefix + "stats"
+        self._item_prefix = prefix + "item:"
+        self._dequeue = client.register_script(_DEQUEUE_SCRIPT)
+        self._finish_script = client.register_script(_FINISH_SCRIPT)
+        self._requeue = client.register_script(_REQUEUE_SCRIPT)
+
+    @staticmethod
+    def _decode(value: Any) -> str:
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+
+    async def _load(self, request_id: int | str) -> RequestQueue | None:
+        fields = await self.client.hgetall(f"{self._item_prefix}{request_id}")
+        if not fields:
+            return None
+        item = {self._decode(k): self._decode(v) for k, v in fields.items()}
+        return RequestQueue(
+            id=int(request_id),
+            request_data=json.loads(item["data"]),
+            priority=int(item["priority"]),
+            status=item["status"],
+            attempts=int(item.get("attempts", 0)),
+            created_at=_from_timestamp(float(item["created_at"])),
+            started_at=_from_timestamp(
+                float(item["started_at"]) if "started_at" in item else None
+            ),
+            processed_at=_from_timestamp(
+                float(item["processed_at"]) if "processed_at" in item else None
+            ),
+            result=json.loads(item["result"]) if "result" in item else None,
+            error=item.get("error"),
+        )
+
+    async def enqueue(
+        self, request_data: dict[str, Any], priority: int
+    ) -> RequestQueue:
+        request_id = int(await self.client.incr(self._seq_key))
+        now = time.time()
+        score = priority * PRIORITY_SCALE + request_id
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hset(
+                f"{self._item_prefix}{request_id}",
+                mapping={
+                    "data": json.dumps(request_data),
+                    "priority": priority,
+                    "score": score,
+                    "status": "pending",
+                    "attempts": 0,
+                    "created_at": now,
+                },
+            )
+            pipe.zadd(self._pending_key, {str(request_id): score})
+            await pipe.execute()
+        return RequestQueue(
+            id=request_id,
+            request_data=request_data,
+            priority=priority,
+            status="pending",
+            created_at=_from_timestamp(now),
+        )
+
+    async def dequeue(self, visibility_timeout_s: float) -> RequestQueue | None:
+        now = time.time()
+        request_id = await self._dequeue(
+            keys=[self._pending_key, self._inflight_key, self._stats_key],
+            args=[now, now + visibility_timeout_s, self._item_prefix],
+        )
+        if not request_id:
+            return None
+        record = await self._load(self._decode(request_id))
+        if record is not None and record.attempts == 1:
+            wait_s = (record.started_at - record.created_at).total_seconds()
+            await self.client.hincrbyfloat(self._stats_key, "wait_total_s", wait_s)
+            await self.client.hincrby(self._stats_key, "wait_count", 1)
+        return record
+
+    async def _finish(
+        self,
+        request_id: int,
+        status: str,
+        result: dict[str, Any] | None = None,
+        error: str | None = None,
+    ) -> RequestQueue | None:
+        finished = await self._finish_script(
+            keys=[
+                self._inflight_key,
+                self._pending_key,
+                self._finished_key,
+                self._stats_key,
+            ],
+            args=[
+                request_id,
+                time.time(),
+                status,
+                self.max_finished,
+                self._item_prefix,
+                json.dumps(result) if result is not None else "",
+                error or "",
+            ],
+        )
+        if not finished:
+            return None
+        record = await self._load(request_id)
+        if record is not None and status == "completed" and record.started_at:
+            processing_s = (record.processed_at - record.started_at).total_seconds()
+            await self.client.hincrbyfloat(
+                self._stats_key, "processing_total_s", processing_s
+            )
+            await self.client.hincrby(self._stats_key, "processing_count", 1)
         return record
 
-    async def dequeue(self) -> RequestQueue | None:
+    async def ack(
+        self, request_id: int, result: dict[str, Any] | None = None
+    ) -> RequestQueue | None:
+        return await self._finish(request_id, "completed", result=result)
+
+    async def nack(
+        self, request_id: int, requeue: bool, error: str | None = None
+    ) -> RequestQueue | None:
+        if not requeue:
+            return await self._finish(request_id, "failed", error=error)
+        requeued = await self._requeue(
+            keys=[self._inflight_key, self._pending_key],
+            args=[request_id, self._item_prefix],
+        )
+        return await self._load(request_id) if requeued else None
+
+    async def get(self, request_id: int) -> RequestQueue | None:
+        return await self._load(request_id)
+
+    async def list_items(self) -> list[RequestQueue]:
+        ids = []
+        async for key in self.client.scan_iter(match=self._item_prefix + "*"):
+            ids.append(int(self._decode(key)[len(self._item_prefix):]))
+        records = [await self._load(request_id) for request_id in sorted(ids)]
+        return [record for record in records if record is not None]
+
+    async def depth(self) -> int:
+        return int(await self.client.zcard(self._pending_key))
+
+    async def stats(self) -> QueueStats:
+        raw = await self.client.hgetall(self._stats_key)
+        values = {self._decode(k): self._decode(v) for k, v in raw.items()}
+        return QueueStats(
+            pending=await self.depth(),
+            processing=int(await self.client.zcard(self._inflight_key)),
+            completed=int(values.get("completed", 0)),
+            failed=int(values.get("failed", 0)),
+            redelivered=int(values.get("redelivered", 0)),
+            wait_total_s=float(values.get("wait_total_s", 0.0)),
+            wait_count=int(values.get("wait_count", 0)),
+            processing_total_s=float(values.get("processing_total_s", 0.0)),
+            processing_count=int(values.get("processing_count", 0)),
+        )
+
+
+def _seconds_between(dialect: str, start, end):
+    """SQL expression for ``end - start`` in seconds."""
+    if dialect == "sqlite":
+        return (func.julianday(end) - func.julianday(start)) * 86400.0
+    return func.extract("epoch", end - start)
+
+
+class DatabaseQueueBackend(QueueBackend):
+    """
+    Queue stored in the RequestQueue table, so items and their results
+    survive restarts and are shared by every replica.
+
+    Several named queues share the table. Consumers find the next item with
+    ``SELECT ... FOR UPDATE SKIP LOCKED`` and claim it with an UPDATE that
+    only matches while it is still claimable, so concurrent consumers never
+    get the same item; an item whose claim (claimed_until) has lapsed is
+    claimable again. Finished rows are kept (they hold the results).
+    """
+
+    def __init__(
+        self,
+        queue: str = "default",
+        session_factory: Callable[[], AsyncSession] | None = None,
+        list_limit: int = 1000,
+    ):
+        self.queue = queue
+        self.list_limit = list_limit
+        self._session_factory = session_factory or async_session_maker
+
+    async def enqueue(
+        self, request_data: dict[str, Any], priority: int
+    ) -> RequestQueue:
+        record = RequestQueue(
+            queue=self.queue,
+            request_data=request_data,
+            priority=priority,
+            status="pending",
+        )
+        async with self._session_factory() as session:
+            session.add(record)
+            await session.commit()
+            await session.refresh(record)
+        return record
+
+    async def dequeue(self, visibility_timeout_s: float) -> RequestQueue | None:
+        now = _utcnow()
+        claimable = and_(
+            RequestQueue.queue == self.queue,
+            or_(
+                RequestQueue.status == "pending",
+                and_(
+                    RequestQueue.status == "processing",
+                    RequestQueue.claimed_until <= now,
+                ),
+            ),
+        )
+        async with self._session_factory() as session:
+            while True:
+                record = (
+                    await session.exec(
+                        select(RequestQueue)
+                        .where(claimable)
+                        .order_by(RequestQueue.priority, RequestQueue.id)
+                        .limit(1)
+                        .with_for_update(skip_locked=True)
+                    )
+                ).first()
+                if record is None:
+                    return None
+                # Conditional so a consumer that read the same row first
+                # (no row locks, e.g. SQLite) wins and this one tries the next
+                claimed = await session.exec(
+                    update(RequestQueue)
+                    .where(RequestQueue.id == record.id, claimable)
+                    .values(
+                        status="processing",
+                        started_at=now,
+                        claimed_until=now + timedelta(seconds=visibility_timeout_s),
+                        attempts=RequestQueue.attempts + 1,
+                    )
+                )
+                await session.commit()
+                if claimed.rowcount == 1:
+                    await session.refresh(record)
+                    return record
+
+    async def _update(
+        self, request_id: int, from_statuses: tuple[str, ...], **values
+    ) -> RequestQueue | None:
+        async with self._session_factory() as session:
+            updated = await session.exec(
+                update(RequestQueue)
+                .where(
+                    RequestQueue.id == request_id,
+                    RequestQueue.queue == self.queue,
+                    RequestQueue.status.in_(from_statuses),
+                )
+                .values(claimed_until=None, **values)
+            )
+            await session.commit()
+            if updated.rowcount != 1:
+                return None
+            return await session.get(RequestQueue, request_id)
+
+    async def ack(
+        self, request_id: int, result: dict[str, Any] | None = None
+    ) -> RequestQueue | None:
+        return await self._update(
+            request_id,
+            ("pending", "processing"),
+            status="completed",
+            processed_at=_utcnow(),
+            result=result,
+        )
+
+    async def nack(
+        self, request_id: int, requeue: bool, error: str | None = None
+    ) -> RequestQueue | None:
+        if requeue:
+            return await self._update(
+                request_id, ("processing",), status="pending", error=error
+            )
+        return await self._update(
+            request_id,
+            ("pending", "processing"),
+            status="failed",
+            processed_at=_utcnow(),
+            error=error,
+        )
+
+    async def get(self, request_id: int) -> RequestQueue | None:
+        async with self._session_factory() as session:
+            record = await session.get(RequestQueue, request_id)
+        if record is None or record.queue != self.queue:
+            return None
+        return record
+
+    async def list_items(self) -> list[RequestQueue]:
+        async with self._session_factory() as session:
+            records = (
+                await session.exec(
+                    select(RequestQueue)
+                    .where(RequestQueue.queue == self.queue)
+                    .order_by(RequestQueue.id.desc())
+                    .limit(self.list_limit)
+                )
+            ).all()
+        return list(reversed(records))
+
+    async def depth(self) -> int:
+        async with self._session_factory() as session:
+            return (
+                await session.exec(
+                    select(func.count(RequestQueue.id)).where(
+                        RequestQueue.queue == self.queue,
+                        RequestQueue.status == "pending",
+                    )
+                )
+            ).one()
+
+    async def stats(self) -> QueueStats:
         """
-        Get next request to process.
+        Counts by status plus averages computed in SQL. Wait time is only
+        averaged over items dequeued once (a redelivered item's started_at
+        is its last dequeue), and any dequeue after the first counts as a
+        redelivery.
         """
-        if not self._queue:
-            return None
+        async with self._session_factory() as session:
+            dialect = session.bind.dialect.name
+            in_queue = RequestQueue.queue == self.queue
+            counts = dict(
+                (
+                    await session.exec(
+                        select(RequestQueue.status, func.count(RequestQueue.id))
+                        .where(in_queue)
+                        .group_by(RequestQueue.status)
+                    )
+                ).all()
+            )
+            redelivered = (
+                await session.exec(
+                    select(
+                        func.coalesce(func.sum(RequestQueue.attempts - 1), 0)
+                    ).where(in_queue, RequestQueue.attempts > 1)
+                )
+            ).one()
+            wait = _seconds_between(
+                dialect, RequestQueue.created_at, RequestQueue.started_at
+            )
+            wait_total, wait_count = (
+                await session.exec(
+                    select(func.sum(wait), func.count(RequestQueue.id)).where(
+                        in_queue, RequestQueue.attempts == 1
+                    )
+                )
+            ).one()
+            processing = _seconds_between(
+                dialect, RequestQueue.started_at, RequestQueue.processed_at
+            )
+            processing_total, processing_count = (
+                await session.exec(
+                    select(func.sum(processing), func.count(RequestQueue.id)).where(
+                        in_queue,
+                        RequestQueue.status == "completed",
+                        RequestQueue.started_at.is_not(None),
+                    )
+                )
+            ).one()
+        return QueueStats(
+            pending=counts.get("pending", 0),
+            processing=counts.get("processing", 0),
+            completed=counts.get("completed", 0),
+            failed=counts.get("failed", 0),
+            redelivered=int(redelivered),
+            wait_total_s=float(wait_total or 0.0),
+            wait_count=wait_count,
+            processing_total_s=float(processing_total or 0.0),
+            processing_count=processing_count,
+        )
+
+
+class QueueService:
+    """
+    Priority request queue.
+
+    Consumers dequeue() an item, then complete() it or fail() it. An item
+    that is neither within ``visibility_timeout_s`` is handed out again, so
+    a crashed consumer does not lose work.
+    """
 
-        # Pop highest priority (first element due to sort)
-        record = self._queue.pop(0)
-        record.status = "processing"
+    def __init__(
+        self,
+        backend: QueueBackend | None = None,
+        visibility_timeout_s: float = 300.0,
+    ):
+        self.backend = backend or MemoryQueueBackend()
+        self.visibility_timeout_s = visibility_timeout_s
+
+    async def enqueue(
+        self, request_data: dict[str, Any], priority: int = 1
+    ) -> RequestQueue:
+        """
+        Add a request to the queue (priority 0 is highest).
+        """
+        record = await self.backend.enqueue(request_data, priority)
+        logger.info(f"Enqueued request {record.id} with priority {priority}")
         return record
 
-    async def complete(self, request_id: int):
+    async def dequeue(
+        self, visibility_timeout_s: float | None = None
+    ) -> RequestQueue | None:
         """
-        Mark request as completed.
+        Get next request to process, hidden from other consumers until it is
+        completed, failed or its visibility timeout passes.
+        """
+        if visibility_timeout_s is None:
+            visibility_timeout_s = self.visibility_timeout_s
+        return await self.backend.dequeue(visibility_timeout_s)
+
+    async def complete(
+        self, request_id: int, result: dict[str, Any] | None = None
+    ) -> RequestQueue | None:
         """
-        record = self._db_mirror.get(request_id)
+        Mark request as completed (ack), optionally storing its result.
+        """
+        record = await self.backend.ack(request_id, result)
         if record:
-            record.status = "completed"
-            record.processed_at = datetime.utcnow()
             logger.info(f"Completed request {request_id}")
+        return record
 
-    def get_queue_depth(self) -> int:
-        return len(self._queue)
+    async def fail(
+        self, request_id: int, requeue: bool = False, error: str | None = None
+    ) -> RequestQueue | None:
+        """
+        Give a dequeued request back (requeue=True) or mark it failed.
+        """
+        return await self.backend.nack(request_id, requeue, error)
 
-    def list_items(self) -> list[RequestQueue]:
+    async def get(self, request_id: int) -> RequestQueue | None:
         """
-        List all queue items.
+        Look up an item by id (None once a finished item has been evicted).
         """
-        return list(self._db_mirror.values())
+        return await self.backend.get(request_id)
 
-    def get_metrics(self) -> dict[str, Any]:
+    async def get_queue_depth(self) -> int:
+        return await self.backend.depth()
+
+    async def list_items(self) -> list[RequestQueue]:
         """
-        Get queue metrics.
+        List all queue items.
         """
-        pending = sum(1 for r in self._db_mirror.values()
-                      if r.status == "pending")
-        processing = sum(
-            1 for r in self._db_mirror.values() if r.status == "processing"
-        )
-        completed = sum(1 for r in self._db_mirror.values()
-                        if r.status == "completed")
+        return await self.backend.list_items()
 
+    async def get_metrics(self) -> dict[str, Any]:
+        """
+        Get queue metrics. Wait time is enqueue to first dequeue, processing
+        time is last dequeue to completion, both averaged in milliseconds.
+        """
+        stats = await self.backend.stats()
         return {
-            "total_pending": pending,
-            "total_processing": processing,
-            "total_completed": completed,
-            "avg_wait_time": 0.0,
-            "avg_processing_time": 0.0,
-            "queue_depth": len(self._queue),
+            "total_pending": stats.pending,
+            "total_processing": stats.processing,
+            "total_completed": stats.completed,
+            "total_failed": stats.failed,
+            "total_redelivered": stats.redelivered,
+            "avg_wait_time": (
+                stats.wait_total_s / stats.wait_count * 1000.0
+                if stats.wait_count
+                else 0.0
+            ),
+            "avg_processing_time": (
+                stats.processing_total_s / stats.processing_count * 1000.0
+                if stats.processing_count
+                else 0.0
+            ),
+            "queue_depth": stats.pending,
         }
+
+
+def _build_backend(settings) -> QueueBackend:
+    if settings.QUEUE_BACKEND == "database":
+        return DatabaseQueueBackend(list_limit=settings.QUEUE_MAX_FINISHED)
+    if settings.QUEUE_BACKEND == "redis":
+        return RedisQueueBackend(
+            url=settings.REDIS_URL, max_finished=settings.QUEUE_MAX_FINISHED
+        )
+    return MemoryQueueBackend(max_finished=settings.QUEUE_MAX_FINISHED)
+
+
+_settings = get_settings()
+_queue_service = QueueService(
+    _build_backend(_settings),
+    visibility_timeout_s=_settings.QUEUE_VISIBILITY_TIMEOUT_S,
+)
+
+
+def get_queue_service() -> QueueService:
+    return _queue_service
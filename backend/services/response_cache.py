@@ -0,0 +1,260 @@
+"""Exact-match cache for provider inference responses."""
+
+import hashlib
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any
+
+import redis.asyncio as redis
+
+from core.config import get_settings
+from core.metrics import (
+    RESPONSE_CACHE_ENTRIES,
+    RESPONSE_CACHE_EVICTIONS,
+    RESPONSE_CACHE_HIT_RATIO,
+    RESPONSE_CACHE_LOOKUPS,
+)
+from services.llm_providers.base import InferenceResult
+
+logger = logging.getLogger(__name__)
+
+KEY_VERSION = "v2"
+REDIS_KEY_PREFIX = "llm-response-cache:"
+
+
+def _normalize_text(text: str | None) -> str:
+    """Collapse runs of whitespace so trivially reformatted prompts match."""
+    return " ".join((text or "").split())
+
+
+def make_cache_key(
+    provider: str,
+    model: str | None,
+    input_text: str,
+    history: list | None = None,
+    *,
+    user_id: int,
+    token_value: str,
+    hf_provider: str | None = None,
+    task: str | None = None,
+) -> str:
+    """
+    Hash of everything that determines a provider's response.
+
+    Provider and model are case-folded, prompt and history text have their
+    whitespace normalised, and the result is a SHA-256 over a canonical JSON
+    encoding, so logically identical requests share one entry. Entries are
+    scoped to the user and a fingerprint of the token that paid for the
+    response, so a cached answer is never served to another user.
+    """
+    payload = {
+        "user_id": user_id,
+        "token": hashlib.sha256(token_value.encode("utf-8")).hexdigest(),
+        "provider": (provider or "").strip().lower(),
+        "model": (model or "auto").strip().lower(),
+        "input": _normalize_text(input_text),
+        "history": [
+            {
+                "role": message.get("role"),
+                "content": _normalize_text(message.get("content")),
+            }
+            for message in history or []
+        ],
+    }
+    if payload["provider"] == "huggingface":
+        payload["hf_provider"] = hf_provider or "auto"
+        payload["task"] = task or "auto"
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return f"{KEY_VERSION}:{hashlib.sha256(encoded.encode('utf-8')).hexdigest()}"
+
+
+class CacheBackend(ABC):
+    """Storage for serialized cache entries."""
+
+    @abstractmethod
+    async def get(self, key: str) -> str | None:
+        """Return the stored value, or None if missing or expired."""
+
+    @abstractmethod
+    async def set(self, key: str, value: str, ttl_s: int) -> None:
+        """Store a value that expires after ``ttl_s`` seconds."""
+
+    @abstractmethod
+    async def clear(self) -> None:
+        """Remove every cached response."""
+
+    def size(self) -> int | None:
+        """Number of entries held, if the backend can tell cheaply."""
+        return None
+
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process LRU bounded by ``max_entries``, with per-entry expiry."""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+    async def get(self, key: str) -> str | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: str, ttl_s: int) -> None:
+        self._entries[key] = (time.monotonic() + ttl_s, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            RESPONSE_CACHE_EVICTIONS.inc()
+
+    async def clear(self) -> None:
+        self._entries.clear()
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Shared cache in Redis.
+
+    Entries are written with SET EX so Redis expires them; size-bounded
+    LRU eviction is left to the server's ``maxmemory-policy allkeys-lru``.
+    """
+
+    def __init__(self, client: Any = None, url: str | None = None):
+        if client is None:
+            client = redis.Redis.from_url(url or get_settings().REDIS_URL)
+        self.client = client
+
+    async def get(self, key: str) -> str | None:
+        value = await self.client.get(REDIS_KEY_PREFIX + key)
+        if isinstance(value, bytes):
+            value = value.decode("utf-8")
+        return value
+
+    async def set(self, key: str, value: str, ttl_s: int) -> None:
+        await self.client.set(REDIS_KEY_PREFIX + key, value, ex=ttl_s)
+
+    async def clear(self) -> None:
+        async for key in self.client.scan_iter(match=REDIS_KEY_PREFIX + "*"):
+            await self.client.delete(key)
+
+
+class ResponseCache:
+    """
+    Cache of successful provider responses keyed by make_cache_key.
+
+    Lookups and stores never raise: a failing backend degrades to a miss so
+    inference keeps working without the cache. Responses whose output is not
+    JSON-serializable, or larger than ``max_entry_bytes``, are not cached.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        default_ttl_s: int = 3600,
+        max_entry_bytes: int = 256 * 1024,
+        enabled: bool = True,
+    ):
+        self.backend = backend
+        self.default_ttl_s = default_ttl_s
+        self.max_entry_bytes = max_entry_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str, provider: str) -> InferenceResult | None:
+        """Return the cached result for ``key`` and record a hit or miss."""
+        try:
+            value = await self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Response cache lookup failed: {e}")
+            value = None
+
+        if value is None:
+            self.misses += 1
+            RESPONSE_CACHE_LOOKUPS.labels(provider=provider, result="miss").inc()
+        else:
+            self.hits += 1
+            RESPONSE_CACHE_LOOKUPS.labels(provider=provider, result="hit").inc()
+        RESPONSE_CACHE_HIT_RATIO.set(self.hit_ratio())
+        return json.loads(value) if value is not None else None
+
+    async def set(
+        self, key: str, result: InferenceResult, ttl_s: int | None = None
+    ) -> bool:
+        """
+        Store a provider result.
+
+        Args:
+            ttl_s: Seconds to keep the entry; None uses the default TTL and
+                0 skips caching
+
+        Returns:
+            True if the result was stored
+        """
+        ttl_s = self.default_ttl_s if ttl_s is None else ttl_s
+        if ttl_s <= 0:
+            return False
+        try:
+            value = json.dumps(result)
+        except (TypeError, ValueError):
+            return False
+        if len(value) > self.max_entry_bytes:
+            return False
+
+        try:
+            await self.backend.set(key, value, ttl_s)
+        except Exception as e:
+            logger.warning(f"Response cache store failed: {e}")
+            return False
+        size = self.backend.size()
+        if size is not None:
+            RESPONSE_CACHE_ENTRIES.set(size)
+        return True
+
+    async def clear(self) -> None:
+        await self.backend.clear()
+        RESPONSE_CACHE_ENTRIES.set(0)
+
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict[str, Any]:
+        """Hit/miss counters and entry count for this process."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hit_ratio(),
+            "entries": self.backend.size(),
+        }
+
+
+def _build_backend(settings) -> CacheBackend:
+    if settings.RESPONSE_CACHE_BACKEND == "redis":
+        return RedisCacheBackend(url=settings.REDIS_URL)
+    return MemoryCacheBackend(max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES)
+
+
+_settings = get_settings()
+_response_cache = ResponseCache(
+    _build_backend(_settings),
+    default_ttl_s=_settings.RESPONSE_CACHE_TTL_S,
+    max_entry_bytes=_settings.RESPONSE_CACHE_MAX_ENTRY_BYTES,
+    enabled=_settings.RESPONSE_CACHE_ENABLED,
+)
+
+
+def get_response_cache() -> ResponseCache:
+    return _response_cache
@@ -1,49 +1,112 @@
 import asyncio
 import logging
 import random
-from collections.abc import Callable
-from typing import Any
+import re
+from collections.abc import Awaitable, Callable
+from typing import Any, TypeVar
 
+from core.config import get_settings
 from models.reliability import RetryConfig
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# A status code in a message only counts next to "status"/"error code" or
+# its reason phrase, so "max_tokens must be <= 512" is not a server error
+_TRANSIENT_STATUS = re.compile(
+    r"(?:status[_ ]?(?:code)?|error code|http)[\s:=]+(?:408|429|5\d\d)\b"
+    r"|\b(?:408 request timeout|429 too many requests|5\d\d [a-z ]*error"
+    r"|502 bad gateway|503 service unavailable|504 gateway timeout)"
+)
+_TRANSIENT_WORDS = (
+    "timeout", "timed out", "connection", "overloaded", "unavailable",
+    "rate limit", "rate_limit",
+)
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Whether a provider error may pass on a retry: timeouts, connection
+    errors, throttling (429) and server errors (5xx). Client errors such as
+    a bad key or an unknown model are not.
+    """
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int):
+        return status in (408, 429) or status >= 500  # noqa: PLR2004
+    name = type(error).__name__
+    if "Timeout" in name or "Connection" in name:
+        return True
+    message = str(error).lower()  # Errors without a status_code attribute
+    return bool(_TRANSIENT_STATUS.search(message)) or any(
+        word in message for word in _TRANSIENT_WORDS
+    )
+
 
 class RetryService:
     """
     Handles exponential backoff and retry logic.
+
+    Delays start at ``initial_delay_ms`` and grow by ``backoff_multiplier``
+    up to ``max_delay_ms``, plus up to 10% jitter. run() uses the provider's
+    RetryConfig, if it has one, and retries only errors that may pass
+    (is_retryable).
     """
 
-    def __init__(self):
-        # Simulation: Default configs
-        self.default_config = RetryConfig(
+    def __init__(
+        self,
+        configs: dict[str, RetryConfig] | None = None,
+        default_config: RetryConfig | None = None,
+    ):
+        self.default_config = default_config or RetryConfig(
             provider="default",
             max_attempts=3,
             initial_delay_ms=100,
             backoff_multiplier=2.0,
         )
+        self.configs = configs or {}
+
+    def get_config(self, provider: str) -> RetryConfig:
+        return self.configs.get(provider, self.default_config)
 
     async def execute_with_retry(self, func: Callable, *args, **kwargs) -> Any:
         """
-        Execute an async function with retries.
+        Execute an async function with retries on any error.
         """
+        return await self._retry(
+            self.default_config, lambda: func(*args, **kwargs), lambda e: True
+        )
+
+    async def run(self, provider: str, func: Callable[[], Awaitable[T]]) -> T:
+        """Call ``func`` with the provider's retry policy."""
+        return await self._retry(self.get_config(provider), func, is_retryable)
+
+    async def _retry(
+        self,
+        config: RetryConfig,
+        func: Callable[[], Awaitable[T]],
+        retryable: Callable[[Exception], bool],
+    ) -> T:
         attempts = 0
-        config = self.default_config  # In reality, could fetch per-provider config
         delay = config.initial_delay_ms / 1000.0
 
-        while attempts < config.max_attempts:
+        while True:
             try:
-                return await func(*args, **kwargs)
+                return await func()
             except Exception as e:
                 attempts += 1
-                if attempts >= config.max_attempts:
-                    logger.error(
-                        f"Retry: Failed after {attempts} attempts. Error: {e}")
-                    raise e
+                if attempts >= config.max_attempts or not retryable(e):
+                    if attempts > 1:
+                        logger.error(
+                            f"Retry: Failed after {attempts} attempts. Error: {e}"
+                        )
+                    raise
 
                 # Jitter
-                jitter = random.uniform(0, 0.1 * delay)
-                sleep_time = delay + jitter
+                sleep_time = min(delay, config.max_delay_ms / 1000.0)
+                sleep_time += random.uniform(0, 0.1 * sleep_time)
 
                 logger.warning(
                     "Retry: Attempt %s failed. Retrying in %.2fs...",
@@ -53,3 +116,36 @@ class RetryService:
                 await asyncio.sleep(sleep_time)
 
                 delay *= config.backoff_multiplier
+
+
+def _build_configs(settings) -> dict[str, RetryConfig]:
+    return {
+        provider: RetryConfig(
+            provider=provider,
+            **{
+                "max_attempts": settings.RETRY_MAX_ATTEMPTS,
+                "initial_delay_ms": settings.RETRY_INITIAL_DELAY_MS,
+                "max_delay_ms": settings.RETRY_MAX_DELAY_MS,
+                "backoff_multiplier": settings.RETRY_BACKOFF_MULTIPLIER,
+                **overrides,
+            },
+        )
+        for provider, overrides in settings.RETRY_PROVIDER_CONFIGS.items()
+    }
+
+
+_settings = get_settings()
+_retry_service = RetryService(
+    configs=_build_configs(_settings),
+    default_config=RetryConfig(
+        provider="default",
+        max_attempts=_settings.RETRY_MAX_ATTEMPTS,
+        initial_delay_ms=_settings.RETRY_INITIAL_DELAY_MS,
+        max_delay_ms=_settings.RETRY_MAX_DELAY_MS,
+        backoff_multiplier=_settings.RETRY_BACKOFF_MULTIPLIER,
+    ),
+)
+
+
+def get_retry_service() -> RetryService:
+    return _retry_service
@@ -1,62 +1,387 @@
+import asyncio
 import logging
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime
 
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.config import get_settings
+from core.database import async_session_maker
 from models.cost_optimization import ProviderPerformance, RoutingRule
+from models.telemetry import Telemetry
 
 logger = logging.getLogger(__name__)
 
+STRATEGIES = ("cheapest", "fastest", "quality", "balanced")
+DEFAULT_ROUTE = {"provider": "openai", "model": "gpt-3.5-turbo"}
+
+# Starting point for each route until telemetry says otherwise. Quality
+# isn't in telemetry, so it always comes from here.
+DEFAULT_PERFORMANCES = [
+    ProviderPerformance(
+        provider="openai",
+        model="gpt-4",
+        avg_cost_per_1k_tokens=0.03,
+        avg_latency_ms=1000,
+        quality_score=0.95,
+    ),
+    ProviderPerformance(
+        provider="openai",
+        model="gpt-3.5-turbo",
+        avg_cost_per_1k_tokens=0.002,
+        avg_latency_ms=500,
+        quality_score=0.85,
+    ),
+    ProviderPerformance(
+        provider="anthropic",
+        model="claude-2",
+        avg_cost_per_1k_tokens=0.01,
+        avg_latency_ms=2000,
+        quality_score=0.92,
+    ),
+    ProviderPerformance(
+        provider="together",
+        model="llama-2-70b",
+        avg_cost_per_1k_tokens=0.0009,
+        avg_latency_ms=300,
+        quality_score=0.80,
+    ),
+]
+
+DEFAULT_RULES = [
+    RoutingRule(
+        name="Cheap Chat",
+        strategy="cheapest",
+        task_type="chat",
+        quality_threshold=0.8,
+    ),
+    RoutingRule(
+        name="High Quality Code",
+        strategy="quality",
+        task_type="code_generation",
+        quality_threshold=0.9,
+    ),
+]
+
+
+class RouteStats:
+    """
+    Rolling statistics for one provider/model.
+
+    Requests, errors, tokens and cost are summed over a sliding window of
+    ``buckets`` time buckets. Running totals are adjusted as calls are added
+    and buckets expire, so reading them is O(1). Latency is an exponentially
+    weighted moving average of successful calls. Until the route has data,
+    its prior (a ProviderPerformance) stands in.
+    """
+
+    def __init__(
+        self,
+        prior: ProviderPerformance,
+        window_s: float = 900.0,
+        buckets: int = 60,
+        alpha: float = 0.2,
+    ):
+        self.prior = prior
+        self.bucket_s = window_s / buckets
+        self.alpha = alpha
+        self._index = [-1] * buckets
+        self._requests = [0] * buckets
+        self._errors = [0] * buckets
+        self._tokens = [0] * buckets
+        self._cost = [0.0] * buckets
+        self._newest = -1
+        self.requests = 0
+        self.errors = 0
+        self.tokens = 0
+        self.cost = 0.0
+        self._ewma_latency_ms: float | None = None
+
+    def _clear(self, slot: int) -> None:
+        self.requests -= self._requests[slot]
+        self.errors -= self._errors[slot]
+        self.tokens -= self._tokens[slot]
+        self.cost -= self._cost[slot]
+        self._index[slot] = -1
+        self._requests[slot] = self._errors[slot] = self._tokens[slot] = 0
+        self._cost[slot] = 0.0
+
+    def add(
+        self,
+        at: float,
+        latency_ms: float,
+        success: bool,
+        tokens: int = 0,
+        cost: float = 0.0,
+    ) -> None:
+        """Count one call made at ``at`` (epoch seconds)."""
+        index = int(at // self.bucket_s)
+        if index <= self._newest - len(self._index):
+            return  # Older than the window
+        slot = index % len(self._index)
+        if self._index[slot] != index:
+            self._clear(slot)
+            self._index[slot] = index
+        self._newest = max(self._newest, index)
+
+        self._requests[slot] += 1
+        self.requests += 1
+        if success:
+            self._tokens[slot] += tokens
+            self.tokens += tokens
+            self._cost[slot] += cost
+            self.cost += cost
+            self._ewma_latency_ms = (
+                latency_ms if self._ewma_latency_ms is None
+                else self.alpha * latency_ms
+                + (1 - self.alpha) * self._ewma_latency_ms
+            )
+        else:
+            self._errors[slot] += 1
+            self.errors += 1
+
+    def expire(self, now: float) -> None:
+        """Drop buckets that have slid out of the window."""
+        self._newest = max(self._newest, int(now // self.bucket_s))
+        oldest = self._newest - len(self._index)
+        for slot, index in enumerate(self._index):
+            if index != -1 and index <= oldest:
+                self._clear(slot)
+
+    @property
+    def quality(self) -> float:
+        return self.prior.quality_score
+
+    @property
+    def latency_ms(self) -> float:
+        if self._ewma_latency_ms is None:
+            return self.prior.avg_latency_ms
+        return self._ewma_latency_ms
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.requests if self.requests else 0.0
+
+    @property
+    def cost_per_1k_tokens(self) -> float:
+        if self.tokens:
+            return self.cost / self.tokens * 1000
+        return self.prior.avg_cost_per_1k_tokens
+
 
 class RoutingService:
     """
     Service to route AI tasks to the best provider based on cost, latency, and quality.
+
+    Statistics come from recent Telemetry: refresh() reads the rows added
+    since the last refresh into each route's RouteStats, then rebuilds a
+    ranking per task type and strategy. Rows are found by timestamp, and the
+    last ``refresh_lag_s`` seconds are read again on every refresh, so rows
+    committed late (by the telemetry writer, or by another replica) are still
+    counted; ids already counted are skipped. route_request only walks a ranking,
+    so picking a route is O(1) unless the request's own limits rule out the
+    top entries. Routes failing more than ``max_error_rate`` of at least
+    ``min_samples`` recent calls go to the back of every ranking.
+
+    Routes that appear in telemetry but not in ``performances`` get a
+    quality of 0, so only rules without a quality threshold pick them.
+
+    Nothing refreshes on its own: a caller of route_request starts the
+    background refresh with start().
     """
 
-    def __init__(self):
-        # Simulation: Load mock data
-        self.performances = [
-            ProviderPerformance(
-                provider="openai",
-                model="gpt-4",
-                avg_cost_per_1k_tokens=0.03,
-                avg_latency_ms=1000,
-                quality_score=0.95,
-            ),
-            ProviderPerformance(
-                provider="openai",
-                model="gpt-3.5-turbo",
-                avg_cost_per_1k_tokens=0.002,
-                avg_latency_ms=500,
-                quality_score=0.85,
-            ),
-            ProviderPerformance(
-                provider="anthropic",
-                model="claude-2",
-                avg_cost_per_1k_tokens=0.01,
-                avg_latency_ms=2000,
-                quality_score=0.92,
-            ),
-            ProviderPerformance(
-                provider="together",
-                model="llama-2-70b",
-                avg_cost_per_1k_tokens=0.0009,
-                avg_latency_ms=300,
-                quality_score=0.80,
-            ),
-        ]
-
-        self.rules = [
-            RoutingRule(
-                name="Cheap Chat",
-                strategy="cheapest",
-                task_type="chat",
-                quality_threshold=0.8,
-            ),
-            RoutingRule(
-                name="High Quality Code",
-                strategy="quality",
-                task_type="code_generation",
-                quality_threshold=0.9,
-            ),
-        ]
+    def __init__(
+        self,
+        performances: list[ProviderPerformance] | None = None,
+        rules: list[RoutingRule] | None = None,
+        *,
+        window_s: float = 900.0,
+        buckets: int = 60,
+        alpha: float = 0.2,
+        min_samples: int = 5,
+        max_error_rate: float = 0.5,
+        refresh_interval_s: float = 10.0,
+        refresh_lag_s: float = 60.0,
+        refresh_batch: int = 5000,
+        session_factory: Callable[[], AsyncSession] | None = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.window_s = window_s
+        self.buckets = buckets
+        self.alpha = alpha
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self.refresh_interval_s = refresh_interval_s
+        self.refresh_lag_s = refresh_lag_s
+        self.refresh_batch = refresh_batch
+        self._session_factory = session_factory or async_session_maker
+        self._clock = clock
+        self.routes: dict[tuple[str, str], RouteStats] = {}
+        for prior in (DEFAULT_PERFORMANCES if performances is None
+                      else performances):
+            self._route(prior.provider, prior.model, prior)
+        self.rules = DEFAULT_RULES if rules is None else rules
+        self._rules_by_task = {}
+        for rule in self.rules:
+            if rule.enabled:
+                self._rules_by_task.setdefault(rule.task_type, rule)
+        self._rankings: dict[tuple[str | None, str], list[tuple]] = {}
+        self._read_until: float | None = None  # Clock at the last refresh
+        self._counted: dict[int, float] = {}  # Telemetry.id -> timestamp
+        self._task: asyncio.Task | None = None
+        self._stopping: asyncio.Event | None = None
+        self.refreshes = 0
+        self.rebuild_rankings()
+
+    def _route(
+        self,
+        provider: str,
+        model: str,
+        prior: ProviderPerformance | None = None,
+    ) -> RouteStats:
+        stats = self.routes.get((provider, model))
+        if stats is None:
+            stats = self.routes[(provider, model)] = RouteStats(
+                prior or ProviderPerformance(provider=provider, model=model),
+                self.window_s,
+                self.buckets,
+                self.alpha,
+            )
+        return stats
+
+    def record(
+        self,
+        provider: str,
+        model: str,
+        latency_ms: float,
+        success: bool,
+        *,
+        tokens: int = 0,
+        cost: float = 0.0,
+        at: float | None = None,
+    ) -> None:
+        """Count one call; rankings change on the next rebuild_rankings()."""
+        self._route(provider, model).add(
+            self._clock() if at is None else at, latency_ms, success, tokens, cost
+        )
+
+    async def refresh(self, session: AsyncSession) -> int:
+        """
+        Read telemetry added since the last refresh (at first, the whole
+        window) and rebuild the rankings.
+
+        Returns:
+            Number of new telemetry rows read
+        """
+        now = self._clock()
+        start = now - self.window_s
+        if self._read_until is not None:
+            start = max(start, self._read_until - self.refresh_lag_s)
+        since = datetime.fromtimestamp(start, UTC)
+        last_id = 0
+        read = 0
+        while True:
+            rows = (await session.exec(
+                select(
+                    Telemetry.id,
+                    Telemetry.sdk,
+                    Telemetry.model,
+                    Telemetry.execution_time_ms,
+                    Telemetry.status,
+                    Telemetry.input_tokens,
+                    Telemetry.output_tokens,
+                    Telemetry.cost,
+                    Telemetry.timestamp,
+                    Telemetry.cache_hit,
+                )
+                .where(
+                    Telemetry.id > last_id,
+                    Telemetry.timestamp >= since.replace(tzinfo=None),
+                )
+                .order_by(Telemetry.id)
+                .limit(self.refresh_batch)
+            )).all()
+            for row in rows:
+                if row.id in self._counted:
+                    continue
+                at = row.timestamp.replace(tzinfo=UTC).timestamp()
+                self._counted[row.id] = at
+                read += 1
+                # Cached responses say nothing about the provider
+                if row.cache_hit or row.status == "cancelled":
+                    continue
+                self.record(
+                    row.sdk,
+                    row.model,
+                    row.execution_time_ms,
+                    row.status == "success",
+                    tokens=(row.input_tokens or 0) + (row.output_tokens or 0),
+                    cost=row.cost or 0.0,
+                    at=at,
+                )
+            if rows:
+                last_id = rows[-1].id
+            if len(rows) < self.refresh_batch:
+                break
+        # Only rows inside the lag window are read again
+        self._read_until = now
+        oldest = now - self.refresh_lag_s
+        self._counted = {
+            id_: at for id_, at in self._counted.items() if at >= oldest
+        }
+        self.rebuild_rankings()
+        self.refreshes += 1
+        return read
+
+    def _unhealthy(self, stats: RouteStats) -> bool:
+        return (
+            stats.requests >= self.min_samples
+            and stats.error_rate > self.max_error_rate
+        )
+
+    @staticmethod
+    def _score(stats: RouteStats, strategy: str) -> float:
+        """Lower is better."""
+        if strategy == "cheapest":
+            return stats.cost_per_1k_tokens
+        if strategy == "fastest":
+            return stats.latency_ms
+        if strategy == "quality":
+            return -stats.quality
+        # balanced (heuristic: reliable quality / cost); avoid div by zero
+        return -(stats.quality * (1 - stats.error_rate)) / (
+            stats.cost_per_1k_tokens + 1e-6
+        )
+
+    def rebuild_rankings(self) -> None:
+        """
+        Precompute the order of routes for each task type with a rule, and
+        for each strategy on its own (task types without a rule).
+        """
+        now = self._clock()
+        for stats in self.routes.values():
+            stats.expire(now)
+
+        def ranking(strategy: str, min_quality: float) -> list[tuple]:
+            ranked = sorted(
+                (s for s in self.routes.values() if s.quality >= min_quality),
+                key=lambda s: (self._unhealthy(s), self._score(s, strategy)),
+            )
+            return [
+                (s.prior.provider, s.prior.model, s.quality, s.latency_ms)
+                for s in ranked
+            ]
+
+        rankings = {
+            (None, strategy): ranking(strategy, 0.0) for strategy in STRATEGIES
+        }
+        for task_type, rule in self._rules_by_task.items():
+            rankings[(task_type, rule.strategy)] = ranking(
+                rule.strategy, rule.quality_threshold
+            )
+        self._rankings = rankings
 
     def route_request(
         self,
@@ -71,43 +396,88 @@ class RoutingService:
         logger.info(
             f"Routing request for task={task_type} quality>={quality_req}")
 
-        candidates = self.performances[:]
-
-        # 1. Filter by specific rule for task type if exists
-        rule = next((r for r in self.rules if r.task_type ==
-                     task_type and r.enabled), None)
-
-        strategy = "balanced"
+        rule = self._rules_by_task.get(task_type)
+        key = (None, "balanced")
         if rule:
-            strategy = rule.strategy
-            quality_req = max(quality_req, rule.quality_threshold)
+            key = (task_type, rule.strategy)
+            if rule.latency_threshold_ms:
+                latency_req_ms = min(
+                    latency_req_ms or rule.latency_threshold_ms,
+                    rule.latency_threshold_ms,
+                )
             logger.debug(
-                f"Applied rule '{rule.name}' with strategy '{strategy}'")
-
-        # 2. Filter by constraints
-        candidates = [p for p in candidates if p.quality_score >= quality_req]
-        if latency_req_ms:
-            candidates = [
-                p for p in candidates if p.avg_latency_ms <= latency_req_ms]
-
-        if not candidates:
-            # Fallback to safest high quality if filtering removed everything, or throw
-            # For resilience, return the "best" available generally or the
-            # first one
-            logger.warning(
-                "No candidates matched requirements. Returning default.")
-            return {"provider": "openai", "model": "gpt-3.5-turbo"}
-
-        # 3. Apply Strategy
-        if strategy == "cheapest":
-            best = min(candidates, key=lambda p: p.avg_cost_per_1k_tokens)
-        elif strategy == "fastest":
-            best = min(candidates, key=lambda p: p.avg_latency_ms)
-        elif strategy == "quality":
-            best = max(candidates, key=lambda p: p.quality_score)
-        else:  # balanced (heuristic: quality / cost)
-            # avoid div by zero
-            best = max(candidates, key=lambda p: p.quality_score /
-                       (p.avg_cost_per_1k_tokens + 1e-6), )
-
-        return {"provider": best.provider, "model": best.model}
+                f"Applied rule '{rule.name}' with strategy '{rule.strategy}'")
+
+        for provider, model, quality, latency_ms in self._rankings[key]:
+            if quality >= quality_req and (
+                not latency_req_ms or latency_ms <= latency_req_ms
+            ):
+                return {"provider": provider, "model": model}
+
+        logger.warning(
+            "No candidates matched requirements. Returning default.")
+        return dict(DEFAULT_ROUTE)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start refreshing from telemetry on the running event loop."""
+        if self.running:
+            return
+        self._stopping = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info("Routing statistics refresh started")
+
+    async def stop(self) -> None:
+        """Stop refreshing."""
+        if self._task is None:
+            return
+        self._stopping.set()
+        await self._task
+        self._task = None
+        logger.info("Routing statistics refresh stopped")
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                async with self._session_factory() as session:
+                    await self.refresh(session)
+            except Exception as e:
+                logger.error(f"Routing statistics refresh failed: {e}")
+            try:
+                await asyncio.wait_for(
+                    self._stopping.wait(), self.refresh_interval_s
+                )
+            except TimeoutError:
+                pass
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        """Current statistics per route ("provider/model")."""
+        return {
+            f"{provider}/{model}": {
+                "requests": s.requests,
+                "error_rate": s.error_rate,
+                "latency_ms": s.latency_ms,
+                "cost_per_1k_tokens": s.cost_per_1k_tokens,
+                "quality": s.quality,
+            }
+            for (provider, model), s in self.routes.items()
+        }
+
+
+_settings = get_settings()
+_routing_service = RoutingService(
+    window_s=_settings.ROUTING_WINDOW_S,
+    buckets=_settings.ROUTING_WINDOW_BUCKETS,
+    alpha=_settings.ROUTING_EWMA_ALPHA,
+    min_samples=_settings.ROUTING_MIN_SAMPLES,
+    max_error_rate=_settings.ROUTING_MAX_ERROR_RATE,
+    refresh_interval_s=_settings.ROUTING_REFRESH_INTERVAL_S,
+    refresh_lag_s=_settings.ROUTING_REFRESH_LAG_S,
+)
+
+
+def get_routing_service() -> RoutingService:
+    return _routing_service
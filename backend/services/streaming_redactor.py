@@ -0,0 +1,162 @@
+"""Bounded-memory DLP/PII redaction of text streams."""
+
+import re
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Iterator
+from dataclasses import dataclass
+
+from models.dlp_rule import DLPAction
+
+DEFAULT_OVERLAP = 256
+
+
+class ContentBlockedError(Exception):
+    """Raised when a BLOCK rule matches the stream."""
+
+    def __init__(self, rule_name: str):
+        self.rule_name = rule_name
+        super().__init__(f"Blocked by rule: {rule_name}")
+
+
+@dataclass(frozen=True)
+class RedactionRule:
+    """A compiled pattern and what to do when it matches."""
+
+    name: str
+    pattern: re.Pattern
+    action: DLPAction = DLPAction.REDACT
+    replacement: str | None = None  # Default: <REDACTED:name>
+    report_violation: bool = True
+
+
+class _Stage:
+    """
+    Applies one rule to a stream.
+
+    Text is held back until it is at least ``overlap`` characters from the
+    end of the buffered input, so a match that straddles two chunks is seen
+    whole once the next chunk arrives. Up to ``overlap`` characters of
+    already-emitted input are kept as left context for lookbehinds and
+    ``\\b``. A match is assumed to be at most ``overlap`` characters long;
+    longer matches are resolved as soon as they reach that length, which
+    keeps the buffer below ``chunk + 2 * overlap`` characters.
+    """
+
+    def __init__(self, rule: RedactionRule, redactor, overlap: int):
+        self.rule = rule
+        self.redactor = redactor
+        self.overlap = overlap
+        self._buffer = ""
+        self._context = 0  # Leading characters of _buffer already emitted
+
+    def _apply(self, match: re.Match) -> str:
+        rule = self.rule
+        if rule.action == DLPAction.BLOCK:
+            self.redactor.violations.append(f"Blocked by rule: {rule.name}")
+            raise ContentBlockedError(rule.name)
+        if rule.action == DLPAction.WARN:
+            if rule.report_violation:
+                self.redactor.record(f"Warning by rule: {rule.name}")
+            return match.group(0)
+        if rule.report_violation:
+            self.redactor.record(f"Redacted by rule: {rule.name}")
+        return rule.replacement or f"<REDACTED:{rule.name}>"
+
+    def feed(self, chunk: str) -> str:
+        self._buffer += chunk
+        return self._drain(final=False)
+
+    def flush(self) -> str:
+        return self._drain(final=True)
+
+    def _drain(self, final: bool) -> str:
+        buffer = self._buffer
+        limit = len(buffer) if final else len(buffer) - self.overlap
+        if limit <= self._context:
+            return ""
+
+        out = []
+        pos = self._context
+        emit_to = limit
+        for match in self.rule.pattern.finditer(buffer, self._context):
+            if match.start() >= limit:
+                break
+            if match.end() == match.start():
+                continue
+            if match.end() > limit and match.end() - match.start() < self.overlap:
+                # May still grow with the next chunk; keep it buffered
+                emit_to = match.start()
+                break
+            out.append(buffer[pos:match.start()])
+            out.append(self._apply(match))
+            pos = match.end()
+        emit_to = max(pos, emit_to)
+        out.append(buffer[pos:emit_to])
+
+        keep_from = max(0, emit_to - self.overlap)
+        self._buffer = buffer[keep_from:]
+        self._context = emit_to - keep_from
+        return "".join(out)
+
+
+class StreamingRedactor:
+    """
+    Chunked redactor with bounded memory.
+
+    Rules run in order, each one seeing the output of the previous one, the
+    same as applying them one after another to the whole text. Feed
+    chunks with feed() and call flush() at the end of the input; both return
+    the redacted text that is ready. ``violations`` lists each rule that
+    matched once.
+
+    Raises:
+        ContentBlockedError: From feed()/flush() when a BLOCK rule matches
+    """
+
+    def __init__(
+        self,
+        rules: list[RedactionRule],
+        overlap: int = DEFAULT_OVERLAP,
+    ):
+        self.violations: list[str] = []
+        self._stages = [_Stage(rule, self, overlap) for rule in rules]
+
+    def record(self, violation: str) -> None:
+        if violation not in self.violations:
+            self.violations.append(violation)
+
+    def feed(self, chunk: str) -> str:
+        for stage in self._stages:
+            chunk = stage.feed(chunk)
+        return chunk
+
+    def flush(self) -> str:
+        text = ""
+        for stage in self._stages:
+            text = stage.feed(text) + stage.flush()
+        return text
+
+    def redact_iter(self, chunks: Iterable[str]) -> Iterator[str]:
+        """Redact an iterable of chunks, yielding output as it is ready."""
+        for chunk in chunks:
+            text = self.feed(chunk)
+            if text:
+                yield text
+        text = self.flush()
+        if text:
+            yield text
+
+    async def aredact_iter(self, chunks: AsyncIterable[str]) -> AsyncIterator[str]:
+        """Async version of redact_iter."""
+        async for chunk in chunks:
+            text = self.feed(chunk)
+            if text:
+                yield text
+        text = self.flush()
+        if text:
+            yield text
+
+
+def iter_chunks(text: str, chunk_size: int = 64 * 1024) -> Iterator[str]:
+    """Split a string into chunks for a StreamingRedactor."""
+    for start in range(0, len(text), chunk_size):
+        yield text[start:start + chunk_size]
@@ -0,0 +1,428 @@
+"""Hourly and daily telemetry rollups for cost analytics."""
+
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+import structlog
+from sqlalchemy import (
+    and_,
+    case,
+    delete,
+    func,
+    literal,
+    literal_column,
+    or_,
+    union_all,
+)
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models.telemetry import Telemetry
+from models.telemetry_rollup import (
+    TelemetryDailyRollup,
+    TelemetryHourlyRollup,
+    TelemetryRollupState,
+)
+
+logger = structlog.get_logger()
+
+ROLLUP_STATE_ID = 1
+
+# Hours are rolled up once they have been closed this long, so rows still
+# sitting in the telemetry write buffer land before their hour is sealed.
+ROLLUP_LAG = timedelta(minutes=5)
+
+# Sealed hours are aggregated again on every refresh for this long, so
+# telemetry written late (e.g. after a writer retry) still reaches them.
+ROLLUP_RECHECK = timedelta(hours=2)
+
+# Upper bound on hours aggregated per transaction (initial backfill).
+MAX_HOURS_PER_BATCH = 24 * 7
+
+HOUR = timedelta(hours=1)
+DAY = timedelta(days=1)
+
+
+class CostBucket(NamedTuple):
+    """Aggregated usage for one bucket (or one raw row) of telemetry."""
+
+    bucket_start: datetime
+    provider: str
+    model: str
+    request_count: int
+    input_tokens: int
+    output_tokens: int
+    cost: float
+    latency_ms_sum: float
+
+
+def floor_hour(dt: datetime) -> datetime:
+    return dt.replace(minute=0, second=0, microsecond=0)
+
+
+def ceil_hour(dt: datetime) -> datetime:
+    floored = floor_hour(dt)
+    return floored if floored == dt else floored + HOUR
+
+
+def floor_day(dt: datetime) -> datetime:
+    return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def ceil_day(dt: datetime) -> datetime:
+    floored = floor_day(dt)
+    return floored if floored == dt else floored + DAY
+
+
+# SQLite equivalents of date_trunc (ISO strings, see as_datetime)
+SQLITE_TRUNC_FORMATS = {
+    "hour": "%Y-%m-%d %H:00:00",
+    "day": "%Y-%m-%d 00:00:00",
+    "month": "%Y-%m-01 00:00:00",
+}
+
+
+def date_trunc(unit: str, column, dialect_name: str):
+    """
+    SQL expression truncating a timestamp column to ``unit``.
+
+    Postgres uses date_trunc; SQLite (tests, local dev) gets an equivalent
+    strftime. The unit is rendered inline rather than bound so Postgres
+    sees the SELECT and GROUP BY expressions as identical.
+    """
+    if unit not in ("hour", "day", "week", "month"):
+        raise ValueError(f"Unsupported date_trunc unit: {unit}")
+    if dialect_name == "postgresql":
+        return func.date_trunc(literal_column(f"'{unit}'"), column)
+    if unit == "week":
+        # Monday on or before the timestamp, like date_trunc('week')
+        return func.strftime(
+            literal_column("'%Y-%m-%d 00:00:00'"),
+            column,
+            literal_column("'-6 days'"),
+            literal_column("'weekday 1'"),
+        )
+    return func.strftime(literal_column(f"'{SQLITE_TRUNC_FORMATS[unit]}'"), column)
+
+
+def as_datetime(value: datetime | str) -> datetime:
+    """Normalise a date_trunc result (datetime, or string on SQLite)."""
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return value
+
+
+class TelemetryRollupService:
+    """
+    Maintains hourly and daily rollups of raw Telemetry.
+
+    Runs from the scheduler on the sync engine. Each run aggregates the
+    closed hours since the watermark in TelemetryRollupState, rebuilds the
+    daily rows those hours touch and advances the watermark in the same
+    transaction, so readers never double count. The last ``recheck`` of
+    sealed hours is rebuilt too, to take in late telemetry.
+    """
+
+    def __init__(
+        self,
+        session: Session,
+        lag: timedelta = ROLLUP_LAG,
+        recheck: timedelta = ROLLUP_RECHECK,
+    ):
+        self.session = session
+        self.lag = lag
+        self.recheck = recheck
+
+    def refresh(self, now: datetime | None = None) -> int:
+        """
+        Roll up every closed hour since the watermark, after rebuilding the
+        sealed hours still within ``recheck``.
+
+        Returns:
+            Number of hours newly rolled up
+        """
+        target = floor_hour((now or datetime.utcnow()) - self.lag)
+
+        state = self.session.get(TelemetryRollupState, ROLLUP_STATE_ID)
+        if state is None:
+            # First run: start from the oldest telemetry row
+            first = self.session.exec(select(func.min(Telemetry.timestamp))).one()
+            start = min(floor_hour(first), target) if first else target
+            state = TelemetryRollupState(id=ROLLUP_STATE_ID, rolled_until=start)
+            self.session.add(state)
+            self.session.commit()
+
+        if self.recheck:
+            # Rebuilt in one transaction, under the same watermark
+            start = state.rolled_until - self.recheck
+            self._roll_hours(start, state.rolled_until)
+            self._roll_days(floor_day(start), state.rolled_until)
+            self.session.commit()
+
+        hours = 0
+        while state.rolled_until < target:
+            start = state.rolled_until
+            end = min(start + HOUR * MAX_HOURS_PER_BATCH, target)
+            self._roll_hours(start, end)
+            self._roll_days(floor_day(start), end)
+
+            state.rolled_until = end
+            state.updated_at = datetime.utcnow()
+            self.session.add(state)
+            self.session.commit()
+            hours += int((end - start) / HOUR)
+
+        if hours:
+            logger.info(
+                "telemetry_rollup_refreshed",
+                hours=hours,
+                rolled_until=state.rolled_until.isoformat(),
+            )
+        return hours
+
+    @property
+    def _dialect_name(self) -> str:
+        return self.session.get_bind().dialect.name
+
+    def _roll_hours(self, start: datetime, end: datetime) -> None:
+        bucket = date_trunc("hour", Telemetry.timestamp, self._dialect_name)
+        rows = self.session.exec(
+            select(
+                bucket,
+                Telemetry.user_id,
+                Telemetry.sdk,
+                Telemetry.model,
+                func.count(),
+                func.sum(case((Telemetry.status == "error", 1), else_=0)),
+                func.sum(func.coalesce(Telemetry.input_tokens, 0)),
+                func.sum(func.coalesce(Telemetry.output_tokens, 0)),
+                func.sum(func.coalesce(Telemetry.cost, 0.0)),
+                func.sum(Telemetry.execution_time_ms),
+            )
+            .where(Telemetry.timestamp >= start, Telemetry.timestamp < end)
+            .group_by(bucket, Telemetry.user_id, Telemetry.sdk, Telemetry.model)
+        ).all()
+
+        self.session.exec(
+            delete(TelemetryHourlyRollup).where(
+                TelemetryHourlyRollup.bucket_start >= start,
+                TelemetryHourlyRollup.bucket_start < end,
+            )
+        )
+        self.session.add_all(_rollup_rows(TelemetryHourlyRollup, rows))
+        self.session.flush()
+
+    def _roll_days(self, start: datetime, end: datetime) -> None:
+        # Rebuild whole days from hourly rows; the last day may be partial
+        # and is rebuilt again as more of its hours are sealed.
+        day_end = ceil_day(end)
+        bucket = date_trunc(
+            "day", TelemetryHourlyRollup.bucket_start, self._dialect_name
+        )
+        rows = self.session.exec(
+            select(
+                bucket,
+                TelemetryHourlyRollup.user_id,
+                TelemetryHourlyRollup.provider,
+                TelemetryHourlyRollup.model,
+                func.sum(TelemetryHourlyRollup.request_count),
+                func.sum(TelemetryHourlyRollup.error_count),
+                func.sum(TelemetryHourlyRollup.input_tokens),
+                func.sum(TelemetryHourlyRollup.output_tokens),
+                func.sum(TelemetryHourlyRollup.cost),
+                func.sum(TelemetryHourlyRollup.latency_ms_sum),
+            )
+            .where(
+                TelemetryHourlyRollup.bucket_start >= start,
+                TelemetryHourlyRollup.bucket_start < day_end,
+            )
+            .group_by(
+                bucket,
+                TelemetryHourlyRollup.user_id,
+                TelemetryHourlyRollup.provider,
+                TelemetryHourlyRollup.model,
+            )
+        ).all()
+
+        self.session.exec(
+            delete(TelemetryDailyRollup).where(
+                TelemetryDailyRollup.bucket_start >= start,
+                TelemetryDailyRollup.bucket_start < day_end,
+            )
+        )
+        self.session.add_all(_rollup_rows(TelemetryDailyRollup, rows))
+        self.session.flush()
+
+
+def _rollup_rows(model: type, rows) -> list:
+    return [
+        model(
+            bucket_start=as_datetime(bucket_start),
+            user_id=user_id,
+            provider=provider,
+            model=model_name,
+            request_count=request_count,
+            error_count=error_count or 0,
+            input_tokens=input_tokens or 0,
+            output_tokens=output_tokens or 0,
+            cost=cost or 0.0,
+            latency_ms_sum=latency_ms_sum or 0.0,
+        )
+        for (
+            bucket_start,
+            user_id,
+            provider,
+            model_name,
+            request_count,
+            error_count,
+            input_tokens,
+            output_tokens,
+            cost,
+            latency_ms_sum,
+        ) in rows
+    ]
+
+
+def _rollup_select(rollup: type, user_id: int, provider: str | None, *windows):
+    query = select(
+        rollup.bucket_start.label("bucket_start"),
+        rollup.provider.label("provider"),
+        rollup.model.label("model"),
+        rollup.request_count.label("request_count"),
+        rollup.input_tokens.label("input_tokens"),
+        rollup.output_tokens.label("output_tokens"),
+        rollup.cost.label("cost"),
+        rollup.latency_ms_sum.label("latency_ms_sum"),
+    ).where(
+        rollup.user_id == user_id,
+        or_(
+            *(
+                and_(rollup.bucket_start >= lo, rollup.bucket_start < hi)
+                for lo, hi in windows
+            )
+        ),
+    )
+    if provider:
+        query = query.where(rollup.provider == provider)
+    return query
+
+
+def _raw_select(user_id: int, provider: str | None, *windows):
+    query = select(
+        Telemetry.timestamp.label("bucket_start"),
+        Telemetry.sdk.label("provider"),
+        Telemetry.model.label("model"),
+        literal(1).label("request_count"),
+        func.coalesce(Telemetry.input_tokens, 0).label("input_tokens"),
+        func.coalesce(Telemetry.output_tokens, 0).label("output_tokens"),
+        func.coalesce(Telemetry.cost, 0.0).label("cost"),
+        Telemetry.execution_time_ms.label("latency_ms_sum"),
+    ).where(
+        Telemetry.user_id == user_id,
+        or_(
+            *(
+                and_(Telemetry.timestamp >= lo, Telemetry.timestamp <= hi)
+                if inclusive
+                else and_(Telemetry.timestamp >= lo, Telemetry.timestamp < hi)
+                for lo, hi, inclusive in windows
+            )
+        ),
+    )
+    if provider:
+        query = query.where(Telemetry.sdk == provider)
+    return query
+
+
+def _usage_source(
+    user_id: int,
+    start: datetime,
+    end: datetime,
+    provider: str | None,
+    rolled_until: datetime | None,
+):
+    """
+    Rows covering [start, end] once each, from rollups where possible.
+
+    Whole days before the watermark come from daily rollups, remaining whole
+    hours before it from hourly rollups, and the partial hours at either end
+    (including the current, not yet rolled up hour) from raw Telemetry.
+    """
+    hour_lo = ceil_hour(start)
+    hour_hi = min(floor_hour(end), rolled_until) if rolled_until else hour_lo
+
+    if hour_lo >= hour_hi:
+        return _raw_select(user_id, provider, (start, end, True))
+
+    day_lo, day_hi = ceil_day(hour_lo), floor_day(hour_hi)
+    parts = [
+        _raw_select(
+            user_id, provider, (start, hour_lo, False), (hour_hi, end, True)
+        )
+    ]
+    if day_lo < day_hi:
+        parts.append(
+            _rollup_select(
+                TelemetryDailyRollup, user_id, provider, (day_lo, day_hi)
+            )
+        )
+        parts.append(
+            _rollup_select(
+                TelemetryHourlyRollup,
+                user_id,
+                provider,
+                (hour_lo, day_lo),
+                (day_hi, hour_hi),
+            )
+        )
+    else:
+        parts.append(
+            _rollup_select(
+                TelemetryHourlyRollup, user_id, provider, (hour_lo, hour_hi)
+            )
+        )
+    return union_all(*parts)
+
+
+async def aggregate_costs(
+    session: AsyncSession,
+    user_id: int,
+    start: datetime,
+    end: datetime,
+    *,
+    unit: str = "day",
+    provider: str | None = None,
+) -> list[CostBucket]:
+    """
+    Usage for [start, end] grouped by time bucket, provider and model.
+
+    Reads rollups with a raw-telemetry fallback for partial hours (see
+    _usage_source) and aggregates them in the database with
+    GROUP BY date_trunc(unit), provider, model in a single query.
+
+    Args:
+        unit: Time bucket: "day", "week" or "month"
+
+    Returns:
+        CostBucket per (bucket, provider, model)
+    """
+    state = await session.get(TelemetryRollupState, ROLLUP_STATE_ID)
+    rolled_until = state.rolled_until if state else None
+
+    usage = _usage_source(user_id, start, end, provider, rolled_until).subquery()
+    bucket = date_trunc(unit, usage.c.bucket_start, session.get_bind().dialect.name)
+    query = select(
+        bucket,
+        usage.c.provider,
+        usage.c.model,
+        func.sum(usage.c.request_count),
+        func.sum(usage.c.input_tokens),
+        func.sum(usage.c.output_tokens),
+        func.sum(usage.c.cost),
+        func.sum(usage.c.latency_ms_sum),
+    ).group_by(bucket, usage.c.provider, usage.c.model)
+
+    rows = (await session.exec(query)).all()
+    return [
+        CostBucket(as_datetime(bucket_start), *totals)
+        for bucket_start, *totals in rows
+    ]
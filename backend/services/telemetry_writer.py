@@ -0,0 +1,189 @@
+"""Batched, asynchronous writer for inference telemetry rows."""
+
+import asyncio
+import logging
+from collections.abc import Callable
+
+from sqlalchemy import insert
+from sqlmodel import Session
+
+from core.config import get_settings
+from core.database import engine
+from core.metrics import (
+    TELEMETRY_BUFFER_SIZE,
+    TELEMETRY_ROWS_BUFFERED,
+    TELEMETRY_ROWS_DROPPED,
+    TELEMETRY_ROWS_FLUSHED,
+)
+from models.telemetry import Telemetry
+
+logger = logging.getLogger(__name__)
+
+
+class TelemetryWriter:
+    """
+    In-process buffer that persists Telemetry rows in bulk inserts.
+
+    Rows are flushed when the buffer reaches ``batch_size`` or every
+    ``flush_interval_s`` seconds, whichever comes first. When the buffer holds
+    ``max_buffer`` rows, writers wait up to ``enqueue_timeout_s`` for a flush
+    to make room (backpressure) before the row is dropped.
+
+    The writer only buffers while started (see main.py lifespan). Until then
+    ``write`` returns False and callers persist the row themselves, so
+    scripts and jobs that never start the writer keep their old behaviour.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 100,
+        flush_interval_s: float = 1.0,
+        max_buffer: int = 10000,
+        enqueue_timeout_s: float = 0.5,
+        session_factory: Callable[[], Session] | None = None,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.max_buffer = max_buffer
+        self.enqueue_timeout_s = enqueue_timeout_s
+        self._session_factory = session_factory or (lambda: Session(engine))
+        self._buffer: list[Telemetry] = []
+        self._flush_requested: asyncio.Event | None = None
+        self._space_available: asyncio.Event | None = None
+        self._flush_lock: asyncio.Lock | None = None
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+        self.buffered = 0
+        self.flushed = 0
+        self.dropped = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the background flush loop on the running event loop."""
+        if self.running:
+            return
+        self._flush_requested = asyncio.Event()
+        self._space_available = asyncio.Event()
+        self._space_available.set()
+        self._flush_lock = asyncio.Lock()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+        logger.info("Telemetry writer started")
+
+    async def stop(self) -> None:
+        """Stop the flush loop and write out everything still buffered."""
+        if self._task is None:
+            return
+        # Let an in-flight flush finish rather than cancelling it mid-insert.
+        self._stopping = True
+        self._flush_requested.set()
+        await self._task
+        self._task = None
+        await self.flush()
+        logger.info("Telemetry writer stopped")
+
+    async def write(self, telemetry: Telemetry) -> bool:
+        """
+        Buffer a telemetry row for the next bulk insert.
+
+        Returns:
+            True if the row was buffered (or dropped under sustained
+            backpressure), False if the writer is not running and the
+            caller should persist the row itself
+        """
+        if not self.running:
+            return False
+
+        while len(self._buffer) >= self.max_buffer:
+            self._space_available.clear()
+            self._flush_requested.set()
+            try:
+                await asyncio.wait_for(
+                    self._space_available.wait(), self.enqueue_timeout_s
+                )
+            except TimeoutError:
+                self.dropped += 1
+                TELEMETRY_ROWS_DROPPED.inc()
+                logger.warning("Telemetry buffer full, dropping row")
+                return True
+
+        self._buffer.append(telemetry)
+        self.buffered += 1
+        TELEMETRY_ROWS_BUFFERED.inc()
+        TELEMETRY_BUFFER_SIZE.set(len(self._buffer))
+        if len(self._buffer) >= self.batch_size:
+            self._flush_requested.set()
+        return True
+
+    async def flush(self) -> int:
+        """
+        Bulk insert everything currently buffered.
+
+        Returns:
+            Number of rows written
+        """
+        written = 0
+        lock = self._flush_lock or asyncio.Lock()
+        async with lock:
+            while self._buffer:
+                batch = self._buffer[: self.batch_size]
+                del self._buffer[: self.batch_size]
+                TELEMETRY_BUFFER_SIZE.set(len(self._buffer))
+                if self._space_available is not None:
+                    self._space_available.set()
+
+                try:
+                    await asyncio.to_thread(self._insert, batch)
+                except Exception as e:
+                    self.dropped += len(batch)
+                    TELEMETRY_ROWS_DROPPED.inc(len(batch))
+                    logger.error(f"Failed to flush {len(batch)} telemetry rows: {e}")
+                    continue
+
+                written += len(batch)
+                self.flushed += len(batch)
+                TELEMETRY_ROWS_FLUSHED.inc(len(batch))
+        return written
+
+    def _insert(self, batch: list[Telemetry]) -> None:
+        rows = [row.model_dump(exclude={"id"}) for row in batch]
+        with self._session_factory() as session:
+            session.execute(insert(Telemetry), rows)
+            session.commit()
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(
+                    self._flush_requested.wait(), self.flush_interval_s
+                )
+            except TimeoutError:
+                pass
+            self._flush_requested.clear()
+            if not self._stopping:
+                await self.flush()
+
+    def stats(self) -> dict[str, int]:
+        """Buffer depth and buffered/flushed/dropped row counters."""
+        return {
+            "pending": len(self._buffer),
+            "buffered": self.buffered,
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+        }
+
+
+_settings = get_settings()
+_telemetry_writer = TelemetryWriter(
+    batch_size=_settings.TELEMETRY_BATCH_SIZE,
+    flush_interval_s=_settings.TELEMETRY_FLUSH_INTERVAL_S,
+    max_buffer=_settings.TELEMETRY_BUFFER_MAX,
+    enqueue_timeout_s=_settings.TELEMETRY_ENQUEUE_TIMEOUT_S,
+)
+
+
+def get_telemetry_writer() -> TelemetryWriter:
+    return _telemetry_writer
@@ -0,0 +1,224 @@
+"""Shared HTTP client and bounded-concurrency fan-out for webhook deliveries."""
+
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import time
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Any
+from urllib.parse import urlsplit
+
+import httpx
+
+from core.config import get_settings
+from core.metrics import (
+    WEBHOOK_DELIVERIES,
+    WEBHOOK_DELIVERIES_IN_FLIGHT,
+    WEBHOOK_DELIVERY_DURATION,
+)
+
+logger = logging.getLogger(__name__)
+
+HTTP_SUCCESS_MIN = 200
+HTTP_SUCCESS_MAX_EXCLUSIVE = 300
+
+WEBHOOK_CONNECT_TIMEOUT_S = 1.0
+WEBHOOK_READ_TIMEOUT_S = 2.0
+WEBHOOK_WRITE_TIMEOUT_S = 2.0
+WEBHOOK_POOL_TIMEOUT_S = 1.0
+KEEPALIVE_EXPIRY_S = 30.0
+
+
+def sign_payload(secret: str, payload: dict[str, Any]) -> str:
+    """HMAC SHA256 signature of the compact JSON payload."""
+    data = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return hmac.new(secret.encode("utf-8"), data, hashlib.sha256).hexdigest()
+
+
+@dataclass(frozen=True)
+class WebhookRequest:
+    """One signed POST to a webhook endpoint."""
+
+    url: str
+    payload: dict[str, Any]
+    headers: dict[str, str]
+
+
+@dataclass
+class DeliveryOutcome:
+    status: str  # "success" or "failed"
+    response_code: int | None
+    delivered_at: datetime
+    duration_s: float
+    error: str | None = None
+
+
+class WebhookDispatcher:
+    """
+    Sends webhook requests over one pooled ``httpx.AsyncClient``.
+
+    A fan-out sends to every endpoint at once, up to ``max_per_workspace``
+    requests in flight per workspace and ``max_per_host`` per receiving host
+    (scheme, host, port), so one slow receiver only holds up the requests
+    queued behind it for the same host. The client keeps connections alive
+    between events.
+
+    The client and semaphores belong to the event loop that first used them;
+    they are rebuilt if the dispatcher is used from another loop (tests,
+    scripts calling asyncio.run more than once).
+    """
+
+    def __init__(
+        self,
+        max_per_workspace: int = 20,
+        max_per_host: int = 10,
+        max_connections: int = 200,
+        timeout: httpx.Timeout | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.max_per_workspace = max_per_workspace
+        self.max_per_host = max_per_host
+        self.max_connections = max_connections
+        self.timeout = timeout or httpx.Timeout(
+            connect=WEBHOOK_CONNECT_TIMEOUT_S,
+            read=WEBHOOK_READ_TIMEOUT_S,
+            write=WEBHOOK_WRITE_TIMEOUT_S,
+            pool=WEBHOOK_POOL_TIMEOUT_S,
+        )
+        self._transport = transport
+        self._client: httpx.AsyncClient | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._workspace_slots: dict[int, asyncio.Semaphore] = {}
+        self._host_slots: dict[tuple[str, str, int | None], asyncio.Semaphore] = {}
+        self.sent = 0
+        self.succeeded = 0
+        self.failed = 0
+
+    def _get_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            # A client from a closed loop can't be closed from this one;
+            # dropping it releases its sockets when it is collected.
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=KEEPALIVE_EXPIRY_S,
+                ),
+                transport=self._transport,
+            )
+            self._loop = loop
+            self._workspace_slots.clear()
+            self._host_slots.clear()
+        return self._client
+
+    def _host_slot(self, url: str) -> asyncio.Semaphore:
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname or "", parts.port)
+        slot = self._host_slots.get(key)
+        if slot is None:
+            slot = self._host_slots[key] = asyncio.Semaphore(self.max_per_host)
+        return slot
+
+    def _workspace_slot(self, workspace_id: int) -> asyncio.Semaphore:
+        slot = self._workspace_slots.get(workspace_id)
+        if slot is None:
+            slot = asyncio.Semaphore(self.max_per_workspace)
+            self._workspace_slots[workspace_id] = slot
+        return slot
+
+    async def fan_out(
+        self, workspace_id: int, requests: list[WebhookRequest]
+    ) -> list[DeliveryOutcome]:
+        """
+        Send all requests concurrently within the workspace and host limits.
+
+        Returns:
+            One outcome per request, in the same order; failures are
+            reported as outcomes rather than raised
+        """
+        if not requests:
+            return []
+        client = self._get_client()
+        workspace_slot = self._workspace_slot(workspace_id)
+        return list(
+            await asyncio.gather(
+                *(self._send(client, workspace_slot, r) for r in requests)
+            )
+        )
+
+    async def _send(
+        self,
+        client: httpx.AsyncClient,
+        workspace_slot: asyncio.Semaphore,
+        request: WebhookRequest,
+    ) -> DeliveryOutcome:
+        # Host slot first: a delivery queued behind a slow host must not
+        # hold one of its workspace's slots while it waits
+        async with self._host_slot(request.url), workspace_slot:
+            WEBHOOK_DELIVERIES_IN_FLIGHT.inc()
+            start = time.perf_counter()
+            try:
+                response = await client.post(
+                    request.url, json=request.payload, headers=request.headers
+                )
+                code = response.status_code
+                ok = HTTP_SUCCESS_MIN <= code < HTTP_SUCCESS_MAX_EXCLUSIVE
+                outcome = DeliveryOutcome(
+                    status="success" if ok else "failed",
+                    response_code=code,
+                    delivered_at=datetime.now(UTC),
+                    duration_s=time.perf_counter() - start,
+                )
+            except Exception as e:
+                logger.error(f"Webhook delivery to {request.url} failed: {e}")
+                outcome = DeliveryOutcome(
+                    status="failed",
+                    response_code=None,
+                    delivered_at=datetime.now(UTC),
+                    duration_s=time.perf_counter() - start,
+                    error=str(e),
+                )
+            finally:
+                WEBHOOK_DELIVERIES_IN_FLIGHT.dec()
+
+        self.sent += 1
+        if outcome.status == "success":
+            self.succeeded += 1
+        else:
+            self.failed += 1
+        WEBHOOK_DELIVERIES.labels(status=outcome.status).inc()
+        WEBHOOK_DELIVERY_DURATION.observe(outcome.duration_s)
+        return outcome
+
+    async def aclose(self) -> None:
+        """Close the shared client (app shutdown)."""
+        client, self._client = self._client, None
+        self._loop = None
+        if client is not None:
+            await client.aclose()
+            logger.info("Webhook HTTP client closed")
+
+    def stats(self) -> dict[str, int]:
+        """Sent/succeeded/failed counters."""
+        return {
+            "sent": self.sent,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+        }
+
+
+_settings = get_settings()
+_webhook_dispatcher = WebhookDispatcher(
+    max_per_workspace=_settings.WEBHOOK_MAX_CONCURRENCY_PER_WORKSPACE,
+    max_per_host=_settings.WEBHOOK_MAX_CONNECTIONS_PER_HOST,
+    max_connections=_settings.WEBHOOK_MAX_CONNECTIONS,
+)
+
+
+def get_webhook_dispatcher() -> WebhookDispatcher:
+    return _webhook_dispatcher
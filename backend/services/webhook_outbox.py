@@ -0,0 +1,339 @@
+"""Durable retry queue for webhook deliveries."""
+
+import asyncio
+import logging
+import random
+from collections import defaultdict
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import and_, or_
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.config import get_settings
+from core.database import async_session_maker
+from models.webhook import Webhook, WebhookDelivery
+from services.circuit_breaker_service import CircuitBreakerService
+from services.webhook_dispatcher import (
+    DeliveryOutcome,
+    WebhookDispatcher,
+    WebhookRequest,
+    get_webhook_dispatcher,
+    sign_payload,
+)
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {408, 425, 429}
+SERVER_ERROR_MIN = 500
+DUE_STATUSES = ("pending", "failed")
+
+
+def _utcnow() -> datetime:
+    # Delivery timestamps are stored as naive UTC, like created_at
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def _is_retryable(outcome: DeliveryOutcome) -> bool:
+    """Network errors, timeouts, 5xx and throttling are retried; other 4xx are not."""
+    code = outcome.response_code
+    return (
+        code is None or code >= SERVER_ERROR_MIN or code in RETRYABLE_STATUS_CODES
+    )
+
+
+class WebhookOutbox:
+    """
+    Sends webhook deliveries and retries the ones that fail.
+
+    The WebhookDelivery table is the queue. "pending" and "failed" rows are
+    due once next_attempt_at has passed, and "sending" rows belong to the
+    worker that claimed them until claimed_until, after which a crashed
+    worker's rows become due again. Workers claim due rows with
+    ``SELECT ... FOR UPDATE SKIP LOCKED`` and mark them "sending" in the
+    same transaction, so replicas polling at the same time get disjoint
+    batches. (SQLite has no row locks; there the lease is all there is.)
+
+    Failed attempts are retried after ``base_delay_s * 2 ** (attempts - 1)``
+    seconds, capped at ``max_delay_s``, with up to half of it taken off at
+    random so endpoints that failed together don't retry together. After
+    ``max_attempts``, or on a non-retryable response, the row is
+    dead-lettered ("dead"). Endpoints whose circuit breaker is open are not
+    called; their rows are pushed back by the breaker's recovery timeout
+    without using up an attempt.
+    """
+
+    def __init__(
+        self,
+        dispatcher: WebhookDispatcher | None = None,
+        breaker: CircuitBreakerService | None = None,
+        *,
+        max_attempts: int = 8,
+        base_delay_s: float = 5.0,
+        max_delay_s: float = 3600.0,
+        batch_size: int = 100,
+        lease_s: float = 60.0,
+        poll_interval_s: float = 5.0,
+        session_factory: Callable[[], AsyncSession] | None = None,
+    ):
+        self.dispatcher = dispatcher or get_webhook_dispatcher()
+        self.breaker = breaker or CircuitBreakerService()
+        self.max_attempts = max_attempts
+        self.base_delay_s = base_delay_s
+        self.max_delay_s = max_delay_s
+        self.batch_size = batch_size
+        self.lease_s = lease_s
+        self.poll_interval_s = poll_interval_s
+        self._session_factory = session_factory or async_session_maker
+        self._task: asyncio.Task | None = None
+        self._stopping: asyncio.Event | None = None
+        self.retried = 0
+        self.dead_lettered = 0
+        self.deferred = 0
+
+    def backoff_delay(self, attempts: int) -> float:
+        """Seconds to wait before the next attempt after ``attempts`` failures."""
+        delay = min(self.max_delay_s, self.base_delay_s * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    def claim_new(self, deliveries: list[WebhookDelivery]) -> list[WebhookDelivery]:
+        """Mark new (unsaved) deliveries as claimed for an immediate attempt."""
+        now = _utcnow()
+        for delivery in deliveries:
+            delivery.status = "sending"
+            delivery.next_attempt_at = now
+            delivery.claimed_until = now + timedelta(seconds=self.lease_s)
+        return deliveries
+
+    async def claim_due(
+        self, session: AsyncSession, limit: int | None = None
+    ) -> list[WebhookDelivery]:
+        """
+        Claim up to ``limit`` due deliveries for this worker and commit.
+
+        Returns:
+            The claimed rows, now "sending" with a lease
+        """
+        now = _utcnow()
+        query = (
+            select(WebhookDelivery)
+            .where(
+                or_(
+                    and_(
+                        WebhookDelivery.status.in_(DUE_STATUSES),
+                        WebhookDelivery.next_attempt_at <= now,
+                    ),
+                    and_(
+                        WebhookDelivery.status == "sending",
+                        WebhookDelivery.claimed_until <= now,
+                    ),
+                )
+            )
+            .order_by(WebhookDelivery.next_attempt_at)
+            .limit(limit or self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        deliveries = list((await session.exec(query)).all())
+        claimed_until = now + timedelta(seconds=self.lease_s)
+        for delivery in deliveries:
+            delivery.status = "sending"
+            delivery.claimed_until = claimed_until
+        await session.commit()
+        return deliveries
+
+    async def deliver(
+        self,
+        session: AsyncSession,
+        items: list[tuple[WebhookDelivery, Webhook | None]],
+    ) -> None:
+        """
+        Attempt claimed deliveries and record the results in one commit.
+
+        ``items`` pairs each delivery with its webhook (None if it has been
+        deleted). Each workspace's deliveries are fanned out concurrently.
+        """
+        now = _utcnow()
+        by_workspace: dict[int, list[tuple[WebhookDelivery, Webhook]]] = (
+            defaultdict(list)
+        )
+        for delivery, webhook in items:
+            if webhook is None or not webhook.enabled:
+                self._dead_letter(delivery, "webhook deleted or disabled")
+            elif self.breaker.is_open(webhook.url):
+                self._defer(delivery, now)
+            else:
+                by_workspace[webhook.workspace_id].append((delivery, webhook))
+
+        await asyncio.gather(
+            *(
+                self._fan_out(workspace_id, batch)
+                for workspace_id, batch in by_workspace.items()
+            )
+        )
+        await session.commit()
+
+    async def _fan_out(
+        self, workspace_id: int, batch: list[tuple[WebhookDelivery, Webhook]]
+    ) -> None:
+        requests = [
+            WebhookRequest(
+                url=webhook.url,
+                payload=delivery.payload,
+                headers={
+                    "Content-Type": "application/json",
+                    "X-Aistrale-Event": delivery.event_type,
+                    "X-Aistrale-Signature": sign_payload(
+                        webhook.secret, delivery.payload
+                    ),
+                    "X-Aistrale-Delivery": str(delivery.id),
+                },
+            )
+            for delivery, webhook in batch
+        ]
+        outcomes = await self.dispatcher.fan_out(workspace_id, requests)
+        now = _utcnow()
+        for (delivery, webhook), outcome in zip(batch, outcomes, strict=True):
+            self._record(delivery, webhook, outcome, now)
+
+    def _record(
+        self,
+        delivery: WebhookDelivery,
+        webhook: Webhook,
+        outcome: DeliveryOutcome,
+        now: datetime,
+    ) -> None:
+        delivery.attempts += 1
+        delivery.response_code = outcome.response_code
+        delivery.delivered_at = outcome.delivered_at
+        delivery.claimed_until = None
+
+        if outcome.status == "success":
+            self.breaker.record_success(webhook.url)
+            delivery.status = "success"
+            delivery.next_attempt_at = None
+            delivery.last_error = None
+            return
+
+        error = outcome.error or f"HTTP {outcome.response_code}"
+        if not _is_retryable(outcome):
+            self._dead_letter(delivery, error)
+            return
+
+        self.breaker.record_failure(webhook.url)
+        if delivery.attempts >= self.max_attempts:
+            self._dead_letter(delivery, error)
+            return
+        delivery.status = "failed"
+        delivery.last_error = error
+        delivery.next_attempt_at = now + timedelta(
+            seconds=self.backoff_delay(delivery.attempts)
+        )
+        self.retried += 1
+        logger.info(
+            f"Webhook delivery {delivery.id} failed ({error}), "
+            f"attempt {delivery.attempts}/{self.max_attempts}"
+        )
+
+    def _dead_letter(self, delivery: WebhookDelivery, error: str) -> None:
+        delivery.status = "dead"
+        delivery.last_error = error
+        delivery.next_attempt_at = None
+        delivery.claimed_until = None
+        self.dead_lettered += 1
+        logger.warning(f"Webhook delivery {delivery.id} dead-lettered: {error}")
+
+    def _defer(self, delivery: WebhookDelivery, now: datetime) -> None:
+        delivery.status = "pending"
+        delivery.claimed_until = None
+        delivery.next_attempt_at = now + timedelta(
+            seconds=self.breaker.recovery_timeout_sec
+        )
+        self.deferred += 1
+
+    async def process_due(self) -> int:
+        """
+        Claim and attempt one batch of due deliveries.
+
+        Returns:
+            Number of deliveries claimed
+        """
+        async with self._session_factory() as session:
+            deliveries = await self.claim_due(session)
+            if not deliveries:
+                return 0
+            webhook_ids = {d.webhook_id for d in deliveries}
+            webhooks = {
+                webhook.id: webhook
+                for webhook in (
+                    await session.exec(
+                        select(Webhook).where(Webhook.id.in_(webhook_ids))
+                    )
+                ).all()
+            }
+            await self.deliver(
+                session, [(d, webhooks.get(d.webhook_id)) for d in deliveries]
+            )
+            return len(deliveries)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the retry worker on the running event loop."""
+        if self.running:
+            return
+        self._stopping = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info("Webhook outbox worker started")
+
+    async def stop(self) -> None:
+        """Stop the worker after the batch in progress."""
+        if self._task is None:
+            return
+        self._stopping.set()
+        await self._task
+        self._task = None
+        logger.info("Webhook outbox worker stopped")
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                # Keep going while full batches come back
+                while await self.process_due() >= self.batch_size:
+                    if self._stopping.is_set():
+                        return
+            except Exception as e:
+                logger.error(f"Webhook outbox batch failed: {e}")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.poll_interval_s)
+            except TimeoutError:
+                pass
+
+    def stats(self) -> dict[str, int]:
+        """Retried/dead-lettered/deferred counters."""
+        return {
+            "retried": self.retried,
+            "dead_lettered": self.dead_lettered,
+            "deferred": self.deferred,
+        }
+
+
+_settings = get_settings()
+_webhook_outbox = WebhookOutbox(
+    breaker=CircuitBreakerService(
+        failure_threshold=_settings.WEBHOOK_BREAKER_FAILURE_THRESHOLD,
+        recovery_timeout_sec=_settings.WEBHOOK_BREAKER_RECOVERY_S,
+    ),
+    max_attempts=_settings.WEBHOOK_MAX_ATTEMPTS,
+    base_delay_s=_settings.WEBHOOK_RETRY_BASE_DELAY_S,
+    max_delay_s=_settings.WEBHOOK_RETRY_MAX_DELAY_S,
+    batch_size=_settings.WEBHOOK_OUTBOX_BATCH_SIZE,
+    lease_s=_settings.WEBHOOK_CLAIM_LEASE_S,
+    poll_interval_s=_settings.WEBHOOK_OUTBOX_POLL_INTERVAL_S,
+)
+
+
+def get_webhook_outbox() -> WebhookOutbox:
+    return _webhook_outbox
@@ -1,36 +1,32 @@
-import hashlib
-import hmac
-import json
 import logging
 import secrets
 from datetime import UTC, datetime
 from typing import Any
 
-import httpx
 from sqlalchemy import delete
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from models.webhook import Webhook, WebhookDelivery
 from models.workspace import Workspace
+from services.webhook_dispatcher import sign_payload
+from services.webhook_outbox import WebhookOutbox, get_webhook_outbox
 
 logger = logging.getLogger(__name__)
 
-HTTP_SUCCESS_MIN = 200
-HTTP_SUCCESS_MAX_EXCLUSIVE = 300
-
-WEBHOOK_CONNECT_TIMEOUT_S = 1.0
-WEBHOOK_READ_TIMEOUT_S = 2.0
-WEBHOOK_WRITE_TIMEOUT_S = 2.0
-WEBHOOK_POOL_TIMEOUT_S = 1.0
-
 
 class WebhookService:
     """
     Service to manage and dispatch webhooks.
     """
 
-    def __init__(self, session: Session):
+    def __init__(
+        self,
+        session: AsyncSession,
+        outbox: WebhookOutbox | None = None,
+    ):
         self._session = session
+        self._outbox = outbox or get_webhook_outbox()
 
     def _to_utc_aware(self, dt: datetime) -> datetime:
         if dt.tzinfo is None:
@@ -39,96 +35,59 @@ class WebhookService:
 
     async def dispatch_event(
         self, workspace_id: int, event_type: str, payload: dict[str, Any]
-    ):
+    ) -> list[WebhookDelivery]:
         """
         Find applicable webhooks and dispatch event.
-        """
-        webhooks = self._get_workspace_webhooks(workspace_id)
-
-        for webhook in webhooks:
-            if not webhook.enabled:
-                continue
-            if event_type in webhook.events or "*" in webhook.events:
-                await self._send_webhook(webhook, event_type, payload)
 
-    async def _send_webhook(
-        self, webhook: Webhook, event_type: str, payload: dict[str, Any]
-    ):
-        """
-        Send single webhook.
+        The first attempt for every matching webhook is made right away,
+        concurrently through the shared dispatcher. Delivery rows are
+        inserted already claimed ("sending") in one commit before sending,
+        and the results are recorded in a second one; failures are left in
+        the outbox for the retry worker.
         """
-        delivery = WebhookDelivery(
-            webhook_id=webhook.id,
-            event_type=event_type,
-            payload=payload,
-            status="pending",
+        webhooks = [
+            webhook
+            for webhook in await self._get_workspace_webhooks(workspace_id)
+            if webhook.enabled
+            and (event_type in webhook.events or "*" in webhook.events)
+        ]
+        if not webhooks:
+            return []
+
+        deliveries = self._outbox.claim_new(
+            [
+                WebhookDelivery(
+                    webhook_id=webhook.id,
+                    event_type=event_type,
+                    payload=payload,
+                )
+                for webhook in webhooks
+            ]
         )
-        self._session.add(delivery)
-        self._session.commit()
-        self._session.refresh(delivery)
-
-        signature = self._generate_signature(webhook.secret, payload)
-
-        headers = {
-            "Content-Type": "application/json",
-            "X-Aistrale-Event": event_type,
-            "X-Aistrale-Signature": signature,
-        }
+        self._session.add_all(deliveries)
+        await self._session.commit()
 
-        try:
-            timeout = httpx.Timeout(
-                connect=WEBHOOK_CONNECT_TIMEOUT_S,
-                read=WEBHOOK_READ_TIMEOUT_S,
-                write=WEBHOOK_WRITE_TIMEOUT_S,
-                pool=WEBHOOK_POOL_TIMEOUT_S,
-            )
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    webhook.url,
-                    json=payload,
-                    headers=headers,
-                    timeout=timeout,
-                )
-                delivery.response_code = response.status_code
-                delivery.status = (
-                    "success"
-                    if HTTP_SUCCESS_MIN
-                    <= response.status_code
-                    < HTTP_SUCCESS_MAX_EXCLUSIVE
-                    else "failed"
-                )
-                delivery.delivered_at = datetime.now(UTC)
-                self._session.add(delivery)
-                self._session.commit()
-                logger.info(
-                    f"Webhook {webhook.id} dispatched: {delivery.status}")
-
-        except Exception as e:
-            logger.error(f"Webhook {webhook.id} failed: {e}")
-            delivery.status = "failed"
-            delivery.response_code = None
-            delivery.delivered_at = datetime.now(UTC)
-            self._session.add(delivery)
-            self._session.commit()
+        await self._outbox.deliver(
+            self._session, list(zip(deliveries, webhooks, strict=True))
+        )
+        return deliveries
 
     def _generate_signature(self, secret: str, payload: dict[str, Any]) -> str:
         """
         HMAC SHA256 signature.
         """
-        data = json.dumps(payload, separators=(",", ":")).encode("utf-8")
-        return hmac.new(
-            secret.encode("utf-8"),
-            data,
-            hashlib.sha256).hexdigest()
+        return sign_payload(secret, payload)
 
-    def list_webhooks(self, workspace_id: int | None = None) -> list[Webhook]:
+    async def list_webhooks(
+        self, workspace_id: int | None = None
+    ) -> list[Webhook]:
         """
         List all webhooks, optionally filtered by workspace.
         """
         query = select(Webhook)
         if workspace_id is not None:
             query = query.where(Webhook.workspace_id == workspace_id)
-        return self._session.exec(query).all()
+        return (await self._session.exec(query)).all()
 
     async def create_webhook(self, webhook_data: dict[str, Any]) -> Webhook:
         """
@@ -138,7 +97,7 @@ class WebhookService:
         if workspace_id is None:
             raise ValueError("workspace_id is required")
 
-        workspace = self._session.get(Workspace, workspace_id)
+        workspace = await self._session.get(Workspace, workspace_id)
         if not workspace:
             raise ValueError("Workspace not found")
 
@@ -159,30 +118,39 @@ class WebhookService:
         )
 
         self._session.add(webhook)
-        self._session.commit()
-        self._session.refresh(webhook)
+        await self._session.commit()
+        await self._session.refresh(webhook)
         return webhook
 
-    def list_deliveries(self, workspace_id: int | None = None) -> list[WebhookDelivery]:
+    async def list_deliveries(
+        self, workspace_id: int | None = None, status: str | None = None
+    ) -> list[WebhookDelivery]:
         """
-        List webhook deliveries.
+        List webhook deliveries, optionally only those in one status
+        (e.g. "dead" for the dead-letter queue).
         """
         query = select(WebhookDelivery)
+        if status is not None:
+            query = query.where(WebhookDelivery.status == status)
         if workspace_id is not None:
-            webhook_ids = self._session.exec(
-                select(Webhook.id).where(Webhook.workspace_id == workspace_id)
+            webhook_ids = (
+                await self._session.exec(
+                    select(Webhook.id).where(Webhook.workspace_id == workspace_id)
+                )
             ).all()
             if not webhook_ids:
                 return []
             query = query.where(WebhookDelivery.webhook_id.in_(webhook_ids))
         query = query.order_by(WebhookDelivery.created_at.desc())
-        return self._session.exec(query).all()
+        return (await self._session.exec(query)).all()
 
-    def get_analytics(self, workspace_id: int | None = None) -> dict[str, Any]:
+    async def get_analytics(
+        self, workspace_id: int | None = None
+    ) -> dict[str, Any]:
         """
         Get webhook analytics.
         """
-        deliveries = self.list_deliveries(workspace_id=workspace_id)
+        deliveries = await self.list_deliveries(workspace_id=workspace_id)
         total = len(deliveries)
         if total == 0:
             return {
@@ -190,6 +158,8 @@ class WebhookService:
                 "success_rate": 0.0,
                 "avg_delivery_time": 0.0,
                 "recent_failures": 0,
+                "retrying": 0,
+                "dead_letters": 0,
             }
 
         success = len([d for d in deliveries if d.status == "success"])
@@ -207,29 +177,56 @@ class WebhookService:
         )
 
         window = deliveries[:20]
-        recent_failures = len([d for d in window if d.status == "failed"])
+        recent_failures = len(
+            [d for d in window if d.status in ("failed", "dead")]
+        )
 
         return {
             "total_deliveries": total,
             "success_rate": success_rate,
             "avg_delivery_time": avg_delivery_time,
             "recent_failures": recent_failures,
+            "retrying": len([d for d in deliveries if d.status == "failed"]),
+            "dead_letters": len([d for d in deliveries if d.status == "dead"]),
         }
 
-    def _get_workspace_webhooks(self, workspace_id: int):
-        return self._session.exec(
-            select(Webhook).where(Webhook.workspace_id == workspace_id)
+    async def retry_delivery(self, delivery_id: int) -> WebhookDelivery:
+        """
+        Put a dead-lettered (or failed) delivery back in the outbox.
+
+        The retry worker picks it up on its next poll with a fresh set of
+        attempts.
+        """
+        delivery = await self._session.get(WebhookDelivery, delivery_id)
+        if not delivery:
+            raise ValueError("Delivery not found")
+        if delivery.status not in ("dead", "failed"):
+            raise ValueError(f"Delivery is {delivery.status}, not dead or failed")
+
+        delivery.status = "pending"
+        delivery.attempts = 0
+        delivery.next_attempt_at = datetime.now(UTC).replace(tzinfo=None)
+        delivery.claimed_until = None
+        self._session.add(delivery)
+        await self._session.commit()
+        return delivery
+
+    async def _get_workspace_webhooks(self, workspace_id: int):
+        return (
+            await self._session.exec(
+                select(Webhook).where(Webhook.workspace_id == workspace_id)
+            )
         ).all()
 
-    def delete_webhook(self, webhook_id: int) -> None:
-        webhook = self._session.get(Webhook, webhook_id)
+    async def delete_webhook(self, webhook_id: int) -> None:
+        webhook = await self._session.get(Webhook, webhook_id)
         if not webhook:
             raise ValueError("Webhook not found")
 
-        self._session.exec(
+        await self._session.exec(
             delete(WebhookDelivery).where(WebhookDelivery.webhook_id == webhook_id)
         )
-        self._session.commit()
+        await self._session.commit()
 
-        self._session.exec(delete(Webhook).where(Webhook.id == webhook_id))
-        self._session.commit()
+        await self._session.exec(delete(Webhook).where(Webhook.id == webhook_id))
+        await self._session.commit()
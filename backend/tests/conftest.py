@@ -11,6 +11,8 @@ os.environ["SECRET_KEY"] = "test_secret_key"
 os.environ["ENCRYPTION_KEY"] = "NNhJa8dRTe9uryu87t9NBcYnwa1cqICrY2uSDI9VxsY="
 os.environ["JAEGER_ENABLED"] = "false"
 os.environ["TESTING"] = "true"
+# Tests opt in to the response cache explicitly
+os.environ["RESPONSE_CACHE_ENABLED"] = "false"
 # Disable OpenTelemetry SDK completely
 os.environ["OTEL_SDK_DISABLED"] = "true"
 
@@ -43,10 +45,13 @@ with patch("core.limiter.limiter", mock_limiter_global):
 
 from fastapi import Request  # noqa: E402
 from fastapi.testclient import TestClient  # noqa: E402
+from sqlmodel.ext.asyncio.session import AsyncSession  # noqa: E402
 
 from api.deps import get_session_data  # noqa: E402
-from core.database import get_session  # noqa: E402
+from core.database import get_async_session, get_session  # noqa: E402
+from core.key_cache import get_key_cache  # noqa: E402
 from main import app  # noqa: E402
+from services.dlp_service import invalidate_dlp_rules  # noqa: E402
 
 # Initialize view_rate_limit for slowapi before any tests run
 # SlowAPIMiddleware expects this to exist
@@ -89,6 +94,22 @@ def reset_rate_limiter():
         app.state.view_rate_limit.clear()
 
 
+@pytest.fixture(autouse=True)
+def reset_key_cache():
+    """Drop cached encryption keys so tests with separate databases don't mix."""
+    key_cache = get_key_cache()
+    key_cache.invalidate()
+    key_cache.token_hits = key_cache.token_misses = 0
+    yield
+
+
+@pytest.fixture(autouse=True)
+def reset_dlp_rules():
+    """Drop the shared compiled DLP rule set between tests."""
+    invalidate_dlp_rules()
+    yield
+
+
 @pytest.fixture
 def mock_session():
     """Create a mock session with proper method mocks."""
@@ -104,6 +125,56 @@ def mock_session():
     return session
 
 
+class MockAsyncSession(AsyncSession):
+    """
+    AsyncSession facade over the sync ``mock_session`` MagicMock.
+
+    Routers on get_async_session await exec/get/commit/...; delegating to the
+    same MagicMock lets tests configure and assert on one session object
+    whichever dependency an endpoint uses.
+    """
+
+    def __init__(self, sync_session):
+        self.sync_session = sync_session
+
+    def add(self, instance, _warn=True):
+        self.sync_session.add(instance)
+
+    def add_all(self, instances):
+        for instance in instances:
+            self.sync_session.add(instance)
+
+    async def exec(self, statement, **kwargs):
+        return self.sync_session.exec(statement)
+
+    async def execute(self, statement, *args, **kwargs):
+        return self.sync_session.execute(statement, *args, **kwargs)
+
+    async def get(self, entity, ident, **kwargs):
+        return self.sync_session.get(entity, ident)
+
+    async def delete(self, instance):
+        self.sync_session.delete(instance)
+
+    async def commit(self):
+        self.sync_session.commit()
+
+    async def rollback(self):
+        self.sync_session.rollback()
+
+    async def flush(self, objects=None):
+        self.sync_session.flush()
+
+    async def refresh(self, instance, *args, **kwargs):
+        self.sync_session.refresh(instance)
+
+    async def close(self):
+        pass
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return fn(self.sync_session, *args, **kwargs)
+
+
 @pytest.fixture
 def client(mock_session):
     # Use the global mock limiter that was patched before module import
@@ -191,6 +262,9 @@ def client(mock_session):
         "api.deps.get_session_data", return_value=_test_session_data
     ):
         app.dependency_overrides[get_session] = lambda: mock_session
+        app.dependency_overrides[get_async_session] = lambda: MockAsyncSession(
+            mock_session
+        )
         # Override get_session_data to return the test session dict
         # The override function should NOT require Request parameter
         # FastAPI will inject Request automatically, but our override ignores it
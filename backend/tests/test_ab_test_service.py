@@ -1,28 +1,214 @@
+import asyncio
+from unittest.mock import patch
+
 import pytest
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from core.stats import percentile
+from models.multi_provider import ABTest, ABTestResult
+from models.token import Token
+from models.user import User
+from services.ab_test_service import (
+    ABTestService,
+    mean_confidence_interval,
+)
+from services.llm_providers.base import LLMProvider
+from services.provider_limiter import ProviderLimiters
+
+
+class FakeProvider(LLMProvider):
+    """Answers after ``delay_s``; every ``fail_every``-th call raises."""
+
+    def __init__(self, name, output="ok", delay_s=0.01, fail_every=0):
+        self.name = name
+        self.output = output
+        self.delay_s = delay_s
+        self.fail_every = fail_every
+        self.calls = []
+        self.running = self.peak = 0
+
+    async def run_inference(self, model, input_text, history=None, **kwargs):
+        self.calls.append(model)
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(self.delay_s)
+            if self.fail_every and len(self.calls) % self.fail_every == 0:
+                raise RuntimeError("503 overloaded")
+        finally:
+            self.running -= 1
+        return {"output": self.output, "input_tokens": 1000, "output_tokens": 1000}
+
+    async def stream_inference(self, model, input_text, history=None, **kwargs):
+        yield {"delta": self.output}
 
-from services.ab_test_service import ABTestService
+    def get_pricing(self, model):
+        return {"input": 0.0, "output": 0.0}
+
+    def get_provider_name(self):
+        return self.name
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/ab.db")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(User(id=1, email="a@example.com", password_hash="x"))
+        for i, provider in enumerate(("openai", "anthropic"), start=1):
+            token = Token(id=i, user_id=1, provider=provider, label=provider)
+            token.set_token(f"sk-{provider}")
+            session.add(token)
+        session.commit()
+    return engine
+
+
+def _patch_providers(fakes):
+    def get_provider(name, token):
+        assert token == f"sk-{name}"
+        return fakes[name]
+
+    return patch("services.ab_test_service.get_provider", side_effect=get_provider)
 
 
 @pytest.mark.asyncio
-async def test_start_test():
-    service = ABTestService()
-    test = await service.start_test("Test 1", "Hello", ["openai", "anthropic"])
+async def test_start_test_fans_out_to_all_providers(engine):
+    fakes = {
+        "openai": FakeProvider("openai", output="x" * 250),
+        "anthropic": FakeProvider("anthropic", output="x" * 500),
+    }
+    with Session(engine) as session, _patch_providers(fakes):
+        service = ABTestService(
+            session, limiters=ProviderLimiters(concurrency=8), repetitions=4
+        )
+        test = await service.start_test(
+            1, "Test 1", "Hello", ["openai:gpt-4o", "anthropic"]
+        )
+        assert test.status == "completed"
+        assert test.name == "Test 1"
+        assert len(test.providers) == 2
+        results = session.exec(select(ABTestResult)).all()
 
-    assert test.status == "completed"
-    assert test.name == "Test 1"
-    assert len(test.providers) == 2
+    # Every call to a provider ran at once
+    assert fakes["openai"].peak == fakes["anthropic"].peak == 4
+    assert fakes["openai"].calls == ["gpt-4o"] * 4
+    assert fakes["anthropic"].calls == ["auto"] * 4
+    assert len(results) == 8
+    openai_result = next(r for r in results if r.provider == "openai:gpt-4o")
+    # gpt-4o is $5 + $15 per 1M tokens
+    assert openai_result.cost == pytest.approx(0.02)
+    assert openai_result.quality_score == 0.5
+    assert openai_result.latency_ms >= 10
 
 
-def test_get_results_analysis():
-    service = ABTestService()
-    # Mock data inside get_results is:
-    # OpenAI: 500ms, 0.9 quality
-    # Anthropic: 1000ms, 0.95 quality
+@pytest.mark.asyncio
+async def test_provider_limits_and_failures(engine):
+    fakes = {
+        "openai": FakeProvider("openai", fail_every=3),
+        "anthropic": FakeProvider("anthropic"),
+    }
+    with Session(engine) as session, _patch_providers(fakes):
+        service = ABTestService(
+            session,
+            limiters=ProviderLimiters(concurrency=8, limits={"openai": 2}),
+            repetitions=6,
+        )
+        test = await service.start_test(1, "t", "Hello", ["openai", "anthropic"])
+        analysis = service.get_results(test.id, user_id=1)
+        assert service.get_results(test.id, user_id=2) is None
+        assert [t.id for t in service.list_tests(1)] == [test.id]
 
-    analysis = service.get_results(1)
+    assert fakes["openai"].peak == 2
+    openai = analysis["statistics"]["openai"]
+    assert (openai["total_responses"], openai["errors"]) == (4, 2)
+    assert openai["error_rate"] == pytest.approx(1 / 3)
+    failed = [r for r in analysis["results"] if r.error]
+    assert {r.error for r in failed} == {"503 overloaded"}
+    assert analysis["statistics"]["anthropic"]["errors"] == 0
 
-    # Fastest should be OpenAI (500 < 1000)
-    assert analysis["fastest_provider"] == "openai"
 
-    # Best quality should be Anthropic (0.95 > 0.9)
+def test_get_results_analysis(engine):
+    with Session(engine) as session:
+        test = ABTest(id=1, name="t", prompt="p", providers=["openai", "anthropic"],
+                      status="completed", user_id=1, repetitions=4)
+        session.add(test)
+        for latency, quality in ((400, 0.8), (500, 0.9), (600, 0.9), (900, 0.8)):
+            session.add(ABTestResult(
+                ab_test_id=1, provider="openai", response="A",
+                latency_ms=latency, cost=0.02, quality_score=quality,
+            ))
+        for latency in (1000, 1100, 1200, 1300):
+            session.add(ABTestResult(
+                ab_test_id=1, provider="anthropic", response="B",
+                latency_ms=latency, cost=0.01, quality_score=0.95,
+            ))
+        session.add(ABTestResult(
+            ab_test_id=1, provider="anthropic", response="", latency_ms=1,
+            cost=0.0, error="timeout",
+        ))
+        session.commit()
+
+        analysis = ABTestService(session).get_results(1, user_id=1)
+
+    assert analysis["fastest_provider"] == "openai"
     assert analysis["best_quality_provider"] == "anthropic"
+    openai = analysis["statistics"]["openai"]
+    assert openai["latency_ms"]["p50"] == 550
+    assert openai["latency_ms"]["p90"] == pytest.approx(810)
+    assert openai["avg_latency"] == 600
+    low, high = openai["cost_ci95"]
+    assert low == high == pytest.approx(0.02)
+    low, high = openai["quality_ci95"]
+    assert low < 0.85 < high
+    anthropic = analysis["statistics"]["anthropic"]
+    # The failed call doesn't count towards latency
+    assert anthropic["latency_ms"]["p50"] == 1150
+    assert (anthropic["total_responses"], anthropic["errors"]) == (4, 1)
+
+
+def test_percentile_and_confidence_interval():
+    assert percentile([], 50) == 0.0
+    assert percentile([10.0], 99) == 10.0
+    assert percentile([1.0, 2.0, 3.0, 4.0, 5.0], 50) == 3.0
+    assert percentile([1.0, 2.0, 3.0, 4.0, 5.0], 95) == pytest.approx(4.8)
+
+    interval = mean_confidence_interval([1.0, 2.0, 3.0])
+    # mean 2, sd 1, t(2) = 4.303
+    assert interval["mean"] == 2.0
+    assert interval["ci_high"] - 2.0 == pytest.approx(4.303 / 3 ** 0.5)
+    assert mean_confidence_interval([5.0]) == {
+        "mean": 5.0, "ci_low": 5.0, "ci_high": 5.0
+    }
+
+
+def test_start_endpoint_runs_in_background(client, engine):
+    from api.deps import get_current_user_id
+    from core.database import get_session
+
+    def session_override():
+        with Session(engine) as session:
+            yield session
+
+    client.app.dependency_overrides[get_session] = session_override
+    client.app.dependency_overrides[get_current_user_id] = lambda: 1
+    try:
+        with patch("api.multi_provider._run_ab_test_in_background") as run:
+            response = client.post("/api/multi-provider/ab-test/start", json={
+                "name": "t", "prompt": "Hello",
+                "providers": ["openai", "anthropic"], "repetitions": 3,
+            })
+        assert response.status_code == 200
+        body = response.json()
+        assert (body["status"], body["repetitions"]) == ("running", 3)
+        run.assert_called_once_with(body["id"])
+
+        response = client.post("/api/multi-provider/ab-test/start", json={
+            "name": "t", "prompt": "Hello", "providers": ["openai", "groq"],
+        })
+        assert response.status_code == 400
+        assert "groq" in response.json()["detail"]
+
+        assert client.get("/api/multi-provider/ab-test/999").status_code == 404
+    finally:
+        client.app.dependency_overrides.pop(get_session, None)
+        client.app.dependency_overrides.pop(get_current_user_id, None)
@@ -1,6 +1,15 @@
 from datetime import datetime, timedelta
 
-from services.circuit_breaker_service import CircuitBreakerService
+import pytest
+
+from services.circuit_breaker_service import (
+    _ALLOW_SCRIPT,
+    _FAILURE_SCRIPT,
+    _SUCCESS_SCRIPT,
+    CircuitBreakerService,
+    CircuitOpenError,
+    RedisCircuitBreakerService,
+)
 
 
 def test_circuit_trips():
@@ -59,3 +68,161 @@ def test_half_open_failure():
     service.record_failure(provider)
     assert breaker.state == "open"
     assert service.is_open(provider) is True
+
+
+class FakeRedis:
+    """
+    Just enough of redis.asyncio for RedisCircuitBreakerService. The Lua
+    scripts are emulated in Python, keyed by their source.
+    """
+
+    def __init__(self):
+        self.hashes = {}
+        self._scripts = {
+            _ALLOW_SCRIPT: self._allow,
+            _SUCCESS_SCRIPT: self._success,
+            _FAILURE_SCRIPT: self._failure,
+        }
+
+    def register_script(self, source):
+        fn = self._scripts[source]
+
+        async def run(keys, args):
+            return fn(self.hashes.setdefault(keys[0], {}), [str(a) for a in args])
+
+        return run
+
+    async def hgetall(self, key):
+        return {
+            k.encode(): str(v).encode() for k, v in self.hashes.get(key, {}).items()
+        }
+
+    @staticmethod
+    def _allow(h, args):
+        if h.get("state") != "open":
+            return 1
+        if float(args[0]) - float(h.get("opened_at", 0)) > float(args[1]):
+            h["state"] = "half-open"
+            return 1
+        return 0
+
+    @staticmethod
+    def _success(h, args):
+        if h.get("state") == "half-open" or (
+            h.get("state") == "closed" and h.get("failures") != "0"
+        ):
+            h.update(state="closed", failures="0")
+            h.pop("opened_at", None)
+        return 0
+
+    @staticmethod
+    def _failure(h, args):
+        state = h.get("state", "closed")
+        failures = int(h.get("failures", "0")) + 1
+        h.update(state=state, failures=str(failures), last_failure=args[0])
+        if state == "half-open" or (state == "closed" and failures >= int(args[1])):
+            h.update(state="open", opened_at=args[0])
+            return 1
+        return 0
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_redis_breaker_is_shared_between_workers():
+    client, clock = FakeRedis(), Clock()
+    workers = [
+        RedisCircuitBreakerService(
+            failure_threshold=2, recovery_timeout_sec=30, client=client, clock=clock
+        )
+        for _ in range(2)
+    ]
+
+    # One failure in each worker trips the shared circuit
+    await workers[0].on_failure("openai")
+    assert await workers[1].allow_request("openai") is True
+    await workers[1].on_failure("openai")
+    assert await workers[0].allow_request("openai") is False
+    state = await workers[0].get_state("openai")
+    assert (state.state, state.failure_count) == ("open", 2)
+    assert state.opened_at is not None
+    assert workers[0].is_blocking(state)
+
+    # After the recovery timeout one worker's probe closes it for both
+    clock.now += 31
+    # Reading the state doesn't move it to half-open
+    state = await workers[0].get_state("openai")
+    assert (state.state, workers[0].is_blocking(state)) == ("open", False)
+    assert await workers[1].allow_request("openai") is True
+    assert (await workers[0].get_state("openai")).state == "half-open"
+    await workers[1].on_success("openai")
+    state = await workers[0].get_state("openai")
+    assert (state.state, state.failure_count, state.opened_at) == (
+        "closed", 0, None
+    )
+
+
+@pytest.mark.asyncio
+async def test_redis_breaker_lets_calls_through_when_redis_fails():
+    client = FakeRedis()
+    service = RedisCircuitBreakerService(failure_threshold=1, client=client)
+
+    async def broken(keys, args):
+        raise ConnectionError("redis down")
+
+    service._allow = service._failure = broken
+    await service.on_failure("openai")
+    assert await service.allow_request("openai") is True
+
+
+@pytest.mark.asyncio
+async def test_call_counts_only_provider_failures():
+    service = CircuitBreakerService(failure_threshold=1)
+
+    async def fail(message):
+        raise Exception(message)
+
+    # A bad key or a throttled key isn't the provider failing
+    for message in ("401 Invalid API key", "429 Rate limit reached"):
+        with pytest.raises(Exception, match=message):
+            await service.call("openai", lambda m=message: fail(m))
+        assert await service.allow_request("openai") is True
+
+    with pytest.raises(Exception, match="timed out"):
+        await service.call("openai", lambda: fail("Request timed out"))
+    with pytest.raises(CircuitOpenError):
+        await service.call("openai", lambda: fail("never called"))
+
+
+def test_breaker_endpoints_need_admin_and_dont_change_state(client, mock_session):
+    from api.reliability import get_circuit_service
+    from models.user import User
+    from tests.conftest import _test_session_data
+
+    service = CircuitBreakerService(failure_threshold=1, recovery_timeout_sec=30)
+    client.app.dependency_overrides[get_circuit_service] = lambda: service
+    url = "/api/reliability/circuit-breakers/openai"
+
+    assert client.post(f"{url}/simulate-failure").status_code == 401
+    _test_session_data["user_id"] = 1
+    try:
+        mock_session.get.return_value = User(
+            id=1, email="u@example.com", password_hash="x", role="user"
+        )
+        assert client.post(f"{url}/simulate-failure").status_code == 403
+        mock_session.get.return_value.role = "admin"
+        assert client.post(f"{url}/simulate-failure").status_code == 200
+    finally:
+        _test_session_data.clear()
+
+    service.get_breaker("openai").opened_at -= timedelta(seconds=31)
+    status = client.get(url).json()
+    # Past the recovery timeout, but a status read doesn't make it half-open
+    assert (status["state"], status["is_blocking"]) == ("open", False)
+    assert service.get_breaker("openai").state == "open"
@@ -1,9 +1,10 @@
 import sys
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 import pytest
 
-from services.dlp_service import DLPService
+from models.dlp_rule import DLPAction, DLPRule
+from services.dlp_service import CompiledRuleSet, DLPService, invalidate_dlp_rules
 
 # Mock dependencies before import
 sys.modules["spacy"] = MagicMock()
@@ -60,3 +61,96 @@ def test_dlp_pii_integration(pii_service_mock):
         "My email is test@example.com")
 
     assert text == "My email is <EMAIL>"
+
+
+def _rule(name, pattern, action, priority=0):
+    return DLPRule(name=name, pattern=pattern, action=action, priority=priority)
+
+
+def test_rule_set_compiles_once():
+    rule_set = CompiledRuleSet(
+        [_rule("Warn Secret", r"secret", DLPAction.WARN)]
+    )
+
+    with patch("services.dlp_service.re.compile") as compile_mock:
+        assert rule_set.scan("no match here") == (False, "no match here", [])
+        assert rule_set.scan("a secret") == (
+            False, "a secret", ["Warning by rule: Warn Secret"]
+        )
+    compile_mock.assert_not_called()
+
+
+def test_rule_set_overlapping_rules_still_block():
+    # The WARN match starts first and would hide the token in an alternation
+    rule_set = CompiledRuleSet(
+        [
+            _rule("Warn Key Label", r"key: \S+", DLPAction.WARN, priority=10),
+            _rule("Block Token", r"sk-[a-z0-9]{8}", DLPAction.BLOCK, priority=1),
+        ]
+    )
+
+    is_blocked, text, violations = rule_set.scan("key: sk-abcd1234")
+
+    assert is_blocked is True
+    assert violations == [
+        "Warning by rule: Warn Key Label",
+        "Blocked by rule: Block Token",
+    ]
+
+
+def test_rule_set_redacts_in_priority_order():
+    rule_set = CompiledRuleSet(
+        [
+            _rule("Emails", r"\S+@corp\.com", DLPAction.REDACT, priority=1),
+            _rule("Users", r"(?i)user\d+", DLPAction.REDACT, priority=5),
+            _rule("Repeat", r"(\w)\1{3}", DLPAction.WARN),
+            _rule(r"Back\slash", r"zzz", DLPAction.REDACT),
+        ]
+    )
+
+    is_blocked, text, violations = rule_set.scan("USER42 wrote to a@corp.com zzz")
+
+    assert is_blocked is False
+    assert text == "<REDACTED:Users> wrote to <REDACTED:Emails> <REDACTED:Back\\slash>"
+    assert violations == [
+        "Redacted by rule: Users",
+        "Redacted by rule: Emails",
+        "Redacted by rule: Back\\slash",
+    ]
+    assert rule_set.scan("aaaa") == (False, "aaaa", ["Warning by rule: Repeat"])
+
+
+def test_rule_set_fails_closed_on_invalid_block_pattern():
+    rule_set = CompiledRuleSet(
+        [
+            _rule("Broken Block", r"sk-(", DLPAction.BLOCK),
+            _rule("Broken Warn", r"[a-", DLPAction.WARN),
+        ]
+    )
+
+    assert rule_set.scan("anything") == (
+        True, "anything", ["Blocked by rule: Broken Block"]
+    )
+    # An invalid non-blocking rule is only skipped
+    rule_set = CompiledRuleSet([_rule("Broken Warn", r"[a-", DLPAction.WARN)])
+    assert rule_set.scan("anything") == (False, "anything", [])
+
+
+def test_shared_rule_set_is_reused_until_invalidated(pii_service_mock):
+    session = MagicMock()
+    session.exec.return_value.all.return_value = [
+        _rule("Warn Secret", r"secret", DLPAction.WARN)
+    ]
+
+    service = DLPService(pii_service_mock, session=session)
+    service.scan_content("a secret")
+    DLPService(pii_service_mock, session=session).scan_content("another secret")
+    assert session.exec.call_count == 1
+
+    invalidate_dlp_rules()
+    session.exec.return_value.all.return_value = []
+    is_blocked, _, _ = DLPService(pii_service_mock, session=session).scan_content(
+        "sk-12345678901234567890"
+    )
+    assert session.exec.call_count == 2
+    assert is_blocked is True  # falls back to the default rules
@@ -1,9 +1,17 @@
-from unittest.mock import AsyncMock, MagicMock
+from unittest.mock import MagicMock
 
 import pytest
 
-from models.multi_provider import ProviderHealth
-from services.failover_service import FailoverService
+from models.multi_provider import FailoverConfig, ProviderHealth
+from models.reliability import RetryConfig
+from services.circuit_breaker_service import CircuitBreakerService, CircuitOpenError
+from services.failover_service import AllProvidersFailedError, FailoverService
+from services.hedging import HedgeTarget
+from services.retry_service import RetryService
+
+OPENAI = HedgeTarget("openai", "gpt-4o", "sk-openai")
+ANTHROPIC = HedgeTarget("anthropic", "auto", "sk-anthropic")
+GROQ = HedgeTarget("groq", "auto", "sk-groq")
 
 
 @pytest.fixture
@@ -16,34 +24,64 @@ def health_service_mock():
     return mock
 
 
+def _service(health_service=None, failure_threshold=5, max_attempts=1):
+    return FailoverService(
+        health_service,
+        breaker=CircuitBreakerService(failure_threshold=failure_threshold),
+        retry=RetryService(default_config=RetryConfig(
+            provider="default", max_attempts=max_attempts, initial_delay_ms=0
+        )),
+        config=FailoverConfig(
+            workspace_id=1,
+            primary_provider="openai",
+            fallback_providers=["anthropic", "groq"],
+        ),
+    )
+
+
+async def _targets(*targets):
+    for target in targets:
+        yield target
+
+
+def _provider_calls(failing=()):
+    calls = []
+
+    async def call(target):
+        calls.append(target.provider)
+        if target.provider in failing:
+            raise Exception("503 Service Unavailable")
+        return {"output": f"Response from {target.provider}"}
+
+    return call, calls
+
+
 @pytest.mark.asyncio
 async def test_execution_success_primary(health_service_mock):
-    service = FailoverService(health_service_mock)
+    service = _service(health_service_mock)
+    call, calls = _provider_calls()
 
-    # Mock simulate to succeed immediately
-    service._simulate_inference = AsyncMock(return_value="Success")
+    target, result = await service.execute(_targets(OPENAI, ANTHROPIC), call)
 
-    result = await service.execute_with_failover("chat", "hello")
-    assert result["status"] == "success"
-    assert result["provider"] == "openai"
+    assert target == OPENAI
+    assert result["output"] == "Response from openai"
+    assert calls == ["openai"]
 
 
 @pytest.mark.asyncio
 async def test_failover_to_secondary(health_service_mock):
-    service = FailoverService(health_service_mock)
+    service = _service(health_service_mock)
+    call, calls = _provider_calls(failing={"openai"})
+    failed = []
 
-    # Mock simulate to fail first, then succeed
-    async def side_effect(provider):
-        if provider == "openai":
-            raise Exception("Fail")
-        return "Success from Anthropic"
-
-    service._simulate_inference = AsyncMock(side_effect=side_effect)
+    target, result = await service.execute(
+        _targets(OPENAI, ANTHROPIC), call, failed
+    )
 
-    result = await service.execute_with_failover("chat", "hello")
-    assert result["status"] == "success"
-    assert result["provider"] == "anthropic"
-    assert result["attempts"] == 2
+    assert target == ANTHROPIC
+    assert result["output"] == "Response from anthropic"
+    assert calls == ["openai", "anthropic"]
+    assert [f.target for f in failed] == [OPENAI]
 
 
 @pytest.mark.asyncio
@@ -54,10 +92,66 @@ async def test_skip_down_provider(health_service_mock):
         if p == "openai"
         else ProviderHealth(provider=p, status="healthy")
     )
+    service = _service(health_service_mock)
+    call, calls = _provider_calls()
 
-    service = FailoverService(health_service_mock)
-    service._simulate_inference = AsyncMock(return_value="Success")
+    target, _ = await service.execute(_targets(OPENAI, ANTHROPIC), call)
 
-    result = await service.execute_with_failover("chat", "hello")
     # Should flip to anthropic because openai was skipped
-    assert result["provider"] == "anthropic"
+    assert target == ANTHROPIC
+    assert calls == ["anthropic"]
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_is_skipped_without_a_call():
+    service = _service(failure_threshold=2)
+    call, calls = _provider_calls(failing={"openai"})
+
+    for _ in range(2):
+        await service.execute(_targets(OPENAI, ANTHROPIC), call)
+    calls.clear()
+    failed = []
+    target, _ = await service.execute(_targets(OPENAI, ANTHROPIC), call, failed)
+
+    assert target == ANTHROPIC
+    assert calls == ["anthropic"]
+    assert failed == []
+    with pytest.raises(CircuitOpenError):
+        await service.execute(_targets(OPENAI), call)
+
+
+@pytest.mark.asyncio
+async def test_retries_stop_when_circuit_opens():
+    service = _service(failure_threshold=2, max_attempts=5)
+    call, calls = _provider_calls(failing={"openai"})
+
+    with pytest.raises(CircuitOpenError):
+        await service.call(OPENAI, call)
+
+    assert calls == ["openai", "openai"]
+
+
+@pytest.mark.asyncio
+async def test_all_providers_failed():
+    service = _service()
+    call, _ = _provider_calls(failing={"openai", "anthropic", "groq"})
+
+    with pytest.raises(AllProvidersFailedError) as exc:
+        await service.execute(_targets(OPENAI, ANTHROPIC, GROQ), call)
+    assert exc.value.errors == [
+        "openai: 503 Service Unavailable",
+        "anthropic: 503 Service Unavailable",
+        "groq: 503 Service Unavailable",
+    ]
+
+    # A single target's error is raised as is
+    with pytest.raises(Exception, match="503"):
+        await service.execute(_targets(GROQ), call)
+
+
+def test_fallback_providers():
+    service = _service()
+    assert service.fallback_providers("openai") == ["anthropic", "groq"]
+    assert service.fallback_providers("groq") == ["openai", "anthropic"]
+    service.config.enabled = False
+    assert service.fallback_providers("openai") == []
@@ -0,0 +1,124 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.exceptions import InferenceError
+from models.token import Token
+from models.user import User
+from services.inference_jobs import InferenceJobWorker
+
+JOB = {"provider": "openai", "model": "gpt-4o-mini", "token_id": 1}
+
+
+async def _setup(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/jobs.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    async with AsyncSession(engine) as session:
+        session.add(User(id=1, email="a@example.com", password_hash="x"))
+        token = Token(id=1, user_id=1, provider="openai", label="t")
+        token.set_token("sk-test")
+        session.add(token)
+        await session.commit()
+    return engine
+
+
+@pytest.mark.asyncio
+async def test_jobs_run_and_store_results(tmp_path):
+    engine = await _setup(tmp_path)
+    worker = InferenceJobWorker(
+        session_factory=lambda: AsyncSession(engine, expire_on_commit=False)
+    )
+
+    async def fake_run_inference(**kwargs):
+        assert kwargs["token_value"] == "sk-test"
+        return f"echo: {kwargs['input_text']}"
+
+    job = await worker.submit(1, {**JOB, "input_text": "hi"})
+    assert job.status == "pending"
+    with patch(
+        "services.inference_jobs.run_inference", side_effect=fake_run_inference
+    ):
+        assert await worker.process_one()
+        assert not await worker.process_one()
+
+    done = await worker.get_job(job.id, 1)
+    assert done.status == "completed"
+    assert done.result == {"result": "echo: hi"}
+    assert await worker.get_job(job.id, 2) is None  # Someone else's job
+    assert worker.stats() == {"completed": 1, "failed": 0, "in_flight": 0}
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_failed_jobs_record_error(tmp_path):
+    engine = await _setup(tmp_path)
+    worker = InferenceJobWorker(
+        session_factory=lambda: AsyncSession(engine, expire_on_commit=False),
+        max_attempts=1,
+    )
+
+    failing = await worker.submit(1, {**JOB, "input_text": "hi"})
+    wrong_token = await worker.submit(
+        1, {**JOB, "provider": "anthropic", "input_text": "hi"}
+    )
+    with patch(
+        "services.inference_jobs.run_inference",
+        side_effect=InferenceError("rate limited"),
+    ):
+        await worker.process_one()
+        await worker.process_one()
+
+    assert (await worker.get_job(failing.id, 1)).error == "rate limited"
+    assert (await worker.get_job(wrong_token.id, 1)).error == "Token not found"
+
+    # A job whose worker died is redelivered, up to max_attempts
+    abandoned = await worker.submit(1, {**JOB, "input_text": "hi"})
+    await worker.queue.dequeue(visibility_timeout_s=0)
+    await worker.process_one()
+    job = await worker.get_job(abandoned.id, 1)
+    assert job.status == "failed"
+    assert job.error == "Gave up after 1 attempts"
+    assert worker.stats()["failed"] == 3
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_workers_respect_provider_concurrency(tmp_path):
+    engine = await _setup(tmp_path)
+    worker = InferenceJobWorker(
+        workers=6,
+        provider_limits={"openai": 2},
+        poll_interval_s=0.01,
+        session_factory=lambda: AsyncSession(engine, expire_on_commit=False),
+    )
+    running = 0
+    peak = 0
+
+    async def slow_inference(**kwargs):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.05)
+        running -= 1
+        return "ok"
+
+    jobs = [
+        await worker.submit(1, {**JOB, "input_text": str(n)}) for n in range(6)
+    ]
+    with patch("services.inference_jobs.run_inference", side_effect=slow_inference):
+        worker.start()
+        for _ in range(200):
+            if worker.completed == len(jobs):
+                break
+            await asyncio.sleep(0.02)
+        await worker.stop()
+
+    assert worker.completed == 6
+    assert peak == 2
+    assert not worker.running
+    await engine.dispose()
@@ -1,5 +1,9 @@
+import random
 from collections import Counter
 
+import pytest
+
+from models.reliability import LoadBalanceRule
 from services.load_balancer_service import LoadBalancerService
 
 
@@ -28,3 +32,129 @@ def test_weighted_distribution():
     assert 750 < counts["openai"] < 850
     # Anthropic ~10% (100)
     assert 50 < counts["anthropic"] < 150
+
+
+def test_alias_table_matches_weights():
+    from services.load_balancer_service import AliasTable
+
+    table = AliasTable(["a", "b", "c", "d"], [50, 30, 15, 5])
+    # Probability of each item implied by the table, computed exactly
+    implied = Counter()
+    n = len(table.items)
+    for i, item in enumerate(table.items):
+        implied[item] += table.prob[i] / n
+        implied[table.items[table.alias[i]]] += (1 - table.prob[i]) / n
+    assert implied["a"] == pytest.approx(0.5)
+    assert implied["b"] == pytest.approx(0.3)
+    assert implied["c"] == pytest.approx(0.15)
+    assert implied["d"] == pytest.approx(0.05)
+
+    with pytest.raises(ValueError):
+        AliasTable(["a"], [0])
+
+
+def _service(algorithm, providers, clock=None):
+    return LoadBalancerService(
+        rules={"r": LoadBalanceRule(name="r", algorithm=algorithm,
+                                    providers=providers)},
+        rng=random.Random(7),
+        **({"clock": clock} if clock else {}),
+    )
+
+
+def test_least_outstanding_follows_in_flight_calls():
+    service = _service("least-connections", ["a", "b", "c"])
+    with service.track("a"), service.track("b"), service.track("b"):
+        assert service.select_provider("r") == "c"
+        with service.track("c"), service.track("c"):
+            assert service.select_provider("r") == "a"
+    assert {service.loads[p].in_flight for p in "abc"} == {0}
+    assert {service.select_provider("r") for _ in range(50)} == {"a", "b", "c"}
+
+
+def test_p2c_prefers_fast_idle_providers():
+    now = [0.0]
+    service = _service("p2c-peak-ewma", ["slow", "fast"], clock=lambda: now[0])
+    service.observe("slow", 900)
+    service.observe("fast", 100)
+    assert Counter(service.select_provider("r") for _ in range(20)) == {"fast": 20}
+
+    # A latency spike takes over at once; recovering decays in over time
+    service.observe("fast", 2000)
+    assert service.loads["fast"].peak_ewma_ms == 2000
+    assert service.select_provider("r") == "slow"
+    now[0] = 10.0
+    service.observe("fast", 100)
+    assert 100 < service.loads["fast"].peak_ewma_ms < 2000
+
+    # In-flight calls count against a provider
+    service.loads["fast"].peak_ewma_ms = 100
+    for _ in range(9):
+        service.loads["fast"].in_flight += 1
+    assert service.select_provider("r") == "slow"
+
+
+@pytest.mark.asyncio
+async def test_track_records_latency_errors_and_analytics():
+    import asyncio
+
+    now = [0.0]
+    service = LoadBalancerService(capacity=4, clock=lambda: now[0])
+    with service.track("openai"):
+        now[0] += 0.2
+    with pytest.raises(RuntimeError):
+        with service.track("openai"):
+            raise RuntimeError("boom")
+
+    async def hedge():
+        with service.track("anthropic"):
+            await asyncio.sleep(10)
+
+    task = asyncio.create_task(hedge())
+    await asyncio.sleep(0)
+    assert service.loads["anthropic"].in_flight == 1
+    analytics = service.analytics()
+    anthropic = analytics["distribution"][0]
+    assert (anthropic["provider"], anthropic["current_load"],
+            anthropic["capacity"]) == ("anthropic", 25.0, 75.0)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    analytics = service.analytics()
+    # The cancelled call isn't counted
+    assert analytics["total_requests"] == 2
+    assert analytics["avg_latency"] == pytest.approx(200)
+    openai = analytics["distribution"][1]
+    assert (openai["requests"], openai["errors"], openai["percentage"]) == (
+        2, 1, 100.0
+    )
+
+
+@pytest.mark.asyncio
+async def test_inference_path_feeds_the_load_balancer(mock_session, client):
+    from unittest.mock import AsyncMock, patch
+
+    from services import inference_service
+    from services.load_balancer_service import get_load_balancer
+
+    balancer = get_load_balancer()
+    before = balancer.analytics()["total_requests"]
+    seen = []
+
+    async def fake_run(**kwargs):
+        seen.append(balancer.loads["openai"].in_flight)
+        return {"output": "hi", "input_tokens": 1, "output_tokens": 1}
+
+    provider = AsyncMock()
+    provider.run_inference = fake_run
+    with patch("services.inference_service._build_provider",
+               return_value=provider):
+        await inference_service.run_inference(
+            session=mock_session, user_id=1, provider="openai", model="gpt-4o",
+            input_text="hello", token_value="sk", use_cache=False,
+        )
+
+    assert seen == [1]
+    assert balancer.loads["openai"].in_flight == 0
+    response = client.get("/api/reliability/load-balancers/analytics")
+    assert response.json()["total_requests"] == before + 1
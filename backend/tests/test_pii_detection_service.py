@@ -0,0 +1,83 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import services.pii_detection_service as pii_module
+from services.pii_detection_service import (
+    BasicPIIResult,
+    PIIDetectionService,
+    get_pii_service,
+    warm_up_pii_service,
+)
+
+TEXTS = [
+    "Reach me at jane@example.com",
+    "Nothing to see here",
+    "SSN 123-45-6789, phone 555-123-4567",
+]
+
+
+@pytest.fixture
+def regex_service():
+    service = PIIDetectionService()
+    service.analyzer = None
+    service.anonymizer = None
+    return service
+
+
+@pytest.fixture
+def fresh_singleton():
+    pii_module._shared_pii_service.cache_clear()
+    yield
+    pii_module._shared_pii_service.cache_clear()
+
+
+def test_get_pii_service_is_shared(fresh_singleton):
+    with patch.object(
+        pii_module, "PIIDetectionService", wraps=PIIDetectionService
+    ) as factory:
+        warm_up_pii_service()
+        first = get_pii_service()
+        assert get_pii_service() is first
+    factory.assert_called_once()
+
+
+def test_analyze_many_regex_matches_analyze(regex_service):
+    results = regex_service.analyze_many(TEXTS)
+
+    assert results == [regex_service.analyze(text) for text in TEXTS]
+    assert results[0] == [BasicPIIResult("EMAIL", 12, 28)]
+    assert results[1] == []
+    assert {r.entity_type for r in results[2]} == {"SSN", "PHONE"}
+
+
+def test_analyze_many_regex_process_pool(regex_service):
+    texts = TEXTS * 4
+
+    results = regex_service.analyze_many(texts, batch_size=2, n_process=2)
+
+    assert results == [regex_service.analyze(text) for text in texts]
+
+
+def test_analyze_many_uses_presidio_batches(regex_service):
+    regex_service.analyzer = MagicMock()
+    batch_engine = MagicMock()
+    batch_engine.return_value.analyze_iterator.return_value = iter([["a"], [], ["b"]])
+
+    with patch.object(pii_module, "BatchAnalyzerEngine", batch_engine, create=True):
+        results = regex_service.analyze_many(TEXTS, batch_size=16, n_process=3)
+
+    assert results == [["a"], [], ["b"]]
+    batch_engine.assert_called_once_with(analyzer_engine=regex_service.analyzer)
+    batch_engine.return_value.analyze_iterator.assert_called_once_with(
+        TEXTS, language="en", batch_size=16, n_process=3
+    )
+
+
+def test_dlp_dependency_reuses_pii_service():
+    from api.dlp import get_dlp_service
+
+    first = get_dlp_service(session=MagicMock())
+    second = get_dlp_service(session=MagicMock())
+
+    assert first.pii_service is second.pii_service
@@ -1,6 +1,19 @@
+from datetime import timedelta
+
 import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from services.queue_service import QueueService
+from services.queue_service import (
+    _DEQUEUE_SCRIPT,
+    _FINISH_SCRIPT,
+    _REQUEUE_SCRIPT,
+    DatabaseQueueBackend,
+    MemoryQueueBackend,
+    QueueService,
+    RedisQueueBackend,
+)
 
 
 @pytest.mark.asyncio
@@ -38,3 +51,307 @@ async def test_complete():
     await service.complete(r1.id)
     assert r1.status == "completed"
     assert r1.processed_at is not None
+
+
+@pytest.mark.asyncio
+async def test_fifo_within_priority():
+    service = QueueService()
+    ids = [(await service.enqueue({"n": n}, priority=1)).id for n in range(5)]
+
+    assert [(await service.dequeue()).id for _ in ids] == ids
+    assert await service.dequeue() is None
+
+
+@pytest.mark.asyncio
+async def test_visibility_timeout_redelivers():
+    service = QueueService(visibility_timeout_s=60)
+    r1 = await service.enqueue({"task": "test"})
+
+    first = await service.dequeue(visibility_timeout_s=0)
+    assert first.id == r1.id
+    assert first.status == "processing"
+
+    # The consumer never acked; the item comes back
+    second = await service.dequeue()
+    assert second.id == r1.id
+    assert second.attempts == 2
+    assert await service.dequeue() is None  # Hidden for 60s now
+
+    metrics = await service.get_metrics()
+    assert metrics["total_redelivered"] == 1
+    assert metrics["total_processing"] == 1
+
+
+@pytest.mark.asyncio
+async def test_fail_and_requeue():
+    service = QueueService()
+    r1 = await service.enqueue({"task": "test"})
+
+    await service.dequeue()
+    assert (await service.fail(r1.id, requeue=True)).status == "pending"
+    assert await service.get_queue_depth() == 1
+
+    await service.dequeue()
+    failed = await service.fail(r1.id)
+    assert failed.status == "failed"
+    assert await service.fail(r1.id) is None
+    assert await service.complete(r1.id) is None
+    assert (await service.get_metrics())["total_failed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_metrics_report_wait_and_processing_time():
+    service = QueueService()
+    r1 = await service.enqueue({"task": "test"})
+    r1.created_at -= timedelta(seconds=2)
+
+    item = await service.dequeue()
+    item.started_at -= timedelta(seconds=1)
+    await service.complete(item.id)
+
+    metrics = await service.get_metrics()
+    assert metrics["total_completed"] == 1
+    assert metrics["avg_wait_time"] >= 2000
+    assert metrics["avg_processing_time"] >= 1000
+    assert metrics["queue_depth"] == 0
+
+
+@pytest.mark.asyncio
+async def test_finished_items_are_bounded():
+    service = QueueService(MemoryQueueBackend(max_finished=3))
+    for n in range(10):
+        await service.enqueue({"n": n})
+    for _ in range(10):
+        await service.complete((await service.dequeue()).id)
+
+    items = await service.list_items()
+    assert [item.request_data["n"] for item in items] == [7, 8, 9]
+    assert (await service.get_metrics())["total_completed"] == 10
+
+
+class FakeRedis:
+    """
+    Just enough of redis.asyncio for RedisQueueBackend. The Lua scripts are
+    emulated in Python, keyed by their source.
+    """
+
+    def __init__(self):
+        self.hashes = {}
+        self.zsets = {}
+        self.lists = {}
+        self.counters = {}
+        self._scripts = {
+            _DEQUEUE_SCRIPT: self._dequeue,
+            _FINISH_SCRIPT: self._finish,
+            _REQUEUE_SCRIPT: self._requeue,
+        }
+
+    def register_script(self, source):
+        fn = self._scripts[source]
+
+        async def run(keys, args):
+            return fn(keys, [str(a) for a in args])
+
+        return run
+
+    async def incr(self, key):
+        self.counters[key] = self.counters.get(key, 0) + 1
+        return self.counters[key]
+
+    def _hset(self, key, mapping):
+        self.hashes.setdefault(key, {}).update(
+            {k.encode(): str(v).encode() for k, v in mapping.items()}
+        )
+
+    def _zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(
+            {str(m): float(s) for m, s in mapping.items()}
+        )
+
+    async def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    async def hincrby(self, key, field, amount):
+        h = self.hashes.setdefault(key, {})
+        h[field.encode()] = str(int(h.get(field.encode(), b"0")) + amount).encode()
+
+    async def hincrbyfloat(self, key, field, amount):
+        h = self.hashes.setdefault(key, {})
+        h[field.encode()] = str(float(h.get(field.encode(), b"0")) + amount).encode()
+
+    async def zcard(self, key):
+        return len(self.zsets.get(key, {}))
+
+    async def scan_iter(self, match):
+        prefix = match.rstrip("*")
+        for key in list(self.hashes):
+            if key.startswith(prefix):
+                yield key.encode()
+
+    def pipeline(self, transaction=True):
+        redis = self
+
+        class Pipeline:
+            def __init__(self):
+                self.ops = []
+
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+            def hset(self, key, mapping):
+                self.ops.append(lambda: redis._hset(key, mapping))
+
+            def zadd(self, key, mapping):
+                self.ops.append(lambda: redis._zadd(key, mapping))
+
+            async def execute(self):
+                return [op() for op in self.ops]
+
+        return Pipeline()
+
+    # Script emulations
+
+    def _move(self, src, dst, member, score):
+        if self.zsets.get(src, {}).pop(member, None) is None:
+            return False
+        self.zsets.setdefault(dst, {})[member] = float(score)
+        return True
+
+    def _dequeue(self, keys, args):
+        pending, inflight, stats = keys
+        now, deadline, prefix = args
+        for member, score in list(self.zsets.get(inflight, {}).items()):
+            if score <= float(now):
+                item = self.hashes[prefix + member]
+                self._move(inflight, pending, member, item[b"score"])
+                item[b"status"] = b"pending"
+                self.hashes.setdefault(stats, {})
+                self.hashes[stats][b"redelivered"] = str(
+                    int(self.hashes[stats].get(b"redelivered", b"0")) + 1
+                ).encode()
+        members = self.zsets.get(pending, {})
+        if not members:
+            return None
+        member = min(members, key=members.get)
+        self._move(pending, inflight, member, deadline)
+        item = self.hashes[prefix + member]
+        item[b"status"] = b"processing"
+        item[b"started_at"] = now.encode()
+        item[b"attempts"] = str(int(item[b"attempts"]) + 1).encode()
+        return member.encode()
+
+    def _finish(self, keys, args):
+        inflight, pending, finished, stats = keys
+        member, now, status, max_finished, prefix, result, error = args
+        removed = self.zsets.get(inflight, {}).pop(member, None)
+        if removed is None and self.zsets.get(pending, {}).pop(member, None) is None:
+            return None
+        item = self.hashes[prefix + member]
+        item[b"status"] = status.encode()
+        item[b"processed_at"] = now.encode()
+        if result:
+            item[b"result"] = result.encode()
+        if error:
+            item[b"error"] = error.encode()
+        s = self.hashes.setdefault(stats, {})
+        s[status.encode()] = str(int(s.get(status.encode(), b"0")) + 1).encode()
+        done = self.lists.setdefault(finished, [])
+        done.insert(0, member)
+        while len(done) > int(max_finished):
+            self.hashes.pop(prefix + done.pop(), None)
+        return 1
+
+    def _requeue(self, keys, args):
+        inflight, pending = keys
+        member, prefix = args
+        item = self.hashes.get(prefix + member)
+        if item is None or not self._move(inflight, pending, member, item[b"score"]):
+            return None
+        item[b"status"] = b"pending"
+        return 1
+
+
+@pytest.mark.asyncio
+async def test_redis_backend():
+    redis = FakeRedis()
+    service = QueueService(RedisQueueBackend(client=redis, max_finished=2))
+
+    r1 = await service.enqueue({"task": "normal"}, priority=1)
+    r2 = await service.enqueue({"task": "high"}, priority=0)
+    r3 = await service.enqueue({"task": "normal2"}, priority=1)
+    assert await service.get_queue_depth() == 3
+
+    d1 = await service.dequeue()
+    assert (d1.id, d1.request_data, d1.status) == (r2.id, {"task": "high"},
+                                                  "processing")
+    assert d1.attempts == 1
+    assert (await service.complete(d1.id)).status == "completed"
+    assert await service.complete(d1.id) is None
+
+    d2 = await service.dequeue(visibility_timeout_s=0)
+    assert d2.id == r1.id
+    d2 = await service.dequeue()  # Expired, so redelivered first
+    assert (d2.id, d2.attempts) == (r1.id, 2)
+    await service.fail(d2.id, requeue=True)
+    assert (await service.dequeue()).id == r1.id
+    await service.fail(r1.id, error="boom")
+    assert (await service.get(r1.id)).error == "boom"
+
+    assert (await service.dequeue()).id == r3.id
+    await service.complete(r3.id, result={"output": "ok"})
+    assert (await service.get(r3.id)).result == {"output": "ok"}
+
+    # Only the last two finished items are kept
+    assert [item.id for item in await service.list_items()] == [r1.id, r3.id]
+    metrics = await service.get_metrics()
+    assert metrics["total_completed"] == 2
+    assert metrics["total_failed"] == 1
+    assert metrics["total_redelivered"] == 1
+    assert metrics["queue_depth"] == 0
+
+
+@pytest.mark.asyncio
+async def test_database_backend(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/queue.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    db_backend = DatabaseQueueBackend(
+        "jobs", session_factory=lambda: AsyncSession(engine, expire_on_commit=False)
+    )
+
+    service = QueueService(db_backend)
+    other = QueueService(
+        DatabaseQueueBackend("other", session_factory=db_backend._session_factory)
+    )
+    await other.enqueue({"task": "elsewhere"}, priority=0)
+
+    r1 = await service.enqueue({"task": "normal"}, priority=1)
+    r2 = await service.enqueue({"task": "high"}, priority=0)
+    assert await service.get_queue_depth() == 2
+
+    d1 = await service.dequeue()
+    assert (d1.id, d1.status, d1.attempts) == (r2.id, "processing", 1)
+    assert (await service.complete(d1.id, {"output": "ok"})).status == "completed"
+    assert await service.complete(d1.id) is None
+    assert (await service.get(r2.id)).result == {"output": "ok"}
+
+    await service.dequeue(visibility_timeout_s=0)
+    redelivered = await service.dequeue()
+    assert (redelivered.id, redelivered.attempts) == (r1.id, 2)
+    assert (await service.fail(r1.id, requeue=True)).status == "pending"
+    await service.dequeue()
+    assert (await service.fail(r1.id, error="boom")).error == "boom"
+
+    assert await service.dequeue() is None
+    assert await service.get(1) is None  # In the other queue
+    assert [item.id for item in await service.list_items()] == [r1.id, r2.id]
+    metrics = await service.get_metrics()
+    assert metrics["total_completed"] == 1
+    assert metrics["total_failed"] == 1
+    assert metrics["total_redelivered"] == 2
+    assert metrics["queue_depth"] == 0
+    assert metrics["avg_wait_time"] >= 0.0
+    await engine.dispose()
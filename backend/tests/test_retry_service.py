@@ -1,6 +1,7 @@
 import pytest
 
-from services.retry_service import RetryService
+from models.reliability import RetryConfig
+from services.retry_service import RetryService, is_retryable
 
 
 @pytest.mark.asyncio
@@ -45,3 +46,53 @@ async def test_retry_exhaustion():
     with pytest.raises(Exception) as exc:
         await service.execute_with_retry(fail_func)
     assert "Fatal" in str(exc.value)
+
+
+@pytest.mark.asyncio
+async def test_run_uses_provider_config_and_retries_only_transient_errors():
+    service = RetryService(configs={
+        "groq": RetryConfig(provider="groq", max_attempts=4, initial_delay_ms=0),
+    }, default_config=RetryConfig(
+        provider="default", max_attempts=2, initial_delay_ms=0
+    ))
+    attempts = {"groq": 0, "openai": 0}
+
+    async def overloaded(provider):
+        attempts[provider] += 1
+        raise Exception("529 overloaded")
+
+    for provider in attempts:
+        with pytest.raises(Exception, match="overloaded"):
+            await service.run(provider, lambda p=provider: overloaded(p))
+    assert attempts == {"groq": 4, "openai": 2}
+
+    calls = 0
+
+    async def bad_key():
+        nonlocal calls
+        calls += 1
+        raise Exception("401 Incorrect API key provided")
+
+    with pytest.raises(Exception, match="401"):
+        await service.run("groq", bad_key)
+    assert calls == 1
+
+
+def test_is_retryable():
+    class APIStatusError(Exception):
+        def __init__(self, status_code):
+            super().__init__("Error code")
+            self.status_code = status_code
+
+    assert is_retryable(TimeoutError())
+    assert is_retryable(APIStatusError(503))
+    assert is_retryable(APIStatusError(429))
+    assert not is_retryable(APIStatusError(400))
+    assert is_retryable(type("APIConnectionError", (Exception,), {})("boom"))
+    assert is_retryable(Exception("Connection reset by peer"))
+    assert not is_retryable(Exception("model not found"))
+    assert is_retryable(Exception("Error code: 503 - {'error': 'overloaded'}"))
+    assert is_retryable(Exception("Server responded with status_code=502"))
+    assert is_retryable(Exception("500 Internal Server Error"))
+    assert not is_retryable(Exception("max_tokens must be <= 512"))
+    assert not is_retryable(Exception("Error code: 400 - context is 5000 tokens"))
@@ -1,3 +1,8 @@
+from datetime import UTC
+
+import pytest
+
+from models.cost_optimization import RoutingRule
 from services.routing_service import RoutingService
 
 
@@ -25,3 +30,186 @@ def test_route_fallback():
     selection = service.route_request("chat", quality_req=1.0)
     # Should fallback to default
     assert selection["model"] == "gpt-3.5-turbo"
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_route_stats_sliding_window():
+    from models.cost_optimization import ProviderPerformance
+    from services.routing_service import RouteStats
+
+    stats = RouteStats(
+        ProviderPerformance(provider="p", model="m", avg_latency_ms=900,
+                            avg_cost_per_1k_tokens=0.5),
+        window_s=60, buckets=6, alpha=0.5,
+    )
+    # Priors until there is data
+    assert (stats.latency_ms, stats.cost_per_1k_tokens) == (900, 0.5)
+
+    stats.add(1000.0, 100, True, tokens=1000, cost=0.002)
+    stats.add(1015.0, 300, True, tokens=1000, cost=0.004)
+    stats.add(1030.0, 0, False)
+    assert stats.latency_ms == 200  # 0.5 * 300 + 0.5 * 100
+    assert stats.cost_per_1k_tokens == pytest.approx(0.003)
+    assert stats.error_rate == pytest.approx(1 / 3)
+
+    # The first call's bucket slides out of the window
+    stats.expire(1065.0)
+    assert (stats.requests, stats.errors, stats.tokens) == (2, 1, 1000)
+    assert stats.cost_per_1k_tokens == pytest.approx(0.004)
+    # A call older than the window is ignored
+    stats.add(990.0, 100, True, tokens=1000, cost=1.0)
+    assert stats.requests == 2
+
+    stats.expire(2000.0)
+    assert (stats.requests, stats.errors, stats.tokens, stats.cost) == (0, 0, 0, 0)
+    # Latency keeps its average after the window empties
+    assert stats.latency_ms == 200
+
+
+def test_live_statistics_change_the_ranking():
+    from services.routing_service import DEFAULT_ROUTE, DEFAULT_RULES
+
+    clock = FakeClock()
+    fast_qa = RoutingRule(name="Fast QA", strategy="fastest", task_type="qa")
+    service = RoutingService(
+        rules=[*DEFAULT_RULES, fast_qa], clock=clock, min_samples=3
+    )
+    assert service.route_request("unknown")["model"] == "llama-2-70b"
+
+    # llama gets expensive, then starts failing
+    for _ in range(3):
+        service.record(
+            "together", "llama-2-70b", 300, True, tokens=1000, cost=0.5
+        )
+    service.rebuild_rankings()
+    assert service.route_request("chat")["model"] == "gpt-3.5-turbo"
+
+    service.record(
+        "openai", "gpt-3.5-turbo", 400, True, tokens=1000, cost=0.001
+    )
+    for _ in range(4):
+        service.record("openai", "gpt-3.5-turbo", 400, False)
+    service.rebuild_rankings()
+    # Too many errors: last resort, behind even an expensive route
+    assert service.route_request("chat")["model"] == "claude-2"
+
+    # Fastest strategy follows measured latency
+    service.record("anthropic", "claude-2", 50, True)
+    service.rebuild_rankings()
+    assert service.route_request("qa")["model"] == "claude-2"
+    assert service.route_request("qa", latency_req_ms=40) == DEFAULT_ROUTE
+
+    # Once the window has passed, llama is cheap again
+    clock.now += 3600
+    service.rebuild_rankings()
+    assert service.route_request("chat")["model"] == "llama-2-70b"
+
+
+@pytest.mark.asyncio
+async def test_refresh_reads_new_telemetry_incrementally(tmp_path):
+    from datetime import datetime, timedelta
+
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlmodel import SQLModel
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+    from models.telemetry import Telemetry
+    from models.user import User
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/routing.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    now = datetime.utcnow()
+    clock = FakeClock(now.replace(tzinfo=UTC).timestamp())
+
+    def telemetry(model, status="success", age_s=0, **kwargs):
+        return Telemetry(
+            user_id=1, model=model, sdk="openai", input_summary="x",
+            execution_time_ms=kwargs.pop("latency", 100), status=status,
+            input_tokens=500, output_tokens=500, cost=kwargs.pop("cost", 0.001),
+            timestamp=now - timedelta(seconds=age_s), **kwargs,
+        )
+
+    async with AsyncSession(engine) as session:
+        session.add(User(id=1, email="a@example.com", password_hash="x"))
+        session.add_all([
+            telemetry("gpt-4", latency=200, cost=0.001),
+            telemetry("gpt-4", latency=400, cost=0.001),
+            # Outside the window, cached, or not in the priors
+            telemetry("gpt-4", latency=9999, age_s=7200),
+            telemetry("gpt-4", latency=0, cost=0.0, cache_hit=True),
+            telemetry("gpt-4o", latency=50),
+        ])
+        await session.commit()
+
+        service = RoutingService(clock=clock, alpha=0.5, refresh_batch=2)
+        assert await service.refresh(session) == 4
+        stats = service.stats()
+        assert stats["openai/gpt-4"]["requests"] == 2
+        assert stats["openai/gpt-4"]["latency_ms"] == 300
+        assert stats["openai/gpt-4"]["cost_per_1k_tokens"] == pytest.approx(0.001)
+        # Discovered in telemetry, but with no known quality
+        assert stats["openai/gpt-4o"]["quality"] == 0.0
+        assert service.route_request("code_generation")["model"] == "gpt-4"
+
+        session.add(telemetry("gpt-4", status="error"))
+        await session.commit()
+        assert await service.refresh(session) == 1
+        assert service.stats()["openai/gpt-4"]["requests"] == 3
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_refresh_counts_rows_committed_late(tmp_path):
+    from datetime import datetime, timedelta
+
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlmodel import SQLModel
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+    from models.telemetry import Telemetry
+    from models.user import User
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/routing.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    now = datetime.utcnow()
+    clock = FakeClock(now.replace(tzinfo=UTC).timestamp())
+
+    def telemetry(id_, age_s):
+        return Telemetry(
+            id=id_, user_id=1, model="gpt-4", sdk="openai", input_summary="x",
+            execution_time_ms=100, status="success",
+            timestamp=now - timedelta(seconds=age_s),
+        )
+
+    async with AsyncSession(engine) as session:
+        session.add(User(id=1, email="a@example.com", password_hash="x"))
+        session.add(telemetry(10, age_s=1))
+        await session.commit()
+
+        service = RoutingService(clock=clock, refresh_lag_s=30)
+        assert await service.refresh(session) == 1
+
+        # Written before the last refresh, but with a lower id and
+        # committed after it
+        session.add(telemetry(5, age_s=2))
+        await session.commit()
+        clock.now += 10
+        assert await service.refresh(session) == 1
+        assert service.stats()["openai/gpt-4"]["requests"] == 2
+
+        # Rows outside the lag window are no longer re-read or remembered
+        clock.now += 60
+        assert await service.refresh(session) == 0
+        assert service._counted == {}
+    await engine.dispose()
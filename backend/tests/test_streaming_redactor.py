@@ -0,0 +1,151 @@
+import json
+import random
+import re
+
+import pytest
+
+from models.dlp_rule import DLPAction
+from services.dlp_service import DLPService
+from services.pii_detection_service import PIIDetectionService
+from services.streaming_redactor import (
+    ContentBlockedError,
+    RedactionRule,
+    StreamingRedactor,
+    iter_chunks,
+)
+
+TEXT = (
+    "Ping 10.0.0.12 or mail jane.doe@example.com, SSN 123-45-6789. "
+    "Call 555-123-4567 after 5pm. Order 12345678901 is not a phone. "
+) * 20
+
+
+@pytest.fixture
+def pii_service():
+    service = PIIDetectionService()
+    service.analyzer = None
+    service.anonymizer = None
+    return service
+
+
+@pytest.fixture
+def dlp_service(pii_service):
+    return DLPService(pii_service=pii_service)
+
+
+def _random_chunks(text, seed):
+    rng = random.Random(seed)
+    pos = 0
+    while pos < len(text):
+        size = rng.randint(1, 40)
+        yield text[pos:pos + size]
+        pos += size
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_stream_matches_whole_text_scan(dlp_service, seed):
+    _, expected, _ = dlp_service.scan_content(TEXT)
+    redactor = dlp_service.streaming_redactor(overlap=64)
+
+    streamed = "".join(redactor.redact_iter(_random_chunks(TEXT, seed)))
+
+    assert streamed == expected
+    assert redactor.violations == ["Redacted by rule: Redact Internal IPs"]
+
+
+def test_match_split_across_chunks():
+    redactor = StreamingRedactor(
+        [RedactionRule(name="SSN", pattern=re.compile(r"\b\d{3}-\d{2}-\d{4}\b"))],
+        overlap=16,
+    )
+
+    out = [redactor.feed("id 123-4"), redactor.feed("5-6789 ok"), redactor.flush()]
+
+    assert "".join(out) == "id <REDACTED:SSN> ok"
+
+
+def test_word_boundary_uses_emitted_context():
+    rule = RedactionRule(name="NUM", pattern=re.compile(r"\b\d{4}\b"))
+    redactor = StreamingRedactor([rule], overlap=4)
+
+    text = "abc" * 10 + "x1234 and 5678"
+    streamed = "".join(redactor.redact_iter(iter_chunks(text, chunk_size=7)))
+
+    assert streamed == rule.pattern.sub("<REDACTED:NUM>", text)
+
+
+def test_buffer_stays_bounded():
+    rule = RedactionRule(name="X", pattern=re.compile(r"x+"))
+    redactor = StreamingRedactor([rule], overlap=32)
+    stage = redactor._stages[0]
+
+    for _ in range(1000):
+        redactor.feed("x" * 10 + "." * 90)
+        assert len(stage._buffer) <= 100 + 2 * 32
+    redactor.feed("x" * 100_000)
+    redactor.flush()
+    assert len(stage._buffer) <= 2 * 32
+
+
+def test_block_rule_stops_stream(dlp_service):
+    redactor = dlp_service.streaming_redactor(overlap=64)
+    text = "safe text " * 50 + "key sk-" + "a" * 30 + " and more"
+
+    emitted = []
+    with pytest.raises(ContentBlockedError) as exc:
+        for chunk in redactor.redact_iter(iter_chunks(text, chunk_size=50)):
+            emitted.append(chunk)
+
+    assert exc.value.rule_name == "Block Auth Tokens"
+    assert "sk-" not in "".join(emitted)
+    assert redactor.violations == ["Blocked by rule: Block Auth Tokens"]
+
+
+def test_warn_rule_passes_text_through():
+    rule = RedactionRule(
+        name="Secret", pattern=re.compile("secret"), action=DLPAction.WARN
+    )
+    redactor = StreamingRedactor([rule])
+
+    assert "".join(redactor.redact_iter(["top se", "cret"])) == "top secret"
+    assert redactor.violations == ["Warning by rule: Secret"]
+
+
+@pytest.mark.asyncio
+async def test_aredact_iter(dlp_service):
+    async def chunks():
+        for chunk in iter_chunks(TEXT, chunk_size=33):
+            yield chunk
+
+    redactor = dlp_service.streaming_redactor(overlap=64)
+    out = [text async for text in redactor.aredact_iter(chunks())]
+
+    assert "".join(out) == dlp_service.scan_content(TEXT)[1]
+    assert len(out) > 1
+
+
+def test_redact_stream_endpoint(client, mock_session, pii_service):
+    from unittest.mock import patch
+
+    from api.deps import get_current_user_id
+    from main import app
+
+    mock_session.exec.return_value.all.return_value = []  # Default rules
+    app.dependency_overrides[get_current_user_id] = lambda: 1
+    try:
+        with patch("api.dlp.get_pii_service", return_value=pii_service):
+            response = client.post(
+                "/api/dlp/redact/stream",
+                content=TEXT.encode(),
+                headers={"Content-Type": "text/plain"},
+            )
+    finally:
+        app.dependency_overrides.pop(get_current_user_id, None)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = re.findall(r"event: (\w+)\ndata: (.*)\n\n", response.text)
+    text = "".join(json.loads(data)["text"] for name, data in events
+                   if name == "chunk")
+    assert text == DLPService(pii_service=pii_service).scan_content(TEXT)[1]
+    assert events[-1][0] == "done"
@@ -1,21 +1,45 @@
+import asyncio
 import json
+import time
+from collections import Counter
 from unittest.mock import AsyncMock, patch
 
+import httpx
 import pytest
-from sqlmodel import Session, SQLModel, create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from models.webhook import Webhook
+from models.webhook import Webhook, WebhookDelivery
 from models.workspace import Workspace
+from services.circuit_breaker_service import CircuitBreakerService
+from services.webhook_dispatcher import WebhookDispatcher, WebhookRequest
+from services.webhook_outbox import WebhookOutbox
 from services.webhook_service import WebhookService
 
 
+async def _session_with_webhooks(engine, urls):
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    session = AsyncSession(engine, expire_on_commit=False)
+    session.add(Workspace(id=1, name="Test Workspace"))
+    for url in urls:
+        session.add(
+            Webhook(workspace_id=1, url=url, events=["*"], secret="secret")
+        )
+    await session.commit()
+    return session
+
+
 @pytest.mark.asyncio
 async def test_dispatch_event_success():
-    engine = create_engine("sqlite://")
-    SQLModel.metadata.create_all(engine)
-    with Session(engine) as session:
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    # Same session settings as core.database.async_session_maker
+    async with AsyncSession(engine, expire_on_commit=False) as session:
         session.add(Workspace(id=1, name="Test Workspace"))
-        session.commit()
+        await session.commit()
 
         session.add(
             Webhook(
@@ -26,7 +50,7 @@ async def test_dispatch_event_success():
                 enabled=True,
             )
         )
-        session.commit()
+        await session.commit()
 
         service = WebhookService(session)
 
@@ -42,10 +66,10 @@ async def test_dispatch_event_success():
             assert "X-Aistrale-Signature" in kwargs["headers"]
 
 
-def test_signature_generation():
-    engine = create_engine("sqlite://")
-    SQLModel.metadata.create_all(engine)
-    with Session(engine) as session:
+@pytest.mark.asyncio
+async def test_signature_generation():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with AsyncSession(engine) as session:
         service = WebhookService(session)
     payload = {"foo": "bar"}
     secret = "secret"
@@ -65,3 +89,242 @@ def test_signature_generation():
                 ":")).encode(),
         hashlib.sha256).hexdigest()
     assert sig == expected
+
+
+@pytest.mark.asyncio
+async def test_dispatch_event_fans_out_concurrently():
+    async def slow_receiver(request):
+        await asyncio.sleep(0.2)
+        return httpx.Response(200)
+
+    engine = create_async_engine("sqlite+aiosqlite://")
+    urls = [f"http://receiver-{i}.test/hook" for i in range(5)]
+    session = await _session_with_webhooks(engine, urls)
+    dispatcher = WebhookDispatcher(transport=httpx.MockTransport(slow_receiver))
+    service = WebhookService(session, outbox=WebhookOutbox(dispatcher=dispatcher))
+
+    start = time.perf_counter()
+    deliveries = await service.dispatch_event(1, "inference.completed", {"id": 1})
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.6  # Serial sends would take 1s
+    assert [d.status for d in deliveries] == ["success"] * 5
+    stored = (await session.exec(select(WebhookDelivery))).all()
+    assert {d.status for d in stored} == {"success"}
+    assert all(d.delivered_at is not None for d in stored)
+    await session.close()
+
+
+@pytest.mark.asyncio
+async def test_dispatch_event_respects_host_limit():
+    in_flight = Counter()
+    peak = Counter()
+
+    async def receiver(request):
+        host = request.url.host
+        in_flight[host] += 1
+        peak[host] = max(peak[host], in_flight[host])
+        await asyncio.sleep(0.05)
+        in_flight[host] -= 1
+        return httpx.Response(204)
+
+    engine = create_async_engine("sqlite+aiosqlite://")
+    urls = [f"http://slow.test/hook/{i}" for i in range(6)]
+    urls += [f"http://fast.test/hook/{i}" for i in range(3)]
+    session = await _session_with_webhooks(engine, urls)
+    dispatcher = WebhookDispatcher(
+        max_per_host=2, transport=httpx.MockTransport(receiver)
+    )
+
+    await WebhookService(
+        session, outbox=WebhookOutbox(dispatcher=dispatcher)
+    ).dispatch_event(1, "inference.completed", {"id": 1})
+
+    assert peak["slow.test"] == 2
+    assert peak["fast.test"] == 2
+    assert dispatcher.stats() == {"sent": 9, "succeeded": 9, "failed": 0}
+    await session.close()
+
+
+@pytest.mark.asyncio
+async def test_slow_host_does_not_hold_workspace_slots():
+    done_at = {}
+
+    async def receiver(request):
+        if request.url.host == "slow.test":
+            await asyncio.sleep(0.1)
+        done_at[str(request.url)] = time.perf_counter()
+        return httpx.Response(204)
+
+    dispatcher = WebhookDispatcher(
+        max_per_workspace=2, max_per_host=1,
+        transport=httpx.MockTransport(receiver),
+    )
+    urls = [f"http://slow.test/hook/{i}" for i in range(3)]
+    urls.append("http://fast.test/hook")
+
+    start = time.perf_counter()
+    await dispatcher.fan_out(1, [WebhookRequest(url, {}, {}) for url in urls])
+
+    # Deliveries queued on the slow host wait for its slot, not the workspace's
+    assert done_at["http://fast.test/hook"] - start < 0.05
+    await dispatcher.aclose()
+
+
+@pytest.mark.asyncio
+async def test_dispatch_event_records_failures():
+    def receiver(request):
+        if request.url.host == "down.test":
+            raise httpx.ConnectError("connection refused")
+        if request.url.host == "error.test":
+            return httpx.Response(500)
+        return httpx.Response(200)
+
+    engine = create_async_engine("sqlite+aiosqlite://")
+    urls = ["http://ok.test/hook", "http://down.test/hook", "http://error.test/hook"]
+    session = await _session_with_webhooks(engine, urls)
+    dispatcher = WebhookDispatcher(transport=httpx.MockTransport(receiver))
+
+    deliveries = await WebhookService(
+        session, outbox=WebhookOutbox(dispatcher=dispatcher)
+    ).dispatch_event(1, "inference.completed", {"id": 1})
+
+    assert [(d.status, d.response_code) for d in deliveries] == [
+        ("success", 200),
+        ("failed", None),
+        ("failed", 500),
+    ]
+    await session.close()
+
+
+def _outbox_for(engine, receiver, **kwargs):
+    return WebhookOutbox(
+        dispatcher=WebhookDispatcher(transport=httpx.MockTransport(receiver)),
+        breaker=kwargs.pop("breaker", CircuitBreakerService()),
+        base_delay_s=0.0,
+        session_factory=lambda: AsyncSession(engine, expire_on_commit=False),
+        **kwargs,
+    )
+
+
+async def _deliveries(engine):
+    async with AsyncSession(engine) as session:
+        return (
+            await session.exec(select(WebhookDelivery).order_by(WebhookDelivery.id))
+        ).all()
+
+
+@pytest.mark.asyncio
+async def test_outbox_retries_failed_delivery(tmp_path):
+    responses = iter([503, 200])
+
+    def receiver(request):
+        assert request.headers["X-Aistrale-Delivery"] == "1"
+        return httpx.Response(next(responses))
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/hooks.db")
+    session = await _session_with_webhooks(engine, ["http://flaky.test/hook"])
+    outbox = _outbox_for(engine, receiver)
+
+    [delivery] = await WebhookService(session, outbox=outbox).dispatch_event(
+        1, "inference.completed", {"id": 1}
+    )
+    assert (delivery.status, delivery.attempts) == ("failed", 1)
+    assert delivery.last_error == "HTTP 503"
+
+    assert await outbox.process_due() == 1
+    [stored] = await _deliveries(engine)
+    assert (stored.status, stored.attempts) == ("success", 2)
+    assert await outbox.process_due() == 0
+    await session.close()
+
+
+@pytest.mark.asyncio
+async def test_outbox_dead_letters_and_requeues(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/hooks.db")
+    session = await _session_with_webhooks(
+        engine, ["http://down.test/hook", "http://gone.test/hook"]
+    )
+
+    def receiver(request):
+        if request.url.host == "gone.test":
+            return httpx.Response(410)  # Not retryable
+        raise httpx.ConnectError("connection refused")
+
+    outbox = _outbox_for(engine, receiver, max_attempts=2)
+    service = WebhookService(session, outbox=outbox)
+    await service.dispatch_event(1, "inference.completed", {"id": 1})
+    await outbox.process_due()
+
+    down, gone = await _deliveries(engine)
+    assert (down.status, down.attempts) == ("dead", 2)
+    assert "connection refused" in down.last_error
+    assert (gone.status, gone.attempts) == ("dead", 1)
+    assert [d.id for d in await service.list_deliveries(status="dead")] == [2, 1]
+
+    requeued = await service.retry_delivery(down.id)
+    assert (requeued.status, requeued.attempts) == ("pending", 0)
+    with pytest.raises(ValueError):
+        await service.retry_delivery(down.id)
+    await session.close()
+
+
+@pytest.mark.asyncio
+async def test_outbox_defers_while_breaker_open(tmp_path):
+    calls = []
+
+    def receiver(request):
+        calls.append(request.url.host)
+        return httpx.Response(500)
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/hooks.db")
+    session = await _session_with_webhooks(engine, ["http://down.test/hook"])
+    breaker = CircuitBreakerService(failure_threshold=1, recovery_timeout_sec=60)
+    outbox = _outbox_for(engine, receiver, breaker=breaker)
+    service = WebhookService(session, outbox=outbox)
+
+    await service.dispatch_event(1, "first", {"id": 1})
+    await service.dispatch_event(1, "second", {"id": 2})
+
+    assert calls == ["down.test"]  # The breaker opened after the first failure
+    first, second = await _deliveries(engine)
+    assert (first.status, first.attempts) == ("failed", 1)
+    assert (second.status, second.attempts) == ("pending", 0)
+    assert second.next_attempt_at > first.next_attempt_at
+    assert outbox.stats()["deferred"] == 1
+    await session.close()
+
+
+@pytest.mark.asyncio
+async def test_claim_due_respects_lease(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/hooks.db")
+    session = await _session_with_webhooks(engine, ["http://a.test/hook"])
+    outbox = _outbox_for(engine, lambda request: httpx.Response(200), lease_s=0.0)
+    session.add_all(
+        outbox.claim_new(
+            [WebhookDelivery(webhook_id=1, event_type="e", payload={}) for _ in range(3)]
+        )
+    )
+    await session.commit()
+
+    # Lease of 0s: the "sending" rows look abandoned and are claimed again
+    outbox.lease_s = 60.0
+    async with AsyncSession(engine, expire_on_commit=False) as worker:
+        claimed = await outbox.claim_due(worker, limit=2)
+    assert len(claimed) == 2
+
+    async with AsyncSession(engine, expire_on_commit=False) as worker:
+        claimed = await outbox.claim_due(worker)
+    assert len(claimed) == 1  # The other two are now leased for 60s
+    await session.close()
+
+
+def test_backoff_delay_grows_with_jitter():
+    outbox = WebhookOutbox(
+        dispatcher=WebhookDispatcher(), base_delay_s=2.0, max_delay_s=30.0
+    )
+
+    for attempts, ceiling in [(1, 2.0), (2, 4.0), (3, 8.0), (10, 30.0)]:
+        delays = [outbox.backoff_delay(attempts) for _ in range(50)]
+        assert all(ceiling / 2 <= d <= ceiling for d in delays)
+        assert len(set(delays)) > 1
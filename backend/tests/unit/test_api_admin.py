@@ -26,6 +26,10 @@ class TestAdminAPI:
             with patch("api.admin.KeyRotationService") as mock_service:
                 mock_rotation = MagicMock()
                 mock_rotation.rotate_key.return_value = ("new-key-id", 5)
+                mock_rotation.get_progress.return_value = {
+                    "status": "completed",
+                    "re_encrypted_tokens": 5,
+                }
                 mock_service.return_value = mock_rotation
 
                 response = client.post("/api/admin/rotate-encryption-key")
@@ -33,6 +37,7 @@ class TestAdminAPI:
                 data = response.json()
                 assert data["status"] == "success"
                 assert data["re_encrypted_tokens"] == 5
+                assert data["progress"]["status"] == "completed"
         finally:
             app.dependency_overrides.clear()
 
@@ -56,3 +61,31 @@ class TestAdminAPI:
             assert response.status_code == 403
         finally:
             app.dependency_overrides.clear()
+
+    def test_get_key_rotation_progress(self, client, mock_session):
+        """Test polling key rotation progress."""
+        from api import admin
+        from core.database import get_session
+
+        app = client.app
+        app.dependency_overrides[admin.require_admin] = lambda: 1
+        app.dependency_overrides[get_session] = lambda: mock_session
+
+        try:
+            with patch("api.admin.KeyRotationService") as mock_service:
+                mock_service.return_value.get_progress.return_value = {
+                    "status": "running",
+                    "processed_tokens": 500,
+                    "total_tokens": 1000,
+                    "percent_complete": 50.0,
+                }
+
+                response = client.get("/api/admin/rotate-encryption-key")
+                assert response.status_code == 200
+                assert response.json()["percent_complete"] == 50.0
+
+                mock_service.return_value.get_progress.return_value = None
+                response = client.get("/api/admin/rotate-encryption-key")
+                assert response.json() == {"status": "none"}
+        finally:
+            app.dependency_overrides.clear()
@@ -204,6 +204,143 @@ class TestInferenceAPI:
 
         app.dependency_overrides.clear()
 
+    def _login(self, client, mock_session):
+        from unittest.mock import patch
+
+        from core.security import get_password_hash
+        from models.user import User
+
+        test_user = User(
+            id=1,
+            email="test@example.com",
+            password_hash=get_password_hash("pass"),
+            role="user",
+        )
+        mock_result = MagicMock()
+        mock_result.first.return_value = test_user
+        mock_session.exec.return_value = mock_result
+        with patch("api.auth.verify_password", return_value=True):
+            client.post(
+                "/api/auth/login",
+                json={"email": "test@example.com", "password": "pass"},
+            )
+
+    def test_stream_inference_endpoint(self, client, mock_session, test_token):
+        """Test streaming inference emits SSE token and done events."""
+        from unittest.mock import patch
+
+        self._login(client, mock_session)
+        mock_session.get.return_value = test_token
+        mock_history_result = MagicMock()
+        mock_history_result.all.return_value = []
+        mock_session.exec.return_value = mock_history_result
+
+        async def fake_stream(**kwargs):
+            yield {"delta": "Hel"}
+            yield {"delta": "lo"}
+            yield {"delta": "", "input_tokens": 3, "output_tokens": 2}
+
+        with patch("api.inference.stream_inference", side_effect=fake_stream):
+            response = client.post(
+                "/api/inference/stream",
+                json={
+                    "provider": "openai",
+                    "model": "gpt-3.5-turbo",
+                    "input_text": "Hello",
+                    "token_id": 1,
+                },
+            )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        body = response.text
+        assert 'event: token\ndata: {"delta": "Hel"}' in body
+        assert 'event: token\ndata: {"delta": "lo"}' in body
+        assert (
+            'event: done\ndata: {"input_tokens": 3, "output_tokens": 2}' in body
+        )
+
+        # User message plus the assembled assistant message
+        saved = [c.args[0] for c in mock_session.add.call_args_list]
+        assistant = [
+            m for m in saved
+            if isinstance(m, ChatMessage) and m.role == "assistant"
+        ]
+        assert assistant[0].content == "Hello"
+
+    def test_stream_inference_endpoint_redacts_output(
+            self, client, mock_session, test_token):
+        """Test redact_output applies DLP rules across chunk boundaries."""
+        from unittest.mock import patch
+
+        self._login(client, mock_session)
+        mock_session.get.return_value = test_token
+        mock_history_result = MagicMock()
+        mock_history_result.all.return_value = []
+        mock_session.exec.return_value = mock_history_result
+
+        async def fake_stream(**kwargs):
+            yield {"delta": "Mail jane@exa"}
+            yield {"delta": "mple.com, host 10.0."}
+            yield {"delta": "0.7 done"}
+
+        with patch("api.inference.stream_inference", side_effect=fake_stream):
+            response = client.post(
+                "/api/inference/stream",
+                json={
+                    "provider": "openai",
+                    "model": "gpt-3.5-turbo",
+                    "input_text": "Hello",
+                    "token_id": 1,
+                    "redact_output": True,
+                },
+            )
+
+        assert response.status_code == 200
+        assert "jane@" not in response.text
+        assert "10.0." not in response.text
+        saved = [c.args[0] for c in mock_session.add.call_args_list]
+        assistant = [
+            m for m in saved
+            if isinstance(m, ChatMessage) and m.role == "assistant"
+        ]
+        assert assistant[0].content == (
+            "Mail <REDACTED:EMAIL>, host <REDACTED:Redact Internal IPs> done"
+        )
+
+    def test_stream_inference_endpoint_error_event(
+            self, client, mock_session, test_token):
+        """Test provider failures are reported as an SSE error event."""
+        from unittest.mock import patch
+
+        from core.exceptions import InferenceError
+
+        self._login(client, mock_session)
+        mock_session.get.return_value = test_token
+        mock_history_result = MagicMock()
+        mock_history_result.all.return_value = []
+        mock_session.exec.return_value = mock_history_result
+
+        async def failing_stream(**kwargs):
+            yield {"delta": "par"}
+            raise InferenceError("provider down")
+
+        with patch("api.inference.stream_inference", side_effect=failing_stream):
+            response = client.post(
+                "/api/inference/stream",
+                json={
+                    "provider": "openai",
+                    "model": "gpt-3.5-turbo",
+                    "input_text": "Hello",
+                    "token_id": 1,
+                },
+            )
+
+        assert response.status_code == 200
+        assert "event: error" in response.text
+        assert "provider down" in response.text
+        assert "event: done" not in response.text
+
     def test_get_chat_history(self, client, mock_session):
         """Test getting chat history."""
         from core.database import get_session
@@ -318,3 +455,96 @@ class TestInferenceAPI:
         assert response.status_code == 401
 
         app.dependency_overrides.clear()
+
+    def test_inference_job_submit_poll_and_subscribe(
+            self, client, mock_session, test_token):
+        """Test queued jobs return immediately and report their result."""
+        import asyncio
+
+        from services.inference_jobs import (
+            InferenceJobWorker,
+            get_inference_job_worker,
+        )
+        from services.queue_service import QueueService
+
+        worker = InferenceJobWorker(queue=QueueService())
+        client.app.dependency_overrides[get_inference_job_worker] = lambda: worker
+        try:
+            self._login(client, mock_session)
+            mock_session.get.return_value = test_token
+
+            response = client.post(
+                "/api/inference/jobs",
+                json={
+                    "provider": "openai",
+                    "input_text": "Hello",
+                    "token_id": 1,
+                    "priority": 0,
+                },
+            )
+            assert response.status_code == 202
+            job_id = response.json()["job_id"]
+            assert response.json()["status"] == "pending"
+            assert client.get(f"/api/inference/jobs/{job_id}").json()[
+                "status"] == "pending"
+
+            asyncio.run(worker.queue.complete(job_id, {"result": "Hi"}))
+
+            polled = client.get(f"/api/inference/jobs/{job_id}").json()
+            assert (polled["status"], polled["result"]) == ("completed", "Hi")
+            events = client.get(f"/api/inference/jobs/{job_id}/events")
+            assert events.headers["content-type"].startswith("text/event-stream")
+            assert '"status": "completed"' in events.text
+            assert client.get("/api/inference/jobs/999").status_code == 404
+
+            # Another user's token can't be used
+            test_token.user_id = 2
+            response = client.post(
+                "/api/inference/jobs",
+                json={"provider": "openai", "input_text": "Hi", "token_id": 1},
+            )
+            assert response.status_code == 404
+        finally:
+            client.app.dependency_overrides.pop(get_inference_job_worker, None)
+
+    def test_run_inference_hedge_target(self, client, mock_session, test_token):
+        """The hedge model goes to the request's provider with its token."""
+        from unittest.mock import patch
+
+        from services.hedging import HedgeTarget
+
+        self._login(client, mock_session)
+        mock_session.get.return_value = test_token
+        mock_history_result = MagicMock()
+        mock_history_result.all.return_value = []
+        mock_session.exec.return_value = mock_history_result
+
+        with patch("api.inference.run_inference", new_callable=AsyncMock) as mock_run:
+            mock_run.return_value = "Hi"
+            response = client.post(
+                "/api/inference/run",
+                json={
+                    "provider": "openai",
+                    "model": "gpt-4o",
+                    "input_text": "Hello",
+                    "token_id": 1,
+                    "hedge_model": "gpt-4o-mini",
+                },
+            )
+            assert response.status_code == 200
+            assert mock_run.call_args.kwargs["hedge"] == HedgeTarget(
+                "openai", "gpt-4o-mini", "test_token_value"
+            )
+
+            # Another user's token can't be used for the hedge
+            mock_session.get.side_effect = [test_token, None]
+            response = client.post(
+                "/api/inference/run",
+                json={
+                    "provider": "openai",
+                    "input_text": "Hello",
+                    "token_id": 1,
+                    "hedge_token_id": 2,
+                },
+            )
+            assert response.status_code == 404
@@ -5,6 +5,24 @@ from unittest.mock import MagicMock
 
 from api.deps import get_current_user_id
 from models.telemetry import Telemetry
+from services.telemetry_rollup_service import CostBucket
+
+
+def cost_bucket_rows(*telemetry_rows):
+    """Buckets aggregate_costs returns for raw Telemetry rows."""
+    return [
+        CostBucket(
+            bucket_start=t.timestamp,
+            provider=t.sdk,
+            model=t.model,
+            request_count=1,
+            input_tokens=t.input_tokens or 0,
+            output_tokens=t.output_tokens or 0,
+            cost=t.cost or 0.0,
+            latency_ms_sum=t.execution_time_ms,
+        )
+        for t in telemetry_rows
+    ]
 
 
 class TestTelemetryAPI:
@@ -160,8 +178,10 @@ class TestTelemetryAPI:
         )
 
         mock_result = MagicMock()
-        mock_result.all.return_value = [telemetry1, telemetry2]
+        mock_result.all.return_value = cost_bucket_rows(telemetry1, telemetry2)
         mock_session.exec.return_value = mock_result
+        # No rollup watermark yet, so everything is read from raw telemetry
+        mock_session.get.return_value = None
 
         response = client.get("/api/telemetry/cost-analytics")
         assert response.status_code == 200
@@ -203,8 +223,10 @@ class TestTelemetryAPI:
         )
 
         mock_result = MagicMock()
-        mock_result.all.return_value = [telemetry1]
+        mock_result.all.return_value = cost_bucket_rows(telemetry1)
         mock_session.exec.return_value = mock_result
+        # No rollup watermark yet, so everything is read from raw telemetry
+        mock_session.get.return_value = None
 
         response = client.get("/api/telemetry/cost-analytics?provider=openai")
         assert response.status_code == 200
@@ -241,8 +263,10 @@ class TestTelemetryAPI:
         )
 
         mock_result = MagicMock()
-        mock_result.all.return_value = [telemetry1]
+        mock_result.all.return_value = cost_bucket_rows(telemetry1)
         mock_session.exec.return_value = mock_result
+        # No rollup watermark yet, so everything is read from raw telemetry
+        mock_session.get.return_value = None
 
         response = client.get("/api/telemetry/cost-analytics?group_by=week")
         assert response.status_code == 200
@@ -279,8 +303,10 @@ class TestTelemetryAPI:
         )
 
         mock_result = MagicMock()
-        mock_result.all.return_value = [telemetry1]
+        mock_result.all.return_value = cost_bucket_rows(telemetry1)
         mock_session.exec.return_value = mock_result
+        # No rollup watermark yet, so everything is read from raw telemetry
+        mock_session.get.return_value = None
 
         response = client.get("/api/telemetry/cost-analytics?group_by=month")
         assert response.status_code == 200
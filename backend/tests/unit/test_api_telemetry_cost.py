@@ -3,6 +3,24 @@
 from unittest.mock import MagicMock
 
 from models.telemetry import Telemetry
+from services.telemetry_rollup_service import CostBucket
+
+
+def cost_bucket_rows(*telemetry_rows):
+    """Buckets aggregate_costs returns for raw Telemetry rows."""
+    return [
+        CostBucket(
+            bucket_start=t.timestamp,
+            provider=t.sdk,
+            model=t.model,
+            request_count=1,
+            input_tokens=t.input_tokens or 0,
+            output_tokens=t.output_tokens or 0,
+            cost=t.cost or 0.0,
+            latency_ms_sum=t.execution_time_ms,
+        )
+        for t in telemetry_rows
+    ]
 
 
 class TestTelemetryCostAnalytics:
@@ -41,8 +59,10 @@ class TestTelemetryCostAnalytics:
 
         # Mock the query execution
         mock_result = MagicMock()
-        mock_result.all.return_value = [telemetry1, telemetry2]
+        mock_result.all.return_value = cost_bucket_rows(telemetry1, telemetry2)
         mock_session.exec.return_value = mock_result
+        # No rollup watermark yet, so everything is read from raw telemetry
+        mock_session.get.return_value = None
 
         app = client.app
 
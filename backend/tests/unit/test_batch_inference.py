@@ -0,0 +1,76 @@
+"""Tests for the provider batch job runner."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from core.exceptions import InferenceError
+from services.batch_inference import BatchRunner, record_batch_telemetry
+from services.llm_providers.openai import OpenAIProvider
+from services.llm_providers.stub import StubProvider
+
+
+@pytest.mark.asyncio
+async def test_run_polls_until_ended():
+    provider = StubProvider(token="x", reply="ok")
+    provider.pending_polls = 2
+    runner = BatchRunner(poll_interval_s=0, max_requests=2)
+
+    results = await runner.run(provider, [
+        {"custom_id": "a", "input_text": "one two"},
+        {"custom_id": "b", "input_text": "three"},
+    ])
+
+    assert results["a"] == {"custom_id": "a", "output": "ok", "input_tokens": 2,
+                            "output_tokens": 1, "error": None}
+    assert set(results) == {"a", "b"}
+    with pytest.raises(ValueError, match="at most 2"):
+        await runner.submit(provider, [{"custom_id": str(i)} for i in range(3)])
+
+
+@pytest.mark.asyncio
+async def test_failed_or_unfinished_batch_raises():
+    provider = StubProvider(token="x")
+    batch_id = await provider.submit_batch([{"custom_id": "a", "input_text": "x"}])
+
+    provider.pending_polls = 100
+    with pytest.raises(InferenceError, match="did not finish"):
+        await BatchRunner(poll_interval_s=0, timeout_s=0).wait(provider, batch_id)
+
+    async def rejected(batch_id):
+        return {"status": "failed", "error": "invalid JSONL"}
+
+    provider.get_batch_status = rejected
+    with pytest.raises(InferenceError, match="invalid JSONL"):
+        await BatchRunner(poll_interval_s=0).wait(provider, batch_id)
+
+
+@pytest.mark.asyncio
+async def test_batch_telemetry_is_discounted():
+    session = MagicMock()
+    provider = OpenAIProvider(token="x", client=MagicMock())
+    writer = MagicMock()
+
+    async def not_running(telemetry):
+        return False
+
+    writer.write = not_running
+    with patch("services.batch_inference.get_telemetry_writer",
+               return_value=writer):
+        await record_batch_telemetry(
+            session,
+            provider,
+            user_id=1,
+            model="gpt-4o",
+            input_text="Hello",
+            result={"custom_id": "a", "output": "Hi",
+                    "input_tokens": 1_000_000, "output_tokens": 1_000_000},
+            prompt_id=None,
+            execution_time_ms=60_000,
+        )
+
+    telemetry = session.add.call_args.args[0]
+    # gpt-4o is $5 + $15 per 1M tokens, half price in a batch
+    assert telemetry.cost == pytest.approx(10.0)
+    assert (telemetry.sdk, telemetry.status) == ("openai", "success")
+    session.commit.assert_not_called()
@@ -0,0 +1,21 @@
+from core.database import get_async_database_url
+
+
+def test_async_database_url_uses_asyncpg_for_postgres():
+    assert (
+        get_async_database_url("postgresql://user:p%40ss@db:5432/app")
+        == "postgresql+asyncpg://user:p%40ss@db:5432/app"
+    )
+    assert (
+        get_async_database_url("postgresql+psycopg2://user:pw@db/app")
+        == "postgresql+asyncpg://user:pw@db/app"
+    )
+
+
+def test_async_database_url_uses_aiosqlite_for_sqlite():
+    assert get_async_database_url("sqlite:///./app.db") == "sqlite+aiosqlite:///./app.db"
+
+
+def test_async_database_url_keeps_async_driver():
+    url = "postgresql+asyncpg://user:pw@db/app"
+    assert get_async_database_url(url) == url
@@ -0,0 +1,111 @@
+"""Tests for the streaming evaluation dataset readers."""
+
+import json
+from unittest.mock import patch
+
+import pytest
+
+from services.dataset_loader import DatasetError, count_rows, iter_dataset
+
+ROWS = [
+    {"input": "héllo", "expected": "wörld", "meta": {"tags": ["a", "b"]}},
+    {"input": "2 + 2", "expected": 4},
+    {"input": "[not, a, list]", "expected": "}{"},
+]
+
+
+def test_json_array_is_streamed_across_chunks(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text(json.dumps(ROWS, ensure_ascii=False, indent=2))
+
+    with patch("services.dataset_loader.READ_CHUNK_BYTES", 5):
+        rows = list(iter_dataset(str(path)))
+
+    assert [r["input"] for r in rows] == ["héllo", "2 + 2", "[not, a, list]"]
+    assert rows[0]["meta"] == {"tags": ["a", "b"]}
+    assert rows[1]["expected"] == "4"  # Converted to a string
+    assert count_rows(str(path)) is None
+
+
+@pytest.mark.parametrize("text", ["[]", "  [ ]  ", ""])
+def test_empty_json(tmp_path, text):
+    path = tmp_path / "data.json"
+    path.write_text(text)
+    if text:
+        assert list(iter_dataset(str(path))) == []
+    else:
+        with pytest.raises(DatasetError, match="must be a list"):
+            list(iter_dataset(str(path)))
+
+
+def test_json_must_be_a_list(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text('{"input": "a", "expected": "b"}')
+
+    with pytest.raises(DatasetError, match="must be a list of objects"):
+        list(iter_dataset(str(path)))
+
+
+def test_jsonl(tmp_path):
+    path = tmp_path / "data.jsonl"
+    path.write_text("\n".join(json.dumps(r) for r in ROWS) + "\n\n")
+
+    assert [r["input"] for r in iter_dataset(str(path))] == [
+        r["input"] for r in ROWS
+    ]
+    assert count_rows(str(path)) == 4  # Counts the trailing blank line too
+
+
+def test_rows_are_validated_as_they_are_read(tmp_path):
+    path = tmp_path / "data.jsonl"
+    path.write_text(
+        '{"input": "a", "expected": "b"}\n'
+        '{"input": "c"}\n'
+        '{"input": "d", "expected": "e"}\n'
+    )
+
+    rows = iter_dataset(str(path))
+    assert next(rows)["input"] == "a"
+    with pytest.raises(DatasetError, match="Row 2"):
+        next(rows)
+
+
+def test_invalid_jsonl_line(tmp_path):
+    path = tmp_path / "data.jsonl"
+    path.write_text('{"input": "a", "expected": "b"}\n{oops\n')
+
+    with pytest.raises(DatasetError, match="Line 2"):
+        list(iter_dataset(str(path)))
+
+
+def test_csv_with_bom_and_multiline_field(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_bytes(
+        '\ufeffinput,expected\n"line one\nline two",b\nc,d\n'.encode()
+    )
+
+    rows = list(iter_dataset(str(path)))
+
+    assert rows == [
+        {"input": "line one\nline two", "expected": "b"},
+        {"input": "c", "expected": "d"},
+    ]
+
+
+def test_parquet(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "data.parquet"
+    pq.write_table(
+        pa.table({"input": ["a", "b", "c"], "expected": ["x", "y", "z"]}),
+        str(path),
+        row_group_size=2,
+    )
+
+    assert [r["expected"] for r in iter_dataset(str(path))] == ["x", "y", "z"]
+    assert count_rows(str(path)) == 3
+
+
+def test_unsupported_format(tmp_path):
+    with pytest.raises(DatasetError, match="Unsupported file format"):
+        list(iter_dataset(str(tmp_path / "data.xlsx")))
@@ -1,7 +1,9 @@
+from contextlib import asynccontextmanager
 from unittest.mock import MagicMock, patch
 
 import pytest
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from models.evaluation import Evaluation
 from models.prompt import Prompt
@@ -11,8 +13,13 @@ from services.evaluation_service import EvaluationService
 
 @pytest.mark.asyncio
 async def test_run_evaluation(mock_session: Session):
+    from tests.conftest import MockAsyncSession
+
     # Setup
-    service = EvaluationService(mock_session)
+    service = EvaluationService(
+        MockAsyncSession(mock_session),
+        session_factory=lambda: MockAsyncSession(mock_session),
+    )
     evaluation = Evaluation(
         id=1,
         name="test-eval",
@@ -55,9 +62,9 @@ async def test_run_evaluation(mock_session: Session):
     mock_session.exec.return_value = mock_exec
     mock_exec.first.return_value = token
 
-    # Mock load_dataset
-    service.load_dataset = MagicMock(
-        return_value=[{"input": "Hello", "expected": "Hi there"}]
+    # Mock the dataset stream
+    service.iter_dataset = MagicMock(
+        return_value=iter([{"input": "Hello", "expected": "Hi there"}])
     )
 
     # Mock run_inference
@@ -82,3 +89,390 @@ async def test_run_evaluation(mock_session: Session):
         assert (
             mock_session.add.call_count >= 3
         )  # eval update + 2 results + eval completion
+
+
+def _eval_db(tmp_path, rows: int):
+    """File-backed SQLite with a user, token, prompt and an evaluation."""
+    import json
+
+    from sqlmodel import SQLModel, create_engine
+
+    from models.user import User
+
+    dataset = tmp_path / "dataset.json"
+    dataset.write_text(json.dumps(
+        [{"input": f"q{i}", "expected": f"a{i}"} for i in range(rows)]
+    ))
+    engine = create_engine(f"sqlite:///{tmp_path}/eval.db")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(User(id=1, email="a@example.com", password_hash="x"))
+        session.add(Prompt(id=1, name="p", template="{input}", user_id=1))
+        token = Token(id=1, user_id=1, provider="openai", label="t")
+        token.set_token("sk-test")
+        session.add(token)
+        session.add(Evaluation(
+            id=1, name="e", dataset_path=str(dataset), metric="exact_match",
+            prompt_id=1, user_id=1,
+        ))
+        session.commit()
+    return engine
+
+
+@asynccontextmanager
+async def _async_sessions(engine):
+    """Factory of AsyncSessions on the database behind ``engine``."""
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(
+        f"sqlite+aiosqlite:///{engine.url.database}"
+    )
+    try:
+        yield async_sessionmaker(
+            async_engine, class_=AsyncSession, expire_on_commit=False
+        )
+    finally:
+        await async_engine.dispose()
+
+
+def _saved_results(engine):
+    from sqlmodel import select
+
+    from models.evaluation import EvaluationResult
+
+    with Session(engine) as session:
+        return session.exec(select(EvaluationResult)).all()
+
+
+@pytest.mark.asyncio
+async def test_run_evaluation_concurrent_with_checkpoints(tmp_path):
+    import asyncio
+
+    from services.provider_limiter import ProviderLimiters
+
+    engine = _eval_db(tmp_path, rows=25)
+    running = peak = 0
+
+    async def fake_inference(**kwargs):
+        nonlocal running, peak
+        assert kwargs["token_value"] == "sk-test"
+        # Inferences are recorded on the worker's own session
+        assert kwargs["session"] is not session
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return "a" + kwargs["input_text"][1:]
+
+    async with _async_sessions(engine) as sessions, sessions() as session:
+        service = EvaluationService(
+            session,
+            session_factory=sessions,
+            limiters=ProviderLimiters(concurrency=4),
+            checkpoint_rows=10,
+        )
+        with patch("services.inference_service.run_inference",
+                   side_effect=fake_inference), \
+                patch.object(session, "commit", wraps=session.commit) as commits:
+            await service.run_evaluation(1)
+        evaluation = await session.get(Evaluation, 1)
+        assert (evaluation.status, evaluation.total_items,
+                evaluation.completed_items) == ("completed", 25, 25)
+        # running + three checkpoints (10, 10, 5) + completed
+        assert commits.call_count == 5
+
+    assert peak == 4
+    results = _saved_results(engine)
+    assert sorted(r.item_index for r in results) == list(range(25))
+    assert all(r.score == 1.0 for r in results)
+
+
+@pytest.mark.asyncio
+async def test_failed_run_resumes_where_it_stopped(tmp_path):
+    from core.exceptions import InferenceError
+    from services.provider_limiter import ProviderLimiters
+
+    engine = _eval_db(tmp_path, rows=20)
+    calls = []
+
+    async def flaky_inference(**kwargs):
+        calls.append(kwargs["input_text"])
+        if kwargs["input_text"] == "q12":
+            raise InferenceError("provider down")
+        return "wrong"
+
+    async with _async_sessions(engine) as sessions, sessions() as session:
+        service = EvaluationService(
+            session,
+            session_factory=sessions,
+            limiters=ProviderLimiters(concurrency=1),
+            checkpoint_rows=5,
+        )
+        with patch("services.inference_service.run_inference",
+                   side_effect=flaky_inference), \
+                pytest.raises(InferenceError):
+            await service.run_evaluation(1)
+        evaluation = await session.get(Evaluation, 1)
+        assert (evaluation.status, evaluation.error) == ("failed", "provider down")
+        assert evaluation.completed_items == 12
+    assert len(_saved_results(engine)) == 12
+
+    calls.clear()
+
+    async def working_inference(**kwargs):
+        calls.append(kwargs["input_text"])
+        return "wrong"
+
+    async with _async_sessions(engine) as sessions, sessions() as session:
+        service = EvaluationService(
+            session, session_factory=sessions, limiters=ProviderLimiters()
+        )
+        with patch("services.inference_service.run_inference",
+                   side_effect=working_inference):
+            await service.run_evaluation(1)
+        evaluation = await session.get(Evaluation, 1)
+        assert (evaluation.status, evaluation.completed_items) == ("completed", 20)
+
+    assert sorted(calls) == sorted(f"q{i}" for i in range(12, 20))
+    assert sorted(r.item_index for r in _saved_results(engine)) == list(range(20))
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_calls_back_off_and_retry(tmp_path):
+    from core.exceptions import InferenceError
+    from services.provider_limiter import ProviderLimiters
+
+    engine = _eval_db(tmp_path, rows=3)
+    limiters = ProviderLimiters(concurrency=2)
+    attempts = 0
+
+    async def throttled_inference(**kwargs):
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            raise InferenceError("Error code: 429 - Rate limit reached")
+        return "x"
+
+    async with _async_sessions(engine) as sessions, sessions() as session:
+        service = EvaluationService(
+            session,
+            session_factory=sessions,
+            limiters=limiters,
+            retry_base_delay_s=0.01,
+        )
+        with patch("services.inference_service.run_inference",
+                   side_effect=throttled_inference):
+            await service.run_evaluation(1)
+        assert (await session.get(Evaluation, 1)).completed_items == 3
+        assert limiters.get("openai").throttled == 1
+    assert attempts == 4
+
+
+@pytest.mark.asyncio
+async def test_provider_limiter_paces_calls():
+    import time
+
+    from services.provider_limiter import ProviderLimiter, is_rate_limited
+
+    limiter = ProviderLimiter(concurrency=10, rate_per_s=100)
+    start = time.monotonic()
+    for _ in range(6):
+        async with limiter:
+            pass
+    assert time.monotonic() - start >= 0.045
+    assert is_rate_limited("429 Too Many Requests")
+    assert not is_rate_limited("invalid api key")
+
+
+def test_results_endpoint_reports_progress(client, tmp_path):
+    from api.deps import get_current_user_id
+    from core.database import get_session
+    from models.evaluation import EvaluationResult
+
+    engine = _eval_db(tmp_path, rows=4)
+    with Session(engine) as session:
+        evaluation = session.get(Evaluation, 1)
+        evaluation.status, evaluation.total_items = "running", 4
+        evaluation.completed_items = 3
+        for i, score in enumerate([1.0, 0.0, 1.0]):
+            session.add(EvaluationResult(
+                evaluation_id=1, item_index=i, input="q", output="a", score=score
+            ))
+        session.add(evaluation)
+        session.commit()
+
+    def get_test_session():
+        with Session(engine) as session:
+            yield session
+
+    client.app.dependency_overrides[get_session] = get_test_session
+    client.app.dependency_overrides[get_current_user_id] = lambda: 1
+    try:
+        body = client.get("/api/evaluation/1/results?limit=2").json()
+        assert len(body["results"]) == 2
+        assert body["summary"]["total_tests"] == 3
+        assert body["summary"]["passed"] == 2
+        assert body["progress"]["percent_complete"] == 75.0
+
+        # Already running
+        assert client.post("/api/evaluation/1/run").status_code == 409
+        with patch("api.evaluation._run_evaluation_in_background") as run:
+            response = client.post("/api/evaluation/1/run?force=true")
+        assert response.json()["completed_items"] == 3
+        run.assert_called_once_with(1, False)
+    finally:
+        client.app.dependency_overrides.pop(get_session, None)
+        client.app.dependency_overrides.pop(get_current_user_id, None)
+
+
+@pytest.mark.asyncio
+async def test_resume_streams_jsonl_and_pages_finished_rows(tmp_path):
+    import json
+
+    from models.evaluation import EvaluationResult
+    from services.provider_limiter import ProviderLimiters
+
+    engine = _eval_db(tmp_path, rows=0)
+    dataset = tmp_path / "dataset.jsonl"
+    dataset.write_text("".join(
+        json.dumps({"input": f"q{i}", "expected": "x"}) + "\n" for i in range(30)
+    ))
+    done = {0, 1, 2, 5, 6, 11, 29}
+    with Session(engine) as session:
+        evaluation = session.get(Evaluation, 1)
+        evaluation.dataset_path = str(dataset)
+        session.add(evaluation)
+        for i in done:
+            session.add(EvaluationResult(
+                evaluation_id=1, item_index=i, input=f"q{i}", output="x", score=1.0
+            ))
+        session.commit()
+
+    calls = []
+
+    async def fake_inference(**kwargs):
+        calls.append(int(kwargs["input_text"][1:]))
+        return "x"
+
+    async with _async_sessions(engine) as sessions, sessions() as session:
+        with patch("services.evaluation_service.FINISHED_PAGE_ROWS", 2), \
+                patch("services.inference_service.run_inference",
+                      side_effect=fake_inference):
+            service = EvaluationService(
+                session,
+                session_factory=sessions,
+                limiters=ProviderLimiters(concurrency=3),
+            )
+            await service.run_evaluation(1)
+        evaluation = await session.get(Evaluation, 1)
+        assert (evaluation.total_items, evaluation.completed_items) == (30, 30)
+
+    assert sorted(calls) == sorted(set(range(30)) - done)
+
+
+def _use_stub_provider(engine):
+    """Point the evaluation's token at the stub provider; echo rows as 'a<n>'."""
+    with Session(engine) as session:
+        token = session.get(Token, 1)
+        token.provider = "stub"
+        session.add(token)
+        prompt = session.get(Prompt, 1)
+        prompt.template = "{{ input | replace('q', 'a') }}"
+        session.add(prompt)
+        session.commit()
+
+
+@pytest.mark.asyncio
+async def test_batch_run_submits_provider_batches(tmp_path):
+    from sqlmodel import select
+
+    from models.telemetry import Telemetry
+    from services.batch_inference import BatchRunner
+    from services.llm_providers.stub import StubProvider
+
+    engine = _eval_db(tmp_path, rows=25)
+    _use_stub_provider(engine)
+
+    async with _async_sessions(engine) as sessions, sessions() as session:
+        with patch.object(StubProvider, "pending_polls", 1), \
+                patch.object(StubProvider, "submit_batch", autospec=True,
+                             side_effect=StubProvider.submit_batch) as submits:
+            service = EvaluationService(
+                session,
+                session_factory=sessions,
+                checkpoint_rows=5,
+                batch_runner=BatchRunner(poll_interval_s=0, max_requests=10),
+            )
+            await service.run_evaluation(1, batch=True)
+        evaluation = await session.get(Evaluation, 1)
+        assert (evaluation.status, evaluation.completed_items,
+                evaluation.batch_id) == ("completed", 25, None)
+        telemetry = (await session.exec(select(Telemetry))).all()
+
+    assert [len(call.args[1]) for call in submits.call_args_list] == [10, 10, 5]
+    results = _saved_results(engine)
+    assert sorted(r.item_index for r in results) == list(range(25))
+    assert all(r.score == 1.0 for r in results)
+    assert len(telemetry) == 25
+    assert {t.sdk for t in telemetry} == {"stub"}
+
+
+@pytest.mark.asyncio
+async def test_rerun_collects_interrupted_batch_and_retries_failed_rows(tmp_path):
+    from core.exceptions import InferenceError
+    from services.batch_inference import BatchRunner
+    from services.llm_providers.stub import StubProvider
+
+    engine = _eval_db(tmp_path, rows=8)
+    _use_stub_provider(engine)
+    stub = StubProvider(token="sk-test")
+    # A run submitted rows 0-3, then was interrupted while waiting
+    batch_id = await stub.submit_batch([
+        {"custom_id": f"row-{i}", "input_text": f"a{i}"} for i in range(4)
+    ])
+    with Session(engine) as session:
+        evaluation = session.get(Evaluation, 1)
+        evaluation.batch_id = batch_id
+        session.add(evaluation)
+        session.commit()
+
+    class FlakyStub(StubProvider):
+        async def get_batch_results(self, batch_id):
+            async for result in super().get_batch_results(batch_id):
+                if result["custom_id"] == "row-6":
+                    yield {"custom_id": "row-6", "output": None,
+                           "error": "Overloaded"}
+                else:
+                    yield result
+
+    submitted = []
+    original_submit = StubProvider.submit_batch
+
+    async def submit_batch(self, requests):
+        submitted.append([r["custom_id"] for r in requests])
+        return await original_submit(self, requests)
+
+    runner = BatchRunner(poll_interval_s=0, max_requests=10)
+    async with _async_sessions(engine) as sessions, sessions() as session:
+        with patch.object(StubProvider, "submit_batch", submit_batch), \
+                patch("services.evaluation_service.get_provider",
+                      return_value=FlakyStub(token="sk-test")), \
+                pytest.raises(InferenceError, match="1 rows failed"):
+            # Collected even without batch=True, rather than paid for again
+            await EvaluationService(
+                session, session_factory=sessions, batch_runner=runner
+            ).run_evaluation(1)
+        evaluation = await session.get(Evaluation, 1)
+        assert (evaluation.status, evaluation.completed_items,
+                evaluation.batch_id) == ("failed", 7, None)
+    assert submitted == [["row-4", "row-5", "row-6", "row-7"]]
+    assert 6 not in {r.item_index for r in _saved_results(engine)}
+
+    async with _async_sessions(engine) as sessions, sessions() as session:
+        with patch.object(StubProvider, "submit_batch", submit_batch):
+            await EvaluationService(
+                session, session_factory=sessions, batch_runner=runner
+            ).run_evaluation(1, batch=True)
+        assert (await session.get(Evaluation, 1)).status == "completed"
+    assert submitted[-1] == ["row-6"]
+    assert sorted(r.item_index for r in _saved_results(engine)) == list(range(8))
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from services.hedging import HEDGE, PRIMARY, HedgeTarget, HedgingService
+
+PRIMARY_TARGET = HedgeTarget("openai", "gpt-4o", "sk-openai")
+SECONDARY_TARGET = HedgeTarget("anthropic", "claude-3-haiku", "sk-anthropic")
+
+
+def _call(delays, errors=()):
+    """A call that sleeps for its target's delay, then answers or raises."""
+    cancelled = []
+
+    async def call(target):
+        try:
+            await asyncio.sleep(delays[target.provider])
+        except asyncio.CancelledError:
+            cancelled.append(target.provider)
+            raise
+        if target.provider in errors:
+            raise RuntimeError(f"{target.provider} failed")
+        return {"output": target.provider, "input_tokens": 1, "output_tokens": 1}
+
+    return call, cancelled
+
+
+def test_delay_is_percentile_of_recent_latency():
+    service = HedgingService(
+        percentile=90, window=10, min_samples=5, default_delay_ms=2000,
+        min_delay_ms=50,
+    )
+    assert service.delay_s("openai", "gpt-4o") == 2.0
+    for latency in range(100, 1100, 100):
+        service.observe("openai", "gpt-4o", latency)
+    assert service.delay_s("openai", "gpt-4o") == pytest.approx(0.91)
+    # Only the last ``window`` latencies count
+    for _ in range(10):
+        service.observe("openai", "gpt-4o", 10)
+    assert service.delay_s("openai", "gpt-4o") == 0.05
+    assert service.delay_s("openai", "gpt-4o-mini") == 2.0
+
+
+@pytest.mark.asyncio
+async def test_fast_primary_is_not_hedged():
+    service = HedgingService(default_delay_ms=200)
+    call, cancelled = _call({"openai": 0.01, "anthropic": 0.01})
+
+    outcome = await service.run(PRIMARY_TARGET, SECONDARY_TARGET, call)
+
+    assert not outcome.hedged
+    assert outcome.winner.role == PRIMARY
+    assert outcome.winner.result["output"] == "openai"
+    assert cancelled == []
+    # Successful calls are observed by the caller, not by run()
+    assert ("openai", "gpt-4o") not in service._latencies
+
+
+@pytest.mark.asyncio
+async def test_slow_primary_loses_to_hedge_and_is_cancelled():
+    service = HedgingService(default_delay_ms=20, min_delay_ms=0)
+    call, cancelled = _call({"openai": 10, "anthropic": 0.01})
+
+    outcome = await service.run(PRIMARY_TARGET, SECONDARY_TARGET, call)
+
+    assert outcome.hedged
+    assert outcome.winner.role == HEDGE
+    assert outcome.winner.result["output"] == "anthropic"
+    primary, hedge = outcome.attempts
+    assert (primary.status, hedge.status) == ("cancelled", "success")
+    assert cancelled == ["openai"]
+    # The cancelled primary's running time still counts towards its latency
+    assert service._latencies[("openai", "gpt-4o")][0] >= 20
+
+
+@pytest.mark.asyncio
+async def test_failed_hedge_waits_for_primary():
+    service = HedgingService(default_delay_ms=10, min_delay_ms=0)
+    call, cancelled = _call(
+        {"openai": 0.05, "anthropic": 0.0}, errors={"anthropic"}
+    )
+
+    outcome = await service.run(PRIMARY_TARGET, SECONDARY_TARGET, call)
+
+    assert outcome.winner.role == PRIMARY
+    assert [a.status for a in outcome.attempts] == ["success", "error"]
+    assert cancelled == []
+
+
+@pytest.mark.asyncio
+async def test_early_primary_failure_is_not_hedged():
+    service = HedgingService(default_delay_ms=1000)
+    call, _ = _call({"openai": 0.0, "anthropic": 0.0}, errors={"openai"})
+
+    outcome = await service.run(PRIMARY_TARGET, SECONDARY_TARGET, call)
+
+    assert outcome.winner is None
+    assert not outcome.hedged
+    assert str(outcome.attempts[0].error) == "openai failed"
@@ -55,6 +55,49 @@ class TestHuggingFaceProvider:
 
             assert result["output"] == "Chat response"
 
+    @pytest.mark.asyncio
+    async def test_stream_inference_text_generation(self):
+        """Test HuggingFace text generation streaming."""
+        with patch(
+            "services.llm_providers.huggingface.AsyncInferenceClient"
+        ) as mock_client_cls:
+            mock_client = AsyncMock()
+            mock_client_cls.return_value = mock_client
+
+            async def token_stream():
+                yield "Gen"
+                yield "erated"
+
+            mock_client.text_generation = AsyncMock(return_value=token_stream())
+
+            provider = HuggingFaceProvider(token="test_token")
+            chunks = [
+                c async for c in provider.stream_inference(
+                    model="gpt2", input_text="Hello", task="text-generation")
+            ]
+
+            assert "".join(c["delta"] for c in chunks) == "Generated"
+            assert mock_client.text_generation.call_args.kwargs["stream"] is True
+
+    @pytest.mark.asyncio
+    async def test_stream_inference_binary_output_single_chunk(self):
+        """Test non-text tasks are sent as one output chunk."""
+        with patch(
+            "services.llm_providers.huggingface.AsyncInferenceClient"
+        ) as mock_client_cls:
+            mock_client = AsyncMock()
+            mock_client_cls.return_value = mock_client
+            mock_client.text_to_video = AsyncMock(return_value=b"video")
+
+            provider = HuggingFaceProvider(token="test_token")
+            chunks = [
+                c async for c in provider.stream_inference(
+                    model="video-model", input_text="Hello", task="text-to-video")
+            ]
+
+            assert len(chunks) == 1
+            assert chunks[0]["output"]["mime_type"] == "video/mp4"
+
     def test_get_pricing(self):
         """Test HuggingFace pricing (free)."""
         provider = HuggingFaceProvider(token="test_token")
@@ -1,10 +1,11 @@
+import asyncio
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
 from core.exceptions import InferenceError
 from models.telemetry import Telemetry
-from services.inference_service import run_inference
+from services.inference_service import run_inference, stream_inference
 
 
 @pytest.mark.asyncio
@@ -173,3 +174,330 @@ async def test_run_inference_invalid_provider(mock_get_provider, mock_session):
 
     telemetry_call = mock_session.add.call_args[0][0]
     assert telemetry_call.status == "error"
+
+
+def _streaming_provider(*chunks, error: Exception | None = None):
+    async def stream_inference(**kwargs):
+        for chunk in chunks:
+            yield chunk
+        if error:
+            raise error
+
+    provider = MagicMock()
+    provider.stream_inference = stream_inference
+    return provider
+
+
+@pytest.mark.asyncio
+@patch("services.inference_service.get_provider")
+async def test_stream_inference_records_telemetry_on_completion(
+    mock_get_provider, mock_session
+):
+    mock_get_provider.return_value = _streaming_provider(
+        {"delta": "Hel"},
+        {"delta": "lo"},
+        {"delta": "", "input_tokens": 1000, "output_tokens": 500},
+    )
+
+    stream = stream_inference(
+        session=mock_session,
+        user_id=1,
+        provider="openai",
+        model="gpt-3.5-turbo",
+        input_text="Hi",
+        token_value="fake_key",
+    )
+    first = await stream.__anext__()
+    # Nothing is persisted until the stream finishes
+    mock_session.add.assert_not_called()
+
+    rest = [chunk async for chunk in stream]
+    assert [first, *rest][0]["delta"] == "Hel"
+
+    telemetry = mock_session.add.call_args[0][0]
+    assert isinstance(telemetry, Telemetry)
+    assert telemetry.status == "success"
+    assert telemetry.input_tokens == 1000
+    assert abs(telemetry.cost - 0.00125) < 0.0001
+
+
+@pytest.mark.asyncio
+@patch("services.inference_service.get_provider")
+async def test_stream_inference_error_mid_stream(mock_get_provider, mock_session):
+    mock_get_provider.return_value = _streaming_provider(
+        {"delta": "partial"}, error=RuntimeError("connection reset")
+    )
+
+    received = []
+    with pytest.raises(InferenceError):
+        async for chunk in stream_inference(
+            session=mock_session,
+            user_id=1,
+            provider="openai",
+            model="gpt-3.5-turbo",
+            input_text="Hi",
+            token_value="fake_key",
+        ):
+            received.append(chunk)
+
+    assert received == [{"delta": "partial"}]
+    telemetry = mock_session.add.call_args[0][0]
+    assert telemetry.status == "error"
+    assert telemetry.error_message == "connection reset"
+
+
+@pytest.mark.asyncio
+@patch("services.inference_service.get_provider")
+async def test_stream_inference_closed_early_records_cancelled(
+    mock_get_provider, mock_session
+):
+    mock_get_provider.return_value = _streaming_provider(
+        {"delta": "a"}, {"delta": "b"}
+    )
+
+    stream = stream_inference(
+        session=mock_session,
+        user_id=1,
+        provider="openai",
+        model="gpt-3.5-turbo",
+        input_text="Hi",
+        token_value="fake_key",
+    )
+    await stream.__anext__()
+    await stream.aclose()
+
+    telemetry = mock_session.add.call_args[0][0]
+    assert telemetry.status == "cancelled"
+
+
+@pytest.mark.asyncio
+@patch("services.inference_service.get_provider")
+async def test_run_inference_with_async_session(mock_get_provider):
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlmodel import SQLModel, select
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+    from models.prompt import Prompt
+
+    mock_provider = MagicMock()
+    mock_provider.run_inference = AsyncMock(
+        return_value={"output": "Hi Ada", "input_tokens": 3, "output_tokens": 2}
+    )
+    mock_get_provider.return_value = mock_provider
+
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        prompt = Prompt(name="greet", template="Hello {{ name }}", model="gpt-4")
+        session.add(prompt)
+        await session.commit()
+
+        result = await run_inference(
+            session=session,
+            user_id=1,
+            provider="openai",
+            model="auto",
+            input_text="",
+            token_value="dummy",
+            prompt_id=prompt.id,
+            prompt_variables={"name": "Ada"},
+        )
+
+        assert result == "Hi Ada"
+        call_kwargs = mock_provider.run_inference.call_args.kwargs
+        assert call_kwargs["input_text"] == "Hello Ada"
+        assert call_kwargs["model"] == "gpt-4"
+
+        telemetry = (await session.exec(select(Telemetry))).one()
+        assert telemetry.model == "gpt-4"
+        assert telemetry.prompt_id == prompt.id
+
+    await engine.dispose()
+
+
+def _delayed_provider(output, delay_s):
+    async def run_inference(**kwargs):
+        await asyncio.sleep(delay_s)
+        return {"output": output, "input_tokens": 1000, "output_tokens": 1000}
+
+    provider = MagicMock()
+    provider.run_inference = run_inference
+    return provider
+
+
+@pytest.mark.asyncio
+@patch("services.inference_service.get_provider")
+async def test_hedged_inference_records_both_calls(mock_get_provider, mock_session):
+    from services.hedging import HedgeTarget, HedgingService
+
+    providers = {
+        "openai": _delayed_provider("slow", 10),
+        "anthropic": _delayed_provider("fast", 0),
+    }
+    mock_get_provider.side_effect = lambda name, token, **kwargs: providers[name]
+
+    with patch(
+        "services.inference_service.get_hedging_service",
+        return_value=HedgingService(default_delay_ms=20, min_delay_ms=0),
+    ):
+        result = await run_inference(
+            session=mock_session,
+            user_id=1,
+            provider="openai",
+            model="gpt-4o",
+            input_text="Hello",
+            token_value="sk-openai",
+            use_cache=False,
+            hedge=HedgeTarget("anthropic", "claude-3-haiku-20240307", "sk-a"),
+        )
+
+    assert result == "fast"
+    primary, hedge = [c.args[0] for c in mock_session.add.call_args_list]
+    assert (primary.sdk, primary.hedge, primary.status) == (
+        "openai", "primary", "cancelled"
+    )
+    assert primary.cost == 0.0
+    assert (hedge.sdk, hedge.hedge, hedge.status) == ("anthropic", "hedge", "success")
+    assert hedge.model == "claude-3-haiku-20240307"
+    assert hedge.cost > 0
+
+
+@pytest.mark.asyncio
+@patch("services.inference_service.get_provider")
+async def test_hedged_inference_within_delay_is_one_call(
+    mock_get_provider, mock_session
+):
+    from services.hedging import HedgeTarget, HedgingService
+
+    mock_get_provider.return_value = _delayed_provider("quick", 0)
+    hedging = HedgingService(default_delay_ms=1000)
+
+    with patch(
+        "services.inference_service.get_hedging_service", return_value=hedging
+    ):
+        result = await run_inference(
+            session=mock_session,
+            user_id=1,
+            provider="openai",
+            model="gpt-4o",
+            input_text="Hello",
+            token_value="sk-openai",
+            use_cache=False,
+            hedge=HedgeTarget("openai", "gpt-4o-mini", "sk-openai"),
+        )
+
+    assert result == "quick"
+    telemetry = mock_session.add.call_args[0][0]
+    mock_session.add.assert_called_once()
+    assert (telemetry.hedge, telemetry.model) == (None, "gpt-4o")
+    assert len(hedging._latencies[("openai", "gpt-4o")]) == 1
+
+
+@pytest.mark.asyncio
+@patch("services.inference_service.get_provider")
+async def test_unhedged_inference_feeds_hedge_latency(
+    mock_get_provider, mock_session
+):
+    from services.hedging import HedgingService
+
+    mock_get_provider.return_value = _delayed_provider("quick", 0)
+    hedging = HedgingService()
+
+    with patch(
+        "services.inference_service.get_hedging_service", return_value=hedging
+    ):
+        await run_inference(
+            session=mock_session,
+            user_id=1,
+            provider="openai",
+            model="gpt-4o",
+            input_text="Hello",
+            token_value="sk-openai",
+        )
+
+    assert len(hedging._latencies[("openai", "gpt-4o")]) == 1
+
+
+@pytest.mark.asyncio
+@patch("services.inference_service.get_provider")
+async def test_failover_inference_moves_to_users_next_provider(
+    mock_get_provider, tmp_path
+):
+    from sqlmodel import Session, SQLModel, create_engine, select
+
+    from models.multi_provider import FailoverConfig
+    from models.reliability import RetryConfig
+    from models.token import Token
+    from models.user import User
+    from services.circuit_breaker_service import CircuitBreakerService
+    from services.failover_service import FailoverService
+    from services.retry_service import RetryService
+
+    engine = create_engine(f"sqlite:///{tmp_path}/failover.db")
+    SQLModel.metadata.create_all(engine)
+    calls = []
+
+    def get_provider(name, token, **kwargs):
+        async def run_inference(**kwargs):
+            calls.append((name, token, kwargs["model"]))
+            if name == "openai":
+                raise RuntimeError("503 Service Unavailable")
+            return {"output": f"from {name}", "input_tokens": 5, "output_tokens": 5}
+
+        provider = MagicMock()
+        provider.run_inference = run_inference
+        return provider
+
+    mock_get_provider.side_effect = get_provider
+    service = FailoverService(
+        breaker=CircuitBreakerService(failure_threshold=5),
+        retry=RetryService(default_config=RetryConfig(
+            provider="default", max_attempts=2, initial_delay_ms=0
+        )),
+        config=FailoverConfig(
+            workspace_id=1, primary_provider="openai",
+            fallback_providers=["groq", "anthropic"],
+        ),
+    )
+
+    with Session(engine) as session, patch(
+        "services.inference_service.get_failover_service", return_value=service
+    ):
+        session.add(User(id=1, email="a@example.com", password_hash="x"))
+        token = Token(user_id=1, provider="anthropic", label="a")
+        token.set_token("sk-anthropic")
+        session.add(token)
+        session.commit()
+
+        result = await run_inference(
+            session=session,
+            user_id=1,
+            provider="openai",
+            model="gpt-4o",
+            input_text="Hello",
+            token_value="sk-openai",
+            use_cache=False,
+            failover=True,
+        )
+        rows = session.exec(select(Telemetry).order_by(Telemetry.id)).all()
+
+    assert result == "from anthropic"
+    # Retried once, then groq skipped for want of a token
+    assert calls == [
+        ("openai", "sk-openai", "gpt-4o"),
+        ("openai", "sk-openai", "gpt-4o"),
+        ("anthropic", "sk-anthropic", "auto"),
+    ]
+    assert [(r.sdk, r.status, r.hedge) for r in rows] == [
+        ("openai", "error", None), ("anthropic", "success", None)
+    ]
+    assert rows[0].error_message == "503 Service Unavailable"
+
+    with pytest.raises(ValueError):
+        await run_inference(
+            session=MagicMock(), user_id=1, provider="openai", model="gpt-4o",
+            input_text="Hello", token_value="sk-openai", failover=True,
+            hedge=MagicMock(),
+        )
@@ -2,11 +2,12 @@
 
 import pytest
 from cryptography.fernet import Fernet
-from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel import Session, SQLModel, create_engine, select
 
 from core.config import get_settings
+from core.key_cache import KeyMaterialCache, get_key_cache
 from models.encryption_key import EncryptionKey
-from models.token import Token
+from models.token import Token, get_active_encryption_key
 from services.key_rotation_service import KeyRotationService
 
 
@@ -98,3 +99,129 @@ class TestKeyRotationService:
         # Check token was re-encrypted
         test_db.refresh(test_token)
         assert test_token.key_id == new_key_id
+
+
+class TestKeyMaterialCache:
+    """Test cached key material and decrypted tokens."""
+
+    def test_get_token_value_is_cached(self, test_db, test_token):
+        """Repeat decryptions skip the key query and decryption."""
+        from unittest.mock import patch
+
+        assert test_token.get_token_value(test_db) == "test_token_value"
+
+        with patch.object(test_db, "exec", wraps=test_db.exec) as spy:
+            assert test_token.get_token_value(test_db) == "test_token_value"
+            assert get_active_encryption_key(test_db)[0] == "test-key-1"
+        spy.assert_not_called()
+        assert get_key_cache().stats()["token_hits"] == 1
+
+    def test_decrypted_token_expires(self, test_db, test_token):
+        """Decrypted tokens are only cached for the token TTL."""
+        from unittest.mock import patch
+
+        cache = KeyMaterialCache(token_ttl_s=60)
+        with patch("core.key_cache.time.monotonic", return_value=100.0):
+            cache.put_token(test_token.encrypted_token, "plain")
+        with patch("core.key_cache.time.monotonic", return_value=159.0):
+            assert cache.get_token(test_token.encrypted_token) == "plain"
+        with patch("core.key_cache.time.monotonic", return_value=160.0):
+            assert cache.get_token(test_token.encrypted_token) is None
+
+    def test_rotate_key_invalidates_cache(self, test_db, test_token):
+        """Rotation drops cached keys so the new key is used afterwards."""
+        assert test_token.get_token_value(test_db) == "test_token_value"
+
+        new_key_id, _ = KeyRotationService(test_db).rotate_key()
+
+        assert get_key_cache().stats()["tokens"] == 0
+        assert get_active_encryption_key(test_db)[0] == new_key_id
+        test_db.refresh(test_token)
+        assert test_token.get_token_value(test_db) == "test_token_value"
+
+    def test_token_value_falls_back_to_loaded_keys(self, test_db, test_token):
+        """The session-less property can decrypt with a cached data key."""
+        get_active_encryption_key(test_db)  # loads test-key-1
+
+        assert test_token.token_value == "test_token_value"
+
+
+class TestBatchedRotation:
+    """Test chunked, resumable rotation."""
+
+    @pytest.fixture
+    def many_tokens(self, test_db, test_token):
+        """Five tokens under test-key-1 (including test_token)."""
+        cipher = Fernet(
+            Fernet(get_settings().ENCRYPTION_KEY.encode()).decrypt(
+                test_db.get(EncryptionKey, 1).encrypted_key.encode()
+            )
+        )
+        for i in range(4):
+            test_db.add(
+                Token(
+                    user_id=1,
+                    provider="openai",
+                    encrypted_token=cipher.encrypt(f"token-{i}".encode()).decode(),
+                    key_id="test-key-1",
+                    label=f"Token {i}",
+                )
+            )
+        test_db.commit()
+
+    def test_rotate_in_batches_reports_progress(self, test_db, many_tokens):
+        """Each batch commits a checkpoint and reports progress."""
+        progress = []
+        service = KeyRotationService(test_db, batch_size=2, max_workers=2)
+
+        new_key_id, count = service.rotate_key(progress_callback=progress.append)
+
+        assert count == 5
+        assert [p["last_token_id"] for p in progress] == [2, 4, 5, 5]
+        assert progress[-1]["status"] == "completed"
+        assert progress[-1]["percent_complete"] == 100.0
+        tokens = test_db.exec(select(Token).order_by(Token.id)).all()
+        assert {t.key_id for t in tokens} == {new_key_id}
+        assert [t.get_token_value(test_db) for t in tokens] == [
+            "test_token_value", "token-0", "token-1", "token-2", "token-3"
+        ]
+
+    def test_interrupted_rotation_resumes(self, test_db, many_tokens):
+        """A failed rotation resumes from its checkpoint with the same key."""
+        def fail_after_first_batch(progress):
+            raise RuntimeError("worker killed")
+
+        service = KeyRotationService(test_db, batch_size=2)
+        with pytest.raises(RuntimeError):
+            service.rotate_key(progress_callback=fail_after_first_batch)
+
+        interrupted = service.get_progress()
+        assert interrupted["status"] == "failed"
+        assert interrupted["last_token_id"] == 2
+        assert interrupted["re_encrypted_tokens"] == 2
+
+        new_key_id, count = service.rotate_key()
+
+        assert new_key_id == interrupted["new_key_id"]
+        assert count == 5
+        assert service.get_progress()["status"] == "completed"
+        assert len(test_db.exec(select(EncryptionKey)).all()) == 2
+
+    def test_undecryptable_tokens_are_skipped(self, test_db, test_token):
+        """Tokens under an unknown key are counted as skipped."""
+        test_db.add(
+            Token(
+                user_id=1,
+                provider="openai",
+                encrypted_token=Fernet(Fernet.generate_key()).encrypt(b"x").decode(),
+                key_id="missing-key",
+                label="Orphan",
+            )
+        )
+        test_db.commit()
+
+        service = KeyRotationService(test_db)
+        _, count = service.rotate_key()
+
+        assert count == 1
+        assert service.get_progress()["skipped_tokens"] == 1
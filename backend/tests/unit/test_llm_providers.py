@@ -1,15 +1,18 @@
 """Tests for LLM provider implementations."""
 
+import asyncio
 from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
 
 from services.llm_providers.anthropic import AnthropicProvider
+from services.llm_providers.client_pool import ProviderClientPool, token_fingerprint
 from services.llm_providers.factory import get_provider
 from services.llm_providers.gemini import GeminiProvider
 from services.llm_providers.groq import GroqProvider
 from services.llm_providers.huggingface import HuggingFaceProvider
 from services.llm_providers.openai import OpenAIProvider
+from services.llm_providers.stub import StubProvider
 
 
 class TestProviderFactory:
@@ -40,6 +43,20 @@ class TestProviderFactory:
         provider = get_provider("huggingface", token="test_token")
         assert isinstance(provider, HuggingFaceProvider)
 
+    def test_get_provider_stub(self):
+        """Test getting the offline stub provider."""
+        provider = get_provider("stub", token="test_token")
+        assert isinstance(provider, StubProvider)
+        assert provider.supports_batch
+
+    def test_get_provider_stub_needs_testing(self):
+        """The stub provider is not offered outside TESTING."""
+        settings = Mock(TESTING=False)
+        with patch("services.llm_providers.factory.get_settings",
+                   return_value=settings), \
+                pytest.raises(ValueError, match="Unsupported provider"):
+            get_provider("stub", token="test_token")
+
     def test_get_provider_invalid(self):
         """Test getting invalid provider raises error."""
         with pytest.raises(ValueError, match="Unsupported provider"):
@@ -75,6 +92,102 @@ class TestOpenAIProvider:
             assert result["input_tokens"] == 10
             assert result["output_tokens"] == 20
 
+    @pytest.mark.asyncio
+    async def test_stream_inference(self):
+        """Test OpenAI streaming yields deltas then usage."""
+        with patch("services.llm_providers.openai.AsyncOpenAI") as mock_openai:
+            mock_client = AsyncMock()
+            mock_openai.return_value = mock_client
+
+            text_chunk = Mock()
+            text_chunk.choices = [Mock()]
+            text_chunk.choices[0].delta.content = "Hi"
+            text_chunk.usage = None
+
+            usage_chunk = Mock()
+            usage_chunk.choices = []
+            usage_chunk.usage = Mock(prompt_tokens=3, completion_tokens=1)
+
+            async def async_stream():
+                yield text_chunk
+                yield usage_chunk
+
+            mock_client.chat.completions.create = AsyncMock(
+                return_value=async_stream())
+
+            provider = OpenAIProvider(token="test_token")
+            chunks = [
+                c async for c in provider.stream_inference(
+                    model="gpt-3.5-turbo", input_text="Test input")
+            ]
+
+            assert chunks[0] == {"delta": "Hi"}
+            assert chunks[-1]["input_tokens"] == 3
+            assert chunks[-1]["output_tokens"] == 1
+            kwargs = mock_client.chat.completions.create.call_args.kwargs
+            assert kwargs["stream"] is True
+
+    @pytest.mark.asyncio
+    async def test_batch_round_trip(self):
+        """Test OpenAI batch upload, status mapping and result files."""
+        import json
+
+        mock_client = AsyncMock()
+        mock_client.files.create = AsyncMock(return_value=Mock(id="file-in"))
+        mock_client.batches.create = AsyncMock(return_value=Mock(id="batch-1"))
+        provider = OpenAIProvider(token="test_token", client=mock_client)
+
+        batch_id = await provider.submit_batch([
+            {"custom_id": "row-0", "model": "gpt-4o", "input_text": "Hi"},
+            {"custom_id": "row-1", "model": "auto", "input_text": "Bye"},
+        ])
+
+        assert batch_id == "batch-1"
+        upload = mock_client.files.create.call_args.kwargs
+        assert upload["purpose"] == "batch"
+        lines = [json.loads(line) for line in upload["file"][1].splitlines()]
+        assert [line["custom_id"] for line in lines] == ["row-0", "row-1"]
+        assert lines[0]["url"] == "/v1/chat/completions"
+        assert lines[1]["body"]["model"] == "gpt-3.5-turbo"
+        assert lines[0]["body"]["messages"][-1] == {"role": "user", "content": "Hi"}
+        mock_client.batches.create.assert_awaited_once_with(
+            input_file_id="file-in",
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+
+        mock_client.batches.retrieve = AsyncMock(return_value=Mock(
+            status="finalizing", output_file_id=None, error_file_id=None
+        ))
+        assert (await provider.get_batch_status("batch-1"))["status"] == "in_progress"
+
+        mock_client.batches.retrieve = AsyncMock(return_value=Mock(
+            status="expired", output_file_id="file-out", error_file_id="file-err"
+        ))
+        assert (await provider.get_batch_status("batch-1"))["status"] == "ended"
+
+        output = json.dumps({"custom_id": "row-0", "error": None, "response": {
+            "status_code": 200,
+            "body": {
+                "choices": [{"message": {"content": "Hello"}}],
+                "usage": {"prompt_tokens": 3, "completion_tokens": 1},
+            },
+        }})
+        error = json.dumps({"custom_id": "row-1", "response": None, "error": {
+            "code": "batch_expired", "message": "This request expired",
+        }})
+        mock_client.files.content = AsyncMock(side_effect=lambda file_id: Mock(
+            text={"file-out": output + "\n", "file-err": error}[file_id]
+        ))
+        results = [r async for r in provider.get_batch_results("batch-1")]
+
+        assert results == [
+            {"custom_id": "row-0", "output": "Hello", "input_tokens": 3,
+             "output_tokens": 1, "error": None},
+            {"custom_id": "row-1", "output": None,
+             "error": "This request expired"},
+        ]
+
     def test_get_pricing(self):
         """Test OpenAI pricing."""
         provider = OpenAIProvider(token="test_token")
@@ -116,6 +229,89 @@ class TestAnthropicProvider:
             assert result["input_tokens"] == 10
             assert result["output_tokens"] == 20
 
+    @pytest.mark.asyncio
+    async def test_stream_inference(self):
+        """Test Anthropic streaming maps events to chunks."""
+        with patch("services.llm_providers.anthropic.AsyncAnthropic") as mock_anthropic:
+            mock_client = AsyncMock()
+            mock_anthropic.return_value = mock_client
+
+            start = Mock(type="message_start")
+            start.message.usage.input_tokens = 7
+            delta = Mock(type="content_block_delta")
+            delta.delta.type = "text_delta"
+            delta.delta.text = "Hello"
+            end = Mock(type="message_delta")
+            end.usage.output_tokens = 2
+
+            async def async_stream():
+                for event in (start, delta, end):
+                    yield event
+
+            mock_client.messages.create = AsyncMock(return_value=async_stream())
+
+            provider = AnthropicProvider(token="test_token")
+            chunks = [
+                c async for c in provider.stream_inference(
+                    model="claude-3-5-sonnet-20241022", input_text="Test input")
+            ]
+
+            assert chunks == [
+                {"delta": "Hello"},
+                {"delta": "", "input_tokens": 7, "output_tokens": 2},
+            ]
+
+    @pytest.mark.asyncio
+    async def test_batch_round_trip(self):
+        """Test Anthropic Message Batches map to batch results."""
+        mock_client = AsyncMock()
+        mock_client.messages.batches.create = AsyncMock(
+            return_value=Mock(id="msgbatch_1")
+        )
+        provider = AnthropicProvider(token="test_token", client=mock_client)
+
+        batch_id = await provider.submit_batch(
+            [{"custom_id": "row-0", "model": "auto", "input_text": "Hi"}]
+        )
+
+        assert batch_id == "msgbatch_1"
+        (request,) = mock_client.messages.batches.create.call_args.kwargs["requests"]
+        assert request == {"custom_id": "row-0", "params": {
+            "model": "claude-3-5-sonnet-20241022",
+            "messages": [{"role": "user", "content": "Hi"}],
+            "max_tokens": 4096,
+        }}
+
+        mock_client.messages.batches.retrieve = AsyncMock(
+            return_value=Mock(processing_status="ended")
+        )
+        assert (await provider.get_batch_status(batch_id))["status"] == "ended"
+
+        succeeded = Mock(custom_id="row-0")
+        succeeded.result.type = "succeeded"
+        succeeded.result.message.content = [Mock(text="Hello")]
+        succeeded.result.message.usage.input_tokens = 3
+        succeeded.result.message.usage.output_tokens = 1
+        errored = Mock(custom_id="row-1")
+        errored.result.type = "errored"
+        errored.result.error.error.message = "Overloaded"
+        expired = Mock(custom_id="row-2")
+        expired.result.type = "expired"
+
+        async def entries():
+            for entry in (succeeded, errored, expired):
+                yield entry
+
+        mock_client.messages.batches.results = AsyncMock(return_value=entries())
+        results = [r async for r in provider.get_batch_results(batch_id)]
+
+        assert results == [
+            {"custom_id": "row-0", "output": "Hello", "input_tokens": 3,
+             "output_tokens": 1, "error": None},
+            {"custom_id": "row-1", "output": None, "error": "Overloaded"},
+            {"custom_id": "row-2", "output": None, "error": "Request expired"},
+        ]
+
     def test_get_pricing(self):
         """Test Anthropic pricing."""
         provider = AnthropicProvider(token="test_token")
@@ -152,6 +348,27 @@ class TestGeminiProvider:
 
             assert result["output"] == "Test response"
 
+    @pytest.mark.asyncio
+    async def test_stream_inference(self):
+        """Test Gemini streaming iterates the sync SDK response."""
+        with patch("services.llm_providers.gemini.genai") as mock_genai:
+            mock_model = Mock()
+            mock_chat = Mock()
+            mock_chat.send_message = Mock(
+                return_value=[Mock(text="Test "), Mock(text="response")])
+            mock_model.start_chat = Mock(return_value=mock_chat)
+            mock_genai.GenerativeModel = Mock(return_value=mock_model)
+
+            provider = GeminiProvider(token="test_token")
+            chunks = [
+                c async for c in provider.stream_inference(
+                    model="gemini-pro", input_text="Test input")
+            ]
+
+            assert [c["delta"] for c in chunks] == ["Test ", "response"]
+            mock_chat.send_message.assert_called_once_with(
+                "Test input", stream=True)
+
     def test_get_pricing(self):
         """Test Gemini pricing."""
         provider = GeminiProvider(token="test_token")
@@ -220,3 +437,127 @@ class TestGroqProvider:
         """Test provider name."""
         provider = GroqProvider(token="test_token")
         assert provider.get_provider_name() == "groq"
+
+
+class _FakeSDKClient:
+    """SDK client stand-in that records whether it was closed."""
+
+    def __init__(self, token, http_client=None):
+        self.token = token
+        self.http_client = http_client
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+class _PooledFakeProvider:
+    """Provider class with a shared transport (like OpenAI/Anthropic/Groq)."""
+
+    @classmethod
+    def create_client(cls, token, http_client=None, **kwargs):
+        return _FakeSDKClient(token, http_client)
+
+    @classmethod
+    def create_http_client(cls, **kwargs):
+        return _FakeSDKClient("transport")
+
+
+class _OwnedTransportFakeProvider(_PooledFakeProvider):
+    """Provider class whose clients own their transport (like HuggingFace)."""
+
+    @classmethod
+    def create_http_client(cls, **kwargs):
+        return None
+
+
+class TestProviderClientPool:
+    """Test the provider SDK client pool."""
+
+    def test_reuses_client_for_same_key(self):
+        """Same provider and token returns the same client."""
+        pool = ProviderClientPool(max_size=4)
+        first = pool.acquire(_PooledFakeProvider, "openai", "tok-a")
+        second = pool.acquire(_PooledFakeProvider, "openai", "tok-a")
+
+        assert first is second
+        assert pool.stats()["hits"] == 1
+        assert pool.stats()["misses"] == 1
+
+    def test_distinct_keys_share_transport(self):
+        """Different tokens get different clients on one shared transport."""
+        pool = ProviderClientPool(max_size=4)
+        a = pool.acquire(_PooledFakeProvider, "openai", "tok-a")
+        b = pool.acquire(_PooledFakeProvider, "openai", "tok-b")
+        c = pool.acquire(_PooledFakeProvider, "openai", "tok-a", hf_provider="x")
+
+        assert len({id(a), id(b), id(c)}) == 3
+        assert a.http_client is b.http_client
+
+    def test_lru_eviction(self):
+        """Least recently used client is evicted when the pool is full."""
+        pool = ProviderClientPool(max_size=2)
+        a = pool.acquire(_PooledFakeProvider, "openai", "tok-a")
+        pool.acquire(_PooledFakeProvider, "openai", "tok-b")
+        pool.acquire(_PooledFakeProvider, "openai", "tok-a")  # refresh a
+        pool.acquire(_PooledFakeProvider, "openai", "tok-c")  # evicts b
+
+        assert pool.stats()["evictions"] == 1
+        assert pool.acquire(_PooledFakeProvider, "openai", "tok-a") is a
+        assert pool.stats()["size"] == 2
+
+    def test_idle_clients_pruned(self):
+        """Clients unused past the idle timeout are dropped and closed."""
+        pool = ProviderClientPool(max_size=4, idle_timeout_s=0.0)
+        a = pool.acquire(_OwnedTransportFakeProvider, "huggingface", "tok-a")
+        b = pool.acquire(_OwnedTransportFakeProvider, "huggingface", "tok-a")
+
+        assert a is not b
+        assert pool._retired == [a]
+
+    @pytest.mark.asyncio
+    async def test_aclose_closes_owned_clients_and_transports(self):
+        """Shutdown closes transports and self-owned clients only."""
+        pool = ProviderClientPool(max_size=1)
+        shared = pool.acquire(_PooledFakeProvider, "openai", "tok-a")
+        owned = pool.acquire(_OwnedTransportFakeProvider, "huggingface", "tok-b")
+        evicted = pool.acquire(_OwnedTransportFakeProvider, "huggingface", "tok-c")
+
+        await pool.aclose()
+
+        assert shared.closed is False
+        assert shared.http_client.closed is True
+        assert owned.closed is True
+        assert evicted.closed is True
+        assert pool.stats()["size"] == 0
+
+    @pytest.mark.asyncio
+    async def test_background_sweep_closes_retired_clients(self):
+        """While running, evicted and idle self-owned clients get closed."""
+        pool = ProviderClientPool(
+            max_size=1, idle_timeout_s=0.5, sweep_interval_s=0.01
+        )
+        pool.start()
+        evicted = pool.acquire(_OwnedTransportFakeProvider, "huggingface", "tok-a")
+        idle = pool.acquire(_OwnedTransportFakeProvider, "huggingface", "tok-b")
+        await asyncio.sleep(0.05)
+        assert evicted.closed is True
+        assert idle.closed is False
+
+        await asyncio.sleep(0.6)
+        assert idle.closed is True
+        assert pool.stats()["size"] == 0
+        await pool.aclose()
+        assert not pool.running
+
+    def test_token_fingerprint_hides_token(self):
+        """Pool keys never contain the raw token."""
+        fingerprint = token_fingerprint("sk-secret")
+        assert "sk-secret" not in fingerprint
+        assert fingerprint == token_fingerprint("sk-secret")
+
+    def test_get_provider_uses_pool(self):
+        """Factory hands out providers backed by the same pooled client."""
+        first = get_provider("openai", token="pooled_token")
+        second = get_provider("openai", token="pooled_token")
+        assert first.client is second.client
@@ -0,0 +1,120 @@
+import pytest
+
+from api.deps import get_current_user_id
+from models.prompt import Prompt
+from services.prompt_service import (
+    TemplateCache,
+    get_template_cache,
+    render_prompt,
+    validate_prompt_template,
+)
+
+
+def _prompt(template="Hello {{ name }}", version=1, prompt_id=1):
+    return Prompt(
+        id=prompt_id,
+        name="greet",
+        template=template,
+        input_variables=["name"],
+        version=version,
+    )
+
+
+def test_template_cache_compiles_once_per_version():
+    cache = TemplateCache()
+    prompt = _prompt()
+
+    first = cache.get(prompt)
+    assert cache.get(prompt) is first
+
+    prompt.template = "Hi {{ name }}"
+    prompt.version = 2
+    assert cache.get(prompt) is not first
+    assert cache.stats() == {"size": 2, "hits": 1, "misses": 2}
+
+    assert cache.invalidate(1) == 2
+    assert cache.stats()["size"] == 0
+
+
+def test_template_cache_evicts_least_recently_used():
+    cache = TemplateCache(max_size=2)
+    a, b, c = (_prompt(prompt_id=i) for i in (1, 2, 3))
+    cache.get(a)
+    cache.get(b)
+    cache.get(a)
+    cache.get(c)
+
+    cache.get(b)
+    assert cache.stats()["misses"] == 4
+
+
+def test_render_prompt_uses_cached_template():
+    get_template_cache().clear()
+    prompt = _prompt(prompt_id=42)
+
+    assert render_prompt(prompt, {"name": "Ada"}) == "Hello Ada"
+    assert render_prompt(prompt, {"name": "Bob"}) == "Hello Bob"
+    assert get_template_cache().stats()["size"] == 1
+
+
+def test_render_prompt_is_sandboxed():
+    prompt = Prompt(
+        id=7,
+        name="evil",
+        template="{{ name.__class__.__mro__[1].__subclasses__() }}",
+        input_variables=["name"],
+    )
+
+    with pytest.raises(ValueError, match="Failed to render prompt"):
+        render_prompt(prompt, {"name": "x"})
+
+
+def test_render_prompt_missing_variable():
+    with pytest.raises(ValueError, match="Missing variables for prompt: name"):
+        render_prompt(_prompt(prompt_id=8), {})
+
+
+def test_validate_prompt_template():
+    validate_prompt_template("Hello {{ name }}", ["name"])
+    validate_prompt_template("{% for x in items %}{{ x }}{% endfor %}", ["items"])
+
+    with pytest.raises(ValueError, match="not listed in input_variables: topic"):
+        validate_prompt_template("{{ name }} on {{ topic }}", ["name"])
+    with pytest.raises(ValueError, match="Invalid prompt template"):
+        validate_prompt_template("Hello {{ name ", ["name"])
+
+
+def test_update_prompt_invalidates_cached_template(client, mock_session):
+    from main import app
+
+    prompt = _prompt(prompt_id=5)
+    get_template_cache().get(prompt)
+    mock_session.get.return_value = prompt
+    app.dependency_overrides[get_current_user_id] = lambda: 1
+    try:
+        response = client.patch(
+            "/api/prompts/5", json={"template": "Bye {{ name }}"}
+        )
+    finally:
+        app.dependency_overrides.pop(get_current_user_id, None)
+
+    assert response.status_code == 200
+    assert get_template_cache().invalidate(5) == 0
+    assert render_prompt(prompt, {"name": "Ada"}) == "Bye Ada"
+
+
+def test_update_prompt_rejects_undeclared_variables(client, mock_session):
+    from main import app
+
+    mock_session.get.return_value = _prompt(prompt_id=6)
+    app.dependency_overrides[get_current_user_id] = lambda: 1
+    try:
+        response = client.patch(
+            "/api/prompts/6", json={"template": "{{ name }} {{ extra }}"}
+        )
+    finally:
+        app.dependency_overrides.pop(get_current_user_id, None)
+
+    assert response.status_code == 400
+    assert "extra" in response.json()["detail"]
+    mock_session.commit.assert_not_called()
@@ -0,0 +1,243 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from services.inference_service import run_inference
+from services.response_cache import (
+    MemoryCacheBackend,
+    RedisCacheBackend,
+    ResponseCache,
+    make_cache_key,
+)
+
+
+class FakeRedis:
+    """Minimal stand-in for redis.asyncio.Redis (get/set/scan/delete)."""
+
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+
+    async def get(self, name):
+        return self.data.get(name)
+
+    async def set(self, name, value, ex=None):
+        self.data[name] = value.encode()
+        self.ttls[name] = ex
+
+    async def scan_iter(self, match=None):
+        prefix = match.rstrip("*")
+        for key in list(self.data):
+            if key.startswith(prefix):
+                yield key
+
+    async def delete(self, name):
+        self.data.pop(name, None)
+
+
+def _provider(output="cached answer"):
+    provider = MagicMock()
+    provider.run_inference = AsyncMock(
+        return_value={"output": output, "input_tokens": 1000, "output_tokens": 500}
+    )
+    return provider
+
+
+SCOPE = {"user_id": 1, "token_value": "sk-1"}
+
+
+def test_cache_key_normalizes_whitespace_and_case():
+    key = make_cache_key(
+        "openai", "gpt-4", "Hello   world\n", [{"role": "user", "content": "hi "}],
+        **SCOPE,
+    )
+
+    assert key == make_cache_key(
+        "OpenAI", "GPT-4", " Hello world", [{"role": "user", "content": "hi"}],
+        **SCOPE,
+    )
+    assert key != make_cache_key("openai", "gpt-4", "Hello world", **SCOPE)
+    assert key != make_cache_key(
+        "openai", "gpt-4", "hello world", [{"role": "user", "content": "hi"}],
+        **SCOPE,
+    )
+    assert make_cache_key(
+        "huggingface", "gpt2", "x", task="summarization", **SCOPE
+    ) != make_cache_key("huggingface", "gpt2", "x", task="text-generation", **SCOPE)
+
+
+def test_cache_key_is_scoped_to_user_and_token():
+    key = make_cache_key("openai", "gpt-4", "Hello", **SCOPE)
+
+    assert key != make_cache_key(
+        "openai", "gpt-4", "Hello", user_id=2, token_value="sk-1"
+    )
+    assert key != make_cache_key(
+        "openai", "gpt-4", "Hello", user_id=1, token_value="sk-2"
+    )
+    assert "sk-1" not in key
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryCacheBackend(max_entries=2)
+    await backend.set("a", "1", ttl_s=60)
+    await backend.set("b", "2", ttl_s=60)
+    await backend.get("a")
+    await backend.set("c", "3", ttl_s=60)
+
+    assert await backend.get("b") is None
+    assert await backend.get("a") == "1"
+    assert await backend.get("c") == "3"
+    assert backend.size() == 2
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_expires_entries():
+    backend = MemoryCacheBackend()
+    with patch("services.response_cache.time.monotonic", return_value=100.0):
+        await backend.set("a", "1", ttl_s=10)
+    with patch("services.response_cache.time.monotonic", return_value=109.0):
+        assert await backend.get("a") == "1"
+    with patch("services.response_cache.time.monotonic", return_value=110.0):
+        assert await backend.get("a") is None
+    assert backend.size() == 0
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_round_trip_with_ttl():
+    client = FakeRedis()
+    cache = ResponseCache(RedisCacheBackend(client=client), default_ttl_s=120)
+
+    assert await cache.set("k", {"output": "hi", "input_tokens": 3})
+    assert await cache.get("k", "openai") == {"output": "hi", "input_tokens": 3}
+    assert list(client.ttls.values()) == [120]
+
+    await cache.clear()
+    assert await cache.get("k", "openai") is None
+    assert cache.stats()["hit_ratio"] == 0.5
+
+
+@pytest.mark.asyncio
+async def test_cache_skips_unserializable_and_zero_ttl():
+    cache = ResponseCache(MemoryCacheBackend())
+
+    assert not await cache.set("k", {"output": object()})
+    assert not await cache.set("k", {"output": "hi"}, ttl_s=0)
+    assert cache.backend.size() == 0
+
+
+@pytest.mark.asyncio
+async def test_backend_failure_is_a_miss():
+    backend = MemoryCacheBackend()
+    backend.get = AsyncMock(side_effect=ConnectionError("redis down"))
+    cache = ResponseCache(backend)
+
+    assert await cache.get("k", "openai") is None
+    assert cache.misses == 1
+
+
+@pytest.mark.asyncio
+async def test_run_inference_serves_repeat_from_cache():
+    cache = ResponseCache(MemoryCacheBackend())
+    session = MagicMock()
+    provider = _provider()
+
+    with patch(
+        "services.inference_service.get_response_cache", return_value=cache
+    ), patch("services.inference_service.get_provider", return_value=provider):
+        for text in ("What is 2+2?", "What is  2+2? "):
+            result = await run_inference(
+                session=session,
+                user_id=1,
+                provider="openai",
+                model="gpt-3.5-turbo",
+                input_text=text,
+                token_value="dummy",
+                use_cache=True,
+            )
+            assert result == "cached answer"
+        # Another user's identical request isn't served this user's answer
+        await run_inference(
+            session=session,
+            user_id=2,
+            provider="openai",
+            model="gpt-3.5-turbo",
+            input_text="What is 2+2?",
+            token_value="other",
+            use_cache=True,
+        )
+        # Nor is a request that didn't opt in
+        await run_inference(
+            session=session,
+            user_id=1,
+            provider="openai",
+            model="gpt-3.5-turbo",
+            input_text="What is 2+2?",
+            token_value="dummy",
+        )
+
+    assert provider.run_inference.await_count == 3
+    first, second, *_ = [c.args[0] for c in session.add.call_args_list]
+    assert first.cache_hit is False and first.cost > 0
+    assert second.cache_hit is True
+    assert second.cost == 0.0
+    assert second.input_tokens is None
+    assert cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_run_inference_bypasses_cache_when_disabled():
+    cache = ResponseCache(MemoryCacheBackend())
+    provider = _provider()
+
+    with patch(
+        "services.inference_service.get_response_cache", return_value=cache
+    ), patch("services.inference_service.get_provider", return_value=provider):
+        for _ in range(2):
+            await run_inference(
+                session=MagicMock(),
+                user_id=1,
+                provider="openai",
+                model="gpt-3.5-turbo",
+                input_text="same",
+                token_value="dummy",
+                use_cache=False,
+            )
+
+    assert provider.run_inference.await_count == 2
+    assert cache.stats()["hits"] + cache.stats()["misses"] == 0
+
+
+@pytest.mark.asyncio
+async def test_run_inference_uses_prompt_cache_ttl():
+    cache = ResponseCache(MemoryCacheBackend())
+    cache.set = AsyncMock(return_value=True)
+    session = MagicMock()
+    session.get.return_value = MagicMock(
+        template="Hi {name}",
+        input_variables=["name"],
+        model=None,
+        cache_ttl_seconds=30,
+    )
+
+    with patch(
+        "services.inference_service.get_response_cache", return_value=cache
+    ), patch(
+        "services.inference_service.get_provider", return_value=_provider()
+    ), patch(
+        "services.inference_service.render_prompt", return_value="Hi Ada"
+    ):
+        await run_inference(
+            session=session,
+            user_id=1,
+            provider="openai",
+            model="gpt-3.5-turbo",
+            input_text="",
+            token_value="dummy",
+            prompt_id=1,
+            prompt_variables={"name": "Ada"},
+            use_cache=True,
+        )
+
+    assert cache.set.await_args.args[2] == 30
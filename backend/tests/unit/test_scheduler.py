@@ -17,7 +17,8 @@ class TestScheduler:
         """Test setting up scheduled jobs."""
         with patch.object(scheduler, "add_job") as mock_add_job:
             setup_scheduled_jobs()
-            mock_add_job.assert_called_once()
+            job_ids = [call.kwargs["id"] for call in mock_add_job.call_args_list]
+            assert job_ids == ["rotate_encryption_key", "refresh_telemetry_rollups"]
 
     def test_start_scheduler(self):
         """Test starting scheduler."""
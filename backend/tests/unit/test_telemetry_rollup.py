@@ -0,0 +1,234 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models.telemetry import Telemetry
+from models.telemetry_rollup import (
+    TelemetryDailyRollup,
+    TelemetryHourlyRollup,
+    TelemetryRollupState,
+)
+from services.telemetry_rollup_service import (
+    TelemetryRollupService,
+    aggregate_costs,
+    date_trunc,
+)
+
+NOW = datetime(2026, 3, 10, 14, 30)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "rollup.db"
+    engine = create_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(engine)
+    engine.dispose()
+    return path
+
+
+def _telemetry(timestamp, cost, sdk="openai", model="gpt-4", user_id=1, **kw):
+    return Telemetry(
+        user_id=user_id,
+        model=model,
+        sdk=sdk,
+        input_summary="hi",
+        execution_time_ms=kw.pop("latency", 100.0),
+        status=kw.pop("status", "success"),
+        input_tokens=10,
+        output_tokens=5,
+        cost=cost,
+        timestamp=timestamp,
+    )
+
+
+def _seed(db_path, rows):
+    engine = create_engine(f"sqlite:///{db_path}")
+    with Session(engine) as session:
+        session.add_all(rows)
+        session.commit()
+    return engine
+
+
+def test_refresh_rolls_up_closed_hours(db_path):
+    engine = _seed(
+        db_path,
+        [
+            _telemetry(datetime(2026, 3, 9, 10, 5), 0.01),
+            _telemetry(datetime(2026, 3, 9, 10, 50), 0.02, status="error"),
+            _telemetry(datetime(2026, 3, 9, 11, 15), 0.04, model="gpt-3.5"),
+            _telemetry(datetime(2026, 3, 10, 13, 10), 0.08),
+            # Current hour, not sealed yet
+            _telemetry(datetime(2026, 3, 10, 14, 10), 0.16),
+        ],
+    )
+
+    with Session(engine) as session:
+        hours = TelemetryRollupService(session).refresh(now=NOW)
+
+        assert hours == 28  # 2026-03-09 10:00 -> 2026-03-10 14:00
+        state = session.get(TelemetryRollupState, 1)
+        assert state.rolled_until == datetime(2026, 3, 10, 14)
+
+        hourly = session.exec(
+            select(TelemetryHourlyRollup).order_by(
+                TelemetryHourlyRollup.bucket_start, TelemetryHourlyRollup.model
+            )
+        ).all()
+        assert [(h.bucket_start, h.model) for h in hourly] == [
+            (datetime(2026, 3, 9, 10), "gpt-4"),
+            (datetime(2026, 3, 9, 11), "gpt-3.5"),
+            (datetime(2026, 3, 10, 13), "gpt-4"),
+        ]
+        first = hourly[0]
+        assert first.request_count == 2
+        assert first.error_count == 1
+        assert first.input_tokens == 20
+        assert first.cost == pytest.approx(0.03)
+        assert first.latency_ms_sum == pytest.approx(200.0)
+
+        daily = session.exec(
+            select(TelemetryDailyRollup).order_by(
+                TelemetryDailyRollup.bucket_start, TelemetryDailyRollup.model
+            )
+        ).all()
+        assert [(d.bucket_start, d.model, d.request_count) for d in daily] == [
+            (datetime(2026, 3, 9), "gpt-3.5", 1),
+            (datetime(2026, 3, 9), "gpt-4", 2),
+            (datetime(2026, 3, 10), "gpt-4", 1),
+        ]
+
+        # Nothing new to seal until the next hour closes
+        assert TelemetryRollupService(session).refresh(now=NOW) == 0
+
+
+def test_refresh_extends_partial_day(db_path):
+    engine = _seed(db_path, [_telemetry(datetime(2026, 3, 10, 9, 0), 0.01)])
+
+    with Session(engine) as session:
+        service = TelemetryRollupService(session)
+        service.refresh(now=datetime(2026, 3, 10, 10, 30))
+
+        session.add(_telemetry(datetime(2026, 3, 10, 10, 20), 0.02))
+        session.commit()
+        assert service.refresh(now=NOW) == 4
+
+        daily = session.exec(select(TelemetryDailyRollup)).all()
+        assert len(daily) == 1
+        assert daily[0].request_count == 2
+        assert daily[0].cost == pytest.approx(0.03)
+
+
+def test_refresh_takes_in_late_telemetry_for_recent_hours(db_path):
+    engine = _seed(db_path, [_telemetry(datetime(2026, 3, 10, 13, 0), 0.01)])
+
+    with Session(engine) as session:
+        service = TelemetryRollupService(session)
+        service.refresh(now=NOW)
+
+        # Written after 13:00 was sealed, and one too old to recheck
+        session.add(_telemetry(datetime(2026, 3, 10, 13, 50), 0.02))
+        session.add(_telemetry(datetime(2026, 3, 10, 11, 50), 0.04))
+        session.commit()
+        assert service.refresh(now=NOW) == 0
+
+        hourly = session.exec(select(TelemetryHourlyRollup)).all()
+        assert [(h.bucket_start, h.request_count) for h in hourly] == [
+            (datetime(2026, 3, 10, 13), 2)
+        ]
+        daily = session.exec(select(TelemetryDailyRollup)).all()
+        assert daily[0].cost == pytest.approx(0.03)
+
+
+def test_refresh_without_telemetry_sets_watermark(db_path):
+    engine = create_engine(f"sqlite:///{db_path}")
+
+    with Session(engine) as session:
+        assert TelemetryRollupService(session).refresh(now=NOW) == 0
+        assert session.get(TelemetryRollupState, 1).rolled_until == datetime(
+            2026, 3, 10, 14
+        )
+
+
+@pytest.mark.asyncio
+async def test_aggregate_costs_matches_raw_totals(db_path):
+    rows = [
+        _telemetry(datetime(2026, 3, 1, 8, 15), 0.5),  # before window
+        _telemetry(datetime(2026, 3, 5, 9, 40), 0.01),  # partial first hour
+        _telemetry(datetime(2026, 3, 5, 10, 5), 0.02),  # hourly edge
+        _telemetry(datetime(2026, 3, 7, 12, 0), 0.04, sdk="anthropic"),  # daily
+        _telemetry(datetime(2026, 3, 10, 2, 0), 0.08),  # hourly edge
+        _telemetry(datetime(2026, 3, 10, 14, 10), 0.16),  # current hour (raw)
+        _telemetry(datetime(2026, 3, 7, 12, 0), 1.0, user_id=2),  # other user
+    ]
+    engine = _seed(db_path, rows)
+    with Session(engine) as session:
+        TelemetryRollupService(session).refresh(now=NOW)
+
+    start = datetime(2026, 3, 5, 9, 30)
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    async with AsyncSession(async_engine) as session:
+        buckets = await aggregate_costs(session, 1, start, NOW)
+        anthropic = await aggregate_costs(
+            session, 1, start, NOW, provider="anthropic"
+        )
+    await async_engine.dispose()
+
+    assert sum(b.cost for b in buckets) == pytest.approx(0.31)
+    assert sum(b.request_count for b in buckets) == 5
+    # One row per day after GROUP BY, regardless of how many sources fed it
+    by_day = {b.bucket_start.date().isoformat(): b.cost for b in buckets}
+    assert len(by_day) == len(buckets)
+    assert by_day == pytest.approx(
+        {"2026-03-05": 0.03, "2026-03-07": 0.04, "2026-03-10": 0.24}
+    )
+    assert [(b.provider, b.cost) for b in anthropic] == [("anthropic", 0.04)]
+
+
+@pytest.mark.asyncio
+async def test_aggregate_costs_reads_raw_before_first_rollup(db_path):
+    _seed(db_path, [_telemetry(datetime(2026, 3, 9, 10, 5), 0.01)])
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    async with AsyncSession(async_engine) as session:
+        buckets = await aggregate_costs(
+            session, 1, NOW - timedelta(days=30), NOW
+        )
+    await async_engine.dispose()
+
+    assert [(b.bucket_start, b.cost) for b in buckets] == [
+        (datetime(2026, 3, 9), 0.01)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_aggregate_costs_groups_by_week_and_month(db_path):
+    _seed(
+        db_path,
+        [
+            _telemetry(datetime(2026, 2, 27, 9, 0), 0.01),  # Friday
+            _telemetry(datetime(2026, 3, 1, 9, 0), 0.02),  # Sunday, same week
+            _telemetry(datetime(2026, 3, 2, 9, 0), 0.04),  # Monday
+        ],
+    )
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    async with AsyncSession(async_engine) as session:
+        start = datetime(2026, 2, 1)
+        weeks = await aggregate_costs(session, 1, start, NOW, unit="week")
+        months = await aggregate_costs(session, 1, start, NOW, unit="month")
+    await async_engine.dispose()
+
+    assert {b.bucket_start: b.cost for b in weeks} == pytest.approx(
+        {datetime(2026, 2, 23): 0.03, datetime(2026, 3, 2): 0.04}
+    )
+    assert {b.bucket_start: b.cost for b in months} == pytest.approx(
+        {datetime(2026, 2, 1): 0.01, datetime(2026, 3, 1): 0.06}
+    )
+
+
+def test_date_trunc_rejects_unknown_unit():
+    with pytest.raises(ValueError):
+        date_trunc("fortnight", Telemetry.timestamp, "sqlite")
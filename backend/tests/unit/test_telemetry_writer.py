@@ -0,0 +1,152 @@
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from models.telemetry import Telemetry
+from services.inference_service import run_inference
+from services.telemetry_writer import TelemetryWriter
+
+
+def _telemetry(user_id=1):
+    return Telemetry(
+        user_id=user_id,
+        model="gpt-3.5-turbo",
+        sdk="openai",
+        input_summary="hi",
+        execution_time_ms=10.0,
+        status="success",
+    )
+
+
+def _writer(**kwargs):
+    session = MagicMock()
+    session.__enter__.return_value = session
+    kwargs.setdefault("flush_interval_s", 60)
+    writer = TelemetryWriter(session_factory=lambda: session, **kwargs)
+    return writer, session
+
+
+def _inserted_rows(session):
+    return [row for call in session.execute.call_args_list for row in call.args[1]]
+
+
+@pytest.mark.asyncio
+async def test_write_returns_false_when_not_started():
+    writer, session = _writer()
+
+    assert await writer.write(_telemetry()) is False
+    assert writer.stats()["buffered"] == 0
+    session.execute.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_flushes_when_batch_size_reached():
+    writer, session = _writer(batch_size=3)
+    writer.start()
+
+    for user_id in range(3):
+        assert await writer.write(_telemetry(user_id)) is True
+    for _ in range(50):
+        if writer.flushed == 3:
+            break
+        await asyncio.sleep(0.01)
+
+    assert writer.flushed == 3
+    # One bulk insert for the whole batch
+    assert session.execute.call_count == 1
+    assert [row["user_id"] for row in _inserted_rows(session)] == [0, 1, 2]
+    assert "id" not in _inserted_rows(session)[0]
+    await writer.stop()
+
+
+@pytest.mark.asyncio
+async def test_flushes_on_interval():
+    writer, session = _writer(batch_size=100, flush_interval_s=0.02)
+    writer.start()
+
+    await writer.write(_telemetry())
+    await asyncio.sleep(0.1)
+
+    assert writer.flushed == 1
+    await writer.stop()
+
+
+@pytest.mark.asyncio
+async def test_stop_flushes_remaining_rows():
+    writer, session = _writer(batch_size=100)
+    writer.start()
+
+    for _ in range(5):
+        await writer.write(_telemetry())
+    await writer.stop()
+
+    assert not writer.running
+    assert writer.stats() == {"pending": 0, "buffered": 5, "flushed": 5, "dropped": 0}
+    assert len(_inserted_rows(session)) == 5
+
+
+@pytest.mark.asyncio
+async def test_drops_rows_when_buffer_stays_full():
+    writer, session = _writer(batch_size=10, max_buffer=2, enqueue_timeout_s=0.01)
+    writer.start()
+    # Keep the flush loop from draining so backpressure times out
+    await writer._flush_lock.acquire()
+
+    for _ in range(3):
+        await writer.write(_telemetry())
+
+    assert writer.stats()["pending"] == 2
+    assert writer.dropped == 1
+
+    writer._flush_lock.release()
+    await writer.stop()
+    assert writer.flushed == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_counts_dropped_rows():
+    writer, session = _writer()
+    session.execute.side_effect = Exception("db down")
+    writer.start()
+
+    await writer.write(_telemetry())
+    await writer.stop()
+
+    assert writer.stats() == {"pending": 0, "buffered": 1, "flushed": 0, "dropped": 1}
+
+
+@pytest.mark.asyncio
+async def test_run_inference_uses_running_writer():
+    writer, writer_session = _writer()
+    writer.start()
+    request_session = MagicMock()
+    provider = MagicMock()
+
+    async def fake_run_inference(**kwargs):
+        return {"output": "ok", "input_tokens": 1, "output_tokens": 1}
+
+    provider.run_inference = fake_run_inference
+
+    with (
+        patch("services.inference_service.get_provider", return_value=provider),
+        patch(
+            "services.inference_service.get_telemetry_writer", return_value=writer
+        ),
+    ):
+        await run_inference(
+            session=request_session,
+            user_id=1,
+            provider="openai",
+            model="gpt-3.5-turbo",
+            input_text="Test",
+            token_value="dummy",
+        )
+
+    # No per-request round-trip: the row waits in the buffer
+    request_session.add.assert_not_called()
+    request_session.commit.assert_not_called()
+    assert writer.stats()["pending"] == 1
+
+    await writer.stop()
+    assert _inserted_rows(writer_session)[0]["sdk"] == "openai"
@@ -23,7 +23,6 @@ interface LoadBalancerAnalytics {
     total_requests: number;
     avg_latency: number;
     distribution: Distribution[];
-    algorithm_performance: { [key: string]: number };
 }
 
 export default function LoadBalancing() {
@@ -69,16 +68,14 @@ export default function LoadBalancing() {
             setAnalytics(res.data || {
                 total_requests: 0,
                 avg_latency: 0,
-                distribution: [],
-                algorithm_performance: {}
+                distribution: []
             });
         } catch (err: any) {
             console.error('Failed to fetch analytics:', err);
             setAnalytics({
                 total_requests: 0,
                 avg_latency: 0,
-                distribution: [],
-                algorithm_performance: {}
+                distribution: []
             });
         }
     };